@@ -11,8 +11,9 @@ from server import set_shared_files, run_server, transfer_monitor
 import server as srv
 from webrtc_manager import WebRTCSender, SignalingClient
 from tunnel_manager import TunnelManager
-from config import (CF_TUNNEL_TOKEN, SIGNALING_SERVER_URL, 
+from config import (CF_TUNNEL_TOKEN, SIGNALING_SERVER_URL, LAN_DISCOVERY,
                     load_config, save_config)
+from lan_discovery import LanShare, share_capabilities
 from downloader import Downloader
 
 class QuickShareAPI:
@@ -20,6 +21,7 @@ class QuickShareAPI:
         self.window = window_ref
         self.selected_files = []
         self.webrtc_sender = None
+        self.lan_share = None  # P2P share announced on the local network
         self.tunnel_manager = None
         self.server_thread = None
         self.is_sharing = False
@@ -225,6 +227,8 @@ class QuickShareAPI:
                     file_list.append({"name": rel, "path": f, "size": os.path.getsize(f)})
                     
         self.webrtc_sender.set_files(file_list)
+        if LAN_DISCOVERY:
+            self._start_lan_share(room_id, file_list)
         signaling = SignalingClient(self.webrtc_sender._loop)
         
         # Helper to run async signalling connection
@@ -234,6 +238,8 @@ class QuickShareAPI:
                 self.webrtc_sender.setup_signaling(signaling)
             except Exception as e:
                 print(f"Sinyal sunucusu hatası: {e}")
+                if self.lan_share:
+                    return  # Offline network: LAN receivers can still connect
                 self.stop_share()
                 if self.window: self.window.evaluate_js(f"alert('Sinyal sunucusu hatası: {e}')")
                 
@@ -255,6 +261,29 @@ class QuickShareAPI:
             "code": room_id
         }
 
+    def _start_lan_share(self, room_id, file_list):
+        """Announce the P2P share on the LAN and join its local signaling server"""
+        lan_share = LanShare(room_id, share_capabilities(file_list))
+        try:
+            url = lan_share.start()
+        except OSError as e:
+            print(f"Yerel ağ duyurusu başlatılamadı: {e}")
+            return
+        signaling = SignalingClient(self.webrtc_sender._loop, url)
+        sender = self.webrtc_sender
+
+        async def setup_async():
+            await signaling.connect(room_id)
+            sender.setup_signaling(signaling)
+
+        try:
+            asyncio.run_coroutine_threadsafe(setup_async(), sender._loop).result(timeout=10)
+        except Exception as e:
+            print(f"Yerel ağ sinyal sunucusuna katılınamadı: {e}")
+            lan_share.stop()
+            return
+        self.lan_share = lan_share
+
     def start_cloud_share(self):
          """Starts HTTP Cloudflare Tunnel logic"""
          if not self.selected_files: return {"success": False, "error": "Lütfen önce dosya seçin."}
@@ -306,6 +335,10 @@ class QuickShareAPI:
             self.tunnel_manager.stop()
             self.tunnel_manager = None
             
+        if self.lan_share:
+            self.lan_share.stop()
+            self.lan_share = None
+            
         if self.webrtc_sender:
             self.webrtc_sender.stop()
             self.webrtc_sender = None
@@ -0,0 +1,482 @@
+"""
+QuickShare Benchmark
+Loopback aktarım ölçümü: P2P (yerel sinyal sunucusu) ve HTTP, 1:N odalar
+
+Gönderici ve alıcılar aynı makinede çalışır; P2P bağlantılar dış sinyal
+sunucusu yerine süreç içinde başlatılan signal_server.SignalServer üzerinden,
+uygulamadaki SignalingClient ile kurulur. Her senaryo ayrı bir süreçte çalışır,
+böylece tepe RSS yalnızca o senaryoya aittir; hash önbelleği ve transfer
+geçmişi geçici dizine yönlendirilir. Dosya içerikleri sabit tohumla
+üretilir ve çıktı commit bilgisini içerir: farklı commit'lerin sonuçları
+karşılaştırılabilir.
+
+Kullanım:
+    python benchmark.py                                  # tüm profiller, P2P + HTTP
+    python benchmark.py --profile small mixed --scale 0.1 --receivers 1 4
+    python benchmark.py --mode p2p --size-mb 64 --channels 1 2 4   # özel profil
+    python benchmark.py --size-mb 8 --files 16 --dedup-ratio 0.5   # tekrar eden içerik
+    python benchmark.py --mode p2p --no-direct --channels 1 4      # LAN TCP yolu kapalı, DataChannel
+    python benchmark.py --output sonuc.json
+"""
+
+import os
+import sys
+import time
+import json
+import uuid
+import random
+import shutil
+import hashlib
+import asyncio
+import argparse
+import platform
+import tempfile
+import threading
+import contextlib
+import statistics
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+# Add directory to sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+
+from webrtc_manager import WebRTCSender, WebRTCReceiver, SignalingClient
+from signal_server import SignalServer
+from utils import calculate_file_hash
+from config import (WEBRTC_TIMEOUT, WEBRTC_CHUNK_SIZE, WEBRTC_DATA_CHANNELS, WEBRTC_UNORDERED,
+                    WEBRTC_DIRECT_TRANSFER, WEBRTC_DIRECT_TLS, COMPRESSION, DEDUP_TRANSFER,
+                    SEGMENTED_DOWNLOAD, DOWNLOAD_CONCURRENCY)
+
+KB = 1024
+MB = 1024 * KB
+GB = 1024 * MB
+
+# Dosya boyutu dağılımları: [(dosya sayısı, dosya boyutu)]
+PROFILES = {
+    "large": [(1, 10 * GB)],                                # 1 × 10 GB
+    "small": [(10000, 4 * KB)],                             # 10k × 4 KB
+    "mixed": [(1, 1 * GB), (50, 16 * MB), (2000, 16 * KB)],  # büyük + orta + çok sayıda küçük
+}
+
+
+def profile_sizes(entries: List[tuple], scale: float = 1.0) -> List[int]:
+    """
+    Profilin dosya boyutları
+
+    Tek dosyalık girdilerde dosya boyutu, çok dosyalıklarda dosya sayısı
+    ölçeklenir (küçük dosya senaryosu küçük dosya olarak kalır).
+
+    Args:
+        entries: [(dosya sayısı, dosya boyutu)]
+        scale: Ölçek (ör. 0.01 hızlı deneme için)
+
+    Returns:
+        Dosya boyutları listesi
+    """
+    sizes = []
+    for count, size in entries:
+        if count == 1:
+            sizes.append(max(1, int(size * scale)))
+        else:
+            sizes.extend([size] * max(1, int(count * scale)))
+    return sizes
+
+
+def create_files(directory: str, sizes: List[int], seed: int = 0) -> List[Dict]:
+    """Sabit tohumlu rastgele içerikli test dosyaları oluştur (commit'ler arası aynı veri)"""
+    rng = random.Random(seed)
+    files = []
+    for i, size in enumerate(sizes):
+        name = f"bench_{i}.bin"
+        path = os.path.join(directory, name)
+        digest = hashlib.sha256()
+        with open(path, "wb") as f:
+            remaining = size
+            while remaining > 0:
+                block = rng.randbytes(min(remaining, MB))
+                f.write(block)
+                digest.update(block)
+                remaining -= len(block)
+        files.append({"name": name, "path": path, "size": size, "sha256": digest.hexdigest()})
+    return files
+
+
+def create_dedup_corpus(directory: str, size: int, count: int, ratio: float, seed: int = 1) -> List[Dict]:
+    """
+    Bilinen tekrar oranına sahip test dosyaları oluştur
+
+    İlk (1 - ratio) kadarı rastgele, geri kalanı önceki dosyalardan rastgele
+    offset'lerle alınmış iki yarımdan oluşur (tam kopya değil, kaymış içerik).
+    """
+    rng = random.Random(seed)
+    unique = max(1, round(count * (1 - ratio)))
+    files = create_files(directory, [size] * unique, seed=seed)
+    half = size // 2
+    for i in range(unique, count):
+        parts = []
+        for _ in range(2):
+            with open(rng.choice(files[:unique])["path"], "rb") as f:
+                f.seek(rng.randrange(0, size - half + 1))
+                parts.append(f.read(half))
+        name = f"bench_{i}.bin"
+        path = os.path.join(directory, name)
+        data = b"".join(parts) + rng.randbytes(size - 2 * half)
+        with open(path, "wb") as f:
+            f.write(data)
+        files.append({"name": name, "path": path, "size": size, "sha256": hashlib.sha256(data).hexdigest()})
+    return files
+
+
+def _isolate_state(directory: str, direct: Optional[bool] = None):
+    """
+    Hash önbelleğini ve transfer geçmişini geçici dizine yönlendir (soğuk önbellek, temiz geçmiş)
+
+    Args:
+        directory: Geçici durum dizini
+        direct: Verilirse P2P'nin doğrudan TCP yolunu aç/kapat (WEBRTC_DIRECT_TRANSFER)
+    """
+    import cdc
+    import merkle
+    import server
+    import downloader
+    import chunk_cache
+    from hash_cache import HashCache
+    from transfer_history import TransferHistory
+
+    cache = HashCache(filepath=os.path.join(directory, "hash_cache.db"))
+    for module in (cdc, merkle, server, downloader, chunk_cache):
+        module.hash_cache = cache
+    history = TransferHistory(filepath=os.path.join(directory, "history.json"))
+    server.history = history
+    downloader.history = history
+    if direct is not None:
+        import webrtc_manager
+        webrtc_manager.WEBRTC_DIRECT_TRANSFER = direct
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Sürecin tepe RSS'i (MB); resource modülü olmayan platformlarda None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (MB if sys.platform == "darwin" else KB), 1)  # macOS byte, Linux KB
+
+
+def _delivered(files: List[Dict], save_dirs: List[str]) -> bool:
+    """Her alıcıda tüm dosyalar doğru boyutta ve kaynakla aynı SHA-256'ya sahip mi? (süre ölçümü dışında)"""
+    for save_dir in save_dirs:
+        for f in files:
+            target = os.path.join(save_dir, f["name"])
+            if not os.path.exists(target) or os.path.getsize(target) != f["size"]:
+                return False
+            expected = f.get("sha256") or calculate_file_hash(f["path"], MB)
+            if calculate_file_hash(target, MB) != expected:
+                return False
+    return True
+
+
+def _result(files: List[Dict], receivers: int, elapsed: float, cpu: float, ok: bool) -> Dict:
+    total = sum(f["size"] for f in files)
+    return {
+        "ok": bool(ok),
+        "receivers": receivers,
+        "files": len(files),
+        "bytes": total,  # Alıcı başına
+        "seconds": round(elapsed, 3),
+        "mb_per_s": round(total * receivers / elapsed / MB, 2),  # Tüm alıcılara teslim edilen
+        "files_per_s": round(len(files) * receivers / elapsed, 2),
+        "cpu_seconds": round(cpu, 3),  # Gönderici + alıcılar (aynı süreç)
+        "cpu_percent": round(cpu / elapsed * 100, 1),  # Tek çekirdek = 100
+    }
+
+
+def run_p2p(files: List[Dict], channels: int = 1, receivers: int = 1, timeout: float = 3600) -> Dict:
+    """
+    Loopback P2P transferi: bir gönderici, aynı odada receivers alıcı
+
+    Args:
+        files: Gönderilecek dosyalar ({name, path, size})
+        channels: Alıcı başına veri kanalı sayısı
+        receivers: Odadaki alıcı sayısı
+        timeout: Transfer zaman aşımı (saniye)
+
+    Returns:
+        Ölçüm sonuçları (bytes, seconds, mb_per_s, files_per_s, cpu_percent, ok)
+    """
+    room = uuid.uuid4().hex
+    signaling_server = SignalServer()
+    url = signaling_server.start()
+    sender = WebRTCSender()
+    sender.log_callback = lambda msg: None
+    sender.set_files(files)
+    sender.start()
+    sender.wait_until_ready()
+    signals = [SignalingClient(sender._loop, server_url=url)]
+    peers: List[WebRTCReceiver] = []
+    save_dirs: List[str] = []
+
+    async def join_sender():
+        await signals[0].connect(room)
+        sender.setup_signaling(signals[0])
+
+    try:
+        asyncio.run_coroutine_threadsafe(join_sender(), sender._loop).result(timeout=WEBRTC_TIMEOUT)
+        for _ in range(receivers):
+            receiver = WebRTCReceiver()
+            receiver.save_path = tempfile.mkdtemp(prefix="quickshare_bench_recv_")
+            receiver.data_channels = channels
+            receiver.log_callback = lambda msg: None
+            receiver.start()
+            receiver.wait_until_ready()
+            signaling = SignalingClient(receiver._loop, server_url=url)
+
+            async def join_receiver(receiver=receiver, signaling=signaling):
+                await signaling.connect(room)
+                receiver.setup_signaling(signaling)
+                await receiver.connect_via_signaling()
+
+            peers.append(receiver)
+            signals.append(signaling)
+            save_dirs.append(receiver.save_path)
+            asyncio.run_coroutine_threadsafe(join_receiver(), receiver._loop).result(timeout=WEBRTC_TIMEOUT)
+
+        for receiver in peers:
+            if not receiver.wait_for_connection(timeout=15) or not receiver._file_list_event.wait(20):
+                return {"ok": False, "receivers": receivers, "error": "connection failed"}
+
+        names = [f["name"] for f in files]
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        for receiver in peers:
+            receiver.request_download(names)
+        deadline = time.monotonic() + timeout
+        done = all(r.wait_for_transfer(timeout=max(0.0, deadline - time.monotonic())) for r in peers)
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu_start
+
+        ok = done and all(r.status == "done" for r in peers) and _delivered(files, save_dirs)
+        result = _result(files, receivers, elapsed, cpu, ok)
+        result["channels"] = channels
+        result["deduplicated_bytes"] = sum(plan["saved"] for plan in peers[0]._dedup.values())
+        return result
+    finally:
+        for peer, signaling in zip([sender] + peers, signals):
+            if peer._loop and peer._loop.is_running():
+                asyncio.run_coroutine_threadsafe(signaling.close(), peer._loop).result(timeout=5)
+            peer.stop()
+        signaling_server.stop()
+        for save_dir in save_dirs:
+            shutil.rmtree(save_dir, ignore_errors=True)
+
+
+def run_http(files: List[Dict], directory: str, receivers: int = 1) -> Dict:
+    """
+    Loopback HTTP transferi: server.py uygulaması, receivers eşzamanlı Downloader
+
+    Args:
+        files: Paylaşılan dosyalar (directory altında)
+        directory: Paylaşılan dizin
+        receivers: Eşzamanlı indiren istemci sayısı
+
+    Returns:
+        Ölçüm sonuçları (bytes, seconds, mb_per_s, files_per_s, cpu_percent, ok)
+    """
+    import logging
+    import server
+    from downloader import Downloader
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)  # İstek başına log satırı basmasın
+    server.set_shared_files([directory])
+    server.wait_chunk_lists()  # Paylaşımda arka planda hesaplanır, ölçülen indirmeye dahil değil
+    httpd = make_server("127.0.0.1", 0, server.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{httpd.server_port}/"
+    save_dirs = [tempfile.mkdtemp(prefix="quickshare_bench_recv_") for _ in range(receivers)]
+
+    def fetch(save_dir):
+        Downloader().download_files(remote, url, save_dir)
+
+    try:
+        remote = Downloader().get_file_list(url)
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        ok = True
+        with ThreadPoolExecutor(max_workers=receivers) as pool:
+            for future in [pool.submit(fetch, d) for d in save_dirs]:
+                try:
+                    future.result()
+                except Exception:
+                    ok = False
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu_start
+        return _result(files, receivers, elapsed, cpu, ok and _delivered(files, save_dirs))
+    finally:
+        httpd.shutdown()
+        for save_dir in save_dirs:
+            shutil.rmtree(save_dir, ignore_errors=True)
+
+
+def run_scenario(spec: Dict) -> Dict:
+    """
+    Tek ölçüm (ayrı süreçte çağrılır)
+
+    Args:
+        spec: {"mode", "files", "directory", "receivers", "channels", "direct", "timeout"}
+
+    Returns:
+        run_p2p / run_http sonucu + peak_rss_mb
+    """
+    state_dir = tempfile.mkdtemp(prefix="quickshare_bench_state_")
+    try:
+        _isolate_state(state_dir, spec.get("direct"))
+        # Downloader dosya başına print eder; JSON çıktısına karışmasın
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            if spec["mode"] == "p2p":
+                result = run_p2p(spec["files"], spec["channels"], spec["receivers"], spec["timeout"])
+            else:
+                result = run_http(spec["files"], spec["directory"], spec["receivers"])
+        result["peak_rss_mb"] = _peak_rss_mb()
+        return result
+    finally:
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+
+def _run_isolated(spec: Dict) -> Dict:
+    """Senaryoyu yeni bir süreçte çalıştır (tepe RSS ve global durum senaryoya ait olsun)"""
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            return pool.submit(run_scenario, spec).result()
+    except Exception as e:
+        return {"ok": False, "receivers": spec["receivers"], "error": str(e)}
+
+
+def environment() -> Dict:
+    """Karşılaştırma için ortam bilgisi: commit, platform ve ilgili ayarlar"""
+    def git(*args):
+        try:
+            out = subprocess.run(["git", *args], cwd=current_dir, capture_output=True, text=True, timeout=30)
+            return out.stdout.strip() if out.returncode == 0 else None
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            "webrtc_chunk_size": WEBRTC_CHUNK_SIZE,
+            "webrtc_data_channels": WEBRTC_DATA_CHANNELS,
+            "webrtc_unordered": WEBRTC_UNORDERED,
+            "webrtc_direct_transfer": WEBRTC_DIRECT_TRANSFER,
+            "webrtc_direct_tls": WEBRTC_DIRECT_TLS,
+            "compression": COMPRESSION,
+            "dedup_transfer": DEDUP_TRANSFER,
+            "segmented_download": SEGMENTED_DOWNLOAD,
+            "download_concurrency": DOWNLOAD_CONCURRENCY,
+        },
+    }
+
+
+def summarize(results: List[Dict]) -> List[Dict]:
+    """Aynı senaryonun tekrarlarını birleştir (medyan, en iyi, tepe RSS)"""
+    groups: Dict[tuple, List[Dict]] = {}
+    for r in results:
+        key = (r["mode"], r["profile"], r["receivers"], r.get("channels"), r.get("direct"))
+        groups.setdefault(key, []).append(r)
+
+    summary = []
+    for (mode, profile, receivers, channels, direct), runs in groups.items():
+        good = [r for r in runs if r.get("ok")]
+        entry = {"mode": mode, "profile": profile, "receivers": receivers, "channels": channels,
+                 "direct": direct, "runs": len(runs), "ok": len(good) == len(runs)}
+        if good:
+            entry.update({
+                "median_mb_per_s": round(statistics.median(r["mb_per_s"] for r in good), 2),
+                "best_mb_per_s": max(r["mb_per_s"] for r in good),
+                "median_files_per_s": round(statistics.median(r["files_per_s"] for r in good), 2),
+                "median_cpu_percent": round(statistics.median(r["cpu_percent"] for r in good), 1),
+                "peak_rss_mb": max((r["peak_rss_mb"] for r in good if r.get("peak_rss_mb")), default=None),
+            })
+        summary.append(entry)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="QuickShare loopback benchmark")
+    parser.add_argument("--mode", nargs="+", choices=["p2p", "http"], default=["p2p", "http"],
+                        help="Ölçülecek aktarım yolları")
+    parser.add_argument("--profile", nargs="+", choices=sorted(PROFILES), default=list(PROFILES),
+                        help="Dosya boyutu dağılımları")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Profil ölçeği (büyük dosyada boyut, küçük dosyalarda sayı)")
+    parser.add_argument("--size-mb", type=float, default=None,
+                        help="Özel profil: dosya başına boyut (MB; --profile yerine)")
+    parser.add_argument("--files", type=int, default=1, help="Özel profil: dosya sayısı")
+    parser.add_argument("--dedup-ratio", type=float, default=None,
+                        help="Özel profil: dosyaların bu oranı önceki dosyaların kaymış kopyaları olur (ör. 0.5)")
+    parser.add_argument("--receivers", type=int, nargs="+", default=[1],
+                        help="Odadaki alıcı sayıları (ör. 1 4)")
+    parser.add_argument("--channels", type=int, nargs="+", default=[1],
+                        help="P2P: denenecek veri kanalı sayıları (ör. 1 2 4)")
+    parser.add_argument("--direct", action=argparse.BooleanOptionalAction, default=WEBRTC_DIRECT_TRANSFER,
+                        help="P2P: aynı ağdaki eşler veriyi doğrudan TCP ile göndersin (--no-direct: DataChannel)")
+    parser.add_argument("--runs", type=int, default=3, help="Tekrar sayısı")
+    parser.add_argument("--timeout", type=float, default=3600, help="Transfer zaman aşımı (saniye)")
+    parser.add_argument("--output", help="Sonuçları ayrıca bu JSON dosyasına yaz")
+    args = parser.parse_args(argv)
+
+    if args.size_mb is not None:
+        profiles = {"custom": [(args.files, int(args.size_mb * MB))]}
+    else:
+        profiles = {name: PROFILES[name] for name in args.profile}
+
+    results = []
+    for profile, entries in profiles.items():
+        src_dir = tempfile.mkdtemp(prefix="quickshare_bench_src_")
+        try:
+            if profile == "custom" and args.dedup_ratio is not None:
+                files = create_dedup_corpus(src_dir, entries[0][1], entries[0][0], args.dedup_ratio)
+            else:
+                files = create_files(src_dir, profile_sizes(entries, 1.0 if profile == "custom" else args.scale))
+            for mode in args.mode:
+                for receivers in args.receivers:
+                    for channels in (args.channels if mode == "p2p" else [None]):
+                        for _ in range(args.runs):
+                            direct = args.direct if mode == "p2p" else None
+                            spec = {"mode": mode, "files": files, "directory": src_dir, "receivers": receivers,
+                                    "channels": channels, "direct": direct, "timeout": args.timeout}
+                            result = {"mode": mode, "profile": profile, "direct": direct, **_run_isolated(spec)}
+                            results.append(result)
+                            print(json.dumps(result), file=sys.stderr)  # İlerleme
+        finally:
+            shutil.rmtree(src_dir, ignore_errors=True)
+
+    report = {
+        "benchmark": "loopback",
+        "environment": environment(),
+        "scale": args.scale,
+        "dedup_ratio": args.dedup_ratio,
+        "results": results,
+        "summary": summarize(results),
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 0 if all(r.get("ok") for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""
+QuickShare CDC
+İçeriğe göre bölünmüş (content-defined) parçalar: tekrar eden verinin bir kez aktarılması
+
+Gönderici her dosyayı içeriğe bağlı sınırlarla parçalara ayırır ve parça
+parmak izlerini dosya listesinde yayınlar. Sınırlar içeriğe bağlı olduğundan
+araya veri eklense de sonraki parçalar aynı kalır. Alıcı aynı parçayı yalnızca
+bir kez ister; tekrarları aktarımdaki ilk kopyasından, kaydetme dizininde zaten
+bulunanları da yerel dosyalardan kopyalar.
+"""
+
+import os
+import base64
+import struct
+import hashlib
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+from hash_cache import hash_cache, file_identity
+from config import DEDUP_SCAN_LIMIT, DELTA_SUFFIX, PARTIAL_STATE_SUFFIX
+
+
+MIN_CHUNK = 128 * 1024           # Parça boyutu alt sınırı (dosya sonu hariç)
+MAX_CHUNK = 1024 * 1024          # Parça boyutu üst sınırı
+READ_SIZE = 8 * 1024 * 1024      # Parçalama okuma bloğu
+
+CHUNK_ENTRY = struct.Struct('!I16s')  # uzunluk, blake2b (parça sırasıyla)
+
+# Parça sınırı: 256 byte değerinin 16'sı "işaret" sayılır ve art arda dört
+# işaret byte'ı bir sınırdır (rastgele veride ortalama 64 KB'de bir). Kayan
+# hash (gear/rabin) saf Python'da byte başına döngü ister; translate + find
+# ise C hızında çalışır ve sınır yine yalnızca yerel içeriğe bağlıdır.
+_MARKS = bytes(1 if (b * 167 + 13) % 16 == 0 else 0 for b in range(256))
+_BOUNDARY = b"\x01" * 4
+
+_inflight: Dict[str, threading.Lock] = {}
+_inflight_lock = threading.Lock()
+
+
+def iter_chunks(f) -> Iterator[memoryview]:
+    """
+    Açık dosyayı içeriğe göre parçalara ayır
+
+    Args:
+        f: İkili modda açık dosya
+
+    Yields:
+        Parça verisi (memoryview; bir sonraki parçaya geçmeden kullanılmalı)
+    """
+    buf = b""
+    marks = b""
+    pos = 0
+    eof = False
+    while True:
+        if len(buf) - pos < MAX_CHUNK and not eof:
+            more = f.read(READ_SIZE)
+            eof = not more
+            buf = buf[pos:] + more
+            marks = marks[pos:] + more.translate(_MARKS)
+            pos = 0
+            continue
+        if pos >= len(buf):
+            return
+        i = marks.find(_BOUNDARY, pos + MIN_CHUNK - len(_BOUNDARY), pos + MAX_CHUNK)
+        end = i + len(_BOUNDARY) if i >= 0 else min(pos + MAX_CHUNK, len(buf))
+        yield memoryview(buf)[pos:end]
+        pos = end
+
+
+def chunk_file(path: str) -> bytes:
+    """
+    Dosyanın parça listesini hesapla
+
+    Args:
+        path: Dosya yolu
+
+    Returns:
+        Paketlenmiş CHUNK_ENTRY dizisi
+    """
+    parts = []
+    with open(path, "rb") as f:
+        for chunk in iter_chunks(f):
+            parts.append(CHUNK_ENTRY.pack(len(chunk), hashlib.blake2b(chunk, digest_size=16).digest()))
+    return b"".join(parts)
+
+
+def file_chunks(path: str) -> bytes:
+    """
+    Parça listesi (önbellekten, yoksa hesaplanıp kaydedilir)
+
+    Args:
+        path: Dosya yolu
+
+    Returns:
+        Paketlenmiş CHUNK_ENTRY dizisi
+    """
+    entries = hash_cache.get_chunks(path)
+    if entries is None:
+        key = os.path.abspath(path)
+        with _inflight_lock:
+            lock = _inflight.setdefault(key, threading.Lock())
+        with lock:
+            # Bekleyen başka bir istek hesaplamış olabilir
+            entries = hash_cache.get_chunks(path)
+            if entries is None:
+                identity = file_identity(path)
+                entries = chunk_file(path)
+                hash_cache.put_chunks(path, entries, identity)
+        with _inflight_lock:
+            if _inflight.get(key) is lock and not lock.locked():
+                del _inflight[key]
+    return entries
+
+
+def encode_chunks(entries: bytes) -> str:
+    """Parça listesinin JSON'a konacak hali (base64)"""
+    return base64.b64encode(entries).decode("ascii")
+
+
+def parse_chunks(text, size: int) -> List[Tuple[int, int, bytes]]:
+    """
+    Karşı taraftan gelen parça listesini çöz
+
+    Args:
+        text: encode_chunks çıktısı
+        size: Dosya boyutu (parçaların toplamı buna eşit olmalı)
+
+    Returns:
+        [(offset, length, digest)]
+
+    Raises:
+        ValueError: Liste bozuksa veya dosya boyutunu tutmuyorsa
+    """
+    if not isinstance(text, str):
+        raise ValueError("Invalid chunk list")
+    entries = base64.b64decode(text, validate=True)
+    if len(entries) % CHUNK_ENTRY.size:
+        raise ValueError("Truncated chunk list")
+    chunks = []
+    offset = 0
+    for length, digest in CHUNK_ENTRY.iter_unpack(entries):
+        if length <= 0:
+            raise ValueError("Empty chunk")
+        chunks.append((offset, length, digest))
+        offset += length
+    if offset != size:
+        raise ValueError("Chunk list does not match the file size")
+    return chunks
+
+
+class ChunkIndex:
+    """
+    Yerelde bulunan parçalar: parmak izi -> (dosya, offset, uzunluk)
+
+    Kaydetme dizinindeki dosyalardan doldurulur; aynı parça birden fazla
+    dosyada varsa ilk bulunan kullanılır.
+    """
+
+    def __init__(self):
+        self._chunks: Dict[bytes, Tuple[str, int, int]] = {}
+
+    def add_file(self, path: str):
+        """Dosyanın parçalarını indekse ekle"""
+        offset = 0
+        for length, digest in CHUNK_ENTRY.iter_unpack(file_chunks(path)):
+            self._chunks.setdefault(digest, (path, offset, length))
+            offset += length
+
+    def scan(self, directory: str, exclude=(), limit: int = DEDUP_SCAN_LIMIT):
+        """
+        Dizindeki dosyaları indeksle
+
+        Önbellekte parça listesi olan dosyalar bedavadır; diğerleri için en
+        fazla limit byte okunur. Tarama indirme başlamadan yapıldığından
+        varsayılan limit 0'dır: yalnızca önbellekteki dosyalar indekslenir.
+
+        Args:
+            directory: Taranacak dizin (alt dizinler dahil)
+            exclude: Atlanacak yollar (ör. indirilecek dosyaların hedefleri)
+            limit: Önbellekte olmayan dosyalar için okunacak en fazla veri
+        """
+        skip = {os.path.abspath(p) for p in exclude}
+        budget = limit
+        for root, _dirs, names in os.walk(directory):
+            for name in names:
+                if name.endswith((DELTA_SUFFIX, PARTIAL_STATE_SUFFIX)):
+                    continue
+                path = os.path.join(root, name)
+                if os.path.abspath(path) in skip:
+                    continue
+                try:
+                    size = os.path.getsize(path)
+                    if size == 0 or not os.path.isfile(path):
+                        continue
+                    if hash_cache.get_chunks(path) is None:
+                        if size > budget:
+                            continue
+                        budget -= size
+                    self.add_file(path)
+                except OSError:
+                    continue
+
+    def get(self, digest: bytes) -> Optional[Tuple[str, int, int]]:
+        return self._chunks.get(digest)
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+
+def plan_transfer(files: List[Dict], index: Optional[ChunkIndex] = None) -> Dict[str, Dict]:
+    """
+    Hangi parçaların ağdan alınacağını, hangilerinin kopyalanacağını belirle
+
+    Dosyalar aktarım sırasıyla verilmelidir: bir parçanın ilk geçtiği yer
+    ağdan alınır, sonraki tekrarları oradan kopyalanır.
+
+    Args:
+        files: [{"name", "size", "chunks"}] (chunks: encode_chunks çıktısı)
+        index: Yerel parçalar (kaydetme dizini)
+
+    Returns:
+        En az bir parçası kopyalanabilen dosyalar için
+        {name: {"fetch": [(start, end)], "local": [(offset, length, path, src_offset)],
+                "dup": [(offset, length, src_name, src_offset)], "saved": bytes}}
+    """
+    seen: Dict[bytes, Tuple[str, int]] = {}
+    plans: Dict[str, Dict] = {}
+    for f in files:
+        try:
+            chunks = parse_chunks(f.get("chunks"), f["size"])
+        except (KeyError, ValueError):
+            continue
+        fetch: List[Tuple[int, int]] = []
+        local, dup = [], []
+        for offset, length, digest in chunks:
+            found = index.get(digest) if index is not None else None
+            if found and found[2] == length:
+                local.append((offset, length, found[0], found[1]))
+            elif digest in seen:
+                dup.append((offset, length) + seen[digest])
+            else:
+                seen[digest] = (f["name"], offset)
+                if fetch and fetch[-1][1] == offset:
+                    fetch[-1] = (fetch[-1][0], offset + length)
+                else:
+                    fetch.append((offset, offset + length))
+        if local or dup:
+            saved = sum(c[1] for c in local) + sum(c[1] for c in dup)
+            plans[f["name"]] = {"fetch": fetch, "local": local, "dup": dup, "saved": saved}
+    return plans
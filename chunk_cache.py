@@ -0,0 +1,193 @@
+"""
+QuickShare Shared Chunk Cache
+1:N gönderimde aynı dosyayı okuyan peer'lar için ortak, sınırlı boyutlu blok önbelleği
+"""
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from hash_cache import hash_cache, file_identity
+from utils import pread
+
+
+BLOCK_SIZE = 256 * 1024           # Önbellek blok boyutu
+MAX_CACHE_BYTES = 64 * 1024 * 1024  # Tüm dosyalar için toplam sınır
+HASH_READ_SIZE = 1024 * 1024       # Hash'in diskten tamamlanması için okuma bloğu
+
+
+class CachedFile:
+    """
+    Paylaşılan bir dosyanın açık tanımlayıcısı, referans sayısı ve hash durumu
+
+    Hash, bloklar diskten sırayla yüklendikçe bir kez hesaplanır; tüm
+    peer'lar aynı sonucu kullanır.
+    """
+
+    def __init__(self, path: str):
+        st = os.stat(path)
+        self.path = path
+        self.size = st.st_size
+        self.identity = file_identity(path, st)
+        self.fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        self.refs = 0
+        self.digest: Optional[str] = hash_cache.get(path)
+        self._hash = None if self.digest else hashlib.sha256()
+        self._hash_pos = 0
+        self._hash_lock = threading.Lock()
+
+    def close(self):
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class SharedChunkCache:
+    """
+    Refcount'lu, LRU eviction'lı blok önbelleği
+
+    Yakın offset'lerdeki peer'lar aynı bloğu diskten tek sefer okur. Bir
+    dosyayı kullanan son peer bıraktığında o dosyanın blokları atılır.
+    Thread-safe'tir.
+    """
+
+    def __init__(self, block_size: int = BLOCK_SIZE, max_bytes: int = MAX_CACHE_BYTES):
+        self.block_size = block_size
+        self.max_bytes = max_bytes
+        self._files: Dict[str, CachedFile] = {}
+        self._blocks: "OrderedDict[Tuple[CachedFile, int], bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def open(self, path: str) -> CachedFile:
+        """
+        Dosyayı aç (veya açık olanın referansını artır)
+
+        Args:
+            path: Dosya yolu
+
+        Returns:
+            CachedFile; işi biten peer release() çağırmalı
+        """
+        key = os.path.abspath(path)
+        with self._lock:
+            entry = self._files.get(key)
+            if entry is not None and entry.identity != file_identity(key):
+                # Dosya paylaşım sırasında değişti: yeni peer'lar eski blokları kullanmasın
+                self._drop_file(entry)
+                entry = None
+            if entry is None:
+                entry = CachedFile(key)
+                self._files[key] = entry
+            entry.refs += 1
+            return entry
+
+    def release(self, entry: CachedFile):
+        """Referansı bırak; son kullanıcıysa dosyayı kapat ve bloklarını at"""
+        with self._lock:
+            entry.refs -= 1
+            if entry.refs <= 0:
+                self._drop_file(entry)
+
+    def read(self, entry: CachedFile, offset: int, max_length: int) -> bytes:
+        """
+        offset'ten itibaren, offset'i içeren bloğun sonuna kadar veri döndür
+
+        Args:
+            entry: open() ile alınmış dosya
+            offset: Dosya içi offset
+            max_length: En fazla döndürülecek byte
+
+        Returns:
+            Veri (dosya sonunda boş)
+        """
+        if offset >= entry.size or max_length <= 0:
+            return b""
+        index = offset // self.block_size
+        block = self._get_block(entry, index)
+        start = offset - index * self.block_size
+        if start == 0 and len(block) <= max_length:
+            return block
+        return block[start:start + max_length]
+
+    def digest(self, entry: CachedFile) -> str:
+        """
+        Dosyanın SHA256'sı (hesaplanmamış kısım varsa diskten tamamlanır)
+
+        Returns:
+            Hex digest
+        """
+        with entry._hash_lock:
+            if entry.digest:
+                return entry.digest
+            pos = entry._hash_pos
+            while pos < entry.size:
+                data = pread(entry.fd, min(HASH_READ_SIZE, entry.size - pos), pos)
+                if not data:
+                    break
+                entry._hash.update(data)
+                pos += len(data)
+            entry._hash_pos = pos
+            entry.digest = entry._hash.hexdigest()
+            hash_cache.put(entry.path, entry.digest, entry.identity)
+            return entry.digest
+
+    def _get_block(self, entry: CachedFile, index: int) -> bytes:
+        key = (entry, index)
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is not None:
+                self._blocks.move_to_end(key)
+                self.hits += 1
+                return block
+            self.misses += 1
+
+        # Disk okuması kilit dışında; aynı bloğu iki peer nadiren birlikte okuyabilir
+        block = pread(entry.fd, self.block_size, index * self.block_size)
+
+        with self._lock:
+            if key not in self._blocks and self._files.get(entry.path) is entry:
+                self._blocks[key] = block
+                self._bytes += len(block)
+                self._evict()
+        self._advance_hash(entry)
+        return block
+
+    def _advance_hash(self, entry: CachedFile):
+        """Hash sırası önbellekteki bloklara ulaştıkça ilerlet"""
+        if entry._hash is None or not entry._hash_lock.acquire(blocking=False):
+            return
+        try:
+            while entry.digest is None and entry._hash_pos < entry.size:
+                index, rem = divmod(entry._hash_pos, self.block_size)
+                with self._lock:
+                    block = self._blocks.get((entry, index))
+                if block is None or rem:
+                    break
+                entry._hash.update(block)
+                entry._hash_pos += len(block)
+        finally:
+            entry._hash_lock.release()
+
+    def _evict(self):
+        """max_bytes aşılırsa en eski kullanılan blokları at (kilit altında çağrılır)"""
+        while self._bytes > self.max_bytes and self._blocks:
+            _, block = self._blocks.popitem(last=False)
+            self._bytes -= len(block)
+
+    def _drop_file(self, entry: CachedFile):
+        """Dosyanın bloklarını at; referansı kalmadıysa kapat (kilit altında çağrılır)"""
+        if self._files.get(entry.path) is entry:
+            del self._files[entry.path]
+        for key in [k for k in self._blocks if k[0] is entry]:
+            self._bytes -= len(self._blocks.pop(key))
+        if entry.refs <= 0:
+            entry.close()
+
+    @property
+    def cached_bytes(self) -> int:
+        return self._bytes
@@ -0,0 +1,89 @@
+"""
+QuickShare Compression
+Dosya başına uyarlanabilir sıkıştırma (zlib)
+
+Her dosya için ilk bloğun byte entropisine bakılır: log, CSV, kaynak kodu
+gibi düşük entropili dosyalar blok blok sıkıştırılır; zaten sıkıştırılmış
+medya/arşivler (uzantıdan veya yüksek entropiden anlaşılır) ham gönderilir.
+Bloklar birbirinden bağımsız sıkıştırıldığından sırasız kanallar, eksik
+aralık (NACK) istekleri ve paralel sıkıştırma ile uyumludur.
+"""
+
+import os
+import math
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from config import COMPRESSION_LEVEL, COMPRESSION_MAX_ENTROPY, COMPRESSION_WORKERS
+
+
+SAMPLE_SIZE = 64 * 1024     # Entropi için örneklenen baştaki veri
+MIN_FILE_SIZE = 1024        # Bundan küçük dosyalar sıkıştırılmaz
+MAX_RATIO = 0.9             # Sıkıştırılmış blok ham boyutun %90'ından büyükse ham gönderilir
+
+# Zaten sıkıştırılmış biçimler (örneklemeye gerek yok)
+SKIP_EXTENSIONS = frozenset({
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".zst", ".7z", ".rar", ".lz4",
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic", ".avif",
+    ".mp3", ".aac", ".ogg", ".opus", ".flac", ".m4a",
+    ".mp4", ".mkv", ".mov", ".avi", ".webm", ".m4v",
+    ".pdf", ".docx", ".xlsx", ".pptx", ".apk", ".jar", ".whl",
+})
+
+# Sıkıştırma thread havuzu (zlib GIL'i bırakır, bloklar paralel sıkıştırılır)
+compress_pool = ThreadPoolExecutor(max_workers=COMPRESSION_WORKERS, thread_name_prefix="compress")
+
+
+def sample_entropy(data) -> float:
+    """
+    Byte dağılımının Shannon entropisi
+
+    Args:
+        data: Örnek veri
+
+    Returns:
+        bit/byte (0 - 8)
+    """
+    total = len(data)
+    if not total:
+        return 0.0
+    return -sum(count / total * math.log2(count / total) for count in Counter(data).values())
+
+
+def should_compress(name: str, size: int, sample) -> bool:
+    """
+    Dosya sıkıştırılmaya değer mi?
+
+    Args:
+        name: Dosya adı (uzantı kontrolü)
+        size: Dosya boyutu
+        sample: Dosyanın başından en az SAMPLE_SIZE (veya tamamı) kadar veri
+
+    Returns:
+        Sıkıştırılmalıysa True
+    """
+    if size < MIN_FILE_SIZE or os.path.splitext(name)[1].lower() in SKIP_EXTENSIONS:
+        return False
+    return sample_entropy(sample[:SAMPLE_SIZE]) <= COMPRESSION_MAX_ENTROPY
+
+
+def deflate(data, gzip: bool = False) -> bytes:
+    """
+    Bloğu tek başına sıkıştır
+
+    Args:
+        data: Ham blok
+        gzip: True ise gzip üyesi (HTTP Content-Encoding), değilse zlib akışı
+
+    Returns:
+        Sıkıştırılmış veri
+    """
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, 31 if gzip else 15)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_block(data) -> Optional[bytes]:
+    """Bloğu sıkıştır; kazanç MAX_RATIO'dan azsa None (ham gönderilmeli)"""
+    packed = deflate(data)
+    return packed if len(packed) <= len(data) * MAX_RATIO else None
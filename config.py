@@ -13,6 +13,37 @@ CHUNK_SIZE = 64 * 1024           # 64 KB (smoother progress bars)
 BUFFER_SIZE = 256 * 1024           # 256 KB (file read buffer)
 MAX_FILE_SIZE = 50 * 1024 * 1024 * 1024  # 50 GB limit (opsiyonel)
 
+# HTTP Streaming Ayarları
+USE_SENDFILE = True                # Werkzeug soketi üzerinden zero-copy sendfile
+SENDFILE_CHUNK_SIZE = 8 * 1024 * 1024  # 8 MB (sendfile dilimi / monitör güncelleme aralığı)
+STREAM_READ_SIZE = 1024 * 1024     # 1 MB (sendfile yoksa okuma bloğu)
+
+# Segmentli HTTP İndirme Ayarları
+SEGMENTED_DOWNLOAD = True          # Büyük dosyaları paralel Range istekleriyle indir
+SEGMENT_MIN_FILE_SIZE = 32 * 1024 * 1024   # 32 MB altı dosyalar tek stream
+SEGMENT_SIZE = 8 * 1024 * 1024     # 8 MB (her Range isteğinin boyutu)
+SEGMENT_CONNECTIONS = 4            # Başlangıç paralel bağlantı sayısı
+SEGMENT_MAX_CONNECTIONS = 16       # Throughput arttıkça çıkılabilecek üst sınır
+SEGMENT_ADAPT_INTERVAL = 2.0       # saniye (throughput ölçüm / state kayıt aralığı)
+PARTIAL_STATE_SUFFIX = ".qsparts"  # Segment resume state dosyası uzantısı
+DOWNLOAD_CONCURRENCY = 4           # Aynı anda indirilen dosya sayısı
+DOWNLOAD_ORDER = "smallest_first"  # smallest_first | largest_first | original
+
+# Delta Transfer Ayarları (rsync benzeri)
+DELTA_TRANSFER = True              # Alıcıdaki eski sürüme göre yalnızca değişen kısımları aktar
+DELTA_MIN_FILE_SIZE = 8 * 1024 * 1024  # 8 MB altı dosyalarda delta kullanılmaz
+DELTA_SUFFIX = ".qsdelta"          # Delta ile yeniden kurulan dosyanın geçici uzantısı
+
+# Tekrar Eden Veri Ayarları (içeriğe göre bölünmüş parçalar)
+DEDUP_TRANSFER = True              # Aynı parçayı bir kez al, tekrarları ve yerelde olanları kopyala
+DEDUP_SCAN_LIMIT = 0               # Kaydetme dizininde önbellekte olmayan dosyalardan okunacak en fazla veri (0: yalnızca önbellektekiler)
+
+# Sıkıştırma Ayarları (dosya başına, içeriğe göre)
+COMPRESSION = True                 # Sıkıştırılabilir dosyaları zlib ile gönder (P2P ve HTTP gzip)
+COMPRESSION_LEVEL = 1              # zlib seviyesi (1 = en hızlı; yavaş bağlantılarda 6 daha iyi olabilir)
+COMPRESSION_MAX_ENTROPY = 7.0      # bit/byte; örnek blok bunun üstündeyse dosya sıkıştırılmaz
+COMPRESSION_WORKERS = 4            # Sıkıştırma thread sayısı
+
 # Network Ayarları
 TIMEOUT = 120                      # saniye (connection timeout - artırıldı)
 MAX_RETRIES = 5                    # connection retry sayısı (artırıldı)
@@ -23,6 +54,23 @@ CLOUDFLARED_STARTUP_TIMEOUT = 30   # Tunnel URL alınana kadar max bekleme (sani
 
 # WebRTC P2P Ayarları
 WEBRTC_CHUNK_SIZE = 64 * 1024  # 64KB per DataChannel message (larger = better throughput)
+WEBRTC_MULTIPLEX_FILES = 2     # Aynı anda round-robin gönderilen büyük dosya sayısı
+WEBRTC_SMALL_FILE_SIZE = 64 * 1024  # Bu boyutun altındaki dosyalar tek mesajda toplanır (batch)
+WEBRTC_BUFFER_HIGH = 4 * 1024 * 1024  # bufferedAmount bu seviyeyi aşınca gönderim durur
+WEBRTC_BUFFER_LOW = 1 * 1024 * 1024   # bufferedamountlow olayı bu seviyede gönderimi sürdürür
+WEBRTC_SHARED_CACHE_SIZE = 64 * 1024 * 1024  # 1:N gönderimde peer'ların ortak okuma önbelleği
+WEBRTC_IO_WORKERS = 4          # Disk okuma ve hash için thread sayısı (event loop dışında)
+WEBRTC_PREFETCH_CHUNKS = 4     # Dosya başına önceden okunan chunk sayısı
+WEBRTC_WRITE_BUFFER = 32 * 1024 * 1024  # Alıcıda diske yazılmayı bekleyen en fazla veri (aşılınca gönderici bekletilir)
+WEBRTC_DATA_CHANNELS = 1       # Peer başına veri kanalı sayısı (>1: chunk'lar kanallara bölünür; aiortc'de
+                               # kanallar tek SCTP ilişkisini paylaşır, loopback'te ölçülebilir hız kazancı yok)
+WEBRTC_MAX_CHANNELS = 8        # Alıcının isteyebileceği en fazla veri kanalı (DOWNLOAD_REQUEST "channels")
+WEBRTC_UNORDERED = False       # Sırasız, kısmi güvenilir veri kanalları + eksik aralık (NACK) isteği
+WEBRTC_MAX_RETRANSMITS = 2     # Sırasız modda SCTP'nin bir chunk'ı en fazla yeniden deneme sayısı
+WEBRTC_NACK_DELAY = 0.5        # FILE_END sonrası eksik aralıkları istemeden önce bekleme (saniye)
+WEBRTC_NACK_RETRIES = 20       # Bir dosya için en fazla NACK turu
+WEBRTC_REPAIR_RETRIES = 3      # Hash uyuşmazlığında en fazla blok onarım turu
+WEBRTC_META_TIMEOUT = 60       # saniye; yerelde kopyası olan dosyalarda blok hash'leri (file_meta) için en fazla bekleme
 ICE_SERVERS = [
     {"urls": "stun:stun.l.google.com:19302"},
     {"urls": "stun:stun1.l.google.com:19302"},
@@ -47,6 +95,12 @@ ICE_SERVERS = [
     }
 ]
 WEBRTC_TIMEOUT = 15  # P2P bağlantı kurulma süresi (saniye)
+WEBRTC_TRICKLE_ICE = True          # SDP'yi yerel adaylarla hemen gönder, STUN/TURN adaylarını geldikçe ilet
+WEBRTC_ICE_GATHER_TIMEOUT = 5      # saniye (STUN/TURN aday toplama üst sınırı)
+WEBRTC_DIRECT_TRANSFER = True      # Aynı ağda (ICE host-host) dosya verisi doğrudan TCP ile gider, DataChannel yalnızca kontrol için
+WEBRTC_DIRECT_TLS = True           # Doğrudan TCP'yi TLS ile şifrele (sertifika parmak izi DataChannel'dan doğrulanır)
+WEBRTC_DIRECT_PORT = 0             # Doğrudan TCP portu (0 = rastgele; güvenlik duvarı için sabitlenebilir)
+WEBRTC_DIRECT_TIMEOUT = 2          # saniye (doğrudan bağlantı denemesi, aşılırsa DataChannel kullanılır)
 
 # GUI Ayarları
 WINDOW_WIDTH = 650
@@ -73,6 +127,17 @@ DUCKDNS_TOKEN = ""
 USE_DUCKDNS = False
 
 SIGNALING_SERVER_URL = "https://quickshare-signal.onrender.com"
+SIGNALING_TRANSPORT = "auto"       # auto (WebSocket, yoksa HTTP long-poll) | websocket | http
+SIGNALING_POOL_SIZE = 8            # Sinyal oturumundaki en fazla keep-alive bağlantı
+SIGNALING_JOIN_TIMEOUT = 60        # saniye (uyuyan ücretsiz sunucunun uyanmasına izin ver)
+SIGNALING_POLL_TIMEOUT = 35        # saniye (HTTP long-poll isteği)
+SIGNALING_POST_TIMEOUT = 20        # saniye (offer/answer/ICE gönderimi)
+SIGNALING_WS_HEARTBEAT = 20        # saniye (WebSocket ping; ara vekiller bağlantıyı kapatmasın)
+SIGNAL_SERVER_PORT = 8765          # signal_server.py varsayılan portu (kendi sinyal sunucunuz)
+LAN_DISCOVERY = True               # Paylaşımları yerel ağda UDP yayınıyla duyur/bul (internet sinyal sunucusu gerekmez)
+LAN_DISCOVERY_PORT = 8766          # UDP keşif portu (duyuru ve sorgular)
+LAN_BEACON_INTERVAL = 2            # saniye (paylaşım duyurusu aralığı)
+LAN_DISCOVERY_TIMEOUT = 1          # saniye (alıcının yerel ağda paylaşım arama süresi)
 
 # Load config from file if exists
 import json
@@ -0,0 +1,333 @@
+"""
+QuickShare Delta
+rsync benzeri delta aktarımı: alıcının eski kopyasına göre yalnızca değişen veri
+
+Alıcı eski dosyasının sabit boyutlu blokları için zayıf (adler32, kayan)
+ve güçlü (blake2b) checksum'lardan bir imza çıkarır. Gönderici kendi
+dosyasını bu imzaya göre byte byte tarar; eşleşen bloklar için yalnızca
+"şu offset'teki bloğu kopyala" referansı, geri kalanı için ham veri
+(literal) gönderir. Alıcı yeni dosyayı geçici bir dosyada kurar.
+
+Kayan tarama saf Python'dadır (~birkaç MB/s); ilk STEP_BYTES'tan sonra
+verinin çoğu literal çıkıyorsa (aynı adlı ama ilgisiz dosya) tarama bırakılır
+ve kalan kısım ham gönderilir.
+"""
+
+import os
+import math
+import zlib
+import struct
+import hashlib
+from typing import Callable, Dict, List, Optional, Tuple
+from config import DELTA_TRANSFER, DELTA_MIN_FILE_SIZE
+from merkle import missing_ranges
+
+
+MIN_BLOCK_SIZE = 8 * 1024          # İmza blok boyutu alt sınırı
+MAX_BLOCK_SIZE = 1024 * 1024       # İmza blok boyutu üst sınırı
+LITERAL_SIZE = 256 * 1024          # Tek literal parçanın en fazla boyutu
+STEP_BYTES = 8 * 1024 * 1024       # step() çağrısı başına taranan en fazla veri
+READ_SIZE = 4 * 1024 * 1024        # Tarama okuma bloğu
+GIVE_UP_RATIO = 0.5                # İlk STEP_BYTES'tan sonra literal oranı bunu aşarsa kalan ham gönderilir
+REUSE_MIN_RATIO = 0.1              # Yerel verinin en az bu kadarı sağlam değilse delta denenmez
+
+SIGNATURE_ENTRY = struct.Struct('!I16s')  # weak, strong (blok sırasıyla)
+_MOD = 65521  # adler32 modülü
+
+
+def block_size_for(size: int) -> int:
+    """
+    İmza blok boyutu: ~sqrt(size), 2'nin kuvveti, [MIN_BLOCK_SIZE, MAX_BLOCK_SIZE]
+
+    Args:
+        size: Dosya boyutu
+
+    Returns:
+        Blok boyutu (byte)
+    """
+    target = math.isqrt(max(size, 1))
+    block_size = MIN_BLOCK_SIZE
+    while block_size < target and block_size < MAX_BLOCK_SIZE:
+        block_size *= 2
+    return block_size
+
+
+def strong_checksum(data) -> bytes:
+    """Bloğun güçlü checksum'ı (16 byte blake2b)"""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def use_delta(local_path: str, size: int, missing: List[Tuple[int, int]]) -> bool:
+    """
+    Yerel dosya eski bir sürüm mü (yarım kalmış indirme değil)?
+
+    Merkle doğrulamasında yerel verinin en az dörtte biri bozuk çıkıyorsa ya
+    da yerel dosya uzaksa büyükse, bozuk blokları onarmak yerine delta kullanılır.
+    Neredeyse tüm bloklar bozuksa (%90'dan fazlası) yeniden kullanılacak bir
+    şey yoktur: delta yerine dosya normal indirilir.
+
+    Args:
+        local_path: Yerel dosya
+        size: Uzaktaki dosyanın boyutu
+        missing: merkle.missing_ranges sonucu
+
+    Returns:
+        Delta kullanılmalıysa True
+    """
+    if not DELTA_TRANSFER or size < DELTA_MIN_FILE_SIZE or not missing:
+        return False
+    try:
+        local = os.path.getsize(local_path)
+    except OSError:
+        return False
+    if local < DELTA_MIN_FILE_SIZE:
+        return False
+    bad = sum(min(end, local) - start for start, end in missing if start < local)
+    if local - bad < local * REUSE_MIN_RATIO:
+        return False
+    return local > size or bad * 4 >= local
+
+
+def signature(path: str, block_size: int) -> bytes:
+    """
+    Dosyanın tam blokları için imza (SIGNATURE_ENTRY dizisi)
+
+    Args:
+        path: Eski (yerel) dosya
+        block_size: Blok boyutu
+
+    Returns:
+        Paketlenmiş imza
+    """
+    builder = SignatureBuilder(block_size)
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(READ_SIZE)
+            if not data:
+                break
+            builder.update(data)
+    return builder.digest()
+
+
+class SignatureBuilder:
+    """
+    İmzayı sırayla beslenen veriden kurar (başka bir okuma geçişine eklenebilir)
+
+    Kullanım:
+        builder = SignatureBuilder(block_size)
+        builder.update(data) ...
+        sig = builder.digest()
+    """
+
+    def __init__(self, block_size: int):
+        self.block_size = block_size
+        self._parts: List[bytes] = []
+        self._pending = b""
+
+    def update(self, data: bytes):
+        n = self.block_size
+        if self._pending:
+            data = self._pending + data
+        view = memoryview(data)
+        full = len(data) - len(data) % n
+        for pos in range(0, full, n):
+            block = view[pos:pos + n]
+            self._parts.append(SIGNATURE_ENTRY.pack(zlib.adler32(block), strong_checksum(block)))
+        self._pending = bytes(view[full:])
+
+    def digest(self) -> bytes:
+        """Paketlenmiş imza (kısa son blok eşleşmeye katılmaz)"""
+        return b"".join(self._parts)
+
+
+def check_local(path: str, size: int, block_size: int, leaves: List[str]) -> Tuple[List[Tuple[int, int]], Optional[bytes]]:
+    """
+    Yerel dosyayı Merkle bloklarıyla doğrula; eski sürümse delta imzasını aynı okumada çıkar
+
+    Args:
+        path: Yerel dosya
+        size: Uzaktaki dosyanın boyutu
+        block_size: Merkle blok boyutu
+        leaves: Beklenen blok hex listesi
+
+    Returns:
+        (merkle.missing_ranges sonucu, delta kullanılacaksa block_size_for(size) ile imza, yoksa None)
+    """
+    builder: Optional[SignatureBuilder] = None
+    feed: Optional[Callable[[bytes], None]] = None
+    try:
+        if DELTA_TRANSFER and size >= DELTA_MIN_FILE_SIZE and os.path.getsize(path) >= DELTA_MIN_FILE_SIZE:
+            builder = SignatureBuilder(block_size_for(size))
+            feed = builder.update
+    except OSError:
+        pass
+    missing = missing_ranges(path, size, block_size, leaves, feed=feed)
+    if builder is None or not use_delta(path, size, missing):
+        return missing, None
+    return missing, builder.digest()
+
+
+def parse_signature(data: bytes) -> Dict[int, List[Tuple[int, bytes]]]:
+    """
+    İmzayı weak checksum -> [(blok index, strong)] tablosuna çevir
+
+    Raises:
+        ValueError: İmza uzunluğu geçersizse
+    """
+    if len(data) % SIGNATURE_ENTRY.size:
+        raise ValueError("Truncated delta signature")
+    table: Dict[int, List[Tuple[int, bytes]]] = {}
+    for index, (weak, strong) in enumerate(SIGNATURE_ENTRY.iter_unpack(data)):
+        table.setdefault(weak, []).append((index, strong))
+    return table
+
+
+class DeltaScanner:
+    """
+    Gönderici tarafı: dosyayı imzaya göre tarayıp delta işlemleri üretir
+
+    step() her çağrıda en fazla STEP_BYTES ilerler ve şu işlemleri döndürür:
+        ("copy", offset, src_offset, length)  alıcının eski kopyasından kopyala
+        ("data", offset, bytes)               ham veri
+    offset yeni dosyadaki konumdur; işlemler sıralı ve boşluksuzdur.
+    İlk STEP_BYTES'tan sonra literal oranı GIVE_UP_RATIO'yu aşarsa tarama
+    bırakılır, kalan kısım ham veri olarak gönderilir.
+    """
+
+    def __init__(self, path: str, table: Dict[int, List[Tuple[int, bytes]]], block_size: int):
+        self.block_size = block_size
+        self.size = os.path.getsize(path)
+        self.done = False
+        self._table = table
+        self._file = open(path, "rb")
+        self._buf = b""
+        self._base = 0  # _buf[0]'ın dosyadaki offset'i
+        self._eof = False
+        self._pos = 0
+        self._weak = None  # (a, b) — pencere için geçerli adler32 bileşenleri
+        self._literal_bytes = 0
+        self.raw = False  # True: tarama bırakıldı, kalan ham gönderiliyor
+
+    def close(self):
+        self._file.close()
+
+    def _fill(self, keep_from: int):
+        """keep_from öncesini at ve READ_SIZE kadar daha oku"""
+        more = self._file.read(READ_SIZE)
+        self._buf = self._buf[keep_from - self._base:] + more
+        self._base = keep_from
+        if not more:
+            self._eof = True
+
+    def step(self) -> List[tuple]:
+        """Taramayı ilerlet ve üretilen işlemleri döndür (bittiyse done=True)"""
+        ops: List[tuple] = []
+        if self.done:
+            return ops
+        if not self.raw and self._pos >= STEP_BYTES and self._literal_bytes > self._pos * GIVE_UP_RATIO:
+            self.raw = True  # Eşleşme çok az: bayt bayt tarama boşa CPU
+            self._buf = b""
+            self._file.seek(self._pos)
+        if self.raw:
+            return self._raw_step(ops)
+        n = self.block_size
+        table = self._table
+        pos = lit = self._pos
+        step_end = pos + STEP_BYTES
+
+        while True:
+            buf_end = self._base + len(self._buf)
+            if pos + n >= buf_end and not self._eof:
+                self._fill(lit)  # Kaydırmak için pencereden sonra en az bir byte gerekli
+                continue
+            if pos + n > buf_end:
+                # Kalan kısım bir bloktan kısa: literal olarak gönder
+                self._literal(ops, lit, buf_end)
+                pos = buf_end
+                self.done = True
+                self.close()
+                break
+
+            buf, base = self._buf, self._base
+            i = pos - base
+            if self._weak is None:
+                checksum = zlib.adler32(buf[i:i + n])
+                self._weak = (checksum & 0xFFFF, checksum >> 16)
+            a, b = self._weak
+            weak = (b << 16) | a
+
+            match = None
+            candidates = table.get(weak)
+            if candidates:
+                strong = strong_checksum(buf[i:i + n])
+                for index, expected in candidates:
+                    if expected == strong:
+                        match = index
+                        break
+
+            if match is not None:
+                self._literal(ops, lit, pos)
+                src = match * n
+                last = ops[-1] if ops else None
+                if last and last[0] == "copy" and last[1] + last[3] == pos and last[2] + last[3] == src:
+                    ops[-1] = ("copy", last[1], last[2], last[3] + n)
+                else:
+                    ops.append(("copy", pos, src, n))
+                pos = lit = pos + n
+                self._weak = None
+                if pos >= step_end:
+                    break
+                continue
+
+            # Eşleşme yok: pencereyi bir sonraki adaya kadar byte byte kaydır
+            limit = min(buf_end - n, lit + LITERAL_SIZE, step_end) - base
+            i += 1
+            while i <= limit:
+                out = buf[i - 1]
+                a = (a - out + buf[i + n - 1]) % _MOD
+                b = (b - n * out + a - 1) % _MOD
+                if ((b << 16) | a) in table:
+                    break
+                i += 1
+            if i > limit:
+                i = limit  # Sınıra ulaşıldı (buffer / literal / step sonu)
+            self._weak = (a, b)
+            pos = base + i
+            if pos - lit >= LITERAL_SIZE or pos >= step_end:
+                self._literal(ops, lit, pos)
+                lit = pos
+                if pos >= step_end:
+                    break
+            elif pos + n == buf_end and self._eof:
+                # Son pencere de eşleşmedi: kalan her şey literal
+                self._literal(ops, lit, buf_end)
+                pos = buf_end
+                self.done = True
+                self.close()
+                break
+
+        self._pos = pos
+        return ops
+
+    def _raw_step(self, ops: List[tuple]) -> List[tuple]:
+        """Taramadan en fazla STEP_BYTES ham veri oku"""
+        end = self._pos + STEP_BYTES
+        while self._pos < end:
+            data = self._file.read(min(LITERAL_SIZE, end - self._pos))
+            if not data:
+                self.done = True
+                self.close()
+                break
+            ops.append(("data", self._pos, data))
+            self._pos += len(data)
+        if self._pos >= self.size and not self.done:
+            self.done = True
+            self.close()
+        return ops
+
+    def _literal(self, ops: List[tuple], start: int, end: int):
+        """[start, end) aralığını LITERAL_SIZE'lık ham veri işlemleri olarak ekle"""
+        self._literal_bytes += max(end - start, 0)
+        for pos in range(start, end, LITERAL_SIZE):
+            stop = min(pos + LITERAL_SIZE, end)
+            ops.append(("data", pos, self._buf[pos - self._base:stop - self._base]))
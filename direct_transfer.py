@@ -0,0 +1,257 @@
+"""
+QuickShare Direct Transfer
+Aynı ağdaki eşler arasında toplu veri için doğrudan TCP (isteğe bağlı TLS) yolu
+
+aiortc'nin SCTP/DTLS/UDP yığını saf Python'da çalıştığından yerel ağda bile
+gigabit'in çok altında kalır. ICE bağlantısı iki host adayı arasında kurulduysa
+(eşler birbirine doğrudan ulaşabiliyorsa) gönderici dinlediği TCP portunu,
+tek kullanımlık bir anahtarı ve TLS sertifikasının parmak izini file_list ile
+DataChannel üzerinden (DTLS ile şifreli) bildirir. Alıcı ICE'in seçtiği host
+adresine bağlanır; dosya verisi aynı binary frame'lerle (transfer_protocol) bu
+bağlantıdan, kontrol mesajları yine DataChannel'dan gider.
+
+TCP akışında her DataChannel mesajının yerini uzunluk önekli bir mesaj alır:
+    length  I  (network byte order)
+    frames  transfer_protocol frame'leri
+
+Not: seçilen ICE aday çifti aiortc'de dışarıya açık değildir; aioice Connection'ın
+iç alanlarına (trickle_ice'ta olduğu gibi) yalnızca lan_address içinde erişilir.
+"""
+
+import os
+import ssl
+import struct
+import asyncio
+import hashlib
+import secrets
+import tempfile
+import datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+from config import WEBRTC_DIRECT_PORT, WEBRTC_DIRECT_TIMEOUT
+
+
+MESSAGE_HEADER = struct.Struct('!I')
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024     # Bundan büyük uzunluk öneki bozuk akış sayılır
+HELLO_TIMEOUT = 5                       # saniye; bağlanan istemcinin anahtarını göndermesi için
+STREAM_LIMIT = 4 * 1024 * 1024          # StreamReader tamponu
+OK = b"OK\n"
+
+
+def lan_address(pc) -> Optional[str]:
+    """
+    ICE iki host adayı arasında kurulduysa karşı tarafın yerel ağ adresi
+
+    Args:
+        pc: Bağlı RTCPeerConnection
+
+    Returns:
+        IP adresi; bağlantı STUN/TURN üzerinden geçiyorsa None
+    """
+    sctp = pc.sctp
+    if sctp is None:
+        return None
+    pair = sctp.transport.transport.iceGatherer._connection._nominated.get(1)
+    if pair is None or pair.local_candidate.type != "host" or pair.remote_candidate.type != "host":
+        return None
+    return pair.remote_candidate.host
+
+
+def certificate_fingerprint(der: bytes) -> str:
+    return hashlib.sha256(der).hexdigest()
+
+
+def _self_signed_context():
+    """
+    Geçici, kendinden imzalı sertifikalı sunucu TLS bağlamı
+
+    Returns:
+        (ssl.SSLContext, sertifikanın SHA-256 parmak izi)
+    """
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "quickshare")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder()
+            .subject_name(name).issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1))
+            .not_valid_after(now + datetime.timedelta(days=30))
+            .sign(key, hashes.SHA256()))
+    pem = cert.public_bytes(serialization.Encoding.PEM) + key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    # load_cert_chain yalnızca dosya yolu kabul eder
+    fd, path = tempfile.mkstemp(suffix=".pem")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(pem)
+        context.load_cert_chain(path)
+    finally:
+        os.remove(path)
+    return context, certificate_fingerprint(cert.public_bytes(serialization.Encoding.DER))
+
+
+class DirectLink:
+    """Doğrudan TCP bağlantısı üzerinden uzunluk önekli mesajlar"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @property
+    def closed(self) -> bool:
+        return self.writer.is_closing()
+
+    async def send(self, message: bytes):
+        """Mesajı yaz; karşı taraf yetişemezse TCP penceresi dolana kadar bekle"""
+        self.writer.writelines((MESSAGE_HEADER.pack(len(message)), message))
+        await self.writer.drain()
+
+    async def messages(self) -> AsyncIterator[bytes]:
+        """Gelen mesajlar; bağlantı kapanınca biter"""
+        while True:
+            try:
+                header = await self.reader.readexactly(MESSAGE_HEADER.size)
+            except asyncio.IncompleteReadError:
+                return
+            (length,) = MESSAGE_HEADER.unpack(header)
+            if length > MAX_MESSAGE_SIZE:
+                raise ConnectionError(f"Geçersiz mesaj uzunluğu: {length}")
+            yield await self.reader.readexactly(length)
+
+    async def close(self):
+        if self.writer.is_closing():
+            return
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except (OSError, ssl.SSLError):
+            pass
+
+
+class DirectServer:
+    """
+    Göndericinin doğrudan TCP sunucusu: her alıcı kendi tek kullanımlık anahtarıyla bağlanır
+    """
+
+    def __init__(self, tls: bool = True, port: int = WEBRTC_DIRECT_PORT):
+        self.tls = tls
+        self.port = port
+        self.fingerprint: Optional[str] = None
+        self._servers: List[asyncio.AbstractServer] = []
+        self._waiting: Dict[str, asyncio.Future] = {}
+
+    async def start(self):
+        """
+        Tüm arayüzlerde dinlemeye başla (bir kez)
+
+        Raises:
+            OSError: Port açılamazsa
+        """
+        if self._servers:
+            return
+        context = None
+        if self.tls:
+            context, self.fingerprint = _self_signed_context()
+        # host=None IPv4 ve IPv6 için ayrı rastgele portlar açar; IPv6 IPv4'ün portunu kullanır
+        for host in ("0.0.0.0", "::"):
+            try:
+                server = await asyncio.start_server(self._accept, host=host, port=self.port,
+                                                    ssl=context, limit=STREAM_LIMIT)
+            except OSError:
+                if not self._servers:
+                    raise
+                continue  # IPv6 desteklenmiyor
+            self._servers.append(server)
+            self.port = server.sockets[0].getsockname()[1]
+
+    def offer(self) -> Dict:
+        """
+        Bir alıcı için bağlantı teklifi (file_list içinde gönderilir)
+
+        Returns:
+            {"port", "token", "fingerprint"}; bağlantı expect(token) ile beklenir
+        """
+        token = secrets.token_hex(16)
+        self._waiting[token] = asyncio.get_running_loop().create_future()
+        return {"port": self.port, "token": token, "fingerprint": self.fingerprint}
+
+    def expect(self, token: str) -> asyncio.Future:
+        """Teklifi kabul eden alıcının DirectLink'i (sonucu bekleyen Future)"""
+        return self._waiting[token]
+
+    def withdraw(self, token: str):
+        future = self._waiting.pop(token, None)
+        if future is not None and not future.done():
+            future.cancel()
+
+    async def _accept(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        link = DirectLink(reader, writer)
+        try:
+            token = (await asyncio.wait_for(reader.readline(), HELLO_TIMEOUT)).strip().decode("ascii")
+        except (asyncio.TimeoutError, ConnectionError, UnicodeDecodeError, ssl.SSLError):
+            await link.close()
+            return
+        future = self._waiting.get(token)
+        if future is None or future.done():
+            await link.close()  # Bilinmeyen ya da kullanılmış anahtar
+            return
+        writer.write(OK)
+        future.set_result(link)
+
+    async def close(self):
+        for token in list(self._waiting):
+            self.withdraw(token)
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers = []
+
+
+async def connect(host: str, offer: Dict, timeout: float = WEBRTC_DIRECT_TIMEOUT) -> DirectLink:
+    """
+    Göndericinin doğrudan TCP sunucusuna bağlan
+
+    Args:
+        host: Göndericinin yerel ağ adresi (lan_address)
+        offer: file_list içindeki {"port", "token", "fingerprint"}
+        timeout: Bağlantı ve el sıkışma süresi (saniye)
+
+    Returns:
+        Kullanıma hazır DirectLink
+
+    Raises:
+        ConnectionError: Sertifika parmak izi tutmazsa ya da gönderici anahtarı reddederse
+        OSError, asyncio.TimeoutError: Bağlanılamazsa
+    """
+    context = None
+    if offer.get("fingerprint"):
+        # Sertifika kendinden imzalı: doğrulama CA yerine DTLS üzerinden gelen parmak iziyle yapılır
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+
+    async def handshake() -> DirectLink:
+        reader, writer = await asyncio.open_connection(host, int(offer["port"]), ssl=context, limit=STREAM_LIMIT)
+        link = DirectLink(reader, writer)
+        try:
+            if context is not None:
+                der = writer.get_extra_info("ssl_object").getpeercert(binary_form=True)
+                if certificate_fingerprint(der) != offer["fingerprint"]:
+                    raise ConnectionError("Sertifika parmak izi eşleşmiyor")
+            writer.write(f"{offer['token']}\n".encode("ascii"))
+            if await reader.readline() != OK:
+                raise ConnectionError("Doğrudan bağlantı reddedildi")
+        except BaseException:
+            await link.close()
+            raise
+        return link
+
+    return await asyncio.wait_for(handshake(), timeout)
@@ -5,26 +5,60 @@ URL'den dosya indirme mantığı
 
 import requests
 import os
+import hashlib
 import time
 import re
+import json
+import queue
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import quote
 from base64 import urlsafe_b64encode
 from typing import Callable, Optional, List, Dict
-from config import CHUNK_SIZE, TIMEOUT, MAX_RETRIES
-from utils import format_size, format_speed, calculate_eta, calculate_file_hash
+from config import (CHUNK_SIZE, TIMEOUT, MAX_RETRIES, SEGMENTED_DOWNLOAD, SEGMENT_MIN_FILE_SIZE,
+                    SEGMENT_SIZE, SEGMENT_CONNECTIONS, SEGMENT_MAX_CONNECTIONS,
+                    SEGMENT_ADAPT_INTERVAL, PARTIAL_STATE_SUFFIX, DOWNLOAD_CONCURRENCY,
+                    DOWNLOAD_ORDER, DELTA_SUFFIX, DEDUP_TRANSFER)
+from utils import format_size, format_speed, calculate_eta, pwrite, pread, hash_file_prefix
+from hash_cache import hash_cache
+from merkle import missing_ranges, valid_blocks
+from delta import block_size_for, check_local
+from cdc import ChunkIndex, plan_transfer
+from transfer_protocol import FRAME_DATA, FRAME_FILE_END, FRAME_COPY, COPY_PAYLOAD, FrameReader
 from transfer_history import history
 
 
+HASH_READ_SIZE = 1024 * 1024  # 1 MB (segmentli indirmede sıralı hash bloğu)
+
+
+class RangeNotSupported(Exception):
+    """Sunucu Range isteğine 206 ile cevap vermedi"""
+
+
+class DownloadAborted(Exception):
+    """Eşzamanlı indirmelerden biri başarısız oldu, bu indirme yarıda durduruldu"""
+
+
 class Downloader:
     """Dosya indirme yöneticisi"""
     
-    def __init__(self, proxies: Optional[Dict] = None):
+    def __init__(self, proxies: Optional[Dict] = None, segmented: bool = SEGMENTED_DOWNLOAD):
         self.session = requests.Session()
         self.session.timeout = TIMEOUT
+        # Segmentli indirme için bağlantı havuzunu büyüt (eşzamanlı her dosya kendi segmentleriyle)
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=SEGMENT_MAX_CONNECTIONS,
+            pool_maxsize=DOWNLOAD_CONCURRENCY * SEGMENT_MAX_CONNECTIONS
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.segmented = segmented
         if proxies:
             self.session.proxies.update(proxies)
         self.hash_results: Dict[str, str] = {}  # {filename: "verified"|"failed"|"skipped"}
         self.transfer_start_time: float = 0
+        self._abort = threading.Event()  # download_files: ilk hatada çalışan indirmeleri durdurur
         
     def get_file_list(self, url: str) -> List[Dict]:
         """
@@ -55,10 +89,16 @@ class Downloader:
         filename: str,
         save_path: str,
         progress_callback: Optional[Callable[[int, int, float], None]] = None,
-        log_callback: Optional[Callable[[str], None]] = None
+        log_callback: Optional[Callable[[str], None]] = None,
+        file_size: Optional[int] = None,
+        plan: Optional[Dict] = None
     ):
         """
         Tek bir dosyayı indir
+        
+        file_size biliniyorsa ve SEGMENT_MIN_FILE_SIZE'dan büyükse dosya
+        paralel Range istekleriyle (segmentli) indirilir. plan verilirse
+        (bkz. _plan_dedup) dosya yerel parçalardan ve Range isteklerinden kurulur.
         """
         # URL'i normalize et
         if not url.endswith('/'):
@@ -72,6 +112,394 @@ class Downloader:
         file_path = os.path.join(save_path, filename)
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
         
+        # Elde kalan kısmi dosya varsa önce bloklarını doğrula (bozuk kuyruk sessizce korunmasın);
+        # dosya eski bir sürümse delta ile yeniden kurulur
+        rebuilt_hash = None
+        if os.path.exists(file_path) and not os.path.exists(file_path + PARTIAL_STATE_SUFFIX):
+            rebuilt_hash = self._verify_partial(url, filename, file_url, file_path, progress_callback, log_callback)
+        
+        # İndirme sırasında hesaplanan SHA256 (None ise dosya zaten tamamdı)
+        inline_hash = rebuilt_hash
+        segmented_done = rebuilt_hash is not None
+        if not segmented_done and plan and not os.path.exists(file_path):
+            segmented_done = self._assemble_chunks(file_url, file_path, plan, progress_callback, log_callback)
+        if not segmented_done and self.segmented and file_size and file_size >= SEGMENT_MIN_FILE_SIZE:
+            try:
+                inline_hash = self._download_segmented(
+                    file_url, file_path, file_size, progress_callback, log_callback
+                )
+                segmented_done = True
+            except RangeNotSupported:
+                pass  # Tek stream'e dön
+        
+        if not segmented_done:
+            inline_hash = self._download_single(file_url, file_path, progress_callback, log_callback)
+        
+        # Inline hash varsa dosyayı tekrar okumaya gerek yok
+        if inline_hash:
+            hash_cache.put(file_path, inline_hash)
+        
+        # Verify Hash
+        msg = f"🔄 {filename} doğrulanıyor..."
+        print(msg)
+        if log_callback: log_callback(msg)
+        try:
+            # Server'dan hash al
+            hash_url = url + 'hash/' + quote(filename)
+            hash_response = self.session.get(hash_url, timeout=TIMEOUT)
+            
+            if hash_response.status_code == 200:
+                server_hash = hash_response.json().get('hash')
+                local_hash = inline_hash or hash_cache.get_or_compute(file_path)
+                
+                # Uyuşmazlıkta tüm dosya yerine yalnızca bozuk blokları yeniden indir
+                if server_hash and server_hash != local_hash and self._repair_blocks(
+                        url, filename, file_url, file_path, log_callback):
+                    local_hash = hash_cache.get_or_compute(file_path)
+                
+                if server_hash == local_hash:
+                    msg = f"✅ {filename} — Hash doğrulandı"
+                    self.hash_results[filename] = "verified"
+                else:
+                    msg = f"❌ {filename} — Hash UYUŞMADI!"
+                    self.hash_results[filename] = "failed"
+                print(msg)
+                if log_callback: log_callback(msg)
+            else:
+                msg = f"⚠️ {filename} — Hash alınamadı (Status: {hash_response.status_code})"
+                self.hash_results[filename] = "skipped"
+                print(msg)
+                if log_callback: log_callback(msg)
+                
+        except Exception as e:
+            msg = f"⚠️ {filename} — Hash doğrulama atlandı: {e}"
+            self.hash_results[filename] = "skipped"
+            print(msg)
+            if log_callback: log_callback(msg)
+
+    def _fetch_blocks(self, url: str, filename: str) -> Optional[Dict]:
+        """
+        Sunucudan dosyanın Merkle blok bilgisini al
+        
+        Returns:
+            {"size", "block_size", "blocks", "root"} veya alınamazsa None
+        """
+        try:
+            response = self.session.get(url + 'blocks/' + quote(filename), timeout=TIMEOUT)
+            if response.status_code != 200:
+                return None
+            info = response.json()
+        except (requests.RequestException, ValueError):
+            return None
+        return info if valid_blocks(info) and isinstance(info.get("size"), int) else None
+
+    def _verify_partial(
+        self,
+        url: str,
+        filename: str,
+        file_url: str,
+        file_path: str,
+        progress_callback: Optional[Callable[[int, int, float], None]] = None,
+        log_callback: Optional[Callable[[str], None]] = None
+    ) -> Optional[str]:
+        """
+        Kısmi dosyayı blok hash'leriyle doğrula
+        
+        Aradaki bozuk bloklar Range istekleriyle onarılır; eksik/bozuk kuyruk
+        kesilir ve normal resume oradan devam eder. Dosya yarım bir indirme
+        değil de eski bir sürüm gibi görünüyorsa delta aktarımı denenir.
+        
+        Returns:
+            Dosya delta ile tamamen yeniden kurulduysa SHA256 hex digest'i, yoksa None
+        """
+        info = self._fetch_blocks(url, filename)
+        if not info:
+            return None
+        size = info["size"]
+        # Eski sürümse delta imzası da aynı okumada çıkar
+        bad, sig = check_local(file_path, size, info["block_size"], info["blocks"])
+        if sig is not None:
+            digest = self._download_delta(url, filename, file_path, size, sig, progress_callback, log_callback)
+            if digest:
+                return digest
+        keep = size
+        if bad and bad[-1][1] == size:
+            keep = bad.pop()[0]
+        if os.path.getsize(file_path) > keep:
+            os.truncate(file_path, keep)
+        if not bad:
+            return None
+        
+        msg = f"🔧 {filename}: {len(bad)} bozuk aralık onarılıyor..."
+        print(msg)
+        if log_callback: log_callback(msg)
+        try:
+            self._fetch_ranges(file_url, file_path, bad)
+        except (requests.RequestException, RangeNotSupported, IOError) as e:
+            # Onarılamadı: ilk bozuk bloktan itibaren baştan al
+            print(f"Blok onarımı başarısız: {e}")
+            os.truncate(file_path, bad[0][0])
+        return None
+
+    def _download_delta(
+        self,
+        url: str,
+        filename: str,
+        file_path: str,
+        size: int,
+        sig: bytes,
+        progress_callback: Optional[Callable[[int, int, float], None]] = None,
+        log_callback: Optional[Callable[[str], None]] = None
+    ) -> Optional[str]:
+        """
+        Yerel eski sürümün imzasını gönderip yalnızca değişen veriyi indir (rsync benzeri)
+        
+        sig, eski sürümün block_size_for(size) bloklarıyla imzasıdır (delta.check_local).
+        
+        Yeni dosya DELTA_SUFFIX uzantılı geçici dosyada kurulur; SHA256
+        doğrulanınca eski dosyanın yerine geçer.
+        
+        Returns:
+            Yeni dosyanın SHA256 hex digest'i veya delta kullanılamadıysa None
+        """
+        msg = f"🔁 {filename}: yerel eski sürüm bulundu, delta aktarımı deneniyor..."
+        print(msg)
+        if log_callback: log_callback(msg)
+        
+        block_size = block_size_for(size)
+        temp_path = file_path + DELTA_SUFFIX
+        try:
+            response = self.session.post(
+                url + 'delta/' + quote(filename),
+                params={'block_size': block_size},
+                data=sig,
+                stream=True,
+                timeout=TIMEOUT
+            )
+        except (requests.RequestException, IOError) as e:
+            print(f"Delta isteği başarısız: {e}")
+            return None
+        
+        reader = FrameReader()
+        hasher = hashlib.sha256()
+        written = copied = 0
+        expected = None
+        start_time = time.time()
+        try:
+            with response:
+                if response.status_code != 200:
+                    print(f"Delta desteklenmiyor (Status: {response.status_code})")
+                    return None
+                with open(file_path, 'rb') as src, open(temp_path, 'wb') as out:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        for frame_type, _, _, offset, payload in reader.feed(chunk):
+                            if frame_type == FRAME_FILE_END:
+                                expected = payload.hex()
+                                continue
+                            if offset != written:
+                                raise ValueError(f"Unexpected delta offset {offset}")
+                            if frame_type == FRAME_COPY:
+                                src_offset, length = COPY_PAYLOAD.unpack(payload)
+                                src.seek(src_offset)
+                                payload = src.read(length)
+                                if len(payload) != length:
+                                    raise ValueError("Delta copy past the end of the local file")
+                                copied += length
+                            elif frame_type != FRAME_DATA:
+                                continue
+                            out.write(payload)
+                            hasher.update(payload)
+                            written += len(payload)
+                            
+                            if progress_callback:
+                                elapsed = time.time() - start_time
+                                speed = (written - copied) / elapsed if elapsed > 0 else 0
+                                progress_callback(written, size, speed)
+        except (requests.RequestException, IOError, ValueError, struct.error) as e:
+            print(f"Delta aktarımı başarısız: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+        
+        digest = hasher.hexdigest()
+        if written != size or expected != digest:
+            print(f"Delta sonucu doğrulanamadı: {filename}")
+            os.remove(temp_path)
+            return None
+        os.replace(temp_path, file_path)
+        
+        msg = (f"✅ {filename}: delta ile güncellendi ({format_size(written - copied)} indirildi, "
+               f"{format_size(copied)} yerel kopyadan)")
+        print(msg)
+        if log_callback: log_callback(msg)
+        return digest
+
+    def _repair_blocks(
+        self,
+        url: str,
+        filename: str,
+        file_url: str,
+        file_path: str,
+        log_callback: Optional[Callable[[str], None]] = None
+    ) -> bool:
+        """
+        Hash uyuşmazlığında yalnızca hatalı blokları yeniden indir
+        
+        Returns:
+            Onarım yapıldıysa True (hash tekrar kontrol edilmeli)
+        """
+        info = self._fetch_blocks(url, filename)
+        if not info:
+            return False
+        bad = missing_ranges(file_path, info["size"], info["block_size"], info["blocks"])
+        if not bad:
+            return False
+        
+        msg = f"🔧 {filename}: hash uyuşmadı, {len(bad)} bozuk aralık yeniden indiriliyor..."
+        print(msg)
+        if log_callback: log_callback(msg)
+        try:
+            self._fetch_ranges(file_url, file_path, bad)
+            os.truncate(file_path, info["size"])
+        except (requests.RequestException, RangeNotSupported, IOError) as e:
+            print(f"Blok onarımı başarısız: {e}")
+            return False
+        return True
+
+    def _plan_dedup(
+        self,
+        url: str,
+        files: List[dict],
+        save_path: str,
+        log_callback: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Dict]:
+        """
+        Tekrar eden parçaları belirle (içeriğe göre bölünmüş parça listeleriyle)
+        
+        Kaydetme dizininde zaten bulunan veya bu indirmede daha önce gelen
+        parçalar indirilmez, kopyalanır. files indirme sırasıyla verilmelidir.
+        
+        Returns:
+            Kopyalanacak parçası olan yeni dosyalar için
+            {name: {"fetch": [(start, end)], "copies": [(offset, length, path, src_offset)], "saved": bytes}}
+        """
+        fresh = [f for f in files if not os.path.exists(os.path.join(save_path, f['name']))]
+        if not fresh:
+            return {}
+        try:
+            response = self.session.get(url, params={"chunks": "1"}, timeout=TIMEOUT)
+            response.raise_for_status()
+            listed = {f.get("name"): f.get("chunks") for f in response.json().get("files", [])}
+        except (requests.RequestException, ValueError, AttributeError):
+            return {}
+        candidates = [dict(f, chunks=listed[f['name']]) for f in fresh if listed.get(f['name'])]
+        if not candidates:
+            return {}
+        
+        index = ChunkIndex()
+        # İstenen ama yerelde olan dosyalar resume/delta ile değişecek: kaynak olamaz
+        index.scan(save_path, exclude=[os.path.join(save_path, f['name']) for f in files])
+        plans = plan_transfer(candidates, index)
+        for plan in plans.values():
+            dup = [(offset, length, os.path.join(save_path, src), src_offset)
+                   for offset, length, src, src_offset in plan.pop("dup")]
+            plan["copies"] = sorted(plan.pop("local") + dup)
+        if plans:
+            saved = sum(plan["saved"] for plan in plans.values())
+            msg = f"♻️ Tekrar eden parçalar: {len(plans)} dosyada {format_size(saved)} indirilmeyecek"
+            print(msg)
+            if log_callback: log_callback(msg)
+        return plans
+    
+    def _assemble_chunks(
+        self,
+        file_url: str,
+        file_path: str,
+        plan: Dict,
+        progress_callback: Optional[Callable[[int, int, float], None]] = None,
+        log_callback: Optional[Callable[[str], None]] = None
+    ) -> bool:
+        """
+        Dosyayı parça planına göre baştan sona sırayla kur
+        
+        Kopyalar yerel dosyalardan (ya da dosyanın önceden yazılmış kısmından)
+        okunur, geri kalanı Range istekleriyle indirilir. Sırayla yazıldığı
+        için yarıda kalan dosya geçerli bir önektir ve normal resume çalışır.
+        
+        Returns:
+            Dosya kurulduysa True; sunucu Range desteklemiyorsa veya bir
+            kaynak okunamadıysa False (dosya silinir, normal indirmeye dönülür)
+        """
+        ops = [(s, e - s, None, 0) for s, e in plan["fetch"]] + plan["copies"]
+        ops.sort()
+        total = ops[-1][0] + ops[-1][1] if ops else 0
+        done = 0
+        start_time = time.time()
+        stop = threading.Event()
+        
+        def on_bytes(count: int):
+            nonlocal done
+            done += count
+            if progress_callback:
+                elapsed = time.time() - start_time
+                progress_callback(done, total, done / elapsed if elapsed > 0 else 0)
+        
+        fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0))
+        try:
+            for offset, length, source, src_offset in ops:
+                if source is None:
+                    segment = [offset, offset + length - 1, 0]
+                    self._fetch_segment(file_url, fd, segment, on_bytes, stop)
+                    continue
+                with open(source, "rb") as f:
+                    data = pread(f.fileno(), length, src_offset)
+                if len(data) != length:
+                    raise IOError(f"{source} changed while copying")
+                pwrite(fd, data, offset)
+                on_bytes(length)
+        except (RangeNotSupported, IOError) as e:
+            os.close(fd)
+            os.remove(file_path)
+            msg = f"⚠️ Parça kopyalama atlandı, dosya normal indirilecek: {e}"
+            print(msg)
+            if log_callback: log_callback(msg)
+            return False
+        os.close(fd)
+        return True
+
+    def _fetch_ranges(self, file_url: str, file_path: str, ranges: List):
+        """[start, end) aralıklarını Range istekleriyle indirip yerine yaz"""
+        fd = os.open(file_path, os.O_WRONLY | getattr(os, "O_BINARY", 0))
+        try:
+            stop = threading.Event()
+            for start, end in ranges:
+                segment = [start, end - 1, 0]
+                self._fetch_segment(file_url, fd, segment, lambda count: None, stop)
+                if segment[2] != end - start:
+                    raise IOError(f"Range {start}-{end - 1} incomplete")
+        finally:
+            os.close(fd)
+
+    def _download_single(
+        self,
+        file_url: str,
+        file_path: str,
+        progress_callback: Optional[Callable[[int, int, float], None]] = None,
+        log_callback: Optional[Callable[[str], None]] = None
+    ) -> Optional[str]:
+        """
+        Dosyayı tek bir stream ile indir (boyuta göre resume)
+        
+        SHA256 yazılan chunk'larla birlikte güncellenir; hasher retry'lar
+        arasında korunur, yeni bir resume'da diskteki prefix'ten bir kez
+        yeniden kurulur.
+        
+        Returns:
+            Dosyanın SHA256 hex digest'i veya dosya zaten tamamsa None
+        """
+        hasher = None
+        hashed_bytes = 0
+        
         # Retry loop
         retries = 0
         while retries < MAX_RETRIES:
@@ -103,12 +531,13 @@ class Downloader:
                     msg = "File already complete or range invalid."
                     print(msg)
                     if log_callback: log_callback(msg)
-                    return
+                    return None
 
                 response.raise_for_status()
                 
-                # Toplam boyut
-                total_size = int(response.headers.get('content-length', 0))
+                # Toplam boyut (gzip ile sıkıştırılmış gövdede Content-Length yoktur)
+                total_size = int(response.headers.get('X-Uncompressed-Length')
+                                 or response.headers.get('content-length', 0))
                 
                 # Range isteği yaptıysak content-length sadece kalan kısımdır.
                 # Total size'ı Content-Range header'dan almalıyız veya bildiğimiz total'e eklemeliyiz.
@@ -124,12 +553,23 @@ class Downloader:
                         mode = 'wb'
                         downloaded = 0
                 
+                # Hasher state'i bu offset'e uymuyorsa prefix'ten yeniden kur
+                if mode == 'wb':
+                    hasher, hashed_bytes = hashlib.sha256(), 0
+                elif hasher is None or hashed_bytes != downloaded:
+                    hasher = hash_file_prefix(file_path, downloaded)
+                    hashed_bytes = downloaded
+                
                 start_time = time.time()
                 
                 with open(file_path, mode) as f:
                     for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        if self._abort.is_set():
+                            raise DownloadAborted(file_path)
                         if chunk:
                             f.write(chunk)
+                            hasher.update(chunk)
+                            hashed_bytes += len(chunk)
                             downloaded += len(chunk)
                             
                             # Progress callback
@@ -142,7 +582,7 @@ class Downloader:
                                 progress_callback(downloaded, total_size, speed)
                 
                 # Başarılı bitti
-                break
+                return hasher.hexdigest()
                 
             except (requests.RequestException, IOError) as e:
                 retries += 1
@@ -150,40 +590,273 @@ class Downloader:
                 if retries >= MAX_RETRIES:
                     raise e
                 time.sleep(2 * retries)  # Exponential backoff (ish)
+
+    def _load_segment_state(self, state_path: str, file_path: str, total_size: int) -> Optional[List[List[int]]]:
+        """
+        Segment resume state'ini oku veya yeni segment listesi oluştur
         
-        # Verify Hash
-        msg = f"🔄 {filename} doğrulanıyor..."
-        print(msg)
-        if log_callback: log_callback(msg)
+        Returns:
+            [[start, end, done_bytes], ...] veya dosya zaten tamamsa None
+        """
+        if os.path.exists(state_path) and os.path.exists(file_path):
+            try:
+                with open(state_path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+                if state.get("size") == total_size:
+                    return state["segments"]
+            except (json.JSONDecodeError, IOError, KeyError):
+                pass
+        
+        # State yok: önceki tek stream indirmesinden kalan prefix'i tamamlanmış say
+        existing = 0
+        if os.path.exists(file_path) and not os.path.exists(state_path):
+            existing = os.path.getsize(file_path)
+            if existing >= total_size:
+                return None
+        
+        segments = []
+        for start in range(0, total_size, SEGMENT_SIZE):
+            end = min(start + SEGMENT_SIZE, total_size) - 1
+            done = min(max(existing - start, 0), end - start + 1)
+            segments.append([start, end, done])
+        return segments
+
+    def _save_segment_state(self, state_path: str, total_size: int, segments: List[List[int]]):
+        """Segment ilerlemesini diske yaz (yarıda kalan indirme için)"""
         try:
-            # Server'dan hash al
-            hash_url = url + 'hash/' + quote(filename)
-            hash_response = self.session.get(hash_url, timeout=TIMEOUT)
+            tmp_path = state_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"size": total_size, "segments": segments}, f)
+            os.replace(tmp_path, state_path)
+        except IOError as e:
+            print(f"Segment state kaydedilemedi: {e}")
+
+    def _fetch_segment(self, file_url: str, fd: int, segment: List[int], on_bytes: Callable[[int], None], stop: threading.Event):
+        """Tek segmentin kalan kısmını Range isteğiyle indirip pwrite ile yaz"""
+        start = segment[0] + segment[2]
+        end = segment[1]
+        if start > end:
+            return
+        
+        response = self.session.get(
+            file_url,
+            stream=True,
+            timeout=TIMEOUT,
+            headers={'Range': f'bytes={start}-{end}'}
+        )
+        with response:
+            if response.status_code != 206:
+                raise RangeNotSupported(f"Server returned {response.status_code} for a range request")
             
-            if hash_response.status_code == 200:
-                server_hash = hash_response.json().get('hash')
-                local_hash = calculate_file_hash(file_path)
-                
-                if server_hash == local_hash:
-                    msg = f"✅ {filename} — Hash doğrulandı"
-                    self.hash_results[filename] = "verified"
-                else:
-                    msg = f"❌ {filename} — Hash UYUŞMADI!"
-                    self.hash_results[filename] = "failed"
-                print(msg)
-                if log_callback: log_callback(msg)
-            else:
-                msg = f"⚠️ {filename} — Hash alınamadı (Status: {hash_response.status_code})"
-                self.hash_results[filename] = "skipped"
-                print(msg)
-                if log_callback: log_callback(msg)
-                
-        except Exception as e:
-            msg = f"⚠️ {filename} — Hash doğrulama atlandı: {e}"
-            self.hash_results[filename] = "skipped"
+            position = start
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                if stop.is_set():
+                    return
+                if self._abort.is_set():
+                    raise DownloadAborted(file_url)
+                if not chunk:
+                    continue
+                chunk = chunk[:end - position + 1]
+                pwrite(fd, chunk, position)
+                position += len(chunk)
+                segment[2] += len(chunk)
+                on_bytes(len(chunk))
+                if position > end:
+                    break
+        
+        if position <= end:
+            raise IOError(f"Segment {segment[0]}-{end} incomplete ({position - segment[0]} bytes)")
+
+    def _download_segmented(
+        self,
+        file_url: str,
+        file_path: str,
+        total_size: int,
+        progress_callback: Optional[Callable[[int, int, float], None]] = None,
+        log_callback: Optional[Callable[[str], None]] = None
+    ) -> Optional[str]:
+        """
+        Dosyayı paralel Range istekleriyle indir
+        
+        Dosya SEGMENT_SIZE'lık parçalara bölünür, worker thread'ler kuyruktan
+        segment alıp önceden boyutlandırılmış dosyaya pwrite ile yazar.
+        Bağlantı sayısı SEGMENT_CONNECTIONS ile başlar ve ölçülen
+        throughput arttıkça SEGMENT_MAX_CONNECTIONS'a kadar çıkar.
+        Segment ilerlemesi PARTIAL_STATE_SUFFIX dosyasında tutulur.
+        
+        Segmentler sırasız tamamlandığı için SHA256 ayrı bir thread'de,
+        baştan itibaren kesintisiz tamamlanmış bölge ilerledikçe (henüz
+        page cache'teki veriden) hesaplanır.
+        
+        Returns:
+            Dosyanın SHA256 hex digest'i veya dosya zaten tamamsa None
+            
+        Raises:
+            RangeNotSupported: Sunucu Range desteklemiyor (tek stream'e dönülmeli)
+        """
+        state_path = file_path + PARTIAL_STATE_SUFFIX
+        segments = self._load_segment_state(state_path, file_path, total_size)
+        if segments is None:
+            msg = "File already complete."
             print(msg)
             if log_callback: log_callback(msg)
-    
+            return None
+        
+        already = sum(seg[2] for seg in segments)
+        if already > 0:
+            msg = f"Resuming segmented download from {format_size(already)}..."
+            print(msg)
+            if log_callback: log_callback(msg)
+        
+        # Dosyayı önceden boyutlandır (mevcut veri korunur)
+        with open(file_path, 'ab'):
+            pass
+        f = open(file_path, 'r+b')
+        f.truncate(total_size)
+        self._save_segment_state(state_path, total_size, segments)
+        
+        pending: queue.Queue = queue.Queue()
+        for idx, seg in enumerate(segments):
+            if seg[2] < seg[1] - seg[0] + 1:
+                pending.put(idx)
+        
+        lock = threading.Lock()
+        stop = threading.Event()
+        errors: List[Exception] = []
+        retries = [0] * len(segments)
+        downloaded = already
+        start_time = time.time()
+        target = [SEGMENT_CONNECTIONS]
+        active = [0]
+        
+        def on_bytes(count):
+            nonlocal downloaded
+            with lock:
+                downloaded += count
+                current = downloaded
+            if progress_callback:
+                elapsed = time.time() - start_time
+                speed = (current - already) / elapsed if elapsed > 0 else 0
+                progress_callback(current, total_size, speed)
+        
+        def worker():
+            try:
+                while not stop.is_set():
+                    with lock:
+                        if active[0] > target[0]:
+                            return  # Bağlantı sayısı düşürüldü
+                    try:
+                        idx = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    try:
+                        self._fetch_segment(file_url, f.fileno(), segments[idx], on_bytes, stop)
+                    except RangeNotSupported as e:
+                        errors.append(e)
+                        stop.set()
+                    except (requests.RequestException, IOError) as e:
+                        retries[idx] += 1
+                        print(f"Segment error (attempt {retries[idx]}/{MAX_RETRIES}): {e}")
+                        if retries[idx] >= MAX_RETRIES:
+                            errors.append(e)
+                            stop.set()
+                        else:
+                            time.sleep(retries[idx])
+                            pending.put(idx)
+                    except Exception as e:
+                        errors.append(e)
+                        stop.set()
+            finally:
+                with lock:
+                    active[0] -= 1
+        
+        def spawn():
+            with lock:
+                active[0] += 1
+            t = threading.Thread(target=worker, daemon=True)
+            t.start()
+            return t
+        
+        # Sıralı hash: baştan kesintisiz yazılmış bölgeyi takip et
+        hasher = hashlib.sha256()
+        hashed = [0]
+        
+        def contiguous_end():
+            for seg in segments:
+                if seg[2] < seg[1] - seg[0] + 1:
+                    return seg[0] + seg[2]
+            return total_size
+        
+        def hash_frontier():
+            with open(file_path, 'rb') as rf:
+                while hashed[0] < total_size and not stop.is_set():
+                    end = contiguous_end()
+                    if end <= hashed[0]:
+                        stop.wait(0.05)
+                        continue
+                    rf.seek(hashed[0])
+                    while hashed[0] < end:
+                        block = rf.read(min(HASH_READ_SIZE, end - hashed[0]))
+                        if not block:
+                            break
+                        hasher.update(block)
+                        hashed[0] += len(block)
+        
+        hash_thread = threading.Thread(target=hash_frontier, daemon=True)
+        hash_thread.start()
+        
+        threads = [spawn() for _ in range(min(target[0], pending.qsize()))]
+        
+        # Adaptif eşzamanlılık: throughput artıyorsa bağlantı ekle, düşüyorsa azalt
+        best_rate = 0.0
+        last_bytes = downloaded
+        last_time = time.time()
+        try:
+            while any(t.is_alive() for t in threads):
+                if stop.wait(SEGMENT_ADAPT_INTERVAL):
+                    break
+                now = time.time()
+                with lock:
+                    current = downloaded
+                rate = (current - last_bytes) / max(now - last_time, 1e-6)
+                last_bytes, last_time = current, now
+                self._save_segment_state(state_path, total_size, segments)
+                
+                if pending.empty() or stop.is_set():
+                    continue
+                if rate > best_rate * 1.1 and target[0] < SEGMENT_MAX_CONNECTIONS:
+                    best_rate = rate
+                    target[0] += 1
+                    threads.append(spawn())
+                elif rate < best_rate * 0.7 and target[0] > 1:
+                    target[0] -= 1
+                threads = [t for t in threads if t.is_alive()]
+                # Segment kuyruğu dolu ama worker kalmadıysa (retry sonrası) yeniden başlat
+                while len(threads) < target[0] and not pending.empty():
+                    threads.append(spawn())
+        finally:
+            if errors or not pending.empty():
+                stop.set()
+            for t in threads:
+                t.join()
+            f.close()
+            self._save_segment_state(state_path, total_size, segments)
+            # Başarılı durumda hash thread'i kalan bölgeyi bitirsin
+            hash_thread.join()
+        
+        if errors:
+            if isinstance(errors[0], RangeNotSupported):
+                # Yarım segmentli dosya kullanılamaz, tek stream baştan başlasın
+                os.remove(state_path)
+                os.remove(file_path)
+            raise errors[0]
+        
+        if any(seg[2] < seg[1] - seg[0] + 1 for seg in segments):
+            raise IOError("Segmented download incomplete")
+        
+        os.remove(state_path)
+        return hasher.hexdigest()
+
     def download_all(
         self,
         url: str,
@@ -192,87 +865,151 @@ class Downloader:
         log_callback: Optional[Callable[[str], None]] = None
     ):
         """
-        Tüm dosyaları sırayla indir
+        Tüm dosyaları indir
         """
         # Önce dosya listesini al
         files = self.get_file_list(url)
         self.download_files(files, url, save_path, progress_callback, log_callback)
 
+    def _order_files(self, files: List[dict], order: str) -> List[dict]:
+        """
+        İndirme sırasını politikaya göre belirle
+        
+        Args:
+            files: Dosya listesi
+            order: "smallest_first" | "largest_first" | "original"
+        """
+        if order == "smallest_first":
+            return sorted(files, key=lambda f: f['size'])
+        if order == "largest_first":
+            return sorted(files, key=lambda f: f['size'], reverse=True)
+        return list(files)
+
     def download_files(
         self,
         files: List[dict],
         url: str,
         save_path: str,
         progress_callback: Optional[Callable[[int, int, float], None]] = None,
-        log_callback: Optional[Callable[[str], None]] = None
+        log_callback: Optional[Callable[[str], None]] = None,
+        max_workers: int = DOWNLOAD_CONCURRENCY,
+        order: str = DOWNLOAD_ORDER
     ):
         """
         Belirli dosyaları indir
+        
+        Dosyalar max_workers boyutlu bir havuzda eşzamanlı indirilir
+        (varsayılan: küçükler önce). Hash doğrulama ve history kaydı
+        her dosya bittiğinde ayrı ayrı yapılır. İlk hatada kuyruktaki
+        dosyalar iptal edilir, çalışan indirmeler durdurulur (resume
+        state'leri korunur, geçmişe "cancelled" yazılır) ve hata yükseltilir.
         """
         # Toplam boyut hesapla
         total_size = sum(f['size'] for f in files)
         
-        # Daha önce ne kadar indirilmiş?
-        total_downloaded = 0
-        
         # Global start time
         start_time = time.time()
         self.transfer_start_time = start_time
         self.hash_results = {}  # Reset
+        self._abort.clear()
         
-        finished_files_size = 0
         total_files = len(files)
+        ordered = self._order_files(files, order)
+        if not url.endswith('/'):
+            url = url + '/'
+        plans = self._plan_dedup(url, ordered, save_path, log_callback) if DEDUP_TRANSFER else {}
         
-        # Her dosya için callback wrapper
-        def file_progress_wrapper(file_downloaded, file_total, file_speed, current_file_idx, total_files_count):
-            nonlocal total_downloaded
-            
-            # current_total calculation logic needs to be accurate
-            # We assume finished_files_size is accurate
-            current_total = finished_files_size + file_downloaded
-            
+        # Dosya başına ilerleme ve toplam sayaç (worker thread'lerden güncellenir)
+        progress_lock = threading.Lock()
+        file_progress: Dict[str, int] = {}
+        current_total = 0
+        finished_count = 0
+        
+        def report():
             elapsed = time.time() - start_time
             avg_speed = current_total / elapsed if elapsed > 0 else 0
-            
             if progress_callback:
-                progress_callback(current_total, total_size, avg_speed, current_file_idx, total_files_count)
-
-        for i, file in enumerate(files):
-            msg = f"Downloading {file['name']} ({i+1}/{total_files})..."
+                progress_callback(current_total, total_size, avg_speed, min(finished_count + 1, total_files), total_files)
+        
+        def file_progress_wrapper(name, file_downloaded):
+            nonlocal current_total
+            with progress_lock:
+                current_total += file_downloaded - file_progress.get(name, 0)
+                file_progress[name] = file_downloaded
+            report()
+        
+        def run(file):
+            msg = f"Downloading {file['name']}..."
             print(msg)
             if log_callback: log_callback(msg)
             
-            # Wrapper callback oluştur
-            file_cb = lambda d, t, s: file_progress_wrapper(d, t, s, i + 1, total_files)
-            
+            file_start = time.time()
+            file_cb = lambda d, t, s, name=file['name']: file_progress_wrapper(name, d)
             # İndir (Retry ve Resume logic'i download_file içinde)
-            try:
-                self.download_file(url, file['name'], save_path, file_cb, log_callback)
-            except Exception as e:
-                # Log failed transfer
-                duration = time.time() - start_time
-                history.log_transfer(
-                    filename=file['name'], size=file['size'],
-                    direction="receive", status="failed",
-                    duration_sec=duration, method="http"
-                )
-                raise e
-            
-            # Dosya bitti, boyutunu global sayaca ekle
-            finished_files_size += file['size']
+            self.download_file(url, file['name'], save_path, file_cb, log_callback,
+                               file_size=file['size'], plan=plans.get(file['name']))
+            return time.time() - file_start
         
-        # Tüm dosyalar bitti — history'ye kaydet
-        duration = time.time() - start_time
-        avg_speed = total_size / duration if duration > 0 else 0
-        for file in files:
-            hash_status = self.hash_results.get(file['name'], 'skipped')
-            history.log_transfer(
-                filename=file['name'], size=file['size'],
-                direction="receive", status="success",
-                hash_value=hash_status,
-                duration_sec=duration / total_files if total_files > 0 else 0,
-                avg_speed=avg_speed, method="http"
-            )
+        # Tekrar eden parça içeren dosyalar, parçaların kopyalanacağı dosyalar
+        # bittikten sonra ve birbirlerine göre sırayla kurulur
+        phases = [
+            ([f for f in ordered if f['name'] not in plans], max_workers),
+            ([f for f in ordered if f['name'] in plans], 1),
+        ]
+        error: Optional[Exception] = None
+        last_flush = time.time()
+        for batch, workers in phases:
+            if error or not batch:
+                continue
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                futures = {pool.submit(run, f): f for f in batch}
+                try:
+                    for future in as_completed(futures):
+                        file = futures[future]
+                        if future.cancelled():
+                            continue  # Hiç başlamadı
+                        try:
+                            duration = future.result()
+                        except Exception as e:
+                            # Log failed transfer (ilk hata yüzünden durdurulanlar iptal)
+                            history.log_transfer(
+                                filename=file['name'], size=file['size'], direction="receive",
+                                status="cancelled" if isinstance(e, DownloadAborted) else "failed",
+                                duration_sec=time.time() - start_time, method="http",
+                                save=False
+                            )
+                            if error is None:
+                                error = e
+                                self._abort.set()
+                                for pending in futures:
+                                    pending.cancel()
+                            continue
+                        
+                        # Dosya bitti (resume/tamamlanmış dosyalar dahil) sayaçları düzelt
+                        with progress_lock:
+                            current_total += file['size'] - file_progress.get(file['name'], 0)
+                            file_progress[file['name']] = file['size']
+                            finished_count += 1
+                        report()
+                        
+                        history.log_transfer(
+                            filename=file['name'], size=file['size'],
+                            direction="receive", status="success",
+                            hash_value=self.hash_results.get(file['name'], 'skipped'),
+                            duration_sec=duration,
+                            avg_speed=file['size'] / duration if duration > 0 else 0,
+                            method="http", save=False
+                        )
+                        # Binlerce küçük dosyada her kayıtta JSON yazmamak için toplu kaydet
+                        if time.time() - last_flush >= 2.0:
+                            history.flush()
+                            last_flush = time.time()
+                finally:
+                    history.flush()
+        
+        self._abort.clear()
+        if error:
+            raise error
     
     def download_all_as_zip(
         self,
@@ -0,0 +1,186 @@
+"""
+QuickShare Shared File Index
+Paylaşılan dosyalar için relative path -> absolute path indeksi
+"""
+
+import os
+import time
+import threading
+from typing import List, Dict, Optional
+
+
+# Lookup miss olduğunda ağacı en fazla bu sıklıkta yeniden tara (saniye)
+REFRESH_INTERVAL = 1.0
+
+
+def normalize_name(name: str) -> str:
+    """Dosya adını indeks anahtarına çevir (Windows ayırıcılarını '/' yap)"""
+    return name.replace('\\', '/')
+
+
+class SharedFileIndex:
+    """
+    Paylaşılan dosyaların bir kez oluşturulan indeksi.
+
+    Her dosya için {name, path, size, mtime, inode} tutulur; route'lar
+    O(1) dict lookup yapar. Dizinlerin mtime'ı da saklanır, böylece
+    ağaç değiştiğinde sadece değişen dizinler yeniden taranır.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Dict] = {}     # {normalized_name: entry}
+        self._roots: List[str] = []
+        self._dirs: Dict[str, tuple] = {}       # {dir_path: (root, mtime_ns)}
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def build(self, paths: List[str]):
+        """
+        İndeksi sıfırdan oluştur
+
+        Args:
+            paths: Paylaşılan dosya/dizin path listesi
+        """
+        with self._lock:
+            self._entries = {}
+            self._dirs = {}
+            self._roots = list(paths)
+            for path in self._roots:
+                if os.path.isfile(path):
+                    self._add_file(path, None)
+                elif os.path.isdir(path):
+                    self._scan_dir(path, path)
+            self._last_refresh = time.time()
+
+    def _add_file(self, filepath: str, base_path: Optional[str]) -> Optional[Dict]:
+        """Tek dosyayı indekse ekle (aynı isim varsa ilk eklenen kazanır)"""
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return None
+
+        name = os.path.relpath(filepath, base_path) if base_path else os.path.basename(filepath)
+        key = normalize_name(name)
+        if key in self._entries:
+            return self._entries[key]
+
+        entry = {
+            "name": name,
+            "path": filepath,
+            "size": st.st_size,
+            "mtime": st.st_mtime_ns,
+            "inode": st.st_ino,
+            "root": base_path,
+        }
+        self._entries[key] = entry
+        return entry
+
+    def _scan_dir(self, directory: str, root: str):
+        """Dizini recursive tara, dosyaları ve dizin mtime'larını kaydet"""
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+            with os.scandir(directory) as it:
+                children = list(it)
+        except OSError:
+            return
+
+        self._dirs[directory] = (root, mtime)
+        for child in children:
+            try:
+                if child.is_dir(follow_symlinks=True):
+                    if child.path not in self._dirs:
+                        self._scan_dir(child.path, root)
+                elif child.is_file(follow_symlinks=True):
+                    self._add_file(child.path, root)
+            except OSError:
+                continue
+
+    def refresh(self):
+        """
+        Değişen dizinleri artımlı olarak yeniden tara.
+
+        Sadece mtime'ı değişen (dosya eklenen/silinen) dizinlerin içeriği
+        yeniden okunur; silinen dosyalar ve dizinler indeksten çıkarılır.
+        """
+        with self._lock:
+            for directory, (root, mtime) in list(self._dirs.items()):
+                try:
+                    current = os.stat(directory).st_mtime_ns
+                except OSError:
+                    self._drop_dir(directory)
+                    continue
+                if current == mtime:
+                    continue
+
+                # Bu dizindeki doğrudan dosyaları düşür, sonra yeniden tara
+                for key, entry in list(self._entries.items()):
+                    if os.path.dirname(entry["path"]) == directory:
+                        del self._entries[key]
+                self._scan_dir(directory, root)
+
+            for path in self._roots:
+                if os.path.isfile(path) and normalize_name(os.path.basename(path)) not in self._entries:
+                    self._add_file(path, None)
+                elif os.path.isdir(path) and path not in self._dirs:
+                    self._scan_dir(path, path)
+            self._last_refresh = time.time()
+
+    def _drop_dir(self, directory: str):
+        """Silinmiş dizini ve altındaki her şeyi indeksten çıkar"""
+        prefix = directory.rstrip(os.sep) + os.sep
+        for d in list(self._dirs):
+            if d == directory or d.startswith(prefix):
+                del self._dirs[d]
+        for key, entry in list(self._entries.items()):
+            if entry["path"].startswith(prefix):
+                del self._entries[key]
+
+    def lookup(self, filename: str) -> Optional[Dict]:
+        """
+        İsme göre dosyayı bul
+
+        Args:
+            filename: Dosya adı veya relative path ('/' veya '\\' ile)
+
+        Returns:
+            Güncel stat bilgisiyle entry veya None
+        """
+        key = normalize_name(filename)
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is None:
+            # Ağaç değişmiş olabilir, throttle ederek yeniden tara
+            if time.time() - self._last_refresh < REFRESH_INTERVAL:
+                return None
+            self.refresh()
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+        try:
+            st = os.stat(entry["path"])
+        except OSError:
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+
+        if st.st_size != entry["size"] or st.st_mtime_ns != entry["mtime"] or st.st_ino != entry["inode"]:
+            with self._lock:
+                entry = dict(entry, size=st.st_size, mtime=st.st_mtime_ns, inode=st.st_ino)
+                self._entries[key] = entry
+        return entry
+
+    def files(self) -> List[Dict]:
+        """Tüm dosya entry'lerini eklenme sırasıyla döndür"""
+        with self._lock:
+            return list(self._entries.values())
+
+    def total_size(self) -> int:
+        """İndeksteki dosyaların toplam boyutu (bytes)"""
+        with self._lock:
+            return sum(e["size"] for e in self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,386 @@
+"""
+QuickShare File Writer
+Alıcı tarafı disk katmanı: sınırlı kuyruk + ayrı yazıcı thread
+
+DataChannel callback'i yalnızca işi kuyruğa ekler; dosya açma, yazma,
+SHA256 ve FILE_END doğrulaması yazıcı thread'inde yapılır. Aynı dosyaya
+ait ardışık chunk'lar tek bir büyük yazma (pwritev) ile diske gider.
+Kuyruk dolunca üretici bekletilmez; on_backpressure ile göndericinin
+durdurulması istenir.
+"""
+
+import os
+import zlib
+import hashlib
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional
+from utils import pwrite, pread, hash_file_prefix
+
+
+WRITE_BUFFER_BYTES = 32 * 1024 * 1024   # Kuyruktaki en fazla veri (aşılınca on_backpressure(True))
+COALESCE_BYTES = 4 * 1024 * 1024        # Tek seferde birleştirilen en fazla veri
+MAX_IOV = 512                           # pwritev başına en fazla buffer
+REORDER_BYTES = 16 * 1024 * 1024        # Hash için bekletilen sıra dışı veri sınırı
+
+_OP_OPEN = 0
+_OP_DATA = 1
+_OP_END = 2
+_OP_BARRIER = 3
+_OP_COPY = 4
+_OP_ZDATA = 5
+_OP_ABORT = 6
+
+
+def _write_views(fd: int, views: List, offset: int):
+    """Buffer listesini offset'ten yaz (mümkünse kopyasız pwritev)"""
+    if len(views) == 1:
+        pwrite(fd, views[0], offset)
+        return
+    if hasattr(os, "pwritev"):
+        total = sum(len(v) for v in views)
+        written = os.pwritev(fd, views, offset)
+        if written == total:
+            return
+        # Kısmi yazma (nadir): kalanı düz pwrite ile tamamla
+        pwrite(fd, b"".join(views)[written:], offset + written)
+        return
+    pwrite(fd, b"".join(views), offset)
+
+
+class FileWriter:
+    """
+    Sınırlı kuyruklu, tek thread'li dosya yazıcı
+
+    Sıra dışı gelen chunk'lar (çoklu kanal) hash için REORDER_BYTES'a kadar
+    bekletilir; sınır aşılırsa hash dosya kapanırken diskten hesaplanır.
+
+    Kuyruğa ekleme hiç beklemez (çağıran event loop'u bloklanmaz). Bekleyen
+    veri max_buffered'ı aşınca on_backpressure(True), yarısının altına
+    inince on_backpressure(False) çağrılır; çağıran bu sürede veri
+    kaynağını durdurmalıdır.
+
+    Callback'ler yazıcı thread'inden çağrılır:
+        on_complete(file_id, name, expected_hash, actual_hash)
+            actual_hash: hex digest, hata durumunda None
+        on_error(file_id, name, exc)
+            Beklenmeyen hatalarda (ör. bir callback'in hatası) file_id ve
+            name None olabilir; thread çalışmaya devam eder.
+        on_backpressure(paused)
+            True üreticinin thread'inden gelir; kilit altında çağrıldığından
+            bloklamamalıdır (ör. yalnızca loop.call_soon_threadsafe).
+    """
+
+    def __init__(self, max_buffered: int = WRITE_BUFFER_BYTES, coalesce_bytes: int = COALESCE_BYTES,
+                 on_complete: Optional[Callable] = None, on_error: Optional[Callable] = None,
+                 on_backpressure: Optional[Callable] = None):
+        self.max_buffered = max_buffered
+        self.coalesce_bytes = coalesce_bytes
+        self.on_complete = on_complete
+        self.on_error = on_error
+        self.on_backpressure = on_backpressure
+        self._ops = deque()
+        self._buffered = 0
+        self._paused = False  # on_backpressure(True) bildirildi, henüz boşalmadı
+        self._cond = threading.Condition()
+        self._closed = False
+        self._files: Dict[int, Dict] = {}  # Yalnızca yazıcı thread'i kullanır
+        self._thread: Optional[threading.Thread] = None
+
+    def _put(self, op: tuple, size: int = 0):
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="quickshare-writer", daemon=True)
+                self._thread.start()
+            if self._closed:
+                return
+            self._ops.append(op)
+            self._buffered += size
+            self._cond.notify_all()
+            # Disk geride kaldı: beklemek yerine kaynağın durdurulmasını iste
+            if self._buffered > self.max_buffered and not self._paused:
+                self._set_paused(True)
+
+    def _set_paused(self, paused: bool):
+        """Basınç durumunu değiştir ve bildir (kilit altında çağrılır)"""
+        self._paused = paused
+        if self.on_backpressure:
+            try:
+                self.on_backpressure(paused)
+            except Exception:
+                pass  # Bildirim hatası kuyruğu etkilememeli
+
+    @property
+    def paused(self) -> bool:
+        """Bekleyen veri sınırı aştı ve henüz yarısının altına inmedi"""
+        return self._paused
+
+    def open(self, file_id: int, path: str, name: str, offset: int = 0,
+             source: Optional[str] = None, final_path: Optional[str] = None):
+        """
+        Dosyayı yazmaya aç (offset > 0 ise mevcut veri korunur ve hash'e katılır)
+
+        Args:
+            file_id: Dosya id'si
+            path: Hedef yol
+            name: Log/callback için dosya adı
+            offset: Devam edilen byte sayısı
+            source: copy() işlemlerinin okunacağı dosya (delta: eski kopya)
+            final_path: Hash doğrulanınca path'in taşınacağı yol
+        """
+        self._put((_OP_OPEN, file_id, path, name, offset, source, final_path))
+
+    def write(self, file_id: int, offset: int, data):
+        """Veriyi kuyruğa ekle (bytes / memoryview, kopyalanmaz)"""
+        self._put((_OP_DATA, file_id, offset, data), len(data))
+
+    def write_compressed(self, file_id: int, offset: int, data, length: int):
+        """zlib ile sıkıştırılmış bir parçayı kuyruğa ekle (açılması yazıcı thread'inde yapılır)"""
+        self._put((_OP_ZDATA, file_id, offset, data, length), len(data))
+
+    def copy(self, file_id: int, offset: int, src_offset: int, length: int, source: Optional[str] = None):
+        """
+        Kaynak dosyanın [src_offset, src_offset + length) aralığını offset'e yaz
+
+        source verilmezse open() ile verilen kaynak dosya kullanılır.
+        """
+        self._put((_OP_COPY, file_id, offset, src_offset, length, source))
+
+    def finish(self, file_id: int, size: int, expected_hash: str):
+        """Dosyayı size'a kes, kapat ve hash'i doğrula (sonuç on_complete ile)"""
+        self._put((_OP_END, file_id, size, expected_hash))
+
+    def abort(self, file_id: int):
+        """Dosyayı doğrulamadan kapat; on_complete actual_hash=None ile çağrılır"""
+        self._put((_OP_ABORT, file_id))
+
+    def barrier(self, callback: Callable):
+        """Önceki tüm işler bittikten sonra callback'i yazıcı thread'inde çağır"""
+        self._put((_OP_BARRIER, callback))
+
+    def close(self):
+        """Bekleyen işleri at, thread'i durdur ve açık dosyaları kapat"""
+        with self._cond:
+            self._closed = True
+            self._ops.clear()
+            self._buffered = 0
+            self._paused = False
+            self._cond.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        for state in list(self._files.values()):
+            self._close_handle(state)
+        self._files.clear()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._ops and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                ops = [self._ops.popleft()]
+                size = 0
+                if ops[0][0] == _OP_DATA:
+                    # Aynı dosyanın ardışık chunk'larını birleştir
+                    _, file_id, offset, data = ops[0]
+                    size = len(data)
+                    end = offset + size
+                    while (self._ops and len(ops) < MAX_IOV and size < self.coalesce_bytes
+                           and self._ops[0][0] == _OP_DATA and self._ops[0][1] == file_id
+                           and self._ops[0][2] == end):
+                        op = self._ops.popleft()
+                        ops.append(op)
+                        size += len(op[3])
+                        end += len(op[3])
+                elif ops[0][0] == _OP_ZDATA:
+                    size = len(ops[0][3])
+
+            try:
+                self._apply(ops)
+            except Exception as e:
+                self._report(ops[0], e)
+            finally:
+                with self._cond:
+                    self._buffered -= size
+                    if self._paused and self._buffered <= self.max_buffered // 2:
+                        self._set_paused(False)
+                    self._cond.notify_all()
+
+    def _report(self, op: tuple, exc: Exception):
+        """İşlemden kaçan hatayı on_error ile bildir; dosya başarısız sayılır, thread sürer"""
+        file_id = op[1] if op[0] != _OP_BARRIER else None
+        state = self._files.get(file_id) if file_id is not None else None
+        if state is not None:
+            state["failed"] = True
+            self._close_handle(state)
+        if self.on_error:
+            try:
+                self.on_error(file_id, state["name"] if state else None, exc)
+            except Exception:
+                pass  # on_error'ın kendi hatası thread'i durdurmamalı
+
+    def _apply(self, ops: List[tuple]):
+        kind = ops[0][0]
+        if kind == _OP_OPEN:
+            self._do_open(*ops[0][1:])
+        elif kind == _OP_DATA:
+            self._do_write(ops[0][1], ops[0][2], [op[3] for op in ops])
+        elif kind == _OP_END:
+            self._do_finish(*ops[0][1:])
+        elif kind == _OP_COPY:
+            self._do_copy(*ops[0][1:])
+        elif kind == _OP_ZDATA:
+            self._do_write_compressed(*ops[0][1:])
+        elif kind == _OP_ABORT:
+            self._do_abort(ops[0][1])
+        elif kind == _OP_BARRIER:
+            ops[0][1]()
+
+    def _do_open(self, file_id: int, path: str, name: str, offset: int,
+                 source: Optional[str], final_path: Optional[str]):
+        state = {"name": name, "path": path, "handle": None, "failed": False,
+                 "pending": {}, "pending_bytes": 0, "source": None, "final_path": final_path}
+        self._files[file_id] = state
+        try:
+            if source:
+                state["source"] = open(source, "rb")
+            dirpath = os.path.dirname(path)
+            if dirpath:
+                os.makedirs(dirpath, exist_ok=True)
+            if offset > 0 and os.path.exists(path):
+                state["handle"] = open(path, "r+b")
+                state["hash"] = hash_file_prefix(path, offset)  # Gönderenin digest'i tüm dosyayı kapsar
+            else:
+                offset = 0
+                state["handle"] = open(path, "wb")
+                state["hash"] = hashlib.sha256()
+            state["hash_pos"] = offset
+            state["in_order"] = True
+        except OSError as e:
+            self._fail(file_id, state, e)
+
+    def _do_write(self, file_id: int, offset: int, views: List):
+        state = self._files.get(file_id)
+        if state is None or state["failed"]:
+            return
+        try:
+            _write_views(state["handle"].fileno(), views, offset)
+        except OSError as e:
+            self._fail(file_id, state, e)
+            return
+        if not state["in_order"]:
+            return
+        if offset == state["hash_pos"]:
+            for view in views:
+                state["hash"].update(view)
+                state["hash_pos"] += len(view)
+            # Bekleyen sıra dışı parçalar artık hash'e eklenebilir mi?
+            pending = state["pending"]
+            while state["hash_pos"] in pending:
+                data = pending.pop(state["hash_pos"])
+                state["pending_bytes"] -= len(data)
+                state["hash"].update(data)
+                state["hash_pos"] += len(data)
+        elif offset > state["hash_pos"]:
+            data = views[0] if len(views) == 1 else b"".join(views)
+            state["pending"][offset] = data
+            state["pending_bytes"] += len(data)
+            if state["pending_bytes"] > REORDER_BYTES:
+                self._drop_running_hash(state)
+        else:
+            self._drop_running_hash(state)  # Aynı bölge tekrar yazıldı
+
+    def _do_write_compressed(self, file_id: int, offset: int, data, length: int):
+        state = self._files.get(file_id)
+        if state is None or state["failed"]:
+            return
+        try:
+            raw = zlib.decompress(data)
+        except zlib.error as e:
+            self._fail(file_id, state, OSError(f"Corrupt compressed block at {offset}: {e}"))
+            return
+        if len(raw) != length:
+            self._fail(file_id, state, OSError(f"Compressed block at {offset} has {len(raw)} bytes, expected {length}"))
+            return
+        self._do_write(file_id, offset, [raw])
+
+    def _do_copy(self, file_id: int, offset: int, src_offset: int, length: int, source: Optional[str]):
+        state = self._files.get(file_id)
+        if state is None or state["failed"]:
+            return
+        if source is None and state["source"] is None:
+            self._fail(file_id, state, OSError("No source file to copy from"))
+            return
+        try:
+            if source is None:
+                data = pread(state["source"].fileno(), length, src_offset)
+            else:
+                # Tekrar eden parça: başka bir (veya aynı) dosyanın önceden yazılmış kısmı
+                with open(source, "rb") as f:
+                    data = pread(f.fileno(), length, src_offset)
+        except OSError as e:
+            self._fail(file_id, state, e)
+            return
+        if len(data) < length:
+            self._fail(file_id, state, OSError(f"Source file shorter than {src_offset + length} bytes"))
+            return
+        self._do_write(file_id, offset, [data])
+
+    @staticmethod
+    def _drop_running_hash(state: Dict):
+        """Akan hash'ten vazgeç; kapanışta diskten hesaplanacak"""
+        state["in_order"] = False
+        state["pending"].clear()
+        state["pending_bytes"] = 0
+
+    def _do_finish(self, file_id: int, size: int, expected_hash: str):
+        state = self._files.pop(file_id, None)
+        if state is None:
+            return
+        actual_hash = None
+        if not state["failed"]:
+            try:
+                state["handle"].truncate(size)
+                if state["in_order"] and state["hash_pos"] == size:
+                    actual_hash = state["hash"].hexdigest()
+                else:
+                    state["handle"].flush()
+                    actual_hash = hash_file_prefix(state["path"], size).hexdigest()
+            except OSError as e:
+                self._fail(file_id, state, e)
+        self._close_handle(state)
+        if actual_hash and state["final_path"] and actual_hash == (expected_hash or actual_hash):
+            try:
+                os.replace(state["path"], state["final_path"])
+            except OSError as e:
+                self._fail(file_id, state, e)
+                actual_hash = None
+        if self.on_complete:
+            self.on_complete(file_id, state["name"], expected_hash, actual_hash)
+
+    def _do_abort(self, file_id: int):
+        state = self._files.pop(file_id, None)
+        if state is None:
+            return
+        # Yazılan kısım diskte kalır (sonraki indirme kaldığı yerden devam edebilir)
+        self._close_handle(state)
+        if self.on_complete:
+            self.on_complete(file_id, state["name"], None, None)
+
+    def _fail(self, file_id: int, state: Dict, exc: Exception):
+        state["failed"] = True
+        self._close_handle(state)
+        if self.on_error:
+            self.on_error(file_id, state["name"], exc)
+
+    @staticmethod
+    def _close_handle(state: Dict):
+        for key in ("handle", "source"):
+            handle = state.get(key)
+            if handle:
+                state[key] = None
+                try:
+                    handle.close()
+                except OSError:
+                    pass
@@ -0,0 +1,342 @@
+"""
+QuickShare Hash Cache
+SQLite tabanlı, dosya kimliğine (path, size, mtime, inode) göre SHA256 önbelleği
+(ve Merkle doğrulaması için blok hash'leri, tekrar tespiti için CDC parçaları)
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from typing import Optional, Dict, List
+from utils import calculate_file_hash
+
+
+# Default cache path (transfer history ile aynı data dizini)
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_CACHE_FILE = os.path.join(DEFAULT_CACHE_DIR, "hash_cache.db")
+MAX_ENTRIES = 10000
+HASH_BUFFER_SIZE = 1024 * 1024  # 1 MB (cache miss durumunda okuma bloğu)
+
+
+def file_identity(path: str, st: Optional[os.stat_result] = None) -> tuple:
+    """Dosyanın önbellek kimliği: (size, mtime_ns, inode)"""
+    if st is None:
+        st = os.stat(path)
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+class HashCache:
+    """
+    Dosya hash önbelleği — SQLite tabanlı, LRU eviction
+
+    Kayıtlar mutlak path'e göre tutulur ve (size, mtime, inode) değiştiğinde
+    geçersiz sayılır. Aynı dosya için eşzamanlı istekler tek bir hesaplamayı
+    bekler.
+    """
+
+    def __init__(self, filepath: str = DEFAULT_CACHE_FILE, max_entries: int = MAX_ENTRIES):
+        self.filepath = filepath
+        self.max_entries = max_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Lock] = {}
+        self._inflight_lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        """Bağlantıyı ilk kullanımda aç (import maliyetini düşük tutar)"""
+        if self._conn is None:
+            dirpath = os.path.dirname(self.filepath)
+            if dirpath:
+                os.makedirs(dirpath, exist_ok=True)
+            self._conn = sqlite3.connect(self.filepath, check_same_thread=False)
+            # Her isabet last_used'ı günceller: WAL + NORMAL ile commit başına fsync olmaz
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS hashes ("
+                "path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, "
+                "inode INTEGER, digest TEXT, last_used REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON hashes(last_used)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS blocks ("
+                "path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, "
+                "inode INTEGER, block_size INTEGER, leaves TEXT, last_used REAL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                "path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, "
+                "inode INTEGER, entries BLOB, last_used REAL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, path: str) -> Optional[str]:
+        """
+        Önbellekteki hash'i döndür
+
+        Args:
+            path: Dosya yolu
+
+        Returns:
+            Hex digest veya dosya değişmişse/kayıt yoksa None
+        """
+        path = os.path.abspath(path)
+        try:
+            identity = file_identity(path)
+        except OSError:
+            return None
+
+        try:
+            with self._lock:
+                db = self._db()
+                row = db.execute(
+                    "SELECT size, mtime, inode, digest FROM hashes WHERE path = ?", (path,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if tuple(row[:3]) != identity:
+                    db.execute("DELETE FROM hashes WHERE path = ?", (path,))
+                    db.commit()
+                    return None
+                db.execute("UPDATE hashes SET last_used = ? WHERE path = ?", (time.time(), path))
+                db.commit()
+                return row[3]
+        except sqlite3.Error as e:
+            print(f"[HashCache] Okuma hatası: {e}")
+            return None
+
+    def put(self, path: str, digest: str, identity: Optional[tuple] = None):
+        """
+        Hash'i önbelleğe yaz
+
+        Args:
+            path: Dosya yolu
+            digest: SHA256 hex digest
+            identity: Hash hesaplanırken alınan (size, mtime_ns, inode);
+                      verilmezse şu anki stat kullanılır
+        """
+        path = os.path.abspath(path)
+        try:
+            current = file_identity(path)
+        except OSError:
+            return
+        if identity is not None and tuple(identity) != current:
+            return  # Dosya hash sırasında değişti, kaydetme
+
+        try:
+            with self._lock:
+                db = self._db()
+                db.execute(
+                    "INSERT OR REPLACE INTO hashes (path, size, mtime, inode, digest, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (path, current[0], current[1], current[2], digest, time.time())
+                )
+                self._evict(db)
+                db.commit()
+        except sqlite3.Error as e:
+            print(f"[HashCache] Kayıt hatası: {e}")
+
+    def get_blocks(self, path: str, block_size: int) -> Optional[List[str]]:
+        """
+        Önbellekteki blok hash'lerini döndür
+
+        Args:
+            path: Dosya yolu
+            block_size: Beklenen blok boyutu
+
+        Returns:
+            Blok başına SHA256 hex listesi veya kayıt yoksa/geçersizse None
+        """
+        path = os.path.abspath(path)
+        try:
+            identity = file_identity(path)
+        except OSError:
+            return None
+
+        try:
+            with self._lock:
+                db = self._db()
+                row = db.execute(
+                    "SELECT size, mtime, inode, block_size, leaves FROM blocks WHERE path = ?", (path,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if tuple(row[:3]) != identity or row[3] != block_size:
+                    db.execute("DELETE FROM blocks WHERE path = ?", (path,))
+                    db.commit()
+                    return None
+                db.execute("UPDATE blocks SET last_used = ? WHERE path = ?", (time.time(), path))
+                db.commit()
+                leaves = row[4]
+                return [leaves[i:i + 64] for i in range(0, len(leaves), 64)]
+        except sqlite3.Error as e:
+            print(f"[HashCache] Okuma hatası: {e}")
+            return None
+
+    def put_blocks(self, path: str, block_size: int, leaves: List[str], identity: Optional[tuple] = None):
+        """
+        Blok hash'lerini önbelleğe yaz
+
+        Args:
+            path: Dosya yolu
+            block_size: Blok boyutu
+            leaves: Blok başına SHA256 hex listesi
+            identity: Hash hesaplanırken alınan (size, mtime_ns, inode)
+        """
+        path = os.path.abspath(path)
+        try:
+            current = file_identity(path)
+        except OSError:
+            return
+        if identity is not None and tuple(identity) != current:
+            return  # Dosya hash sırasında değişti, kaydetme
+
+        try:
+            with self._lock:
+                db = self._db()
+                db.execute(
+                    "INSERT OR REPLACE INTO blocks (path, size, mtime, inode, block_size, leaves, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (path, current[0], current[1], current[2], block_size, "".join(leaves), time.time())
+                )
+                self._evict(db, "blocks")
+                db.commit()
+        except sqlite3.Error as e:
+            print(f"[HashCache] Kayıt hatası: {e}")
+
+    def get_chunks(self, path: str) -> Optional[bytes]:
+        """
+        Önbellekteki CDC parça listesini döndür
+
+        Args:
+            path: Dosya yolu
+
+        Returns:
+            Paketlenmiş parça kayıtları (cdc.CHUNK_ENTRY dizisi) veya kayıt yoksa/geçersizse None
+        """
+        path = os.path.abspath(path)
+        try:
+            identity = file_identity(path)
+        except OSError:
+            return None
+
+        try:
+            with self._lock:
+                db = self._db()
+                row = db.execute(
+                    "SELECT size, mtime, inode, entries FROM chunks WHERE path = ?", (path,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if tuple(row[:3]) != identity:
+                    db.execute("DELETE FROM chunks WHERE path = ?", (path,))
+                    db.commit()
+                    return None
+                db.execute("UPDATE chunks SET last_used = ? WHERE path = ?", (time.time(), path))
+                db.commit()
+                return bytes(row[3])
+        except sqlite3.Error as e:
+            print(f"[HashCache] Okuma hatası: {e}")
+            return None
+
+    def put_chunks(self, path: str, entries: bytes, identity: Optional[tuple] = None):
+        """
+        CDC parça listesini önbelleğe yaz
+
+        Args:
+            path: Dosya yolu
+            entries: Paketlenmiş parça kayıtları
+            identity: Parçalar hesaplanırken alınan (size, mtime_ns, inode)
+        """
+        path = os.path.abspath(path)
+        try:
+            current = file_identity(path)
+        except OSError:
+            return
+        if identity is not None and tuple(identity) != current:
+            return  # Dosya okunurken değişti, kaydetme
+
+        try:
+            with self._lock:
+                db = self._db()
+                db.execute(
+                    "INSERT OR REPLACE INTO chunks (path, size, mtime, inode, entries, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (path, current[0], current[1], current[2], entries, time.time())
+                )
+                self._evict(db, "chunks")
+                db.commit()
+        except sqlite3.Error as e:
+            print(f"[HashCache] Kayıt hatası: {e}")
+
+    def _evict(self, db: sqlite3.Connection, table: str = "hashes"):
+        """max_entries'i aşan en eski kullanılmış kayıtları sil (LRU)"""
+        count = db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        if count > self.max_entries:
+            db.execute(
+                f"DELETE FROM {table} WHERE path IN "
+                f"(SELECT path FROM {table} ORDER BY last_used ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def invalidate(self, path: str):
+        """Dosyanın kaydını sil"""
+        try:
+            with self._lock:
+                db = self._db()
+                db.execute("DELETE FROM hashes WHERE path = ?", (os.path.abspath(path),))
+                db.execute("DELETE FROM blocks WHERE path = ?", (os.path.abspath(path),))
+                db.execute("DELETE FROM chunks WHERE path = ?", (os.path.abspath(path),))
+                db.commit()
+        except sqlite3.Error:
+            pass
+
+    def get_or_compute(self, path: str) -> str:
+        """
+        Hash'i önbellekten al, yoksa hesaplayıp kaydet
+
+        Args:
+            path: Dosya yolu
+
+        Returns:
+            SHA256 hex digest
+        """
+        digest = self.get(path)
+        if digest:
+            return digest
+
+        key = os.path.abspath(path)
+        with self._inflight_lock:
+            lock = self._inflight.setdefault(key, threading.Lock())
+
+        with lock:
+            # Bekleyen başka bir istek hesaplamış olabilir
+            digest = self.get(path)
+            if digest:
+                return digest
+            identity = file_identity(path)
+            digest = calculate_file_hash(path, chunk_size=HASH_BUFFER_SIZE)
+            self.put(path, digest, identity)
+
+        with self._inflight_lock:
+            if self._inflight.get(key) is lock and not lock.locked():
+                del self._inflight[key]
+        return digest
+
+    def clear(self):
+        """Tüm önbelleği sil"""
+        try:
+            with self._lock:
+                db = self._db()
+                db.execute("DELETE FROM hashes")
+                db.execute("DELETE FROM blocks")
+                db.execute("DELETE FROM chunks")
+                db.commit()
+        except sqlite3.Error:
+            pass
+
+
+# Global instance
+hash_cache = HashCache()
@@ -0,0 +1,309 @@
+"""
+QuickShare LAN Discovery
+Aynı ağdaki paylaşımları internet sinyal sunucusuna gitmeden bulma (UDP yayın)
+
+Gönderici, odası için yerel bir sinyal sunucusu (signal_server.SignalServer,
+tüm arayüzlerde) açar ve paylaşımı LAN_DISCOVERY_PORT'a UDP yayınıyla duyurur;
+aynı oda etiketini taşıyan sorgulara da hemen yanıt verir. Alıcı oda kodunun
+etiketini yayınla sorar, yanıtın geldiği adresteki sinyal sunucusuna bağlanır. Böylece eşleşme
+internet gidiş-dönüşü olmadan, internetsiz (air-gapped) ağlarda da çalışır;
+ICE trickle ile host adayları hemen denendiğinden STUN/TURN beklenmez.
+
+mDNS/DNS-SD yerine düz UDP yayını: ek bağımlılık yok, tek paketlik sorgu/yanıt.
+
+Mesajlar (JSON, UDP):
+    {"app": "quickshare", "v": 2, "type": "query", "tag": room_tag(oda) | null}
+    {"app": "quickshare", "v": 2, "type": "announce", "id", "tag", "port", "name", "caps"}
+    {"app": "quickshare", "v": 2, "type": "bye", "id", "tag"}
+
+Sinyal sunucusunun adresi paketin kaynak IP'sinden alınır (duyuruda IP yoktur).
+Oda kodu ağa hiç yazılmaz, yalnızca yavaş bir özeti (room_tag) gider: kodu
+bilmeyen biri odaya katılamaz. Kısa kodlar yine de çevrimdışı denenerek
+bulunabilir; gizli paylaşımlar için parola (caps.password) kullanılmalıdır.
+"""
+
+import json
+import time
+import hashlib
+import socket
+import secrets
+import ipaddress
+import threading
+from typing import Dict, List, Optional
+
+from config import LAN_BEACON_INTERVAL, LAN_DISCOVERY_PORT, LAN_DISCOVERY_TIMEOUT, WEBRTC_DIRECT_TRANSFER
+from transfer_protocol import PROTOCOL_VERSION
+
+
+APP = "quickshare"
+VERSION = 2                 # 2: oda kodu yerine room_tag
+MAX_PACKET = 2048           # Duyuru ve sorgular tek küçük pakettir
+MAX_NAME_LENGTH = 64
+TAG_LENGTH = 32             # hex karakter
+TAG_ITERATIONS = 100_000    # PBKDF2 turu; 6 haneli kodların tamamını denemeyi saatlere çıkarır
+TAG_SALT = b"quickshare-lan"
+QUERY_RETRY = 0.5           # saniye; UDP kaybına karşı sorgu tekrarı
+STOP_POLL = 0.25            # saniye; duyuru thread'inin durma kontrolü aralığı
+
+
+def room_tag(room: str) -> str:
+    """
+    Oda kodunun yerel ağda duyurulan özeti
+
+    Args:
+        room: Oda kodu
+
+    Returns:
+        TAG_LENGTH karakterlik hex PBKDF2-SHA256 özeti
+    """
+    digest = hashlib.pbkdf2_hmac("sha256", room.encode("utf-8"), TAG_SALT, TAG_ITERATIONS)
+    return digest.hex()[:TAG_LENGTH]
+
+
+def share_capabilities(files: List[Dict], password: Optional[str] = None) -> Dict:
+    """
+    Duyuruda paylaşılan yetenekler ve özet
+
+    Args:
+        files: Paylaşılan dosyalar ({name, path, size})
+        password: Paylaşım parolası (yalnızca var olup olmadığı duyurulur)
+
+    Returns:
+        {"files", "bytes", "password", "direct", "protocol"}
+    """
+    return {
+        "files": len(files),
+        "bytes": sum(f["size"] for f in files),
+        "password": bool(password),
+        "direct": WEBRTC_DIRECT_TRANSFER,
+        "protocol": PROTOCOL_VERSION,
+    }
+
+
+def broadcast_addresses() -> List[str]:
+    """
+    Sorgu ve duyuruların gönderileceği adresler
+
+    255.255.255.255 yalnızca varsayılan arayüzden çıkar; birden fazla ağa bağlı
+    makinelerde her IPv4 arayüzünün yayın adresi de eklenir. Aynı makinedeki
+    paylaşımlar için 127.0.0.1 her zaman listededir.
+    """
+    addresses = ["255.255.255.255", "127.0.0.1"]
+    try:
+        import ifaddr  # aioice bağımlılığı
+        adapters = ifaddr.get_adapters()
+    except (ImportError, OSError):
+        return addresses
+    for adapter in adapters:
+        for ip in adapter.ips:
+            if not isinstance(ip.ip, str):
+                continue  # IPv6
+            network = ipaddress.ip_network(f"{ip.ip}/{ip.network_prefix}", strict=False)
+            if network.is_loopback or network.prefixlen >= 31:
+                continue
+            address = str(network.broadcast_address)
+            if address not in addresses:
+                addresses.append(address)
+    return addresses
+
+
+def _message(kind: str, **fields) -> bytes:
+    return json.dumps({"app": APP, "v": VERSION, "type": kind, **fields}).encode("utf-8")
+
+
+def _parse(data: bytes) -> Optional[Dict]:
+    """Geçerli bir QuickShare keşif mesajı ya da None"""
+    try:
+        msg = json.loads(data.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(msg, dict) or msg.get("app") != APP or msg.get("v") != VERSION:
+        return None
+    tag = msg.get("tag")
+    if tag is not None and (not isinstance(tag, str) or len(tag) != TAG_LENGTH):
+        return None
+    if msg.get("type") == "announce":
+        port = msg.get("port")
+        if (not isinstance(port, int) or not 0 < port < 65536 or not tag
+                or not isinstance(msg.get("id"), str) or not isinstance(msg.get("caps", {}), dict)):
+            return None
+    return msg
+
+
+def _udp_socket(port: int = 0) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    if port:
+        # Aynı makinedeki birden fazla paylaşım portu paylaşır; yayınlar hepsine ulaşır
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, "SO_REUSEPORT"):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    try:
+        sock.bind(("", port))
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class LanShare:
+    """
+    Bir paylaşımı yerel ağda duyurur ve yerel sinyal sunucusunu çalıştırır
+
+    Duyurularda oda kodu yerine room_tag gider; etiketsiz sorgular (scan)
+    da yanıtlanır ama kodu bilmeyen tarayıcı odaya katılamaz.
+
+    Kullanım:
+        lan = LanShare(code, share_capabilities(files, password))
+        url = lan.start()                # göndericinin kendi SignalingClient'ı için
+        ...
+        lan.stop()
+    """
+
+    def __init__(self, room: str, capabilities: Optional[Dict] = None, port: int = LAN_DISCOVERY_PORT,
+                 interval: float = LAN_BEACON_INTERVAL, targets: Optional[List[str]] = None):
+        self.room = room
+        self.tag = room_tag(room)
+        self.capabilities = capabilities or {}
+        self.port = port
+        self.interval = interval
+        self.targets = targets
+        self.id = secrets.token_hex(8)
+        self.name = socket.gethostname()
+        self.server = None
+        self._sock: Optional[socket.socket] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> str:
+        """
+        Yerel sinyal sunucusunu aç, duyuru ve sorgu yanıtlamayı başlat
+
+        Returns:
+            Yerel sinyal sunucusunun bu makineden adresi (http://127.0.0.1:port)
+
+        Raises:
+            OSError: Sinyal sunucusu ya da keşif portu açılamazsa
+        """
+        from signal_server import SignalServer
+
+        self.server = SignalServer(host="0.0.0.0")
+        self.server.start()
+        try:
+            self._sock = _udp_socket(self.port)
+        except OSError:
+            self.server.stop()
+            raise
+        if self.targets is None:
+            self.targets = broadcast_addresses()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="quickshare-lan")
+        self._thread.start()
+        return f"http://127.0.0.1:{self.server.port}"
+
+    def _announcement(self) -> bytes:
+        return _message("announce", id=self.id, tag=self.tag, port=self.server.port,
+                        name=self.name, caps=self.capabilities)
+
+    def _broadcast(self, packet: bytes):
+        for address in self.targets:
+            try:
+                self._sock.sendto(packet, (address, self.port))
+            except OSError:
+                pass  # Ağ arayüzü kapanmış olabilir
+
+    def _run(self):
+        next_beacon = 0.0
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if now >= next_beacon:
+                self._broadcast(self._announcement())
+                next_beacon = now + self.interval
+            # Kısa bekleme: stop() duyuru aralığını beklemeden döner
+            self._sock.settimeout(min(STOP_POLL, max(0.01, next_beacon - now)))
+            try:
+                data, addr = self._sock.recvfrom(MAX_PACKET)
+            except socket.timeout:
+                continue
+            except OSError:
+                if self._stop.is_set():
+                    break
+                continue
+            msg = _parse(data)
+            if msg and msg["type"] == "query" and msg.get("tag") in (None, self.tag):
+                try:
+                    self._sock.sendto(self._announcement(), addr)
+                except OSError:
+                    pass
+
+    def stop(self):
+        """Duyuruyu kaldır (bye), sinyal sunucusunu kapat"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=STOP_POLL + 1)
+            self._broadcast(_message("bye", id=self.id, tag=self.tag))
+            self._sock.close()
+            self._thread = None
+        if self.server is not None:
+            self.server.stop()
+            self.server = None
+
+
+def discover(room: Optional[str] = None, timeout: float = LAN_DISCOVERY_TIMEOUT,
+             port: int = LAN_DISCOVERY_PORT, targets: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Yerel ağdaki paylaşımları sorgula
+
+    Args:
+        room: Aranan oda kodu (ağa yalnızca room_tag gider); verilirse ilk
+              yanıtta döner, None ise tüm paylaşımlar
+        timeout: En fazla bekleme süresi (saniye)
+        port: Keşif portu
+        targets: Sorgu adresleri (varsayılan: broadcast_addresses())
+
+    Returns:
+        [{"id", "tag", "name", "host", "url", "caps"}] (aynı paylaşım bir kez)
+    """
+    targets = targets or broadcast_addresses()
+    tag = room_tag(room) if room is not None else None
+    query = _message("query", tag=tag)
+    shares: Dict[str, Dict] = {}
+    sock = _udp_socket()
+    try:
+        deadline = time.monotonic() + timeout
+        next_query = 0.0
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if now >= next_query:
+                for address in targets:
+                    try:
+                        sock.sendto(query, (address, port))
+                    except OSError:
+                        pass
+                next_query = now + QUERY_RETRY
+            sock.settimeout(max(0.01, min(deadline, next_query) - now))
+            try:
+                data, (host, _) = sock.recvfrom(MAX_PACKET)
+            except socket.timeout:
+                continue
+            except OSError:
+                continue  # Windows: kapalı porta giden sorgunun ICMP hatası (WSAECONNRESET)
+            msg = _parse(data)
+            if not msg or msg["type"] != "announce" or msg["id"] in shares:
+                continue
+            if tag is not None and msg["tag"] != tag:
+                continue
+            shares[msg["id"]] = {
+                "id": msg["id"],
+                "tag": msg["tag"],
+                "name": str(msg.get("name", ""))[:MAX_NAME_LENGTH],
+                "host": host,
+                "url": f"http://{host}:{msg['port']}",
+                "caps": msg.get("caps", {}),
+            }
+            if tag is not None:
+                break
+    finally:
+        sock.close()
+    return list(shares.values())
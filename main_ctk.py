@@ -14,12 +14,13 @@ import webbrowser
 import asyncio
 from typing import List, Optional
 
-from config import WINDOW_WIDTH, WINDOW_HEIGHT, WINDOW_TITLE, CF_TUNNEL_TOKEN, CF_TUNNEL_URL, save_config, DUCKDNS_DOMAIN, DUCKDNS_TOKEN, USE_DUCKDNS, SIGNALING_SERVER_URL
+from config import WINDOW_WIDTH, WINDOW_HEIGHT, WINDOW_TITLE, CF_TUNNEL_TOKEN, CF_TUNNEL_URL, save_config, DUCKDNS_DOMAIN, DUCKDNS_TOKEN, USE_DUCKDNS, SIGNALING_SERVER_URL, LAN_DISCOVERY
 from utils import format_size, format_speed, format_time, validate_url, calculate_total_size, calculate_eta
 from server import set_shared_files, run_server, transfer_monitor
 from tunnel_manager import TunnelManager
 from downloader import Downloader
 from webrtc_manager import WebRTCSender, WebRTCReceiver, SignalingClient
+from lan_discovery import LanShare, discover, share_capabilities
 import random
 import string
 from transfer_history import history
@@ -75,6 +76,8 @@ class QuickShareApp(Tk):
         self.selected_files: List[str] = []
         self.tunnel_manager: Optional[TunnelManager] = None
         self.webrtc_sender: Optional[WebRTCSender] = None
+        self.lan_share: Optional[LanShare] = None  # P2P share announced on the local network
+        self.lan_signaling: Optional[SignalingClient] = None
         self.use_p2p = False
         self.server_thread: Optional[threading.Thread] = None
         self.downloader: Optional[Downloader] = None
@@ -783,6 +786,10 @@ class QuickShareApp(Tk):
                         file_list.append({"name": rel, "path": f, "size": os.path.getsize(f)})
             self.webrtc_sender.set_files(file_list)
             
+            # Receivers on the same network find the share without the internet signaling server
+            if LAN_DISCOVERY:
+                self._start_lan_share(room_id, file_list)
+            
             signaling = SignalingClient(self.webrtc_sender._loop)
             
             # Helper to run async in sender's loop
@@ -792,6 +799,8 @@ class QuickShareApp(Tk):
                     self.webrtc_sender.setup_signaling(signaling)
                 except Exception as e:
                     print(f"Sinyal sunucusu bağlantı hatası: {e}")
+                    if self.lan_share:
+                        return  # Offline network: the share stays reachable on the LAN
                     self.after(0, lambda: messagebox.showerror("Bağlantı Hatası", f"Sinyal sunucusuna bağlanılamadı: {e}"))
                     self.after(0, self.stop_sharing)
                 
@@ -826,6 +835,37 @@ class QuickShareApp(Tk):
             self.after(0, lambda: messagebox.showerror("Hata", str(e)))
             self.after(0, self.stop_sharing)
 
+    def _start_lan_share(self, room_id, file_list):
+        """Announce the P2P share on the LAN and join its local signaling server"""
+        lan_share = LanShare(room_id, share_capabilities(file_list, self.webrtc_sender.password))
+        try:
+            url = lan_share.start()
+        except OSError as e:
+            print(f"Yerel ağ duyurusu başlatılamadı: {e}")
+            return
+        self.lan_share = lan_share
+        self.lan_signaling = SignalingClient(self.webrtc_sender._loop, url)
+        sender, signaling = self.webrtc_sender, self.lan_signaling
+
+        async def setup_async():
+            await signaling.connect(room_id)
+            sender.setup_signaling(signaling)
+
+        try:
+            asyncio.run_coroutine_threadsafe(setup_async(), sender._loop).result(timeout=10)
+        except Exception as e:
+            print(f"Yerel ağ sinyal sunucusuna katılınamadı: {e}")
+            self._stop_lan_share()
+
+    def _stop_lan_share(self):
+        """Withdraw the LAN announcement (in the background, the UI does not wait)"""
+        lan_share, signaling = self.lan_share, self.lan_signaling
+        self.lan_share = self.lan_signaling = None
+        if signaling and self.webrtc_sender:
+            asyncio.run_coroutine_threadsafe(signaling.close(), self.webrtc_sender._loop)
+        if lan_share:
+            threading.Thread(target=lan_share.stop, daemon=True).start()
+
     def stop_sharing(self):
         """Stop sharing (Tunnel or Direct)"""
         self.is_sharing = False
@@ -836,6 +876,8 @@ class QuickShareApp(Tk):
             self.tunnel_manager.stop()
         self.tunnel_manager = None
         
+        self._stop_lan_share()
+        
         # Stop WebRTC Sender (handles both Tunnel and Direct modes)
         if self.webrtc_sender:
             if hasattr(self.webrtc_sender, 'signaling') and self.webrtc_sender.signaling:
@@ -896,11 +938,25 @@ class QuickShareApp(Tk):
              receiver.start() # Start loop
              receiver.wait_until_ready() # Wait for loop
              
-             signaling = SignalingClient(receiver._loop)
+             # The internet join starts right away; if the share is on the same network,
+             # its own signaling server wins and the internet client is dropped
+             internet = SignalingClient(receiver._loop, SIGNALING_SERVER_URL)
+             joining = asyncio.run_coroutine_threadsafe(internet.connect(code), receiver._loop)
+             signaling = internet
+             if LAN_DISCOVERY:
+                 shares = discover(room=code)
+                 if shares:
+                     joining.cancel()
+                     asyncio.run_coroutine_threadsafe(internet.close(), receiver._loop)
+                     signaling = SignalingClient(receiver._loop, shares[0]["url"])
+                     self.after(0, self.log_message, f"Paylaşım yerel ağda bulundu: {shares[0]['name']} ({shares[0]['host']})")
              
              async def setup_async():
                  try:
-                     await signaling.connect(code)
+                     if signaling is internet:
+                         await asyncio.wrap_future(joining)
+                     else:
+                         await signaling.connect(code)
                      receiver.setup_signaling(signaling)
                      await receiver.connect_via_signaling()
                  except Exception as e:
@@ -1052,6 +1108,8 @@ class QuickShareApp(Tk):
             self.tunnel_manager.stop()
         self.tunnel_manager = None
         
+        self._stop_lan_share()
+        
         # Stop background thread
         # Server runs in daemon thread, hard to stop gracefully without complex logic
         # For now we just hide UI and stop WebRTC
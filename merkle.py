@@ -0,0 +1,176 @@
+"""
+QuickShare Merkle
+Sabit boyutlu bloklar üzerinde hash ağacı: doğrulanmış resume ve blok düzeyinde onarım
+
+Gönderici her büyük dosya için blok hash'lerini (yapraklar) ve kök hash'i
+yayınlar. Alıcı elindeki kısmi dosyanın bloklarını bunlarla karşılaştırıp
+yalnızca eksik veya bozuk blokları ister; dosya sonu hash'i uyuşmazsa da
+tüm dosya yerine yalnızca hatalı bloklar yeniden alınır.
+"""
+
+import os
+import hashlib
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from hash_cache import hash_cache, file_identity
+
+
+BLOCK_SIZE = 1024 * 1024  # En küçük Merkle blok boyutu
+MAX_BLOCKS = 256          # Dosya başına en fazla yaprak (blok boyutu buna göre büyür)
+
+_inflight: Dict[str, threading.Lock] = {}
+_inflight_lock = threading.Lock()
+
+
+def block_size_for(size: int) -> int:
+    """
+    Dosya boyutuna göre blok boyutu (2'nin kuvveti, en fazla MAX_BLOCKS yaprak)
+
+    Args:
+        size: Dosya boyutu
+
+    Returns:
+        Blok boyutu (byte)
+    """
+    block_size = BLOCK_SIZE
+    while size > block_size * MAX_BLOCKS:
+        block_size *= 2
+    return block_size
+
+
+def hash_file_blocks(path: str, block_size: int) -> Tuple[List[str], str]:
+    """
+    Dosyayı bir kez okuyup blok hash'lerini ve tüm dosyanın SHA256'sını hesapla
+
+    Args:
+        path: Dosya yolu
+        block_size: Blok boyutu
+
+    Returns:
+        (blok hex listesi, dosya hex digest)
+    """
+    leaves = []
+    whole = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            leaves.append(hashlib.sha256(block).hexdigest())
+            whole.update(block)
+    return leaves, whole.hexdigest()
+
+
+def merkle_root(leaves: List[str]) -> str:
+    """
+    Yapraklardan kök hash'i hesapla (tek kalan düğüm bir üst seviyeye aynen çıkar)
+
+    Args:
+        leaves: Blok hex listesi
+
+    Returns:
+        Kök hex digest (boş liste için boş verinin SHA256'sı)
+    """
+    level = [bytes.fromhex(leaf) for leaf in leaves]
+    if not level:
+        return hashlib.sha256(b"").hexdigest()
+    while len(level) > 1:
+        paired = [hashlib.sha256(level[i] + level[i + 1]).digest() for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0].hex()
+
+
+def file_blocks(path: str) -> Optional[Dict]:
+    """
+    file_list / HTTP için blok bilgisi (önbellekten, yoksa hesaplanıp kaydedilir)
+
+    Tek bloğa sığan dosyalar için None döner; onları doğrulamak tüm dosyayı
+    yeniden almakla aynıdır.
+
+    Args:
+        path: Dosya yolu
+
+    Returns:
+        {"block_size", "blocks", "root"} veya None
+    """
+    identity = file_identity(path)
+    if identity[0] <= BLOCK_SIZE:
+        return None
+    block_size = block_size_for(identity[0])
+    leaves = hash_cache.get_blocks(path, block_size)
+    if leaves is None:
+        key = os.path.abspath(path)
+        with _inflight_lock:
+            lock = _inflight.setdefault(key, threading.Lock())
+        with lock:
+            # Bekleyen başka bir istek hesaplamış olabilir
+            leaves = hash_cache.get_blocks(path, block_size)
+            if leaves is None:
+                leaves, digest = hash_file_blocks(path, block_size)
+                hash_cache.put_blocks(path, block_size, leaves, identity)
+                hash_cache.put(path, digest, identity)  # Sonraki FILE_END/hash istekleri için
+        with _inflight_lock:
+            if _inflight.get(key) is lock and not lock.locked():
+                del _inflight[key]
+    return {"block_size": block_size, "blocks": leaves, "root": merkle_root(leaves)}
+
+
+def valid_blocks(info) -> bool:
+    """Karşı taraftan gelen blok bilgisi tutarlı mı (yapraklar kökü veriyor mu)?"""
+    try:
+        return (int(info["block_size"]) > 0 and isinstance(info["blocks"], list)
+                and merkle_root(info["blocks"]) == info["root"])
+    except (KeyError, TypeError, ValueError):
+        return False
+
+
+def missing_ranges(path: str, size: int, block_size: int, leaves: List[str],
+                   feed: Optional[Callable[[bytes], None]] = None) -> List[Tuple[int, int]]:
+    """
+    Yerel dosyada eksik veya bozuk blokların [start, end) aralıkları (bitişikler birleşik)
+
+    Args:
+        path: Yerel (kısmi) dosya
+        size: Beklenen dosya boyutu
+        block_size: Blok boyutu
+        leaves: Beklenen blok hex listesi
+        feed: Verilirse yerel dosyanın tamamı (beklenen boyutun ötesi dahil)
+            sırayla buna da verilir; ikinci bir okuma gerekmez (bkz. delta.check_local)
+
+    Returns:
+        Yeniden alınması gereken aralıklar; dosya tamamsa boş liste
+    """
+    ranges: List[Tuple[int, int]] = []
+
+    def mark(start: int, end: int):
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return [(0, size)] if size else []
+    with f:
+        for index, leaf in enumerate(leaves):
+            start = index * block_size
+            end = min(start + block_size, size)
+            if start >= size:
+                break
+            block = f.read(end - start)
+            if feed is not None and block:
+                feed(block)
+            if len(block) < end - start or hashlib.sha256(block).hexdigest() != leaf:
+                mark(start, end)
+        while feed is not None:
+            block = f.read(block_size)
+            if not block:
+                break
+            feed(block)
+    covered = len(leaves) * block_size
+    if covered < size:
+        mark(covered, size)  # Yaprağı olmayan kuyruk (olmamalı)
+    return ranges
@@ -0,0 +1,453 @@
+"""
+QuickShare CLI
+Arayüz gerektirmeyen (headless) gönderme, alma ve HTTP paylaşımı
+
+Kullanım:
+    python quickshare.py send rapor.pdf klasor/ [--code 123456] [--password P] [--once]
+    python quickshare.py receive 123456 -o indirilenler/ [--files a.txt b.txt]
+    python quickshare.py receive https://paylasim.example.com -o indirilenler/
+    python quickshare.py serve klasor/ --host 0.0.0.0 --port 5000
+    python quickshare.py scan                       # yerel ağdaki paylaşımlar
+
+P2P paylaşımlar yerel ağda da duyurulur (lan_discovery); alıcı oda kodunu yerel
+ağda ararken internet sinyal sunucusuna da katılmaya başlar, paylaşım yerel ağda
+bulunursa onu kullanır (--no-lan kapatır).
+
+stdout'a satır başına bir JSON olay yazılır ("ready", "log", "progress",
+"peer_done", "share", "done", "error"); modüllerin kendi print çıktıları stderr'e
+yönlendirilir. aiortc, Flask ve requests yalnızca ilgili alt komut
+çalışırken yüklenir, böylece --help ve argüman hataları anında döner.
+
+Çıkış kodları: 0 başarılı, 1 hata, 130 Ctrl+C
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import random
+import string
+import argparse
+import threading
+import contextlib
+from typing import Dict, List, Optional
+
+# Add directory to sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+
+from config import SERVER_HOST, SERVER_PORT, SIGNALING_SERVER_URL, LAN_DISCOVERY, LAN_DISCOVERY_TIMEOUT
+
+
+PROGRESS_INTERVAL = 0.5     # saniye (progress olayları arası en az süre)
+CONNECT_TIMEOUT = 90        # saniye (sinyal sunucusuna katılma; uyuyan sunucu uyanabilsin)
+PEER_CLOSE_TIMEOUT = 30     # saniye (--once: bitişten sonra eksik aralık istekleri için bekleme)
+
+
+class EventWriter:
+    """
+    Olayları JSON satırları olarak yazar (thread-safe)
+
+    progress olayları PROGRESS_INTERVAL'a seyreltilir; son durum (done ==
+    total) her zaman yazılır.
+    """
+
+    def __init__(self, stream, interval: float = PROGRESS_INTERVAL):
+        self._stream = stream
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._last_progress = 0.0
+
+    def emit(self, event: str, **fields):
+        line = json.dumps({"event": event, "time": round(time.time(), 3), **fields}, ensure_ascii=False)
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+
+    def log(self, message: str):
+        self.emit("log", message=str(message))
+
+    def progress(self, done: int, total: int, speed: float, file_index: int = 0, file_count: int = 0):
+        """Transfer ilerlemesi (webrtc_manager / downloader callback imzası)"""
+        now = time.monotonic()
+        with self._lock:
+            if done < total and now - self._last_progress < self._interval:
+                return
+            self._last_progress = now
+        self.emit("progress", bytes=done, total=total,
+                  percent=round(done / total * 100, 1) if total else 100.0,
+                  speed=round(speed), file=file_index, files=file_count)
+
+
+def collect_files(paths: List[str]) -> List[Dict]:
+    """
+    Gönderilecek dosya listesi
+
+    Klasörlerdeki dosyalar klasöre göre göreli adla eklenir (GUI ile aynı).
+
+    Args:
+        paths: Dosya veya klasör yolları
+
+    Returns:
+        [{name, path, size}]
+
+    Raises:
+        FileNotFoundError: Yol yoksa
+    """
+    from utils import get_files_from_directory
+
+    files = []
+    for path in paths:
+        if os.path.isfile(path):
+            files.append({"name": os.path.basename(path), "path": path, "size": os.path.getsize(path)})
+        elif os.path.isdir(path):
+            for f in get_files_from_directory(path):
+                files.append({"name": os.path.relpath(f, path), "path": f, "size": os.path.getsize(f)})
+        else:
+            raise FileNotFoundError(f"Dosya bulunamadı: {path}")
+    return files
+
+
+def select_files(remote_files: List[Dict], names: Optional[List[str]]) -> List[Dict]:
+    """
+    Uzak listeden indirilecek dosyaları seç
+
+    Args:
+        remote_files: Göndericinin dosya listesi
+        names: İstenen adlar (None ise hepsi)
+
+    Raises:
+        ValueError: İstenen dosya listede yoksa
+    """
+    if not names:
+        return list(remote_files)
+    by_name = {f["name"]: f for f in remote_files}
+    missing = [n for n in names if n not in by_name]
+    if missing:
+        raise ValueError(f"Göndericide olmayan dosyalar: {', '.join(missing)}")
+    return [by_name[n] for n in names]
+
+
+def _join_room(peer, signaling, code: str, on_joined):
+    """Sinyal sunucusundaki odaya peer'ın event loop'unda katıl"""
+    import asyncio
+
+    async def setup():
+        await signaling.connect(code)
+        await on_joined()
+
+    asyncio.run_coroutine_threadsafe(setup(), peer._loop).result(timeout=CONNECT_TIMEOUT)
+
+
+def _join_in_background(peer, signaling, code: str, on_joined, out: EventWriter):
+    """Odaya beklemeden katıl; hata yalnızca loglanır (yerel ağ sinyali zaten hazırken)"""
+    import asyncio
+
+    async def setup():
+        try:
+            await signaling.connect(code)
+            await on_joined()
+        except Exception as e:
+            out.log(f"İnternet sinyal sunucusuna bağlanılamadı, yalnızca yerel ağ: {e}")
+
+    asyncio.run_coroutine_threadsafe(setup(), peer._loop)
+
+
+def _share_on_lan(sender, code: str, files: List[Dict], password: Optional[str], out: EventWriter):
+    """
+    Paylaşımı yerel ağda duyur ve yerel sinyal sunucusundaki odaya katıl
+
+    Returns:
+        (LanShare, SignalingClient); yerel sunucu ya da keşif portu açılamazsa (None, None)
+    """
+    from lan_discovery import LanShare, share_capabilities
+    from webrtc_manager import SignalingClient
+
+    lan = LanShare(code, share_capabilities(files, password))
+    try:
+        url = lan.start()
+    except OSError as e:
+        out.log(f"Yerel ağ duyurusu başlatılamadı: {e}")
+        return None, None
+    signaling = SignalingClient(sender._loop, url)
+
+    async def on_joined():
+        sender.setup_signaling(signaling)
+
+    try:
+        _join_room(sender, signaling, code, on_joined)
+    except Exception:
+        lan.stop()
+        raise
+    return lan, signaling
+
+
+def _shutdown(peer, *signalings):
+    """Sinyal bağlantılarını kapat ve peer'ı durdur (karşı taraf kapanışı hemen görsün)"""
+    import asyncio
+
+    if peer._loop and peer._loop.is_running():
+        for signaling in signalings:
+            if signaling is None:
+                continue
+            try:
+                asyncio.run_coroutine_threadsafe(signaling.close(), peer._loop).result(timeout=5)
+            except Exception:
+                pass
+    peer.stop()
+    # stop() kapanışı loop'a bırakır; süreç bitmeden bağlantılar kapatılsın
+    if peer._thread:
+        peer._thread.join(timeout=5)
+
+
+def cmd_send(args, out: EventWriter) -> int:
+    """P2P gönder: oda kodu üret, sinyal sunucusunda (ve yerel ağda) alıcıları bekle"""
+    files = collect_files(args.paths)
+    if not files:
+        raise ValueError("Gönderilecek dosya yok")
+
+    from webrtc_manager import WebRTCSender, SignalingClient
+
+    finished = queue.Queue()
+    sender = WebRTCSender()
+    sender.password = args.password
+    sender.log_callback = out.log
+    sender.progress_callback = out.progress
+    sender.on_peer_done = finished.put
+    sender.start()
+    sender.wait_until_ready()
+    sender.set_files(files)
+
+    code = args.code or "".join(random.choices(string.digits, k=6))
+    signaling = SignalingClient(sender._loop, args.signaling)
+
+    async def on_joined():
+        sender.setup_signaling(signaling)
+
+    lan, lan_signaling = None, None
+    try:
+        if args.lan:
+            lan, lan_signaling = _share_on_lan(sender, code, files, args.password, out)
+        if lan is None:
+            _join_room(sender, signaling, code, on_joined)
+        else:
+            # Yerel ağdaki alıcılar hemen bağlanabilir; internetsiz ağda bu katılım başarısız olur
+            _join_in_background(sender, signaling, code, on_joined, out)
+        out.emit("ready", mode="p2p", code=code, lan=lan is not None,
+                 files=len(files), bytes=sum(f["size"] for f in files))
+        while True:
+            peer_sid = finished.get()
+            out.emit("peer_done", peer=peer_sid)
+            if args.once:
+                # Alıcı eksik aralıkları isteyebilir: bağlantıyı kapatana kadar bekle
+                deadline = time.monotonic() + PEER_CLOSE_TIMEOUT
+                while (sender.peers.get(peer_sid, {}).get("status") == "done"
+                       and time.monotonic() < deadline):
+                    time.sleep(0.2)
+                out.emit("done", peers=1)
+                return 0
+    finally:
+        _shutdown(sender, signaling, lan_signaling)
+        if lan is not None:
+            lan.stop()
+
+
+def _wait_receiver(receiver, event: threading.Event, rejected: threading.Event, timeout: float) -> bool:
+    """Olayı bekle; bağlantı koparsa veya parola reddedilirse erken dön"""
+    deadline = time.monotonic() + timeout
+    while not event.wait(0.2):
+        if rejected.is_set() or receiver.status in ("failed", "stopped") or time.monotonic() > deadline:
+            return False
+    return True
+
+
+def _receive_p2p(args, out: EventWriter) -> int:
+    from webrtc_manager import WebRTCReceiver, SignalingClient
+
+    rejected = threading.Event()
+    receiver = WebRTCReceiver()
+    receiver.password = args.password
+    receiver.on_auth_failed = rejected.set
+    receiver.save_path = args.output
+    receiver.log_callback = out.log
+    receiver.progress_callback = out.progress
+    receiver.start()
+    receiver.wait_until_ready()
+    import asyncio
+
+    # İnternet katılımı yerel ağ aramasını beklemez; paylaşım yerel ağda bulunursa bırakılır
+    internet = SignalingClient(receiver._loop, args.signaling)
+    joining = asyncio.run_coroutine_threadsafe(internet.connect(args.target), receiver._loop)
+    signaling, lan_signaling = internet, None
+
+    async def on_joined():
+        receiver.setup_signaling(signaling)
+        await receiver.connect_via_signaling()
+
+    try:
+        if args.lan:
+            from lan_discovery import discover
+            shares = discover(room=args.target, timeout=LAN_DISCOVERY_TIMEOUT)
+            if shares:
+                out.log(f"Paylaşım yerel ağda bulundu: {shares[0]['name']} ({shares[0]['host']})")
+                lan_signaling = SignalingClient(receiver._loop, shares[0]["url"])
+                signaling = lan_signaling
+                try:
+                    _join_room(receiver, lan_signaling, args.target, on_joined)
+                    joining.cancel()
+                    asyncio.run_coroutine_threadsafe(internet.close(), receiver._loop)
+                except Exception as e:
+                    out.log(f"Yerel sinyal sunucusuna bağlanılamadı, internet sunucusu kullanılıyor: {e}")
+                    signaling = internet
+        if signaling is internet:
+            joining.result(timeout=CONNECT_TIMEOUT)
+            asyncio.run_coroutine_threadsafe(on_joined(), receiver._loop).result(timeout=CONNECT_TIMEOUT)
+        if (not _wait_receiver(receiver, receiver._connected_event, rejected, args.timeout)
+                or receiver.status == "failed"):
+            raise RuntimeError("P2P bağlantısı kurulamadı")
+        if not _wait_receiver(receiver, receiver._file_list_event, rejected, args.timeout):
+            if rejected.is_set():
+                raise PermissionError("Parola hatalı ya da gerekli")
+            raise RuntimeError("Dosya listesi alınamadı")
+
+        files = select_files(receiver._file_list, args.files)
+        out.emit("files", files=[{"name": f["name"], "size": f["size"]} for f in files])
+        start = time.monotonic()
+        receiver.request_download([f["name"] for f in files])
+        receiver.wait_for_transfer(timeout=None)
+        if receiver.status != "done":
+            raise RuntimeError(f"Transfer tamamlanamadı ({receiver.status})")
+        out.emit("done", mode="p2p", files=len(files), bytes=sum(f["size"] for f in files),
+                 seconds=round(time.monotonic() - start, 3), path=os.path.abspath(args.output))
+        return 0
+    finally:
+        joining.cancel()
+        _shutdown(receiver, internet, lan_signaling)
+
+
+def _receive_http(args, out: EventWriter) -> int:
+    from downloader import Downloader
+
+    downloader = Downloader()
+    files = select_files(downloader.get_file_list(args.target), args.files)
+    out.emit("files", files=[{"name": f["name"], "size": f["size"]} for f in files])
+    start = time.monotonic()
+    downloader.download_files(files, args.target, args.output, out.progress, out.log)
+    out.emit("done", mode="http", files=len(files), bytes=sum(f["size"] for f in files),
+             seconds=round(time.monotonic() - start, 3), path=os.path.abspath(args.output),
+             hashes=downloader.hash_results)
+    return 0
+
+
+def cmd_receive(args, out: EventWriter) -> int:
+    """Oda kodu ile P2P veya paylaşım URL'i ile HTTP üzerinden al"""
+    os.makedirs(args.output, exist_ok=True)
+    if args.target.startswith(("http://", "https://")):
+        return _receive_http(args, out)
+    return _receive_p2p(args, out)
+
+
+def cmd_scan(args, out: EventWriter) -> int:
+    """Yerel ağda duyurulan P2P paylaşımları listele"""
+    from lan_discovery import discover
+
+    shares = discover(timeout=args.timeout)
+    for share in shares:
+        # Oda kodu duyurulmaz: paylaşıma katılmak için göndericiden alınmalı
+        out.emit("share", name=share["name"], host=share["host"], caps=share["caps"])
+    out.emit("done", shares=len(shares))
+    return 0
+
+
+def cmd_serve(args, out: EventWriter) -> int:
+    """Dosyaları HTTP üzerinden paylaş (tünel/ters vekil arkasında kullanılabilir)"""
+    for path in args.paths:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Dosya bulunamadı: {path}")
+
+    import server as srv
+    from werkzeug.serving import make_server
+
+    srv.set_shared_files(args.paths)
+    # app.run yerine: port hatası burada yakalanır, Ctrl+C ile düzgün kapanır
+    try:
+        httpd = make_server(args.host, args.port, srv.app, threaded=True)
+    except SystemExit:
+        # werkzeug bind hatasında sys.exit çağırır
+        raise OSError(f"{args.host}:{args.port} dinlenemiyor (port kullanımda olabilir)")
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    out.emit("ready", mode="http", url=f"http://{args.host}:{httpd.server_port}/",
+             files=len(srv.shared_index), bytes=srv.shared_index.total_size())
+
+    last = None
+    try:
+        while thread.is_alive():
+            thread.join(PROGRESS_INTERVAL)
+            stats = srv.transfer_monitor.get_stats()
+            current = (stats["total_sent"], stats["active"])
+            if current != last:
+                last = current
+                out.emit("progress", bytes=stats["total_sent"], total=stats["total_size"],
+                         speed=round(stats["speed"]), active=stats["active"])
+    finally:
+        httpd.shutdown()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="quickshare", description="QuickShare komut satırı (arayüzsüz)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    send = commands.add_parser("send", help="P2P gönder (oda kodu ile)")
+    send.add_argument("paths", nargs="+", help="Dosya veya klasörler")
+    send.add_argument("--code", help="Oda kodu (varsayılan: rastgele 6 hane)")
+    send.add_argument("--password", help="Alıcıdan istenecek parola")
+    send.add_argument("--once", action="store_true", help="İlk alıcı bitince çık")
+    send.add_argument("--signaling", default=SIGNALING_SERVER_URL, help="Sinyal sunucusu URL'i")
+    send.add_argument("--no-lan", dest="lan", action="store_false", default=LAN_DISCOVERY,
+                      help="Paylaşımı yerel ağda duyurma")
+    send.set_defaults(handler=cmd_send)
+
+    receive = commands.add_parser("receive", help="Oda kodu (P2P) veya paylaşım URL'i (HTTP) ile al")
+    receive.add_argument("target", help="Oda kodu veya http(s):// paylaşım adresi")
+    receive.add_argument("-o", "--output", default=".", help="Kaydetme dizini")
+    receive.add_argument("--files", nargs="+", help="Yalnızca bu dosyaları al")
+    receive.add_argument("--password", help="Göndericinin parolası")
+    receive.add_argument("--timeout", type=float, default=60, help="Bağlantı zaman aşımı (saniye)")
+    receive.add_argument("--signaling", default=SIGNALING_SERVER_URL, help="Sinyal sunucusu URL'i")
+    receive.add_argument("--no-lan", dest="lan", action="store_false", default=LAN_DISCOVERY,
+                         help="Oda kodunu yerel ağda arama")
+    receive.set_defaults(handler=cmd_receive)
+
+    scan = commands.add_parser("scan", help="Yerel ağdaki P2P paylaşımları listele")
+    scan.add_argument("--timeout", type=float, default=LAN_DISCOVERY_TIMEOUT, help="Arama süresi (saniye)")
+    scan.set_defaults(handler=cmd_scan)
+
+    serve = commands.add_parser("serve", help="HTTP üzerinden paylaş")
+    serve.add_argument("paths", nargs="+", help="Dosya veya klasörler")
+    serve.add_argument("--host", default=SERVER_HOST, help="Dinlenecek adres (ör. 0.0.0.0)")
+    serve.add_argument("--port", type=int, default=SERVER_PORT, help="Port")
+    serve.set_defaults(handler=cmd_serve)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    out = EventWriter(sys.stdout)
+    # stdout yalnızca JSON olaylarına ayrılır; modüllerin print'leri stderr'e
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            return args.handler(args, out)
+        except KeyboardInterrupt:
+            out.emit("stopped")
+            return 130
+        except Exception as e:
+            out.emit("error", message=str(e), type=type(e).__name__)
+            return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,19 +3,27 @@ QuickShare Flask Server
 Dosya sunma, streaming ve WebRTC signaling
 """
 
-from flask import Flask, send_file, jsonify, Response, request, stream_with_context
+from flask import Flask, send_file, jsonify, Response, request
 from werkzeug.utils import secure_filename
 import os
-import io
 import time
 import threading
 import re
-import zipfile
 import base64
 import json
-from typing import List, Dict
-from config import CHUNK_SIZE, SERVER_HOST, SERVER_PORT
-from utils import create_file_info, get_files_from_directory, calculate_total_size, calculate_file_hash
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import List, Dict, Optional
+from config import (SERVER_HOST, SERVER_PORT, USE_SENDFILE, SENDFILE_CHUNK_SIZE, STREAM_READ_SIZE,
+                    DEDUP_TRANSFER, COMPRESSION, COMPRESSION_WORKERS)
+from hash_cache import hash_cache
+from merkle import file_blocks
+from cdc import encode_chunks, file_chunks
+from compress import SAMPLE_SIZE as COMPRESS_SAMPLE, compress_pool, deflate, should_compress
+from delta import DeltaScanner, parse_signature, MIN_BLOCK_SIZE, MAX_BLOCK_SIZE
+from transfer_protocol import FRAME_DATA, FRAME_FILE_END, FRAME_COPY, COPY_PAYLOAD, encode_frame
+from file_index import SharedFileIndex
+from zip_stream import generate_zip_stream
 from transfer_history import history
 
 
@@ -24,6 +32,14 @@ app = Flask(__name__)
 # WebRTC Sender instance (set by main_ctk.py)
 webrtc_sender = None
 
+# Paylaşılan dosyalar ve relative path indeksi (set_shared_files ile dolar)
+shared_files: List[str] = []
+shared_index = SharedFileIndex()
+
+# Parça listeleri set_shared_files'ta arka planda hesaplanır; liste isteği diski okumaz
+chunk_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quickshare-chunks")
+_chunk_jobs: List[Future] = []
+
 # Transfer Monitoring
 class TransferMonitor:
     def __init__(self):
@@ -110,60 +126,183 @@ def list_files():
     """
     Paylaşılan dosyaların listesini JSON olarak döndür
     
+    Query:
+        chunks: 1 ise parça listesi önbellekte hazır olan dosyalara içeriğe
+                göre bölünmüş parça listesi de eklenir (tekrar eden parçaları
+                bir kez indirmek için); henüz hesaplanmamış dosyalar parçasız döner
+    
     Returns:
-        JSON: {"files": [{"name": "...", "size": ..., "path": "..."}]}
+        JSON: {"files": [{"name": "...", "size": ..., "path": "...", "chunks": "..."}]}
     """
-    files_info = []
+    files_info = [
+        {"name": e["name"], "size": e["size"], "path": e["path"]}
+        for e in shared_index.files()
+    ]
     
-    for path in shared_files:
-        if os.path.isfile(path):
-            # Tek dosya
-            files_info.append(create_file_info(path))
-        elif os.path.isdir(path):
-            # Dizin - içindeki tüm dosyaları ekle
-            dir_files = get_files_from_directory(path)
-            for file in dir_files:
-                files_info.append(create_file_info(file, base_path=path))
+    if DEDUP_TRANSFER and request.args.get("chunks") == "1":
+        for info in files_info:
+            entries = hash_cache.get_chunks(info["path"])
+            if entries is not None:
+                info["chunks"] = encode_chunks(entries)
     
     return jsonify({"files": files_info})
 
 
-@app.route('/file/<path:filename>')
-def download_file(filename: str):
+class RangeFileWrapper:
     """
-    Tek bir dosyayı stream olarak indir (Monitörlü)
-    
-    Args:
-        filename: İndirilecek dosya adı
-        
-    Returns:
-        Response: Streaming file response
+    Range-aware dosya gövdesi (WSGI iterable).
+
+    Werkzeug sunucusunun bağlantı soketi erişilebilirse byte aralığı
+    socket.sendfile ile kernel içinden (zero-copy) gönderilir; değilse
+    büyük bloklarla okunup yield edilir. TransferMonitor'a her blokta
+    değil, SENDFILE_CHUNK_SIZE'lık dilimlerde toplu güncelleme yapılır.
+
+    Gönderim geçmişine yalnızca log_history ile açılan gövdeler (tam dosya
+    yanıtları) yazılır; Range (206) yanıtları bir indirmenin parçası
+    olabileceğinden kaydedilmez.
     """
-    # Dosyayı shared_files içinde ara
-    target_file = None
-    
-    for path in shared_files:
-        if os.path.isfile(path):
-            if os.path.basename(path) == filename:
-                target_file = path
+
+    def __init__(self, path: str, start: int, length: int, file_size: int, sock=None,
+                 log_history: bool = True):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.start = start
+        self.length = length
+        self.file_size = file_size
+        self.sent = 0
+        self._sock = sock
+        self._log_history = log_history
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self._closed = False
+        transfer_monitor.start_transfer()
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def _account(self, count: int):
+        """Gönderilen byte'ları monitöre toplu bildir"""
+        self.sent += count
+        transfer_monitor.add_bytes(count)
+        transfer_monitor.update_file_progress(self.name, self.sent, self.length)
+
+    def __iter__(self):
+        if self._sock is not None and USE_SENDFILE and hasattr(self._sock, 'sendfile'):
+            # Boş chunk Werkzeug'un header'ları sokete yazmasını sağlar,
+            # ardından gövde doğrudan sendfile ile gider
+            yield b""
+            offset = self.start
+            remaining = self.length
+            while remaining > 0:
+                count = min(SENDFILE_CHUNK_SIZE, remaining)
+                sent = self._sock.sendfile(self._file, offset, count)
+                if not sent:
+                    break
+                offset += sent
+                remaining -= sent
+                self._account(sent)
+            return
+
+        remaining = self.length
+        pending = 0
+        while remaining > 0:
+            chunk = self._file.read(min(STREAM_READ_SIZE, remaining))
+            if not chunk:
                 break
-        elif os.path.isdir(path):
-            # Dizin içinde ara
-            for file in get_files_from_directory(path):
-                # Relative path ile karşılaştır
-                rel_path = os.path.relpath(file, path)
-                if rel_path.replace('\\', '/') == filename.replace('\\', '/'):
-                    target_file = file
+            remaining -= len(chunk)
+            pending += len(chunk)
+            if pending >= SENDFILE_CHUNK_SIZE or remaining == 0:
+                self._account(pending)
+                pending = 0
+            yield chunk
+        if pending:
+            self._account(pending)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._file.close()
+        transfer_monitor.end_transfer()
+        transfer_monitor.finish_file(self.name)
+        if not self._log_history:
+            return
+        # Log send history (istemci bağlantıyı erken kestiyse iptal)
+        history.log_transfer(
+            filename=self.name, size=self.file_size, direction="send",
+            status="success" if self.sent >= self.length else "cancelled", method="http"
+        )
+
+
+class CompressedFileWrapper(RangeFileWrapper):
+    """
+    Tüm dosyayı gzip ile sıkıştırarak gönderen gövde (Accept-Encoding: gzip).
+
+    Dosya STREAM_READ_SIZE'lık bloklar halinde okunur; her blok ayrı bir
+    gzip üyesi olarak compress_pool'da paralel sıkıştırılır ve sırayla
+    gönderilir. Art arda eklenmiş gzip üyeleri geçerli tek bir gzip akışıdır.
+    """
+
+    def __init__(self, path: str, file_size: int):
+        super().__init__(path, 0, file_size, file_size)
+
+    def __iter__(self):
+        pending = deque()  # (ham boyut, sıkıştırma future'ı)
+        remaining = self.length
+        while remaining > 0 or pending:
+            while remaining > 0 and len(pending) < COMPRESSION_WORKERS * 2:
+                chunk = self._file.read(min(STREAM_READ_SIZE, remaining))
+                if not chunk:
+                    remaining = 0
                     break
-            if target_file:
+                remaining -= len(chunk)
+                pending.append((len(chunk), compress_pool.submit(deflate, chunk, True)))
+            if not pending:
                 break
-    
-    if not target_file or not os.path.exists(target_file):
+            size, future = pending.popleft()
+            data = future.result()
+            self._account(size)
+            yield data
+
+
+def _accepts_gzip() -> bool:
+    """İstemci gzip kabul ediyor mu?"""
+    return request.accept_encodings.quality("gzip") > 0
+
+
+def _compressible(entry: Dict) -> bool:
+    """Dosyanın başından alınan örneğe göre sıkıştırmaya değer mi?"""
+    try:
+        with open(entry["path"], "rb") as f:
+            sample = f.read(COMPRESS_SAMPLE)
+    except OSError:
+        return False
+    return should_compress(entry["name"], entry["size"], sample)
+
+
+def _stream_shared_file(filename: str):
+    """
+    İndeksteki dosyayı (Range destekli) stream eden response oluştur
+
+    Range'siz isteklerde istemci gzip kabul ediyorsa ve dosya sıkıştırılabilir
+    görünüyorsa gövde gzip ile sıkıştırılır (Content-Length yerine
+    X-Uncompressed-Length gönderilir).
+
+    Args:
+        filename: Relative dosya adı
+
+    Returns:
+        Response: 200/206 streaming response, 404 veya 416
+    """
+    # Dosyayı indeksten bul (O(1))
+    entry = shared_index.lookup(filename)
+    if not entry:
         return jsonify({"error": "File not found"}), 404
+    target_file = entry["path"]
     
     # Range Header Handling
     range_header = request.headers.get('Range', None)
-    file_size = os.path.getsize(target_file)
+    file_size = entry["size"]
     
     start_byte = 0
     end_byte = file_size - 1
@@ -177,10 +316,10 @@ def download_file(filename: str):
             if range_match:
                 start_byte = int(range_match.group(1))
                 if range_match.group(2):
-                    end_byte = int(range_match.group(2))
+                    end_byte = min(int(range_match.group(2)), file_size - 1)
                 
                 # Validate range
-                if start_byte >= file_size:
+                if start_byte >= file_size or end_byte < start_byte:
                     return Response(
                         "Requested Range Not Satisfiable",
                         status=416,
@@ -192,35 +331,6 @@ def download_file(filename: str):
         except ValueError:
             pass  # Invalid range, ignore and send full file
 
-    # Custom generator for monitoring
-    def generate_file_stream():
-        transfer_monitor.start_transfer()
-        try:
-            with open(target_file, 'rb') as f:
-                if start_byte > 0:
-                    f.seek(start_byte)
-                
-                remaining = length
-                while remaining > 0:
-                    read_size = min(CHUNK_SIZE, remaining)
-                    chunk = f.read(read_size)
-                    if not chunk:
-                        break
-                    remaining -= len(chunk)
-                    transfer_monitor.add_bytes(len(chunk))
-                    # Update file progress
-                    current_sent = length - remaining
-                    transfer_monitor.update_file_progress(os.path.basename(target_file), current_sent, length)
-                    yield chunk
-        finally:
-            transfer_monitor.end_transfer()
-            transfer_monitor.finish_file(os.path.basename(target_file))
-            # Log send history
-            history.log_transfer(
-                filename=os.path.basename(target_file), size=file_size,
-                direction="send", status="success", method="http"
-            )
-
     # Streaming Response
     headers = {
         'Content-Disposition': 'attachment; filename="file.bin"',
@@ -230,15 +340,55 @@ def download_file(filename: str):
     
     if status_code == 206:
         headers['Content-Range'] = f'bytes {start_byte}-{end_byte}/{file_size}'
+    elif COMPRESSION and _accepts_gzip() and _compressible(entry):
+        del headers['Content-Length']
+        headers['Content-Encoding'] = 'gzip'
+        headers['X-Uncompressed-Length'] = str(file_size)
+        headers['Vary'] = 'Accept-Encoding'
+        if request.method == 'HEAD':
+            return Response(status=200, mimetype='application/octet-stream', headers=headers)
+        try:
+            body = CompressedFileWrapper(target_file, file_size)
+        except OSError:
+            return jsonify({"error": "File not found"}), 404
+        return Response(body, status=200, mimetype='application/octet-stream', headers=headers)
+
+    # HEAD: dosya açılmaz, transfer başlatılmaz ve geçmişe yazılmaz
+    if request.method == 'HEAD':
+        return Response(status=status_code, mimetype='application/octet-stream', headers=headers)
+
+    try:
+        body = RangeFileWrapper(
+            target_file, start_byte, length, file_size,
+            sock=request.environ.get('werkzeug.socket'),
+            log_history=status_code == 200
+        )
+    except OSError:
+        return jsonify({"error": "File not found"}), 404
 
     return Response(
-        stream_with_context(generate_file_stream()),
+        body,
         status=status_code,
         mimetype='application/octet-stream',
-        headers=headers
+        headers=headers,
+        direct_passthrough=True
     )
 
 
+@app.route('/file/<path:filename>')
+def download_file(filename: str):
+    """
+    Tek bir dosyayı stream olarak indir (Monitörlü)
+    
+    Args:
+        filename: İndirilecek dosya adı
+        
+    Returns:
+        Response: Streaming file response
+    """
+    return _stream_shared_file(filename)
+
+
 @app.route('/file_b64/<path:encoded_filename>')
 def download_file_b64(encoded_filename: str):
     """
@@ -250,107 +400,7 @@ def download_file_b64(encoded_filename: str):
     except Exception as e:
         return jsonify({"error": f"Invalid filename encoding: {str(e)}"}), 400
         
-    # Mevcut download_file mantığını çağır (kod tekrarını önlemek için)
-    # Ancak burada doğrudan logic'i tekrar edelim çünkü context generate_file_stream içinde
-    
-    # Dosyayı shared_files içinde ara
-    target_file = None
-    
-    for path in shared_files:
-        if os.path.isfile(path):
-            if os.path.basename(path) == filename:
-                target_file = path
-                break
-        elif os.path.isdir(path):
-            # Dizin içinde ara
-            for file in get_files_from_directory(path):
-                # Relative path ile karşılaştır
-                rel_path = os.path.relpath(file, path)
-                if rel_path.replace('\\', '/') == filename.replace('\\', '/'):
-                    target_file = file
-                    break
-            if target_file:
-                break
-    
-    if not target_file or not os.path.exists(target_file):
-        return jsonify({"error": "File not found"}), 404
-    
-    # Range Header Handling
-    range_header = request.headers.get('Range', None)
-    file_size = os.path.getsize(target_file)
-    
-    start_byte = 0
-    end_byte = file_size - 1
-    length = file_size
-    status_code = 200
-    
-    if range_header:
-        try:
-            # Parse Range header (format: bytes=start-end)
-            range_match = re.search(r'bytes=(\d+)-(\d*)', range_header)
-            if range_match:
-                start_byte = int(range_match.group(1))
-                if range_match.group(2):
-                    end_byte = int(range_match.group(2))
-                
-                # Validate range
-                if start_byte >= file_size:
-                    return Response(
-                        "Requested Range Not Satisfiable",
-                        status=416,
-                        headers={'Content-Range': f'bytes */{file_size}'}
-                    )
-                
-                length = end_byte - start_byte + 1
-                status_code = 206
-        except ValueError:
-            pass  # Invalid range, ignore and send full file
-
-    # Custom generator for monitoring
-    def generate_file_stream():
-        transfer_monitor.start_transfer()
-        try:
-            with open(target_file, 'rb') as f:
-                if start_byte > 0:
-                    f.seek(start_byte)
-                
-                remaining = length
-                while remaining > 0:
-                    read_size = min(CHUNK_SIZE, remaining)
-                    chunk = f.read(read_size)
-                    if not chunk:
-                        break
-                    remaining -= len(chunk)
-                    transfer_monitor.add_bytes(len(chunk))
-                    # Update file progress
-                    current_sent = length - remaining
-                    transfer_monitor.update_file_progress(os.path.basename(target_file), current_sent, length)
-                    yield chunk
-        finally:
-            transfer_monitor.end_transfer()
-            transfer_monitor.finish_file(os.path.basename(target_file))
-            # Log send history
-            history.log_transfer(
-                filename=os.path.basename(target_file), size=file_size,
-                direction="send", status="success", method="http"
-            )
-
-    # Streaming Response
-    headers = {
-        'Content-Disposition': 'attachment; filename="file.bin"',
-        'Content-Length': str(length),
-        'Accept-Ranges': 'bytes'
-    }
-    
-    if status_code == 206:
-        headers['Content-Range'] = f'bytes {start_byte}-{end_byte}/{file_size}'
-
-    return Response(
-        stream_with_context(generate_file_stream()),
-        status=status_code,
-        mimetype='application/octet-stream',
-        headers=headers
-    )
+    return _stream_shared_file(filename)
 
 
 @app.route('/download')
@@ -358,46 +408,43 @@ def download_all():
     """
     Tüm dosyaları ZIP olarak stream et (Monitörlü)
     
+    Arşiv belleğe alınmaz; zip_stream dosyaları okurken local header,
+    veri ve data descriptor üretir, central directory en sonda gider.
+    
     Returns:
         Response: Streaming ZIP response
     """
+    # Arşiv adları paylaşılan klasörün adını da içerir
+    entries = []
+    for e in shared_index.files():
+        if e["root"]:
+            arcname = os.path.relpath(e["path"], os.path.dirname(e["root"]))
+        else:
+            arcname = os.path.basename(e["path"])
+        entries.append((e["path"], arcname))
+
     def generate_zip():
         """ZIP'i on-the-fly oluştur ve stream et"""
         transfer_monitor.start_transfer()
+        sent = 0
+        pending = 0
         try:
-            # In-memory buffer
-            buffer = io.BytesIO()
-            
-            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
-                # Dosyaları ekle
-                for file_path in shared_files:
-                    if os.path.isfile(file_path):
-                        arcname = os.path.basename(file_path)
-                        zf.write(file_path, arcname)
-                    elif os.path.isdir(file_path):
-                        for root, _, files in os.walk(file_path):
-                            for file in files:
-                                full_path = os.path.join(root, file)
-                                rel_path = os.path.relpath(full_path, os.path.dirname(file_path))
-                                zf.write(full_path, rel_path)
-            
-            # Buffer'ı başa al
-            buffer.seek(0)
-            
-            # Chunk by chunk oku
-            while True:
-                chunk = buffer.read(CHUNK_SIZE)
-                if not chunk:
-                    break
-                transfer_monitor.add_bytes(len(chunk))
-                transfer_monitor.update_file_progress("ALL_FILES.zip", transfer_monitor.total_sent, transfer_monitor.total_size)
+            for chunk in generate_zip_stream(entries, chunk_size=STREAM_READ_SIZE):
+                pending += len(chunk)
+                if pending >= SENDFILE_CHUNK_SIZE:
+                    sent += pending
+                    transfer_monitor.add_bytes(pending)
+                    transfer_monitor.update_file_progress("ALL_FILES.zip", sent, transfer_monitor.total_size)
+                    pending = 0
                 yield chunk
+            if pending:
+                transfer_monitor.add_bytes(pending)
         finally:
             transfer_monitor.end_transfer()
             transfer_monitor.finish_file("ALL_FILES.zip")
     
     return Response(
-        stream_with_context(generate_zip()),
+        generate_zip(),
         mimetype='application/zip',
         headers={
             'Content-Disposition': 'attachment; filename=download.zip'
@@ -416,35 +463,91 @@ def get_file_hash(filename: str):
     Returns:
         JSON: {"hash": "..."}
     """
-    # Dosyayı shared_files içinde ara
-    target_file = None
-    
-    for path in shared_files:
-        if os.path.isfile(path):
-            if os.path.basename(path) == filename:
-                target_file = path
-                break
-        elif os.path.isdir(path):
-            for file in get_files_from_directory(path):
-                rel_path = os.path.relpath(file, path)
-                if rel_path.replace('\\', '/') == filename.replace('\\', '/'):
-                    target_file = file
-                    break
-            if target_file:
-                break
-    
-    if not target_file or not os.path.exists(target_file):
+    entry = shared_index.lookup(filename)
+    if not entry:
         return jsonify({"error": "File not found"}), 404
+    target_file = entry["path"]
         
-    # Hash hesapla (bu işlem büyük dosyalarda zaman alabilir)
-    # TODO: Cache mekanizması eklenebilir
+    # Hash'i önbellekten al; yoksa hesapla (büyük dosyalarda zaman alabilir)
     try:
-        file_hash = calculate_file_hash(target_file)
+        file_hash = hash_cache.get_or_compute(target_file)
         return jsonify({"hash": file_hash})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/blocks/<path:filename>')
+def get_file_blocks(filename: str):
+    """
+    Dosyanın Merkle blok hash'lerini döndür (doğrulanmış resume / blok onarımı için)
+    
+    Args:
+        filename: Dosya adı (veya relative path)
+        
+    Returns:
+        JSON: {"size": ..., "block_size": ..., "blocks": ["..."], "root": "..."}
+              (tek bloğa sığan dosyalarda alanlar null)
+    """
+    entry = shared_index.lookup(filename)
+    if not entry:
+        return jsonify({"error": "File not found"}), 404
+    
+    try:
+        info = file_blocks(entry["path"])
+        info = info or {"block_size": None, "blocks": None, "root": None}
+        return jsonify(dict(info, size=entry["size"]))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/delta/<path:filename>', methods=['POST'])
+def get_file_delta(filename: str):
+    """
+    İstemcinin eski kopyasına göre delta üret (rsync benzeri)
+    
+    Body, istemcinin imzasıdır (delta.signature); yanıt transfer_protocol
+    frame'lerinden oluşan bir akıştır: COPY (eski kopyadan kopyala), DATA
+    (ham veri) ve sonda dosyanın SHA256'sını taşıyan FILE_END.
+    
+    Args:
+        filename: Dosya adı (veya relative path)
+        
+    Query:
+        block_size: İmza blok boyutu
+    """
+    entry = shared_index.lookup(filename)
+    if not entry:
+        return jsonify({"error": "File not found"}), 404
+    target_file = entry["path"]
+    
+    try:
+        block_size = int(request.args.get("block_size", 0))
+        if not MIN_BLOCK_SIZE <= block_size <= MAX_BLOCK_SIZE:
+            raise ValueError("Invalid block_size")
+        table = parse_signature(request.get_data())
+        scanner = DeltaScanner(target_file, table, block_size)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except OSError:
+        return jsonify({"error": "File not found"}), 404
+    
+    def generate():
+        try:
+            while not scanner.done:
+                for op in scanner.step():
+                    if op[0] == "copy":
+                        yield encode_frame(FRAME_COPY, 0, op[1], COPY_PAYLOAD.pack(op[2], op[3]))
+                    else:
+                        yield encode_frame(FRAME_DATA, 0, op[1], op[2])
+                        transfer_monitor.add_bytes(len(op[2]))
+            digest = hash_cache.get_or_compute(target_file)
+            yield encode_frame(FRAME_FILE_END, 0, scanner.size, bytes.fromhex(digest))
+        finally:
+            scanner.close()
+    
+    return Response(generate(), mimetype='application/octet-stream')
+
+
 def set_shared_files(files: List[str]):
     """
     Paylaşılacak dosyaları set et
@@ -455,9 +558,29 @@ def set_shared_files(files: List[str]):
     global shared_files
     shared_files = files
     
-    # Toplam boyutu hesapla ve monitöre bildir (ETA için)
-    total_size = calculate_total_size(files)
-    transfer_monitor.set_total_size(total_size)
+    # Path indeksini bir kez oluştur (route'lar dict lookup yapar)
+    shared_index.build(files)
+    
+    # Toplam boyutu monitöre bildir (ETA için)
+    transfer_monitor.set_total_size(shared_index.total_size())
+
+    # Parça listelerini ilk istemciden önce hesapla (önbellekte kalır)
+    if DEDUP_TRANSFER:
+        for job in _chunk_jobs:
+            job.cancel()
+        _chunk_jobs[:] = [chunk_pool.submit(_precompute_chunks, e["path"]) for e in shared_index.files()]
+
+
+def wait_chunk_lists(timeout: Optional[float] = None) -> bool:
+    """Arka planda hesaplanan parça listelerini bekle; hepsi hazırsa True"""
+    return not wait(_chunk_jobs, timeout=timeout).not_done
+
+
+def _precompute_chunks(path: str):
+    try:
+        file_chunks(path)
+    except OSError:
+        pass  # Okunamayan dosya listede parçasız kalır, normal indirilir
 
 
 def run_server(port: int = SERVER_PORT, debug: bool = False):
@@ -0,0 +1,401 @@
+"""
+QuickShare Signal Server
+SignalingClient ile uyumlu, kendi sunucunuzda çalıştırılabilen sinyal sunucusu (aiohttp)
+
+Protokol (webrtc_manager.SignalingClient):
+    POST /join    {"room", "sid"}                      -> {"peers": [...]}
+    GET  /poll    ?sid=...  (long-poll)                -> {"messages": [...]}
+    POST /signal  {"sender", "type", "data", "target", "room"}
+    GET  /ws      WebSocket: önce {"type": "join", "room", "sid"} -> {"type": "joined", "peers"},
+                  sonra /signal gövdeleri gönderilir, /poll mesajları anında itilir
+    GET  /        Sağlık kontrolü (oda ve istemci sayısı)
+
+Her istemcinin bellekte sınırlı bir mesaj kutusu vardır; HTTP istemcileri kutuyu
+long-poll ile boşaltır, WebSocket istemcilerine mesajlar geldiği sırayla itilir.
+Bağlantısı kopan WebSocket istemcisinin kutusu korunur, böylece HTTP'ye geçen
+istemci mesaj kaybetmez. Yoklamayan istemciler CLIENT_TTL sonra odadan düşer.
+Tek süreç, tek event loop; oda başına görev ya da thread açılmaz.
+
+Kullanım:
+    python signal_server.py --port 8765
+    (istemcilerde config.SIGNALING_SERVER_URL = "http://sunucu:8765")
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Set
+
+from aiohttp import WSCloseCode, WSMsgType, web
+
+from config import SIGNAL_SERVER_PORT, SIGNALING_WS_HEARTBEAT
+
+
+POLL_WAIT = 25              # saniye; long-poll en fazla bu kadar bekletilir (istemci 35 sn bekler)
+CLIENT_TTL = 90             # saniye; bu süre yoklamayan (WebSocket'i de olmayan) istemci silinir
+SWEEP_INTERVAL = 15         # saniye; süresi dolan istemcilerin taranma aralığı
+QUEUE_SIZE = 256            # İstemci başına bekleyen en fazla mesaj (taşarsa en eskisi düşer)
+MAX_MESSAGE_SIZE = 64 * 1024  # SDP + adaylar birkaç KB; daha büyük istek reddedilir
+MAX_ID_LENGTH = 128         # Oda kodu / sid üst sınırı
+SIGNAL_TYPES = frozenset({"offer", "answer", "ice"})
+
+
+class _Client:
+    """Bir istemcinin oda üyeliği ve mesaj kutusu"""
+
+    __slots__ = ("sid", "room", "messages", "wakeup", "ws", "polls", "seen")
+
+    def __init__(self, sid: str, now: float):
+        self.sid = sid
+        self.room: Optional[str] = None
+        self.messages = deque(maxlen=QUEUE_SIZE)
+        self.wakeup = asyncio.Event()
+        self.ws: Optional[web.WebSocketResponse] = None
+        self.polls = 0  # Bekleyen long-poll sayısı
+        self.seen = now
+
+    def drain(self) -> List[Dict]:
+        messages = list(self.messages)
+        self.messages.clear()
+        self.wakeup.clear()
+        return messages
+
+
+class SignalingHub:
+    """
+    Odalar ve istemci mesaj kutuları (yalnızca sunucunun event loop'unda kullanılır)
+    """
+
+    def __init__(self):
+        self.rooms: Dict[str, Set[str]] = {}
+        self.clients: Dict[str, _Client] = {}
+
+    @staticmethod
+    def _now() -> float:
+        return asyncio.get_running_loop().time()
+
+    def client(self, sid: str) -> _Client:
+        """İstemciyi getir (yoksa oluştur) ve son görülme zamanını güncelle"""
+        client = self.clients.get(sid)
+        if client is None:
+            client = self.clients[sid] = _Client(sid, self._now())
+        client.seen = self._now()
+        return client
+
+    def join(self, room: str, sid: str) -> List[str]:
+        """
+        İstemciyi odaya al, odadakilere peer_joined gönder
+
+        Args:
+            room: Oda kodu
+            sid: İstemci kimliği
+
+        Returns:
+            Odada zaten bulunan istemciler
+        """
+        client = self.client(sid)
+        if client.room is not None and client.room != room:
+            self.leave(sid, forget=False)
+        members = self.rooms.setdefault(room, set())
+        peers = [other for other in members if other != sid]
+        if sid not in members:
+            # Aynı sid ile yeniden katılım (ör. WebSocket -> HTTP geçişi) duyurulmaz
+            members.add(sid)
+            for other in peers:
+                self.deliver(other, {"type": "peer_joined", "sid": sid})
+        client.room = room
+        return peers
+
+    def leave(self, sid: str, forget: bool = True):
+        """İstemciyi odasından çıkar; forget=True ise mesaj kutusunu da sil"""
+        client = self.clients.pop(sid, None) if forget else self.clients.get(sid)
+        if client is None or client.room is None:
+            return
+        members = self.rooms.get(client.room)
+        if members is not None:
+            members.discard(sid)
+            if not members:
+                del self.rooms[client.room]
+        client.room = None
+
+    def deliver(self, sid: str, message: Dict) -> bool:
+        client = self.clients.get(sid)
+        if client is None:
+            return False
+        client.messages.append(message)
+        client.wakeup.set()
+        return True
+
+    def signal(self, payload: Dict, sender: Optional[str] = None) -> int:
+        """
+        offer/answer/ice mesajını odadaki hedefe (target yoksa diğer herkese) ilet
+
+        Args:
+            payload: /signal gövdesi
+            sender: Bağlantının kimliği (WebSocket); yoksa gövdedeki sender
+
+        Returns:
+            Mesajın bırakıldığı istemci sayısı
+
+        Raises:
+            ValueError: Geçersiz mesaj, bilinmeyen ya da odaya katılmamış gönderen
+        """
+        if not isinstance(payload, dict) or payload.get("type") not in SIGNAL_TYPES:
+            raise ValueError("Invalid signal type")
+        sender = sender or payload.get("sender")
+        client = self.clients.get(sender) if isinstance(sender, str) else None
+        if client is None or client.room is None:
+            raise ValueError("Sender has not joined a room")
+        client.seen = self._now()
+
+        # Mesaj yalnızca gönderenin odasında dolaşır
+        members = self.rooms.get(client.room, ())
+        target = payload.get("target")
+        if target is None:
+            targets = [sid for sid in members if sid != sender]
+        elif isinstance(target, str):
+            targets = [target] if target in members else []
+        else:
+            raise ValueError("Invalid target")
+        message = {"type": payload["type"], "sender": sender, "data": payload.get("data"),
+                   "room": client.room}
+        return sum(self.deliver(sid, message) for sid in targets if sid != sender)
+
+    def sweep(self):
+        """CLIENT_TTL boyunca görülmeyen istemcileri sil"""
+        deadline = self._now() - CLIENT_TTL
+        stale = [sid for sid, c in self.clients.items()
+                 if c.ws is None and not c.polls and c.seen < deadline]
+        for sid in stale:
+            self.leave(sid)
+        return len(stale)
+
+
+HUB = web.AppKey("hub", SignalingHub)
+POLL_WAIT_KEY = web.AppKey("poll_wait", float)
+HEARTBEAT_KEY = web.AppKey("heartbeat", float)
+
+
+def _valid_id(value) -> bool:
+    return isinstance(value, str) and 0 < len(value) <= MAX_ID_LENGTH
+
+
+async def _read_json(request: web.Request):
+    try:
+        return await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise web.HTTPBadRequest(text=json.dumps({"error": "Invalid JSON"}), content_type="application/json")
+
+
+async def handle_index(request: web.Request):
+    hub: SignalingHub = request.app[HUB]
+    return web.json_response({"status": "ok", "rooms": len(hub.rooms), "clients": len(hub.clients)})
+
+
+async def handle_join(request: web.Request):
+    data = await _read_json(request)
+    if not isinstance(data, dict) or not _valid_id(data.get("room")) or not _valid_id(data.get("sid")):
+        return web.json_response({"error": "room and sid required"}, status=400)
+    return web.json_response({"peers": request.app[HUB].join(data["room"], data["sid"])})
+
+
+async def handle_poll(request: web.Request):
+    sid = request.query.get("sid")
+    if not _valid_id(sid):
+        return web.json_response({"error": "sid required"}, status=400)
+    hub: SignalingHub = request.app[HUB]
+    client = hub.client(sid)
+    client.polls += 1
+    try:
+        if not client.messages:
+            client.wakeup.clear()
+            try:
+                await asyncio.wait_for(client.wakeup.wait(), request.app[POLL_WAIT_KEY])
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        client.polls -= 1
+        client.seen = hub._now()
+    return web.json_response({"messages": client.drain()})
+
+
+async def handle_signal(request: web.Request):
+    data = await _read_json(request)
+    try:
+        delivered = request.app[HUB].signal(data)
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    return web.json_response({"ok": True, "delivered": delivered})
+
+
+async def _pump(client: _Client, ws: web.WebSocketResponse):
+    """Mesaj kutusunu WebSocket'e geldiği sırayla aktar"""
+    while not ws.closed:
+        await client.wakeup.wait()
+        for message in client.drain():
+            await ws.send_json(message)
+
+
+async def handle_ws(request: web.Request):
+    hub: SignalingHub = request.app[HUB]
+    ws = web.WebSocketResponse(heartbeat=request.app[HEARTBEAT_KEY], max_msg_size=MAX_MESSAGE_SIZE)
+    await ws.prepare(request)
+    client = None
+    pump = None
+    try:
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            try:
+                data = json.loads(msg.data)
+            except json.JSONDecodeError:
+                await ws.send_json({"type": "error", "error": "Invalid JSON"})
+                continue
+            if not isinstance(data, dict):
+                continue
+            if data.get("type") == "join":
+                if client is not None or not _valid_id(data.get("room")) or not _valid_id(data.get("sid")):
+                    await ws.send_json({"type": "error", "error": "room and sid required"})
+                    continue
+                peers = hub.join(data["room"], data["sid"])
+                client = hub.client(data["sid"])
+                client.ws = ws
+                await ws.send_json({"type": "joined", "peers": peers})
+                pump = asyncio.ensure_future(_pump(client, ws))
+            elif client is None:
+                await ws.send_json({"type": "error", "error": "join first"})
+            else:
+                try:
+                    hub.signal(data, sender=client.sid)
+                except ValueError as e:
+                    await ws.send_json({"type": "error", "error": str(e)})
+    finally:
+        if pump is not None:
+            pump.cancel()
+        if client is not None and client.ws is ws:
+            client.ws = None
+            client.seen = hub._now()
+            # Temiz kapanış = odadan ayrılma; kopan bağlantının kutusu HTTP'ye geçiş için kalır
+            if ws.close_code == WSCloseCode.OK:
+                hub.leave(client.sid)
+    return ws
+
+
+async def _sweeper(app: web.Application):
+    async def loop():
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            app[HUB].sweep()
+
+    task = asyncio.ensure_future(loop())
+    yield
+    task.cancel()
+
+
+def create_app(poll_wait: float = POLL_WAIT, heartbeat: float = SIGNALING_WS_HEARTBEAT) -> web.Application:
+    """
+    Sinyal sunucusu uygulaması
+
+    Args:
+        poll_wait: Long-poll bekleme süresi (saniye)
+        heartbeat: WebSocket ping aralığı (saniye)
+    """
+    app = web.Application(client_max_size=MAX_MESSAGE_SIZE)
+    app[HUB] = SignalingHub()
+    app[POLL_WAIT_KEY] = poll_wait
+    app[HEARTBEAT_KEY] = heartbeat
+    app.add_routes([
+        web.get("/", handle_index),
+        web.post("/join", handle_join),
+        web.get("/poll", handle_poll),
+        web.post("/signal", handle_signal),
+        web.get("/ws", handle_ws),
+    ])
+    app.cleanup_ctx.append(_sweeper)
+    return app
+
+
+class SignalServer:
+    """
+    Arka plan thread'inde çalışan sinyal sunucusu (testler, benchmark, yerel ağ)
+
+    Kullanım:
+        server = SignalServer(); url = server.start()
+        client = SignalingClient(loop, server_url=url)
+        ...
+        server.stop()
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, poll_wait: float = POLL_WAIT):
+        self.host = host
+        self.port = port
+        self.app = create_app(poll_wait=poll_wait)
+        self.hub: SignalingHub = self.app[HUB]
+        self.url: Optional[str] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, timeout: float = 10) -> str:
+        """
+        Sunucuyu başlat
+
+        Returns:
+            Sunucu adresi (http://host:port)
+
+        Raises:
+            OSError: Port açılamazsa
+        """
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True, name="quickshare-signal")
+        self._thread.start()
+        future = asyncio.run_coroutine_threadsafe(self._start(), self._loop)
+        try:
+            host, port = future.result(timeout=timeout)[:2]
+        except Exception:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            raise
+        self.port = port
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def _start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        return self._runner.addresses[0]
+
+    def call(self, func, *args, timeout: float = 5):
+        """Hub fonksiyonunu sunucunun loop'unda çalıştır (ör. server.call(hub.sweep))"""
+        async def run():
+            return func(*args)
+        return asyncio.run_coroutine_threadsafe(run(), self._loop).result(timeout=timeout)
+
+    def stop(self):
+        if self._loop is None or not self._loop.is_running():
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(timeout=10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="signal_server",
+                                     description="QuickShare sinyal sunucusu (HTTP long-poll + WebSocket)")
+    parser.add_argument("--host", default="0.0.0.0", help="Dinlenecek adres (varsayılan: 0.0.0.0)")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", SIGNAL_SERVER_PORT)),
+                        help=f"Port (varsayılan: $PORT ya da {SIGNAL_SERVER_PORT})")
+    args = parser.parse_args(argv)
+    print(f"QuickShare sinyal sunucusu: http://{args.host}:{args.port}", file=sys.stderr)
+    web.run_app(create_app(), host=args.host, port=args.port, access_log=None, print=None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Benchmark Test - profil ölçekleme, sabit tohumlu veri ve yerel sinyal sunucusu ile 1:N P2P
+"""
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import benchmark
+import webrtc_manager
+from benchmark import KB, MB, GB, PROFILES, _delivered, create_files, profile_sizes, run_p2p
+
+
+def test_profile_sizes():
+    assert profile_sizes(PROFILES["large"]) == [10 * GB]
+    assert profile_sizes(PROFILES["small"], 0.01) == [4 * KB] * 100
+    # Tek dosyada boyut, çok dosyada sayı ölçeklenir
+    assert profile_sizes([(1, 100 * MB), (10, 4 * KB)], 0.5) == [50 * MB] + [4 * KB] * 5
+
+
+def test_files_are_reproducible():
+    a = tempfile.mkdtemp(prefix="quickshare_bench_test_")
+    b = tempfile.mkdtemp(prefix="quickshare_bench_test_")
+    try:
+        first = create_files(a, [MB + 5, 10])
+        second = create_files(b, [MB + 5, 10])
+        for x, y in zip(first, second):
+            with open(x["path"], "rb") as fx, open(y["path"], "rb") as fy:
+                assert fx.read() == fy.read()
+    finally:
+        shutil.rmtree(a, ignore_errors=True)
+        shutil.rmtree(b, ignore_errors=True)
+
+
+def test_delivered_checks_content():
+    src = tempfile.mkdtemp(prefix="quickshare_bench_test_")
+    dst = tempfile.mkdtemp(prefix="quickshare_bench_test_")
+    try:
+        files = create_files(src, [MB + 5, 10])
+        for f in files:
+            shutil.copy(f["path"], os.path.join(dst, f["name"]))
+        assert _delivered(files, [dst])
+        # Aynı boyutta ama bozuk içerik teslim edilmiş sayılmaz
+        with open(os.path.join(dst, files[0]["name"]), "r+b") as f:
+            f.seek(MB)
+            byte = f.read(1)
+            f.seek(MB)
+            f.write(bytes([byte[0] ^ 1]))
+        assert not _delivered(files, [dst])
+    finally:
+        shutil.rmtree(src, ignore_errors=True)
+        shutil.rmtree(dst, ignore_errors=True)
+
+
+def test_p2p_room_with_two_receivers():
+    src = tempfile.mkdtemp(prefix="quickshare_bench_test_")
+    try:
+        benchmark._isolate_state(src)
+        files = create_files(src, [200 * KB, 4 * KB, 4 * KB])
+        result = run_p2p(files, receivers=2, timeout=60)
+        assert result["ok"], result
+        assert result["receivers"] == 2 and result["files"] == 3
+        assert result["files_per_s"] > 0 and result["cpu_percent"] >= 0
+    finally:
+        shutil.rmtree(src, ignore_errors=True)
+
+
+def test_direct_option_applied_and_recorded():
+    src = tempfile.mkdtemp(prefix="quickshare_bench_test_")
+    direct = webrtc_manager.WEBRTC_DIRECT_TRANSFER
+    try:
+        benchmark._isolate_state(src, direct=False)
+        assert webrtc_manager.WEBRTC_DIRECT_TRANSFER is False
+        result = run_p2p(create_files(src, [300 * KB]), timeout=60)
+        assert result["ok"], result
+
+        # Seçim her ölçüm sürecine uygulanır ve sonuçlara yazılır
+        output = os.path.join(src, "sonuc.json")
+        assert benchmark.main(["--mode", "p2p", "--size-mb", "0.1", "--runs", "1", "--no-direct",
+                               "--output", output]) == 0
+        with open(output, encoding="utf-8") as f:
+            report = json.load(f)
+        assert [r["direct"] for r in report["results"]] == [False]
+        assert report["summary"][0]["direct"] is False
+    finally:
+        webrtc_manager.WEBRTC_DIRECT_TRANSFER = direct
+        shutil.rmtree(src, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_profile_sizes()
+    test_files_are_reproducible()
+    test_delivered_checks_content()
+    test_p2p_room_with_two_receivers()
+    test_direct_option_applied_and_recorded()
+    print("✅ PASSED")
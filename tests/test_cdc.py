@@ -0,0 +1,132 @@
+"""
+CDC Test - içeriğe göre parçalama, parça listesi, tekrar planı ve önbellek
+"""
+import io
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cdc
+from cdc import (MIN_CHUNK, MAX_CHUNK, CHUNK_ENTRY, ChunkIndex, chunk_file, encode_chunks,
+                 iter_chunks, parse_chunks, plan_transfer)
+from hash_cache import HashCache
+
+
+def _setup():
+    tmp = tempfile.mkdtemp(prefix="quickshare_cdc_")
+    # Global hash önbelleğini test dizinine yönlendir
+    cdc.hash_cache = HashCache(filepath=os.path.join(tmp, "cache.db"))
+    return tmp
+
+
+def _write(directory, name, data):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def _chunks(data):
+    return [bytes(c) for c in iter_chunks(io.BytesIO(data))]
+
+
+def test_boundaries_follow_content():
+    data = os.urandom(6 * 1024 * 1024)
+    chunks = _chunks(data)
+    assert b"".join(chunks) == data
+    assert all(MIN_CHUNK <= len(c) <= MAX_CHUNK for c in chunks[:-1])
+
+    # Başa veri eklenince sınırlar kayar ama ilk birkaç parçadan sonra aynı parçalar çıkar
+    shifted = _chunks(os.urandom(12345) + data)
+    common = set(chunks) & set(shifted)
+    assert sum(len(c) for c in common) > len(data) * 0.8
+
+    # Sınır içermeyen veri MAX_CHUNK'ta kesilir; küçük dosya tek parçadır
+    assert [len(c) for c in _chunks(b"\x00" * (2 * MAX_CHUNK + 5))] == [MAX_CHUNK, MAX_CHUNK, 5]
+    assert _chunks(b"abc") == [b"abc"]
+    assert _chunks(b"") == []
+
+
+def test_encode_and_parse():
+    tmp = _setup()
+    data = os.urandom(3 * 1024 * 1024)
+    entries = chunk_file(_write(tmp, "a.bin", data))
+    text = encode_chunks(entries)
+    chunks = parse_chunks(text, len(data))
+    assert len(chunks) == len(entries) // CHUNK_ENTRY.size
+    assert chunks[0][0] == 0 and chunks[-1][0] + chunks[-1][1] == len(data)
+
+    for bad, size in ((text, len(data) + 1), (text[:-4], len(data)), ("!!", 0), (None, 0)):
+        try:
+            parse_chunks(bad, size)
+            assert False, "ValueError bekleniyordu"
+        except ValueError:
+            pass
+    assert parse_chunks(encode_chunks(b""), 0) == []
+
+
+def test_plan_transfer():
+    tmp = _setup()
+    save = os.path.join(tmp, "save")
+    os.makedirs(save)
+    base = os.urandom(4 * 1024 * 1024)
+    extra = os.urandom(2 * 1024 * 1024)
+    local_path = _write(save, "old.bin", extra)
+
+    src = os.path.join(tmp, "src")
+    os.makedirs(src)
+    sources = {"a.bin": base, "b.bin": base, "c.bin": extra + os.urandom(1000)}
+    files = [{"name": n, "size": len(d), "chunks": encode_chunks(chunk_file(_write(src, n, d)))}
+             for n, d in sources.items()]
+    files.append({"name": "broken.bin", "size": 5, "chunks": "??"})
+
+    # Varsayılan: önbellekte parça listesi olmayan dosyalar okunmaz
+    index = ChunkIndex()
+    index.scan(save)
+    assert len(index) == 0
+    index.scan(save, limit=len(extra))
+    assert len(index) > 0
+    cached = ChunkIndex()
+    cached.scan(save)
+    assert len(cached) == len(index)  # Okunan dosyanın parçaları artık önbellekte
+    plans = plan_transfer(files, index)
+
+    # a.bin ilk geçiş: tamamen ağdan, planı yok
+    assert "a.bin" not in plans and "broken.bin" not in plans
+    # b.bin tamamen a.bin'den kopyalanır
+    assert plans["b.bin"]["fetch"] == []
+    assert plans["b.bin"]["saved"] == len(base)
+    assert all(src_name == "a.bin" and offset == src_offset
+               for offset, _, src_name, src_offset in plans["b.bin"]["dup"])
+    # c.bin'in başı kaydetme dizinindeki dosyada var
+    local = plans["c.bin"]["local"]
+    assert local and all(path == local_path for _, _, path, _ in local)
+    assert plans["c.bin"]["fetch"][-1][1] == len(sources["c.bin"])
+
+    # Hariç tutulan dosyalar indekslenmez
+    excluded = ChunkIndex()
+    excluded.scan(save, exclude=[local_path], limit=len(extra))
+    assert len(excluded) == 0
+
+
+def test_file_chunks_cached():
+    tmp = _setup()
+    path = _write(tmp, "a.bin", os.urandom(MAX_CHUNK + 10))
+    entries = cdc.file_chunks(path)
+    assert cdc.hash_cache.get_chunks(path) == entries
+
+    # Dosya değişince kayıt geçersiz olmalı
+    with open(path, "ab") as f:
+        f.write(b"more")
+    assert cdc.hash_cache.get_chunks(path) is None
+    assert cdc.file_chunks(path) == chunk_file(path)
+
+
+if __name__ == "__main__":
+    test_boundaries_follow_content()
+    test_encode_and_parse()
+    test_plan_transfer()
+    test_file_chunks_cached()
+    print("✅ PASSED")
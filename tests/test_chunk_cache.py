@@ -0,0 +1,70 @@
+"""
+Shared Chunk Cache Test - ortak okuma, tek hash ve eviction
+"""
+import os
+import sys
+import hashlib
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chunk_cache
+from chunk_cache import SharedChunkCache
+from hash_cache import HashCache
+
+
+def _setup(size):
+    tmp = tempfile.mkdtemp(prefix="quickshare_chunk_")
+    # Global hash önbelleğini test dizinine yönlendir
+    chunk_cache.hash_cache = HashCache(filepath=os.path.join(tmp, "cache.db"))
+    path = os.path.join(tmp, "file.bin")
+    data = os.urandom(size)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path, data
+
+
+def _read_all(cache, entry, start=0):
+    parts, pos = [], start
+    while True:
+        part = cache.read(entry, pos, 1 << 20)
+        if not part:
+            return b"".join(parts)
+        parts.append(part)
+        pos += len(part)
+
+
+def test_peers_share_blocks_and_hash():
+    path, data = _setup(10 * 1000 + 7)
+    cache = SharedChunkCache(block_size=1000, max_bytes=1 << 20)
+    a = cache.open(path)
+    b = cache.open(path)
+    assert a is b
+
+    assert _read_all(cache, a) == data
+    assert _read_all(cache, b, start=2500) == data[2500:]
+    assert cache.misses == 11  # Her blok diskten bir kez okunur
+    assert cache.digest(a) == hashlib.sha256(data).hexdigest()
+    assert chunk_cache.hash_cache.get(path) == a.digest
+
+    cache.release(a)
+    cache.release(b)
+    assert cache.cached_bytes == 0
+
+
+def test_eviction_and_digest_from_disk():
+    path, data = _setup(8000)
+    cache = SharedChunkCache(block_size=1000, max_bytes=3000)
+    entry = cache.open(path)
+
+    # Sondan başlayan okuma (resume) hash sırasını ilerletmez
+    assert _read_all(cache, entry, start=4000) == data[4000:]
+    assert cache.cached_bytes <= 3000
+    assert cache.digest(entry) == hashlib.sha256(data).hexdigest()
+    cache.release(entry)
+
+
+if __name__ == "__main__":
+    test_peers_share_blocks_and_hash()
+    test_eviction_and_digest_from_disk()
+    print("✅ PASSED")
@@ -0,0 +1,109 @@
+"""
+CLI Test - JSON olayları, dosya seçimi, hafif başlangıç ve HTTP üzerinden alma
+"""
+import io
+import os
+import sys
+import json
+import tempfile
+import threading
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import quickshare
+from quickshare import EventWriter, build_parser, collect_files, select_files
+
+
+def _events(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_event_writer_throttles_progress():
+    stream = io.StringIO()
+    out = EventWriter(stream, interval=60)
+    out.log("merhaba")
+    for done in range(0, 100, 10):
+        out.progress(done, 100, 1.5, 1, 1)
+    out.progress(100, 100, 2.0, 1, 1)  # Son durum her zaman yazılır
+
+    events = _events(stream)
+    assert events[0]["event"] == "log" and events[0]["message"] == "merhaba"
+    progress = [e for e in events if e["event"] == "progress"]
+    assert [e["bytes"] for e in progress] == [0, 100]
+    assert progress[-1]["percent"] == 100.0 and progress[-1]["speed"] == 2
+
+
+def test_collect_and_select_files():
+    tmp = tempfile.mkdtemp(prefix="quickshare_cli_")
+    os.makedirs(os.path.join(tmp, "dir", "sub"))
+    for name, data in (("a.txt", b"a"), ("dir/b.txt", b"bb"), ("dir/sub/c.txt", b"ccc")):
+        with open(os.path.join(tmp, name), "wb") as f:
+            f.write(data)
+
+    files = collect_files([os.path.join(tmp, "a.txt"), os.path.join(tmp, "dir")])
+    assert sorted((f["name"], f["size"]) for f in files) == [
+        ("a.txt", 1), ("b.txt", 2), (os.path.join("sub", "c.txt"), 3)]
+    try:
+        collect_files([os.path.join(tmp, "yok")])
+        assert False, "FileNotFoundError bekleniyordu"
+    except FileNotFoundError:
+        pass
+
+    assert select_files(files, None) == files
+    assert [f["name"] for f in select_files(files, ["b.txt"])] == ["b.txt"]
+    try:
+        select_files(files, ["b.txt", "z.txt"])
+        assert False, "ValueError bekleniyordu"
+    except ValueError:
+        pass
+
+
+def test_help_does_not_load_transfer_stack():
+    # Ağır bağımlılıklar yalnızca alt komut çalışırken yüklenmeli
+    code = ("import sys, quickshare; quickshare.build_parser(); "
+            "print(sorted(m for m in ('aiortc', 'flask', 'requests', 'aiohttp') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+
+
+def test_receive_over_http():
+    import server
+    from benchmark import _isolate_state
+    from werkzeug.serving import make_server
+
+    _isolate_state(tempfile.mkdtemp(prefix="quickshare_cli_state_"))
+    src = tempfile.mkdtemp(prefix="quickshare_cli_src_")
+    dst = tempfile.mkdtemp(prefix="quickshare_cli_dst_")
+    data = {"a.bin": os.urandom(300 * 1024), "b.txt": b"hello\n" * 100}
+    for name, content in data.items():
+        with open(os.path.join(src, name), "wb") as f:
+            f.write(content)
+
+    server.set_shared_files([os.path.join(src, name) for name in data])
+    httpd = make_server("127.0.0.1", 0, server.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{httpd.server_port}"
+        stream = io.StringIO()
+        args = build_parser().parse_args(["receive", url, "-o", dst, "--files", "b.txt"])
+        assert quickshare.cmd_receive(args, EventWriter(stream)) == 0
+    finally:
+        httpd.shutdown()
+
+    events = _events(stream)
+    assert events[0]["event"] == "files" and [f["name"] for f in events[0]["files"]] == ["b.txt"]
+    assert events[-1]["event"] == "done" and events[-1]["hashes"] == {"b.txt": "verified"}
+    assert os.listdir(dst) == ["b.txt"]
+    with open(os.path.join(dst, "b.txt"), "rb") as f:
+        assert f.read() == data["b.txt"]
+
+
+if __name__ == "__main__":
+    test_event_writer_throttles_progress()
+    test_collect_and_select_files()
+    test_help_does_not_load_transfer_stack()
+    test_receive_over_http()
+    print("✅ PASSED")
@@ -0,0 +1,51 @@
+"""
+Compression Test - entropi örneklemesi, dosya seçimi ve blok sıkıştırma
+"""
+import os
+import sys
+import gzip
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compress import MIN_FILE_SIZE, compress_block, deflate, sample_entropy, should_compress
+
+
+TEXT = b"".join(b"2026-01-01 12:00:%02d INFO request served in %d ms\n" % (i % 60, i % 97)
+                for i in range(20000))
+
+
+def test_should_compress():
+    assert sample_entropy(b"") == 0.0
+    assert sample_entropy(b"a" * 100) == 0.0
+    assert sample_entropy(bytes(range(256)) * 4) == 8.0
+
+    assert should_compress("app.log", len(TEXT), TEXT)
+    # Yüksek entropili veri, bilinen sıkıştırılmış uzantılar ve küçük dosyalar ham gider
+    noise = os.urandom(256 * 1024)
+    assert not should_compress("data.bin", len(noise), noise)
+    assert not should_compress("photo.JPG", len(TEXT), TEXT)
+    assert not should_compress("tiny.txt", MIN_FILE_SIZE - 1, TEXT[:MIN_FILE_SIZE - 1])
+
+
+def test_compress_block():
+    packed = compress_block(TEXT)
+    assert packed is not None and len(packed) < len(TEXT) // 4
+    assert zlib.decompress(packed) == TEXT
+    # Sıkışmayan blok için None
+    assert compress_block(os.urandom(64 * 1024)) is None
+
+
+def test_gzip_members():
+    # HTTP yanıtı bağımsız sıkıştırılmış gzip üyelerinin art arda eklenmesidir
+    blocks = [TEXT[i:i + 100000] for i in range(0, len(TEXT), 100000)]
+    stream = b"".join(deflate(block, gzip=True) for block in blocks)
+    assert len(blocks) > 1
+    assert gzip.decompress(stream) == TEXT
+
+
+if __name__ == "__main__":
+    test_should_compress()
+    test_compress_block()
+    test_gzip_members()
+    print("✅ PASSED")
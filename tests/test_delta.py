@@ -0,0 +1,139 @@
+"""
+Delta Test - imza, kayan checksum taraması ve eski sürümden yeniden kurma
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import delta
+from delta import DeltaScanner, block_size_for, check_local, parse_signature, signature, use_delta
+from merkle import hash_file_blocks
+
+
+def _write(directory, name, data):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def _delta(old, new, block_size, scanners=None):
+    tmp = tempfile.mkdtemp(prefix="quickshare_delta_")
+    old_path = _write(tmp, "old.bin", old)
+    new_path = _write(tmp, "new.bin", new)
+    scanner = DeltaScanner(new_path, parse_signature(signature(old_path, block_size)), block_size)
+    if scanners is not None:
+        scanners.append(scanner)
+    ops = []
+    while not scanner.done:
+        ops += scanner.step()
+    return ops
+
+
+def _apply(old, ops):
+    out = bytearray()
+    for op in ops:
+        assert op[1] == len(out)  # Sıralı ve boşluksuz
+        if op[0] == "copy":
+            out += old[op[2]:op[2] + op[3]]
+        else:
+            out += op[2]
+    return bytes(out)
+
+
+def test_shifted_content_is_copied():
+    old = os.urandom(200 * 1000 + 17)
+    new = old[:50000] + b"inserted" * 100 + old[50000:120000] + old[130000:] + b"tail"
+    ops = _delta(old, new, 4096)
+    assert _apply(old, ops) == new
+    literal = sum(len(op[2]) for op in ops if op[0] == "data")
+    assert literal < 3 * 4096 + 800 + 4  # Yalnızca değişen bölgeler ve kısa kuyruklar
+
+
+def test_unrelated_and_edge_files():
+    old = os.urandom(50000)
+    for new in (os.urandom(30000), b"", old[:100], old[:4096 * 3], old):
+        ops = _delta(old, new, 4096)
+        assert _apply(old, ops) == new
+
+    # Literal parçalar LITERAL_SIZE ile sınırlı
+    new = os.urandom(delta.LITERAL_SIZE * 2 + 10)
+    ops = _delta(old, new, 4096)
+    assert _apply(old, ops) == new
+    assert max(len(op[2]) for op in ops) <= delta.LITERAL_SIZE
+
+
+def test_signature_and_decision():
+    try:
+        parse_signature(b"\x00" * 5)
+        assert False, "truncated signature accepted"
+    except ValueError:
+        pass
+
+    assert block_size_for(0) == delta.MIN_BLOCK_SIZE
+    assert block_size_for(1 << 40) == delta.MAX_BLOCK_SIZE
+
+    tmp = tempfile.mkdtemp(prefix="quickshare_delta_")
+    size = delta.DELTA_MIN_FILE_SIZE * 2
+    path = _write(tmp, "local.bin", b"\0" * size)
+    # Temiz bir yarım indirme: yalnızca kuyruk eksik
+    assert not use_delta(path, size * 2, [(size, size * 2)])
+    # Yerel verinin çoğu bozuk: eski sürüm
+    assert use_delta(path, size, [(0, size // 2)])
+    # Neredeyse hepsi bozuk: yeniden kullanılacak veri yok, normal indirme
+    assert not use_delta(path, size, [(0, size)])
+    assert not use_delta(path, size, [(0, size - size // 20)])
+    # Tek bozuk blok: Merkle onarımı yeterli
+    assert not use_delta(path, size, [(1 << 20, 2 << 20)])
+
+
+def test_unrelated_file_gives_up_scanning():
+    step_bytes = delta.STEP_BYTES
+    delta.STEP_BYTES = 64 * 1024
+    try:
+        old = os.urandom(300 * 1024)
+        # İlgisiz dosya: ilk adımdan sonra tarama bırakılır, kalan ham gider
+        scanners = []
+        new = os.urandom(delta.STEP_BYTES * 5 + 123)
+        ops = _delta(old, new, 4096, scanners)
+        assert _apply(old, ops) == new and scanners[0].raw
+        assert all(op[0] == "data" for op in ops)
+
+        # Çoğu eşleşen dosya sonuna kadar taranır
+        scanners = []
+        new = old[:1000] + b"x" * 10 + old[1000:]
+        ops = _delta(old, new, 4096, scanners)
+        assert _apply(old, ops) == new and not scanners[0].raw
+        assert sum(len(op[2]) for op in ops if op[0] == "data") < 2 * 4096 + 10
+    finally:
+        delta.STEP_BYTES = step_bytes
+
+
+def test_check_local_signature_in_one_pass():
+    tmp = tempfile.mkdtemp(prefix="quickshare_delta_")
+    size = delta.DELTA_MIN_FILE_SIZE * 2
+    block = 1 << 20
+    new = os.urandom(size)
+    leaves, _ = hash_file_blocks(_write(tmp, "new.bin", new), block)
+
+    # Eski sürüm: ortası değişmiş ve sonuna veri eklenmiş (beklenenden büyük)
+    old = new[:size // 4] + os.urandom(size // 2) + new[size * 3 // 4:] + b"ek" * 1000
+    old_path = _write(tmp, "old.bin", old)
+    missing, sig = check_local(old_path, size, block, leaves)
+    assert missing == [(size // 4, size * 3 // 4)]
+    assert sig == signature(old_path, block_size_for(size))
+
+    # Yarım indirme: onarım yeterli, imza çıkarılmaz
+    part_path = _write(tmp, "part.bin", new[:size - block])
+    assert check_local(part_path, size, block, leaves) == ([(size - block, size)], None)
+
+
+if __name__ == "__main__":
+    test_shifted_content_is_copied()
+    test_unrelated_and_edge_files()
+    test_signature_and_decision()
+    test_unrelated_file_gives_up_scanning()
+    test_check_local_signature_in_one_pass()
+    print("✅ PASSED")
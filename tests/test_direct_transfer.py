@@ -0,0 +1,124 @@
+"""
+Direct Transfer Test - doğrudan TCP/TLS el sıkışması, parmak izi/anahtar doğrulaması ve aynı ağda P2P transferin TCP'den gitmesi
+"""
+import os
+import sys
+import time
+import asyncio
+import hashlib
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cdc
+import merkle
+import chunk_cache
+from hash_cache import HashCache
+from direct_transfer import DirectServer, MESSAGE_HEADER, MAX_MESSAGE_SIZE, connect
+from webrtc_manager import WebRTCSender, WebRTCReceiver
+
+# Global hash önbelleğini repo içindeki data/ yerine geçici dizine yönlendir
+cdc.hash_cache = merkle.hash_cache = chunk_cache.hash_cache = HashCache(
+    filepath=os.path.join(tempfile.mkdtemp(prefix="quickshare_test_cache_"), "cache.db"))
+
+
+def test_direct_link_handshake():
+    async def scenario():
+        for tls in (True, False):
+            server = DirectServer(tls=tls, port=0)
+            await server.start()
+            try:
+                offer = server.offer()
+                assert (offer["fingerprint"] is not None) == tls
+
+                # Yanlış anahtar ve (TLS'de) yanlış parmak izi reddedilir, teklif geçerli kalır
+                bad = [dict(offer, token="0" * 32)]
+                if tls:
+                    bad.append(dict(offer, fingerprint="0" * 64))
+                for wrong in bad:
+                    try:
+                        await connect("127.0.0.1", wrong, timeout=5)
+                        assert False, f"ConnectionError bekleniyordu: {wrong}"
+                    except ConnectionError:
+                        pass
+                assert not server.expect(offer["token"]).done()
+
+                link = await connect("127.0.0.1", offer, timeout=5)
+                accepted = await asyncio.wait_for(server.expect(offer["token"]), 5)
+                # Anahtar tek kullanımlık
+                try:
+                    await connect("127.0.0.1", offer, timeout=5)
+                    assert False, "Kullanılmış anahtar kabul edildi"
+                except ConnectionError:
+                    pass
+
+                messages = [b"x" * 10, b"", os.urandom(300 * 1024)]
+                for message in messages:
+                    await accepted.send(message)
+                await accepted.close()
+                assert [m async for m in link.messages()] == messages
+                await link.close()
+
+                # Bozuk uzunluk öneki akışı keser
+                other = server.offer()
+                link = await connect("127.0.0.1", other, timeout=5)
+                accepted = await asyncio.wait_for(server.expect(other["token"]), 5)
+                accepted.writer.write(MESSAGE_HEADER.pack(MAX_MESSAGE_SIZE + 1))
+                try:
+                    async for _ in link.messages():
+                        pass
+                    assert False, "ConnectionError bekleniyordu"
+                except ConnectionError:
+                    pass
+                await link.close()
+                await accepted.close()
+            finally:
+                await server.close()
+
+    asyncio.run(scenario())
+
+
+def test_p2p_data_goes_over_direct_link():
+    src_dir = tempfile.mkdtemp(prefix="quickshare_direct_")
+    save_dir = tempfile.mkdtemp(prefix="quickshare_direct_recv_")
+    files, hashes = [], {}
+    for i, size in enumerate((3 * 1024 * 1024 + 17, 1000, 0)):
+        name = f"dosya_{i}.bin"
+        data = os.urandom(size)
+        with open(os.path.join(src_dir, name), "wb") as f:
+            f.write(data)
+        files.append({"name": name, "path": os.path.join(src_dir, name), "size": size})
+        hashes[name] = hashlib.sha256(data).hexdigest()
+
+    logs = []
+    sender = WebRTCSender()
+    sender.log_callback = logs.append
+    sender.set_files(files)
+    sender.start()
+    sender.wait_until_ready()
+    receiver = WebRTCReceiver()
+    receiver.save_path = save_dir
+    receiver.log_callback = logs.append
+    try:
+        offer = receiver.create_offer_sync()
+        receiver.set_answer_sync(sender.handle_offer_sync(offer["sdp"])["sdp"])
+        assert receiver.wait_for_connection(timeout=15)
+        assert receiver._file_list_event.wait(20)
+        receiver.request_download([f["name"] for f in files])
+        assert receiver.wait_for_transfer(timeout=60) and receiver.status == "done"
+    finally:
+        sender.stop()
+        receiver.stop()
+        time.sleep(0.3)
+
+    # Loopback'te ICE host-host bağlanır: dosya verisi doğrudan TCP'den gelmiş olmalı
+    assert any("doğrudan TCP ile gönderiliyor" in m for m in logs), logs
+    for name, digest in hashes.items():
+        with open(os.path.join(save_dir, name), "rb") as f:
+            assert hashlib.sha256(f.read()).hexdigest() == digest
+
+
+if __name__ == "__main__":
+    test_direct_link_handshake()
+    test_p2p_data_goes_over_direct_link()
+    print("✅ PASSED")
@@ -0,0 +1,406 @@
+"""
+Downloader Test - loopback sunucuyla segmentli indirme ve resume, eşzamanlı çoklu dosya indirme ve ilk hatada durdurma
+"""
+import os
+import sys
+import time
+import hashlib
+import tempfile
+import threading
+from base64 import urlsafe_b64encode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+import downloader
+from benchmark import _isolate_state
+from config import PARTIAL_STATE_SUFFIX, SEGMENT_MIN_FILE_SIZE, SEGMENT_SIZE
+from downloader import Downloader
+from hash_cache import HashCache
+from werkzeug.serving import make_server
+
+
+def _setup(files):
+    """Geçici durum + paylaşılan dosyalar; (kaynak, hedef) klasörleri döner"""
+    tmp = tempfile.mkdtemp(prefix="quickshare_dl_")
+    _isolate_state(tmp)
+    src, dst = os.path.join(tmp, "src"), os.path.join(tmp, "dst")
+    os.makedirs(src)
+    os.makedirs(dst)
+    for name, data in files.items():
+        with open(os.path.join(src, name), "wb") as f:
+            f.write(data)
+    server.set_shared_files([os.path.join(src, name) for name in files])
+    assert server.wait_chunk_lists(timeout=30)
+    return src, dst
+
+
+def _serve(app=None):
+    httpd = make_server("127.0.0.1", 0, app or server.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd, f"http://127.0.0.1:{httpd.server_port}"
+
+
+class _Throttle:
+    """Dosya gövdelerini blok başına bekleterek gönderen WSGI sarmalayıcı; eşzamanlı istekleri sayar"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        environ.pop("werkzeug.socket", None)  # sendfile yerine 1 MB'lık bloklar
+        body = server.app(environ, start_response)
+        if not environ["PATH_INFO"].startswith("/file_b64/"):
+            return body
+        return self._slow(body)
+
+    def _slow(self, body):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            for chunk in body:
+                time.sleep(self.delay)
+                yield chunk
+        finally:
+            with self._lock:
+                self.active -= 1
+            if hasattr(body, "close"):
+                body.close()
+
+
+class _Ranges:
+    """Dosya isteklerindeki Range başlıklarını kaydeden (ignore ile yok sayan) WSGI sarmalayıcı"""
+
+    def __init__(self, ignore=False):
+        self.ignore = ignore
+        self.seen = []
+        self.requests = []  # (method, path, Range)
+
+    def __call__(self, environ, start_response):
+        self.requests.append((environ["REQUEST_METHOD"], environ["PATH_INFO"], environ.get("HTTP_RANGE")))
+        if environ["PATH_INFO"].startswith("/file_b64/"):
+            self.seen.append(environ.get("HTTP_RANGE"))
+            if self.ignore:
+                environ.pop("HTTP_RANGE", None)  # Sunucu Range desteklemiyormuş gibi 200 döner
+        return server.app(environ, start_response)
+
+    def starts(self):
+        return sorted(int(r.split("=")[1].split("-")[0]) for r in self.seen if r)
+
+
+class _Corrupt:
+    """Range'siz dosya isteklerinde gövdenin ilk bloğunun bir byte'ını bozan WSGI sarmalayıcı"""
+
+    def __init__(self):
+        self.ranges = _Ranges()
+
+    def __call__(self, environ, start_response):
+        environ.pop("werkzeug.socket", None)
+        body = self.ranges(environ, start_response)
+        if not environ["PATH_INFO"].startswith("/file_b64/") or environ.get("HTTP_RANGE"):
+            return body
+        return self._flip(body)
+
+    def _flip(self, body):
+        first = True
+        try:
+            for chunk in body:
+                if first and chunk:
+                    chunk = bytes([chunk[0] ^ 0xFF]) + chunk[1:]
+                    first = False
+                yield chunk
+        finally:
+            if hasattr(body, "close"):
+                body.close()
+
+
+def _received_history():
+    return {r["filename"]: r["status"] for r in downloader.history.get_recent(direction="receive")}
+
+
+def test_parallel_smallest_first():
+    sizes = {"d.bin": 3 * 1024 * 1024, "a.bin": 1000, "c.bin": 2 * 1024 * 1024, "b.bin": 1536 * 1024}
+    data = {name: os.urandom(size) for name, size in sizes.items()}
+    src, dst = _setup(data)
+    throttle = _Throttle(0.1)
+    httpd, url = _serve(throttle)
+    started = []
+
+    def log(msg):
+        if msg.startswith("Downloading "):
+            started.append(msg[len("Downloading "):-3])
+
+    try:
+        dl = Downloader()
+        files = [{"name": name, "size": len(content)} for name, content in data.items()]
+        dl.download_files(files, url, dst, log_callback=log, max_workers=2, order="smallest_first")
+    finally:
+        httpd.shutdown()
+
+    # İlk ikisi birlikte başlar; a.bin bitince c.bin, b.bin bitince d.bin
+    assert sorted(started[:2]) == ["a.bin", "b.bin"] and started[2:] == ["c.bin", "d.bin"]
+    assert throttle.peak == 2
+    assert dl.hash_results == {name: "verified" for name in data}
+    assert _received_history() == {name: "success" for name in data}
+    for name, content in data.items():
+        with open(os.path.join(dst, name), "rb") as f:
+            assert f.read() == content
+
+
+def test_first_failure_stops_running_downloads():
+    data = {"slow.bin": os.urandom(8 * 1024 * 1024), "bad.bin": b"x" * 10}
+    src, dst = _setup(data)
+    httpd, url = _serve(_Throttle(0.5))
+
+    def log(msg):
+        if msg == "Downloading bad.bin...":
+            time.sleep(0.3)  # slow.bin aktarımı başlamış olsun
+            raise RuntimeError("bad.bin başarısız")
+
+    try:
+        dl = Downloader()
+        files = [{"name": name, "size": len(content)} for name, content in data.items()]
+        started = time.monotonic()
+        try:
+            dl.download_files(files, url, dst, log_callback=log)
+            assert False, "RuntimeError bekleniyordu"
+        except RuntimeError:
+            pass
+        # slow.bin'in tamamı ~4 s sürerdi; çalışan indirme beklenmeden durdurulur
+        assert time.monotonic() - started < 2
+    finally:
+        httpd.shutdown()
+
+    assert _received_history() == {"bad.bin": "failed", "slow.bin": "cancelled"}
+    assert os.path.getsize(os.path.join(dst, "slow.bin")) < len(data["slow.bin"])
+    assert not dl._abort.is_set()
+
+
+def test_segmented_resume_from_state():
+    size = SEGMENT_MIN_FILE_SIZE + SEGMENT_SIZE // 2
+    content = os.urandom(size)
+    src, dst = _setup({"big.bin": content})
+    path = os.path.join(dst, "big.bin")
+    state_path = path + PARTIAL_STATE_SUFFIX
+    segments = [[start, min(start + SEGMENT_SIZE, size) - 1, 0] for start in range(0, size, SEGMENT_SIZE)]
+    written = SEGMENT_SIZE + 1024 * 1024
+
+    # Yarıda kalmış indirme: ilk segment tamam, ikincinin 1 MB'ı yazılmış
+    with open(path, "wb") as f:
+        f.write(content[:written])
+        f.truncate(size)
+    segments[0][2], segments[1][2] = SEGMENT_SIZE, 1024 * 1024
+    dl = Downloader()
+    dl._save_segment_state(state_path, size, segments)
+    ranges = _Ranges()
+    httpd, url = _serve(ranges)
+    try:
+        dl.download_files([{"name": "big.bin", "size": size}], url, dst)
+        # Yalnızca eksik kısımlar istenir
+        assert ranges.starts() == [written] + [seg[0] for seg in segments[2:]]
+        assert not os.path.exists(state_path)
+        with open(path, "rb") as f:
+            assert f.read() == content
+        assert dl.hash_results == {"big.bin": "verified"}
+
+        # Yarım yazılmış (bozuk) state: elde kalan veriye güvenilmez, tüm segmentler yeniden iner
+        with open(path, "r+b") as f:
+            f.write(os.urandom(written))
+        with open(state_path, "w") as f:
+            f.write('{"size": %d, "segm' % size)
+        ranges.seen.clear()
+        dl.download_files([{"name": "big.bin", "size": size}], url, dst)
+        assert ranges.starts() == [seg[0] for seg in segments]
+    finally:
+        httpd.shutdown()
+    assert not os.path.exists(state_path)
+    with open(path, "rb") as f:
+        assert f.read() == content
+    assert dl.hash_results == {"big.bin": "verified"}
+
+
+def test_fallback_when_range_ignored():
+    data = {"big.bin": os.urandom(SEGMENT_MIN_FILE_SIZE + 1000), "small.bin": os.urandom(3 * 1024 * 1024)}
+    src, dst = _setup(data)
+    # Yarım kalmış tek stream indirmesi: resume Range ile istenir ama 200 gelir
+    with open(os.path.join(dst, "small.bin"), "wb") as f:
+        f.write(data["small.bin"][:2 * 1024 * 1024])
+    ranges = _Ranges(ignore=True)
+    httpd, url = _serve(ranges)
+    try:
+        dl = Downloader()
+        dl.download_files([{"name": name, "size": len(content)} for name, content in data.items()], url, dst)
+    finally:
+        httpd.shutdown()
+
+    assert any(r and r.startswith("bytes=2097152-") for r in ranges.seen), ranges.seen
+    assert dl.hash_results == {"big.bin": "verified", "small.bin": "verified"}
+    assert sorted(os.listdir(dst)) == ["big.bin", "small.bin"]  # .qsparts kalmadı
+    for name, content in data.items():
+        with open(os.path.join(dst, name), "rb") as f:
+            assert f.read() == content
+
+
+class _CountingCache(HashCache):
+    """Dosyayı baştan okuyarak hash hesaplayan çağrıları sayan önbellek"""
+
+    def __init__(self, filepath):
+        super().__init__(filepath=filepath)
+        self.computed = []
+
+    def get_or_compute(self, path):
+        self.computed.append(os.path.basename(path))
+        return super().get_or_compute(path)
+
+
+def test_inline_hash_fills_cache():
+    data = {"single.bin": os.urandom(3 * 1024 * 1024), "segmented.bin": os.urandom(SEGMENT_MIN_FILE_SIZE + 1000),
+            "resumed.bin": os.urandom(2 * 1024 * 1024 + 5)}
+    src, dst = _setup(data)
+    with open(os.path.join(dst, "resumed.bin"), "wb") as f:
+        f.write(data["resumed.bin"][:1024 * 1024 + 3])
+    # Sunucu kendi önbelleğini kullanmaya devam eder; yalnızca alıcı tarafı sayılır
+    cache = _CountingCache(os.path.join(os.path.dirname(dst), "receiver_cache.db"))
+    downloader.hash_cache = cache
+    httpd, url = _serve()
+    try:
+        dl = Downloader()
+        dl.download_files([{"name": name, "size": len(content)} for name, content in data.items()], url, dst)
+    finally:
+        httpd.shutdown()
+
+    # Hash indirme sırasında hesaplanır: doğrulama için dosya ikinci kez okunmaz
+    assert cache.computed == []
+    assert dl.hash_results == {name: "verified" for name in data}
+    for name, content in data.items():
+        assert cache.get(os.path.join(dst, name)) == hashlib.sha256(content).hexdigest()
+
+
+def test_verified_resume_and_block_repair():
+    block = 1024 * 1024
+    data = {"partial.bin": os.urandom(3 * block + 10), "broken.bin": os.urandom(3 * block + 20)}
+    src, dst = _setup(data)
+    # Yarım indirme: ilk blok bozuk, kuyruk eksik
+    partial = bytearray(data["partial.bin"][:2 * block + 5])
+    partial[10] ^= 0xFF
+    with open(os.path.join(dst, "partial.bin"), "wb") as f:
+        f.write(partial)
+    corrupt = _Corrupt()
+    httpd, url = _serve(corrupt)
+    try:
+        dl = Downloader()
+        dl.download_files([{"name": name, "size": len(content)} for name, content in data.items()], url, dst)
+    finally:
+        httpd.shutdown()
+
+    # partial.bin: bozuk blok Range ile onarılır, kısmi son blok atılıp oradan devam edilir
+    # broken.bin: aktarımda bozulan ilk blok hash uyuşmazlığından sonra yeniden indirilir
+    assert sorted(r for r in corrupt.ranges.seen if r) == [
+        f"bytes=0-{block - 1}", f"bytes=0-{block - 1}", f"bytes={2 * block}-"]
+    assert dl.hash_results == {name: "verified" for name in data}
+    for name, content in data.items():
+        with open(os.path.join(dst, name), "rb") as f:
+            assert f.read() == content
+
+
+def test_delta_update_of_old_version():
+    block = 1024 * 1024
+    new = os.urandom(16 * block)
+    data = {"image.bin": new}
+    src, dst = _setup(data)
+    # Eski sürüm: 16 bloktan 6'sı farklı (Merkle onarımı için fazla, delta için uygun)
+    old = bytearray(new)
+    for index in range(0, 12, 2):
+        old[index * block + 100:index * block + 200] = os.urandom(100)
+    with open(os.path.join(dst, "image.bin"), "wb") as f:
+        f.write(old)
+    ranges = _Ranges()
+    httpd, url = _serve(ranges)
+    logs = []
+    try:
+        dl = Downloader()
+        dl.download_files([{"name": "image.bin", "size": len(new)}], url, dst, log_callback=logs.append)
+    finally:
+        httpd.shutdown()
+
+    assert ("POST", "/delta/image.bin", None) in ranges.requests
+    assert not any(path.startswith("/file_b64/") for _, path, _ in ranges.requests)
+    assert any("delta ile güncellendi" in m for m in logs), logs
+    assert dl.hash_results == {"image.bin": "verified"}
+    assert sorted(os.listdir(dst)) == ["image.bin"]  # .qsdelta geçici dosyası kalmadı
+    with open(os.path.join(dst, "image.bin"), "rb") as f:
+        assert f.read() == new
+
+
+def test_duplicate_chunks_copied():
+    shared = os.urandom(3 * 1024 * 1024)
+    data = {"a.bin": shared, "b.bin": shared, "c.bin": os.urandom(100 * 1024) + shared}
+    src, dst = _setup(data)
+    ranges = _Ranges()
+    httpd, url = _serve(ranges)
+    logs = []
+    try:
+        dl = Downloader()
+        files = [{"name": name, "size": len(body)} for name, body in data.items()]
+        dl.download_files(files, url, dst, log_callback=logs.append)
+    finally:
+        httpd.shutdown()
+
+    assert any("Tekrar eden parçalar: 2 dosyada" in m for m in logs), logs
+    requested = {}
+    for _, path, byte_range in ranges.requests:
+        requested.setdefault(path, []).append(byte_range)
+    assert "/file_b64/" + urlsafe_b64encode(b"b.bin").decode() not in requested  # Tamamen a.bin'den kopyalandı
+    # c.bin'in yalnızca baştaki yeni kısmı (ve sınır parçası) Range ile alındı
+    c_ranges = requested["/file_b64/" + urlsafe_b64encode(b"c.bin").decode()]
+    assert c_ranges and all(r and r.startswith("bytes=") for r in c_ranges)
+    fetched = sum(int(r.split("-")[1]) - int(r[6:].split("-")[0]) + 1 for r in c_ranges)
+    assert fetched < 1024 * 1024
+    for name, body in data.items():
+        with open(os.path.join(dst, name), "rb") as f:
+            assert f.read() == body, name
+    assert dl.hash_results == {name: "verified" for name in data}
+
+
+def test_gzip_download():
+    text = b"".join(b"satir %d: quickshare\n" % i for i in range(200000))
+    src, dst = _setup({"log.txt": text})
+    encodings = []
+
+    def app(environ, start_response):
+        def record(status, headers, exc_info=None):
+            encodings.append(dict(headers).get("Content-Encoding"))
+            return start_response(status, headers, exc_info)
+        return server.app(environ, record)
+
+    httpd, url = _serve(app)
+    totals = []
+    try:
+        dl = Downloader()
+        dl.download_files([{"name": "log.txt", "size": len(text)}], url, dst,
+                          progress_callback=lambda done, total, *_: totals.append(total))
+    finally:
+        httpd.shutdown()
+
+    assert "gzip" in encodings
+    assert dl.hash_results == {"log.txt": "verified"}
+    assert totals and set(totals) == {len(text)}
+    with open(os.path.join(dst, "log.txt"), "rb") as f:
+        assert f.read() == text
+
+
+if __name__ == "__main__":
+    test_parallel_smallest_first()
+    test_first_failure_stops_running_downloads()
+    test_segmented_resume_from_state()
+    test_fallback_when_range_ignored()
+    test_inline_hash_fills_cache()
+    test_verified_resume_and_block_repair()
+    test_delta_update_of_old_version()
+    test_duplicate_chunks_copied()
+    test_gzip_download()
+    print("✅ PASSED")
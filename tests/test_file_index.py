@@ -0,0 +1,59 @@
+"""
+SharedFileIndex Test - relative path lookup ve artımlı yenileme
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import file_index
+from file_index import SharedFileIndex
+
+
+def _write(path, data=b"x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def test_lookup_and_refresh():
+    root = tempfile.mkdtemp(prefix="quickshare_index_")
+    share_dir = os.path.join(root, "share")
+    single = os.path.join(root, "single.txt")
+    _write(single, b"hello")
+    _write(os.path.join(share_dir, "a.bin"), b"1234")
+    _write(os.path.join(share_dir, "sub", "b.bin"), b"12")
+
+    index = SharedFileIndex()
+    index.build([single, share_dir])
+
+    assert len(index) == 3
+    assert index.lookup("single.txt")["size"] == 5
+    assert index.lookup("sub/b.bin")["path"] == os.path.join(share_dir, "sub", "b.bin")
+    assert index.lookup("sub\\b.bin") is not None
+    assert index.total_size() == 11
+
+    # Dosya büyürse lookup güncel boyutu döndürmeli
+    _write(os.path.join(share_dir, "a.bin"), b"123456")
+    assert index.lookup("a.bin")["size"] == 6
+
+    # Yeni dosya eklenirse miss sonrası artımlı tarama bulmalı
+    old_interval = file_index.REFRESH_INTERVAL
+    file_index.REFRESH_INTERVAL = 0
+    try:
+        _write(os.path.join(share_dir, "sub", "new", "c.bin"), b"abc")
+        assert index.lookup("sub/new/c.bin")["size"] == 3
+    finally:
+        file_index.REFRESH_INTERVAL = old_interval
+
+    # Silinen dosya artık bulunmamalı
+    os.remove(os.path.join(share_dir, "sub", "b.bin"))
+    assert index.lookup("sub/b.bin") is None
+    index.refresh()
+    assert "sub/b.bin" not in [e["name"].replace("\\", "/") for e in index.files()]
+
+
+if __name__ == "__main__":
+    test_lookup_and_refresh()
+    print("✅ PASSED")
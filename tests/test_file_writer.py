@@ -0,0 +1,188 @@
+"""
+FileWriter Test - birleştirilmiş yazma, sıra dışı chunk, hash doğrulama, bloklamayan geri basınç ve hata dayanıklılığı
+"""
+import os
+import sys
+import zlib
+import hashlib
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_writer import FileWriter
+
+
+def _run(writes, data, resume_prefix=0):
+    tmp = tempfile.mkdtemp(prefix="quickshare_writer_")
+    path = os.path.join(tmp, "sub", "out.bin")
+    if resume_prefix:
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as f:
+            f.write(data[:resume_prefix])
+
+    results = []
+    done = threading.Event()
+    writer = FileWriter(max_buffered=4096, coalesce_bytes=64 * 1024,
+                        on_complete=lambda *args: results.append(args))
+    writer.open(7, path, "out.bin", resume_prefix)
+    for offset, length in writes:
+        writer.write(7, offset, memoryview(data)[offset:offset + length])
+    writer.finish(7, len(data), hashlib.sha256(data).hexdigest())
+    writer.barrier(done.set)
+    assert done.wait(10)
+    writer.close()
+
+    with open(path, "rb") as f:
+        assert f.read() == data
+    return results[0]
+
+
+def test_sequential_writes_verify_hash():
+    data = os.urandom(100 * 1000)
+    writes = [(i, 1000) for i in range(0, len(data), 1000)]
+    file_id, name, expected, actual = _run(writes, data)
+    assert (file_id, name) == (7, "out.bin")
+    assert expected == actual
+
+
+def test_resume_and_out_of_order():
+    data = os.urandom(10 * 1000)
+    # Devam: mevcut prefix hash'e katılmalı
+    _, _, expected, actual = _run([(i, 1000) for i in range(3000, len(data), 1000)], data, resume_prefix=3000)
+    assert expected == actual
+
+    # Sıra dışı yazım (çoklu kanal): hash yine doğru olmalı
+    writes = [(i, 1000) for i in range(0, len(data), 1000)]
+    writes[2], writes[5] = writes[5], writes[2]
+    _, _, expected, actual = _run(writes, data)
+    assert expected == actual
+
+
+def test_copy_from_source_then_replace():
+    tmp = tempfile.mkdtemp(prefix="quickshare_writer_")
+    old = os.urandom(5000)
+    new = old[1000:3000] + b"literal" + old[:1000]
+    source = os.path.join(tmp, "file.bin")
+    with open(source, "wb") as f:
+        f.write(old)
+
+    results = []
+    done = threading.Event()
+    writer = FileWriter(on_complete=lambda *args: results.append(args))
+    writer.open(3, source + ".tmp", "file.bin", 0, source=source, final_path=source)
+    writer.copy(3, 0, 1000, 2000)
+    writer.write(3, 2000, b"literal")
+    writer.copy(3, 2007, 0, 1000)
+    writer.finish(3, len(new), hashlib.sha256(new).hexdigest())
+    writer.barrier(done.set)
+    assert done.wait(10)
+    writer.close()
+
+    assert results[0][2] == results[0][3]
+    with open(source, "rb") as f:
+        assert f.read() == new
+    assert not os.path.exists(source + ".tmp")
+
+
+def test_compressed_writes():
+    tmp = tempfile.mkdtemp(prefix="quickshare_writer_")
+    path = os.path.join(tmp, "out.txt")
+    data = b"log line\n" * 5000
+
+    results = []
+    done = threading.Event()
+    writer = FileWriter(on_complete=lambda *args: results.append(args))
+    writer.open(1, path, "out.txt")
+    writer.write_compressed(1, 0, zlib.compress(data[:20000]), 20000)
+    writer.write(1, 20000, data[20000:30000])
+    writer.write_compressed(1, 30000, zlib.compress(data[30000:]), len(data) - 30000)
+    writer.finish(1, len(data), hashlib.sha256(data).hexdigest())
+    # Bozuk veya uzunluğu tutmayan blok dosyayı başarısız sayar
+    writer.open(2, os.path.join(tmp, "bad.txt"), "bad.txt")
+    writer.write_compressed(2, 0, zlib.compress(b"abc"), 4)
+    writer.finish(2, 4, "")
+    writer.barrier(done.set)
+    assert done.wait(10)
+    writer.close()
+
+    assert results[0][2] == results[0][3]
+    with open(path, "rb") as f:
+        assert f.read() == data
+    assert results[1][:2] == (2, "bad.txt") and results[1][3] is None
+
+
+def test_backpressure_does_not_block():
+    tmp = tempfile.mkdtemp(prefix="quickshare_writer_")
+    path = os.path.join(tmp, "out.bin")
+    data = os.urandom(20 * 1000)
+
+    pressure = []
+    results = []
+    stall = threading.Event()
+    done = threading.Event()
+    writer = FileWriter(max_buffered=4096, on_complete=lambda *args: results.append(args),
+                        on_backpressure=pressure.append)
+    writer.open(1, path, "out.bin")
+    writer.barrier(lambda: stall.wait(10))  # Disk "geride": yazıcı thread'i takılı
+    # Sınırın çok üstünde veri kuyruğa eklenir ama write() beklemez
+    for offset in range(0, len(data), 1000):
+        writer.write(1, offset, data[offset:offset + 1000])
+    assert writer.paused and pressure == [True]
+    writer.finish(1, len(data), hashlib.sha256(data).hexdigest())
+    writer.barrier(done.set)
+
+    stall.set()
+    assert done.wait(10)
+    writer.close()
+    assert not writer.paused and pressure == [True, False]
+    assert results[0][2] == results[0][3]
+    with open(path, "rb") as f:
+        assert f.read() == data
+
+
+def test_errors_keep_thread_running():
+    tmp = tempfile.mkdtemp(prefix="quickshare_writer_")
+    data = os.urandom(3000)
+
+    errors = []
+    results = []
+    done = threading.Event()
+
+    def on_complete(*args):
+        results.append(args)
+        if args[0] == 2:
+            raise RuntimeError("callback hatası")
+
+    writer = FileWriter(on_complete=on_complete, on_error=lambda *args: errors.append(args))
+    # _do_write'tan kaçan (OSError olmayan) hata: dosya başarısız, thread sürer
+    writer.open(1, os.path.join(tmp, "a.bin"), "a.bin")
+    writer.write(1, 0, [1, 2, 3])
+    writer.finish(1, 3, "")
+    # Callback hataları da thread'i durdurmaz
+    writer.open(2, os.path.join(tmp, "b.bin"), "b.bin")
+    writer.write(2, 0, data)
+    writer.finish(2, len(data), hashlib.sha256(data).hexdigest())
+    writer.barrier(lambda: 1 / 0)
+    writer.open(3, os.path.join(tmp, "c.bin"), "c.bin")
+    writer.write(3, 0, data)
+    writer.finish(3, len(data), hashlib.sha256(data).hexdigest())
+    writer.barrier(done.set)
+    assert done.wait(10)
+    writer.close()
+
+    assert [(r[0], r[3] is not None) for r in results] == [(1, False), (2, True), (3, True)]
+    assert [(e[0], e[1], type(e[2])) for e in errors] == [
+        (1, "a.bin", TypeError), (2, None, RuntimeError), (None, None, ZeroDivisionError)]
+    with open(os.path.join(tmp, "c.bin"), "rb") as f:
+        assert f.read() == data
+
+
+if __name__ == "__main__":
+    test_sequential_writes_verify_hash()
+    test_resume_and_out_of_order()
+    test_copy_from_source_then_replace()
+    test_compressed_writes()
+    test_backpressure_does_not_block()
+    test_errors_keep_thread_running()
+    print("✅ PASSED")
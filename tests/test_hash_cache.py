@@ -0,0 +1,64 @@
+"""
+HashCache Test - kimlik değişiminde invalidation ve LRU eviction
+"""
+import os
+import sys
+import hashlib
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hash_cache import HashCache
+
+
+def _write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return hashlib.sha256(data).hexdigest()
+
+
+def test_cache_hit_and_invalidation():
+    tmp = tempfile.mkdtemp(prefix="quickshare_hash_")
+    cache = HashCache(filepath=os.path.join(tmp, "cache.db"))
+    path = os.path.join(tmp, "file.bin")
+    expected = _write(path, os.urandom(4096))
+
+    assert cache.get(path) is None
+    assert cache.get_or_compute(path) == expected
+    assert cache.get(path) == expected
+
+    # İsabetler commit başına fsync beklemez
+    assert cache._db().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    # Yeni instance aynı db'den okuyabilmeli (kalıcı)
+    assert HashCache(filepath=cache.filepath).get(path) == expected
+
+    # Boyut değişince kayıt geçersiz olmalı
+    expected = _write(path, os.urandom(8192))
+    assert cache.get(path) is None
+    assert cache.get_or_compute(path) == expected
+
+
+def test_lru_eviction():
+    tmp = tempfile.mkdtemp(prefix="quickshare_hash_")
+    cache = HashCache(filepath=os.path.join(tmp, "cache.db"), max_entries=2)
+    paths = []
+    for i in range(3):
+        path = os.path.join(tmp, f"f{i}.bin")
+        _write(path, bytes([i]) * 100)
+        paths.append(path)
+
+    cache.get_or_compute(paths[0])
+    cache.get_or_compute(paths[1])
+    cache.get(paths[0])  # f0 son kullanılan olsun
+    cache.get_or_compute(paths[2])
+
+    assert cache.get(paths[1]) is None
+    assert cache.get(paths[0]) is not None
+    assert cache.get(paths[2]) is not None
+
+
+if __name__ == "__main__":
+    test_cache_hit_and_invalidation()
+    test_lru_eviction()
+    print("✅ PASSED")
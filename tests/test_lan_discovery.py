@@ -0,0 +1,138 @@
+"""
+LAN Discovery Test - duyuru/sorgu mesajları, oda koduyla paylaşım bulma ve internet sinyal sunucusu olmadan P2P transfer
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import hashlib
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cdc
+import merkle
+import chunk_cache
+from hash_cache import HashCache
+import lan_discovery
+from lan_discovery import LanShare, discover, room_tag, share_capabilities
+from webrtc_manager import WebRTCSender, WebRTCReceiver, SignalingClient
+
+# Global hash önbelleğini repo içindeki data/ yerine geçici dizine yönlendir
+cdc.hash_cache = merkle.hash_cache = chunk_cache.hash_cache = HashCache(
+    filepath=os.path.join(tempfile.mkdtemp(prefix="quickshare_test_cache_"), "cache.db"))
+
+
+def _free_udp_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def test_messages_and_capabilities():
+    caps = share_capabilities([{"name": "a", "path": "a", "size": 10}, {"name": "b", "path": "b", "size": 5}], "gizli")
+    assert (caps["files"], caps["bytes"], caps["password"]) == (2, 15, True)
+    assert share_capabilities([])["password"] is False
+
+    tag = room_tag("123456")
+    assert len(tag) == 32 and tag == room_tag("123456") != room_tag("123457")
+    announce = {"app": "quickshare", "v": 2, "type": "announce", "id": "x", "tag": tag, "port": 8765, "caps": {}}
+    assert lan_discovery._parse(json.dumps(announce).encode()) == announce
+    for bad in (b"\xff", b"[]", b"{}", json.dumps(dict(announce, app="baska")).encode(),
+                json.dumps(dict(announce, v=1, room="123456")).encode(),
+                json.dumps(dict(announce, port=70000)).encode(), json.dumps(dict(announce, tag=None)).encode(),
+                json.dumps(dict(announce, tag="123456")).encode()):
+        assert lan_discovery._parse(bad) is None, bad
+
+    assert lan_discovery.broadcast_addresses()[:2] == ["255.255.255.255", "127.0.0.1"]
+
+
+def test_discover_share_by_room():
+    port = _free_udp_port()
+    targets = ["127.0.0.1"]
+    lan = LanShare("424242", {"files": 1}, port=port, interval=0.2, targets=targets)
+    url = lan.start()
+    # Oda kodu hiçbir pakette geçmez
+    assert b"424242" not in lan._announcement() and room_tag("424242").encode() in lan._announcement()
+    try:
+        started = time.monotonic()
+        shares = discover(room="424242", timeout=3, port=port, targets=targets)
+        # Sorguya anında yanıt verilir, duyuru aralığı beklenmez
+        assert time.monotonic() - started < 1
+        assert len(shares) == 1
+        share = shares[0]
+        assert share["tag"] == room_tag("424242") and share["caps"] == {"files": 1}
+        assert share["url"] == url == f"http://127.0.0.1:{lan.server.port}"
+
+        assert discover(room="000000", timeout=0.3, port=port, targets=targets) == []
+        assert [s["tag"] for s in discover(timeout=0.3, port=port, targets=targets)] == [room_tag("424242")]
+    finally:
+        lan.stop()
+    assert discover(room="424242", timeout=0.3, port=port, targets=targets) == []
+
+
+def test_lan_only_p2p_transfer():
+    port = _free_udp_port()
+    targets = ["127.0.0.1"]
+    src_dir = tempfile.mkdtemp(prefix="quickshare_lan_")
+    save_dir = tempfile.mkdtemp(prefix="quickshare_lan_recv_")
+    data = os.urandom(512 * 1024)
+    with open(os.path.join(src_dir, "a.bin"), "wb") as f:
+        f.write(data)
+    files = [{"name": "a.bin", "path": os.path.join(src_dir, "a.bin"), "size": len(data)}]
+
+    sender = WebRTCSender()
+    sender.set_files(files)
+    sender.start()
+    sender.wait_until_ready()
+    receiver = WebRTCReceiver()
+    receiver.save_path = save_dir
+    receiver.start()
+    receiver.wait_until_ready()
+    lan = LanShare("777777", share_capabilities(files), port=port, targets=targets)
+    signals = []
+    try:
+        # Gönderici yalnızca kendi yerel sinyal sunucusunda: internet sinyal sunucusu yok
+        sender_signaling = SignalingClient(sender._loop, server_url=lan.start())
+        signals.append((sender, sender_signaling))
+
+        async def join_sender():
+            await sender_signaling.connect("777777")
+            sender.setup_signaling(sender_signaling)
+
+        asyncio.run_coroutine_threadsafe(join_sender(), sender._loop).result(timeout=10)
+
+        shares = discover(room="777777", timeout=3, port=port, targets=targets)
+        assert shares, "Paylaşım yerel ağda bulunamadı"
+        receiver_signaling = SignalingClient(receiver._loop, server_url=shares[0]["url"])
+        signals.append((receiver, receiver_signaling))
+
+        async def join_receiver():
+            await receiver_signaling.connect("777777")
+            receiver.setup_signaling(receiver_signaling)
+            await receiver.connect_via_signaling()
+
+        asyncio.run_coroutine_threadsafe(join_receiver(), receiver._loop).result(timeout=10)
+        assert receiver.wait_for_connection(timeout=15) and receiver._file_list_event.wait(15)
+        receiver.request_download(["a.bin"])
+        assert receiver.wait_for_transfer(timeout=30) and receiver.status == "done"
+    finally:
+        for peer, signaling in signals:
+            asyncio.run_coroutine_threadsafe(signaling.close(), peer._loop).result(timeout=5)
+        sender.stop()
+        receiver.stop()
+        lan.stop()
+
+    with open(os.path.join(save_dir, "a.bin"), "rb") as f:
+        assert hashlib.sha256(f.read()).digest() == hashlib.sha256(data).digest()
+
+
+if __name__ == "__main__":
+    test_messages_and_capabilities()
+    test_discover_share_by_room()
+    test_lan_only_p2p_transfer()
+    print("✅ PASSED")
@@ -0,0 +1,85 @@
+"""
+Merkle Test - blok hash'leri, kök, bozuk/eksik blok tespiti ve önbellek
+"""
+import os
+import sys
+import hashlib
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import merkle
+from merkle import block_size_for, hash_file_blocks, merkle_root, missing_ranges, valid_blocks
+from hash_cache import HashCache
+
+
+def _setup(size):
+    tmp = tempfile.mkdtemp(prefix="quickshare_merkle_")
+    # Global hash önbelleğini test dizinine yönlendir
+    merkle.hash_cache = HashCache(filepath=os.path.join(tmp, "cache.db"))
+    path = os.path.join(tmp, "file.bin")
+    data = os.urandom(size)
+    with open(path, "wb") as f:
+        f.write(data)
+    return tmp, path, data
+
+
+def test_leaves_and_root():
+    _, path, data = _setup(10 * 1000 + 7)
+    leaves, digest = hash_file_blocks(path, 1000)
+    assert len(leaves) == 11
+    assert leaves[3] == hashlib.sha256(data[3000:4000]).hexdigest()
+    assert digest == hashlib.sha256(data).hexdigest()
+
+    root = merkle_root(leaves)
+    assert root == merkle_root(list(leaves))
+    assert merkle_root(leaves[:1]) == leaves[0]
+    changed = list(leaves)
+    changed[10] = hashlib.sha256(b"x").hexdigest()
+    assert merkle_root(changed) != root
+
+    assert valid_blocks({"block_size": 1000, "blocks": leaves, "root": root})
+    assert not valid_blocks({"block_size": 1000, "blocks": changed, "root": root})
+    assert not valid_blocks({"block_size": None, "blocks": None, "root": None})
+
+
+def test_missing_ranges():
+    tmp, path, data = _setup(10 * 1000 + 7)
+    leaves, _ = hash_file_blocks(path, 1000)
+    assert missing_ranges(path, len(data), 1000, leaves) == []
+
+    # Bozuk blok 2, 3. blok sağlam, kısmi blok 6 ve sonrası eksik
+    partial = bytearray(data[:6500])
+    partial[2100] ^= 0xFF
+    part_path = os.path.join(tmp, "partial.bin")
+    with open(part_path, "wb") as f:
+        f.write(partial)
+    assert missing_ranges(part_path, len(data), 1000, leaves) == [(2000, 3000), (6000, len(data))]
+
+    # Dosya hiç yoksa her şey eksik
+    assert missing_ranges(os.path.join(tmp, "none.bin"), len(data), 1000, leaves) == [(0, len(data))]
+
+
+def test_file_blocks_cached():
+    _, path, data = _setup(3 * merkle.BLOCK_SIZE + 5)
+    info = merkle.file_blocks(path)
+    assert info["block_size"] == block_size_for(len(data)) == merkle.BLOCK_SIZE
+    assert len(info["blocks"]) == 4
+    assert valid_blocks(info)
+    # Tüm dosya hash'i de aynı okumada önbelleğe yazılmış olmalı
+    assert merkle.hash_cache.get(path) == hashlib.sha256(data).hexdigest()
+    assert merkle.hash_cache.get_blocks(path, info["block_size"]) == info["blocks"]
+
+    # Dosya değişince kayıt geçersiz olmalı
+    with open(path, "ab") as f:
+        f.write(b"more")
+    assert merkle.hash_cache.get_blocks(path, info["block_size"]) is None
+
+    assert block_size_for(merkle.BLOCK_SIZE * merkle.MAX_BLOCKS + 1) == 2 * merkle.BLOCK_SIZE
+
+
+if __name__ == "__main__":
+    test_leaves_and_root()
+    test_missing_ranges()
+    test_file_blocks_cached()
+    print("✅ PASSED")
@@ -0,0 +1,266 @@
+"""
+Server Test - Range gövdesi (sendfile / 1 MB okuma yolu), aralık sınırlama, gönderim geçmişi, /blocks, /delta, parça listesi ve gzip
+"""
+import os
+import sys
+import gzip
+import random
+import socket
+import hashlib
+import tempfile
+import threading
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+from benchmark import _isolate_state
+from cdc import parse_chunks
+from config import STREAM_READ_SIZE
+from delta import MIN_BLOCK_SIZE, signature
+from merkle import BLOCK_SIZE as MERKLE_BLOCK_SIZE, hash_file_blocks, merkle_root
+from server import RangeFileWrapper
+from transfer_protocol import COPY_PAYLOAD, FRAME_COPY, FRAME_DATA, FRAME_FILE_END, FrameReader
+from werkzeug.serving import make_server
+
+
+def _setup(files):
+    """Geçici durum + paylaşılan dosyalar; (klasör, {ad: içerik}) döner"""
+    tmp = tempfile.mkdtemp(prefix="quickshare_server_")
+    _isolate_state(tmp)
+    src = os.path.join(tmp, "src")
+    os.makedirs(src)
+    for name, data in files.items():
+        with open(os.path.join(src, name), "wb") as f:
+            f.write(data)
+    server.set_shared_files([os.path.join(src, name) for name in files])
+    return src
+
+
+def _sent_history():
+    return [(r["filename"], r["status"]) for r in reversed(server.history.get_recent(direction="send"))]
+
+
+def test_sendfile_path():
+    src = _setup({"a.bin": os.urandom(300 * 1024 + 7)})
+    path = os.path.join(src, "a.bin")
+    with open(path, "rb") as f:
+        data = f.read()
+
+    left, right = socket.socketpair()
+    received = bytearray()
+
+    def drain():
+        while True:
+            chunk = right.recv(65536)
+            if not chunk:
+                break
+            received.extend(chunk)
+
+    reader = threading.Thread(target=drain)
+    reader.start()
+    body = RangeFileWrapper(path, 100, len(data) - 100, len(data), sock=left)
+    # Gövde yalnızca header'ları tetikleyen boş chunk'tır, veri soketten gider
+    assert list(body) == [b""]
+    body.close()
+    left.close()
+    reader.join(timeout=5)
+    right.close()
+    assert bytes(received) == data[100:]
+    assert body.sent == len(data) - 100
+    assert _sent_history() == [("a.bin", "success")]
+
+    # Gerçek Werkzeug sunucusu soketi environ'a koyar: aralık sendfile ile gelir
+    httpd = make_server("127.0.0.1", 0, server.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{httpd.server_port}/file/a.bin"
+        req = urllib.request.Request(url, headers={"Range": "bytes=1000-"})
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            assert resp.status == 206 and resp.read() == data[1000:]
+    finally:
+        httpd.shutdown()
+
+
+def test_buffered_fallback():
+    data = os.urandom(2 * STREAM_READ_SIZE + 123)
+    src = _setup({"b.bin": data})
+    body = RangeFileWrapper(os.path.join(src, "b.bin"), 0, len(data), len(data))
+    chunks = list(body)
+    body.close()
+    assert [len(c) for c in chunks] == [STREAM_READ_SIZE, STREAM_READ_SIZE, 123]
+    assert b"".join(chunks) == data and body.sent == len(data)
+
+    client = server.app.test_client()
+    resp = client.get("/file/b.bin", headers={"Range": "bytes=5-9"})
+    assert resp.status_code == 206 and resp.data == data[5:10]
+    assert _sent_history() == [("b.bin", "success")]  # Son aralık değil: kayıt yok
+
+
+def test_range_clamping():
+    data = os.urandom(5000)
+    _setup({"c.bin": data})
+    client = server.app.test_client()
+
+    resp = client.get("/file/c.bin", headers={"Range": "bytes=4000-999999"})
+    assert resp.status_code == 206 and resp.data == data[4000:]
+    assert resp.headers["Content-Range"] == "bytes 4000-4999/5000"
+    assert resp.headers["Content-Length"] == "1000"
+
+    for bad in ("bytes=5000-", "bytes=10-5"):
+        resp = client.get("/file/c.bin", headers={"Range": bad})
+        assert resp.status_code == 416 and resp.headers["Content-Range"] == "bytes */5000"
+
+    resp = client.get("/file/c.bin", headers={"Range": "lines=1-2"})
+    assert resp.status_code == 200 and resp.data == data
+    assert client.get("/file/yok.bin").status_code == 404
+
+
+def test_close_logs_history():
+    data = os.urandom(3 * STREAM_READ_SIZE)
+    src = _setup({"d.bin": data})
+    path = os.path.join(src, "d.bin")
+
+    # İstemci ilk bloktan sonra koptu
+    body = RangeFileWrapper(path, 0, len(data), len(data))
+    next(iter(body))
+    body.close()
+    body.close()  # İkinci close etkisiz
+    assert _sent_history() == [("d.bin", "cancelled")]
+
+    # HEAD dosyayı açmaz ve geçmişe yazmaz
+    client = server.app.test_client()
+    resp = client.head("/file/d.bin")
+    assert resp.status_code == 200 and resp.headers["Content-Length"] == str(len(data))
+    resp = client.head("/file/d.bin", headers={"Range": "bytes=0-9"})
+    assert resp.status_code == 206 and resp.headers["Content-Length"] == "10"
+    assert _sent_history() == [("d.bin", "cancelled")]
+
+    # Tam dosya GET kaydedilir, Range (206) yanıtları kaydedilmez
+    resp = client.get("/file/d.bin")
+    assert resp.data == data
+    resp.close()
+    half = len(data) // 2
+    for start, end in ((0, half - 1), (half, len(data) - 1)):
+        resp = client.get("/file/d.bin", headers={"Range": f"bytes={start}-{end}"})
+        assert resp.status_code == 206 and resp.data == data[start:end + 1]
+        resp.close()
+    assert _sent_history() == [("d.bin", "cancelled"), ("d.bin", "success")]
+
+
+def test_blocks_endpoint():
+    data = {"big.bin": os.urandom(3 * MERKLE_BLOCK_SIZE + 5), "small.bin": os.urandom(1000)}
+    src = _setup(data)
+    client = server.app.test_client()
+
+    info = client.get("/blocks/big.bin").get_json()
+    leaves, _ = hash_file_blocks(os.path.join(src, "big.bin"), info["block_size"])
+    assert info["size"] == len(data["big.bin"]) and info["blocks"] == leaves
+    assert info["root"] == merkle_root(leaves)
+    # Tek bloğa sığan dosya: blok bilgisi yok
+    assert client.get("/blocks/small.bin").get_json() == {
+        "size": 1000, "block_size": None, "blocks": None, "root": None}
+    assert client.get("/blocks/yok.bin").status_code == 404
+
+
+def test_delta_endpoint():
+    new = os.urandom(300 * 1024)
+    old = new[:100 * 1024] + os.urandom(20 * 1024) + new[120 * 1024:]
+    src = _setup({"new.bin": new})
+    old_path = os.path.join(src, "old.bin")
+    with open(old_path, "wb") as f:
+        f.write(old)
+    client = server.app.test_client()
+
+    sig = signature(old_path, MIN_BLOCK_SIZE)
+    resp = client.post(f"/delta/new.bin?block_size={MIN_BLOCK_SIZE}", data=sig)
+    assert resp.status_code == 200
+    out, literal, digest = bytearray(), 0, None
+    for frame_type, _, _, offset, payload in FrameReader().feed(resp.data):
+        if frame_type == FRAME_FILE_END:
+            digest = payload
+            continue
+        assert offset == len(out)
+        if frame_type == FRAME_COPY:
+            src_offset, length = COPY_PAYLOAD.unpack(payload)
+            out += old[src_offset:src_offset + length]
+        else:
+            assert frame_type == FRAME_DATA
+            out += payload
+            literal += len(payload)
+    assert bytes(out) == new and digest == hashlib.sha256(new).digest()
+    assert literal <= 20 * 1024 + 2 * MIN_BLOCK_SIZE  # Yalnızca değişen bölge
+
+    for query, body in ((f"block_size={MIN_BLOCK_SIZE - 1}", sig), ("", sig),
+                        ("block_size=abc", sig), (f"block_size={MIN_BLOCK_SIZE}", sig[:-1])):
+        assert client.post(f"/delta/new.bin?{query}", data=body).status_code == 400, query
+    assert client.post(f"/delta/yok.bin?block_size={MIN_BLOCK_SIZE}", data=sig).status_code == 404
+    assert client.get(f"/delta/new.bin?block_size={MIN_BLOCK_SIZE}").status_code == 405
+
+
+def test_chunk_lists():
+    # Sabit tohum: os.urandom ile ilk sınır önek yüzünden ara sıra kayıyordu
+    rng = random.Random(1)
+    shared = rng.randbytes(600 * 1024)
+    data = {"a.bin": shared, "b.bin": rng.randbytes(1000) + shared, "empty.bin": b""}
+    src = _setup(data)
+    client = server.app.test_client()
+
+    assert all("chunks" not in f for f in client.get("/").get_json()["files"])
+    assert server.wait_chunk_lists(timeout=30)
+    listed = {f["name"]: f for f in client.get("/?chunks=1").get_json()["files"]}
+    chunks = {name: parse_chunks(listed[name]["chunks"], len(body)) for name, body in data.items()}
+    assert chunks["empty.bin"] == []
+    # Ortak içerik aynı parçalara bölünür
+    shared_digests = {digest for _, _, digest in chunks["a.bin"]}
+    assert len(shared_digests & {digest for _, _, digest in chunks["b.bin"]}) >= len(shared_digests) - 1
+
+    # Liste isteği dosyayı parçalamaz: önbelleği geçersizleşen dosya parçasız listelenir
+    with open(os.path.join(src, "a.bin"), "ab") as f:
+        f.write(b"x")
+    for _ in range(2):
+        listed = {f["name"]: f for f in client.get("/?chunks=1").get_json()["files"]}
+        assert "chunks" not in listed["a.bin"] and "chunks" in listed["b.bin"]
+
+
+def test_gzip_body():
+    text = b"".join(b"satir %d: quickshare\n" % i for i in range(200000))
+    data = {"log.txt": text, "rand.bin": os.urandom(200 * 1024)}
+    _setup(data)
+    client = server.app.test_client()
+    gzip_accepted = {"Accept-Encoding": "gzip"}
+
+    resp = client.get("/file/log.txt", headers=gzip_accepted)
+    assert resp.status_code == 200 and resp.headers["Content-Encoding"] == "gzip"
+    assert resp.headers["X-Uncompressed-Length"] == str(len(text))
+    assert "Content-Length" not in resp.headers
+    assert len(resp.data) < len(text) // 4 and gzip.decompress(resp.data) == text
+    resp.close()
+    assert _sent_history() == [("log.txt", "success")]
+
+    # Range isteği ve gzip istemeyen istemci ham gövde alır
+    resp = client.get("/file/log.txt", headers=dict(gzip_accepted, Range="bytes=10-99"))
+    assert resp.status_code == 206 and "Content-Encoding" not in resp.headers
+    assert resp.data == text[10:100]
+    resp = client.get("/file/log.txt")
+    assert "Content-Encoding" not in resp.headers and resp.data == text
+
+    # Rastgele veri sıkıştırılmaz
+    resp = client.get("/file/rand.bin", headers=gzip_accepted)
+    assert "Content-Encoding" not in resp.headers and resp.data == data["rand.bin"]
+    assert resp.headers["Content-Length"] == str(len(data["rand.bin"]))
+
+    resp = client.head("/file/log.txt", headers=gzip_accepted)
+    assert resp.headers["Content-Encoding"] == "gzip" and resp.data == b""
+
+
+if __name__ == "__main__":
+    test_sendfile_path()
+    test_buffered_fallback()
+    test_range_clamping()
+    test_close_logs_history()
+    test_blocks_endpoint()
+    test_delta_endpoint()
+    test_chunk_lists()
+    test_gzip_body()
+    print("✅ PASSED")
@@ -0,0 +1,213 @@
+"""
+Signal Server Test - oda/mesaj kutusu kuralları ve SignalingClient ile HTTP long-poll ve WebSocket üzerinden el sıkışma,
+ortak oturum, /ws olmayan sunucuda ve kopan WebSocket'te HTTP'ye geçiş
+"""
+import os
+import sys
+import time
+import asyncio
+
+from aiohttp import WSCloseCode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import signal_server
+from config import SIGNALING_POOL_SIZE
+from signal_server import SignalingHub, SignalServer
+from webrtc_manager import SignalingClient
+
+
+def test_hub_rooms_and_delivery():
+    async def scenario():
+        hub = SignalingHub()
+        assert hub.join("oda", "a") == []
+        assert hub.join("oda", "b") == ["a"]
+        hub.join("baska", "c")
+        assert hub.clients["a"].drain() == [{"type": "peer_joined", "sid": "b"}]
+        # Aynı sid ile tekrar katılım duyurulmaz
+        hub.join("oda", "b")
+        assert hub.clients["a"].drain() == []
+
+        # Hedefsiz mesaj odadaki diğerlerine, hedefli mesaj yalnızca hedefe gider
+        assert hub.signal({"sender": "b", "type": "offer", "data": "sdp"}) == 1
+        assert hub.clients["a"].drain() == [{"type": "offer", "sender": "b", "data": "sdp", "room": "oda"}]
+        assert hub.signal({"sender": "a", "type": "answer", "data": "x", "target": "b"}) == 1
+        # Başka odadaki istemciye ulaşılamaz, kimse kendine mesaj alamaz
+        assert hub.signal({"sender": "a", "type": "ice", "data": {}, "target": "c"}) == 0
+        assert hub.signal({"sender": "c", "type": "ice", "data": {}}) == 0
+        assert hub.clients["c"].drain() == []
+
+        for bad in ({"sender": "zzz", "type": "offer"}, {"sender": "a", "type": "peer_joined"},
+                    {"sender": "a", "type": "ice", "target": ["b"]}, ["offer"]):
+            try:
+                hub.signal(bad)
+                assert False, f"ValueError bekleniyordu: {bad}"
+            except ValueError:
+                pass
+
+        # Süresi dolan istemci odadan düşer, boş oda silinir
+        hub.clients["c"].seen -= signal_server.CLIENT_TTL + 1
+        assert hub.sweep() == 1
+        assert "c" not in hub.clients and "baska" not in hub.rooms
+        hub.leave("a")
+        hub.leave("b")
+        assert hub.rooms == {} and hub.clients == {}
+
+    asyncio.run(scenario())
+
+
+def test_signaling_client_transports():
+    server = SignalServer(poll_wait=1)
+    url = server.start()
+    try:
+        for transport in ("http", "websocket"):
+            async def scenario():
+                received = {"joined": [], "offer": [], "answer": [], "ice": []}
+
+                def recorder(kind):
+                    async def record(data, sender=None):
+                        received[kind].append((data, sender))
+                    return record
+
+                sender = SignalingClient(asyncio.get_running_loop(), server_url=url, transport=transport)
+                receiver = SignalingClient(asyncio.get_running_loop(), server_url=url, transport=transport)
+                sender.on_peer_joined = recorder("joined")
+                sender.on_offer = recorder("offer")
+                sender.on_ice = recorder("ice")
+                receiver.on_answer = recorder("answer")
+                try:
+                    await sender.connect(f"oda-{transport}")
+                    await receiver.connect(f"oda-{transport}")
+                    assert (sender._ws is not None) == (transport == "websocket")
+
+                    await receiver.send_offer("offer-sdp")
+                    await receiver.send_ice({"candidate": ""})
+                    await sender.send_answer("answer-sdp", target_sid=receiver.sid)
+                    deadline = time.monotonic() + 10
+                    while not (received["ice"] and received["answer"]) and time.monotonic() < deadline:
+                        await asyncio.sleep(0.02)
+                finally:
+                    await sender.close()
+                    await receiver.close()
+
+                assert received["joined"] == [(receiver.sid, None)]
+                assert received["offer"] == [("offer-sdp", receiver.sid)]
+                assert received["ice"] == [({"candidate": ""}, receiver.sid)]
+                assert received["answer"] == [("answer-sdp", sender.sid)]
+
+            asyncio.run(scenario())
+
+        # WebSocket istemcileri temiz kapanınca odadan ayrılır; HTTP istemcileri süre dolunca düşer
+        deadline = time.monotonic() + 5
+        while "oda-websocket" in server.hub.rooms and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert "oda-websocket" not in server.hub.rooms
+        # Kapanan HTTP istemcisinin son long-poll'u sunucuda süresi dolana kadar bekler
+        while any(c.polls for c in server.hub.clients.values()) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        for client in list(server.hub.clients.values()):
+            client.seen -= signal_server.CLIENT_TTL + 1
+        assert server.call(server.hub.sweep) == 2
+        assert server.hub.rooms == {}
+    finally:
+        server.stop()
+
+
+class NoWebSocketClient(SignalingClient):
+    """/ws yolu olmayan (eski) bir sunucu gibi: WebSocket yükseltmesi 404 alır"""
+
+    def _ws_url(self):
+        return super()._ws_url() + "-yok"
+
+
+async def _wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        await asyncio.sleep(0.02)
+    return condition()
+
+
+def test_auto_falls_back_to_http_on_one_session():
+    server = SignalServer(poll_wait=1)
+    url = server.start()
+
+    async def scenario():
+        offers = []
+
+        async def record(data, sender=None):
+            offers.append((data, sender))
+
+        sender = NoWebSocketClient(asyncio.get_running_loop(), server_url=url, transport="auto")
+        receiver = SignalingClient(asyncio.get_running_loop(), server_url=url, transport="http")
+        sender.on_offer = record
+        try:
+            await sender.connect("oda-auto")
+            # Yükseltme reddedildi: HTTP long-poll, sonraki bağlantılar WebSocket'i denemez
+            assert sender._ws is None and sender._polling_task is not None
+            assert url in SignalingClient._ws_unsupported
+            session = sender._session
+            assert session.connector.limit == SIGNALING_POOL_SIZE
+
+            await receiver.connect("oda-auto")
+            for i in range(5):
+                await receiver.send_offer(f"sdp-{i}", target_sid=sender.sid)
+            assert await _wait_for(lambda: len(offers) == 5)
+            # Join, long-poll'lar ve mesajlar aynı havuzlu oturumdan geçer
+            assert sender._session is session and not session.closed
+        finally:
+            await sender.close()
+            await receiver.close()
+        assert session.closed
+        assert offers == [(f"sdp-{i}", receiver.sid) for i in range(5)]
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        SignalingClient._ws_unsupported.discard(url)
+        server.stop()
+
+
+def test_dropped_websocket_falls_back_to_polling():
+    server = SignalServer(poll_wait=1)
+    url = server.start()
+
+    async def scenario():
+        offers = []
+
+        async def record(data, sender=None):
+            offers.append((data, sender))
+
+        sender = SignalingClient(asyncio.get_running_loop(), server_url=url, transport="websocket")
+        receiver = SignalingClient(asyncio.get_running_loop(), server_url=url, transport="websocket")
+        sender.on_offer = record
+        try:
+            await sender.connect("oda-kopan")
+            await receiver.connect("oda-kopan")
+            assert sender._ws is not None
+
+            # Sunucu bağlantıyı düşürür (temiz kapanış değil): istemci aynı sid ile HTTP'ye geçer
+            async def drop():
+                await server.hub.clients[sender.sid].ws.close(code=WSCloseCode.GOING_AWAY)
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(drop(), server._loop))
+            assert await _wait_for(lambda: sender._polling_task is not None)
+            assert sender._ws is None and sender.sid in server.hub.rooms["oda-kopan"]
+
+            await receiver.send_offer("offer-sdp", target_sid=sender.sid)
+            assert await _wait_for(lambda: offers)
+        finally:
+            await sender.close()
+            await receiver.close()
+        assert offers == [("offer-sdp", receiver.sid)]
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    test_hub_rooms_and_delivery()
+    test_signaling_client_transports()
+    test_auto_falls_back_to_http_on_one_session()
+    test_dropped_websocket_falls_back_to_polling()
+    print("✅ PASSED")
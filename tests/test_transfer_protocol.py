@@ -0,0 +1,88 @@
+"""
+Transfer Protocol Test - frame encode/decode ve batch birleştirme
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transfer_protocol import (FrameReader, HEADER_SIZE, FRAME_DATA, FRAME_FILE_END, FRAME_ZDATA,
+                               FrameBatch, ProtocolError, RangeSet, encode_frame, iter_frames)
+
+
+def test_roundtrip_multiple_frames():
+    message = (encode_frame(FRAME_DATA, 3, 1 << 40, b"hello")
+               + encode_frame(FRAME_FILE_END, 3, 5, b"\x00" * 32, stream_id=7))
+    frames = [(t, s, fid, off, bytes(p)) for t, s, fid, off, p in iter_frames(message)]
+    assert frames == [
+        (FRAME_DATA, 0, 3, 1 << 40, b"hello"),
+        (FRAME_FILE_END, 7, 3, 5, b"\x00" * 32),
+    ]
+
+
+def test_truncated_frame_rejected():
+    message = encode_frame(FRAME_DATA, 1, 0, b"abcdef")
+    for cut in (HEADER_SIZE - 1, len(message) - 1):
+        try:
+            list(iter_frames(message[:cut]))
+        except ProtocolError:
+            continue
+        assert False, "truncated frame should raise ProtocolError"
+
+
+def test_batch_limits():
+    batch = FrameBatch(max_size=HEADER_SIZE * 2 + 20)
+    assert batch.fits(20)
+    batch.add(FRAME_DATA, 0, 0, b"x" * 10)
+    assert batch.fits(10)
+    assert not batch.fits(11)
+    batch.add(FRAME_FILE_END, 0, 10, b"y" * 10)
+    assert batch.full
+
+    assert batch.reliable  # FILE_END güvenilir kanaldan gitmeli
+
+    data = batch.take()
+    assert len(batch) == 0 and batch.frame_count == 0 and not batch.reliable
+
+    batch.add(FRAME_ZDATA, 0, 0, b"z" * 10)
+    assert not batch.reliable  # Sıkıştırılmış veri de toplu veri sayılır
+    batch.take()
+    assert [fid for _, _, fid, _, _ in iter_frames(data)] == [0, 0]
+
+
+def test_range_set_gaps():
+    ranges = RangeSet()
+    ranges.add(100, 200)
+    ranges.add(300, 400)
+    ranges.add(200, 250)  # Bitişik aralıklar birleşmeli
+    assert len(ranges) == 2
+    assert ranges.contains(100, 250)
+    assert not ranges.contains(100, 251)
+    assert ranges.missing(0, 500) == [(0, 100), (250, 300), (400, 500)]
+
+    ranges.add(0, 500)
+    assert len(ranges) == 1
+    assert ranges.missing(0, 500) == []
+
+
+def test_frame_reader_split_stream():
+    stream = (encode_frame(FRAME_DATA, 1, 0, b"hello")
+              + encode_frame(FRAME_FILE_END, 1, 5, b"\x01" * 32))
+    reader = FrameReader()
+    frames = []
+    for i in range(0, len(stream), 7):
+        frames += reader.feed(stream[i:i + 7])
+    assert [(f[0], f[2], f[3], f[4]) for f in frames] == [
+        (FRAME_DATA, 1, 0, b"hello"),
+        (FRAME_FILE_END, 1, 5, b"\x01" * 32),
+    ]
+    assert reader.pending == 0
+
+
+if __name__ == "__main__":
+    test_roundtrip_multiple_frames()
+    test_truncated_frame_rejected()
+    test_batch_limits()
+    test_range_set_gaps()
+    test_frame_reader_split_stream()
+    print("✅ PASSED")
@@ -0,0 +1,115 @@
+"""
+Trickle ICE Test - aday kodlama, SDP ve geç gelen STUN adaylarının karşı tarafa eklenmesi
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aioice import stun
+from aiortc import RTCConfiguration, RTCIceCandidate, RTCIceServer, RTCPeerConnection, RTCSessionDescription
+from trickle_ice import IceTrickler, decode_candidate, encode_candidate, strip_end_of_candidates
+
+
+class StunResponder(asyncio.DatagramProtocol):
+    """Her binding isteğine gönderenin adresiyle yanıt veren yerel STUN sunucusu"""
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        request = stun.parse_message(data)
+        response = stun.Message(message_method=stun.Method.BINDING,
+                                message_class=stun.Class.RESPONSE,
+                                transaction_id=request.transaction_id)
+        response.attributes["XOR-MAPPED-ADDRESS"] = addr
+        self.transport.sendto(bytes(response), addr)
+
+
+def test_candidate_encoding():
+    candidate = RTCIceCandidate(component=1, foundation="abc", ip="192.0.2.7", port=5000,
+                                priority=100, protocol="udp", type="srflx",
+                                relatedAddress="10.0.0.2", relatedPort=4000)
+    data = encode_candidate(candidate, "0")
+    assert data["candidate"].startswith("candidate:abc 1 udp 100 192.0.2.7 5000 typ srflx")
+    back = decode_candidate(data)
+    assert (back.ip, back.port, back.type, back.relatedPort, back.sdpMid) == ("192.0.2.7", 5000, "srflx", 4000, "0")
+
+    # Boş aday (tarayıcı biçimi) aday listesinin sonudur
+    assert decode_candidate(encode_candidate(None)) is None
+    assert decode_candidate(None) is None
+    try:
+        decode_candidate({"candidate": "candidate:bozuk"})
+        assert False, "ValueError bekleniyordu"
+    except ValueError:
+        pass
+
+    sdp = "v=0\r\na=candidate:1 1 udp 1 10.0.0.2 5000 typ host\r\na=end-of-candidates\r\n"
+    assert strip_end_of_candidates(sdp) == "v=0\r\na=candidate:1 1 udp 1 10.0.0.2 5000 typ host\r\n"
+
+
+def test_trickled_candidates_reach_peer():
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        stun_transport, _ = await loop.create_datagram_endpoint(StunResponder, local_addr=("127.0.0.1", 0))
+        # Yanıt vermeyen TURN sunucusu: tam toplama burada zaman aşımına kadar beklerdi
+        silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        silent.bind(("127.0.0.1", 0))
+        config = RTCConfiguration(iceServers=[
+            RTCIceServer(f"stun:127.0.0.1:{stun_transport.get_extra_info('sockname')[1]}"),
+            RTCIceServer(f"turn:127.0.0.1:{silent.getsockname()[1]}", username="u", credential="p"),
+        ])
+        offerer, answerer = RTCPeerConnection(config), RTCPeerConnection(config)
+        opened = asyncio.Event()
+        offerer.createDataChannel("fileTransfer").on("open", opened.set)
+        try:
+            started = time.monotonic()
+            offer_trickle = IceTrickler(offerer, timeout=2)
+            offer_trickle.defer()
+            await offerer.setLocalDescription(await offerer.createOffer())
+            assert "end-of-candidates" not in offer_trickle.sdp()
+            await answerer.setRemoteDescription(
+                RTCSessionDescription(sdp=offer_trickle.sdp(), type="offer"))
+
+            answer_trickle = IceTrickler(answerer, timeout=2)
+            answer_trickle.defer()
+            await answerer.setLocalDescription(await answerer.createAnswer())
+            await offerer.setRemoteDescription(
+                RTCSessionDescription(sdp=answer_trickle.sdp(), type="answer"))
+            # Bağlantı host adaylarıyla, STUN/TURN beklenmeden kurulur
+            await asyncio.wait_for(opened.wait(), 10)
+            assert time.monotonic() - started < 1.5
+
+            sent = []
+
+            async def send(data):
+                sent.append(data)
+                await answerer.addIceCandidate(decode_candidate(data))
+
+            await offer_trickle.run(send)
+            # STUN adayı gönderildi, liste sonu en sona geldi
+            assert [decode_candidate(d).type for d in sent[:-1]] == ["srflx"] * (len(sent) - 1) and len(sent) > 1
+            assert decode_candidate(sent[-1]) is None
+            remote = answerer.sctp.transport.transport.getRemoteCandidates()
+            assert any(c.type == "srflx" for c in remote)
+
+            # Toplama bittikten sonra defer() etkisizdir: SDP olduğu gibi gider
+            late = IceTrickler(answerer)
+            late.defer()
+            assert late.sdp() == answerer.localDescription.sdp
+        finally:
+            await offerer.close()
+            await answerer.close()
+            stun_transport.close()
+            silent.close()
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_candidate_encoding()
+    test_trickled_candidates_reach_peer()
+    print("✅ PASSED")
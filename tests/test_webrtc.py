@@ -8,6 +8,7 @@ import sys
 import time
 import tempfile
 import hashlib
+import threading
 
 # Fix Windows console encoding for emoji
 sys.stdout.reconfigure(encoding='utf-8', errors='replace')
@@ -16,8 +17,19 @@ sys.stderr.reconfigure(encoding='utf-8', errors='replace')
 # Add parent dir to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+import cdc
+import merkle
+import chunk_cache
+import webrtc_manager
+from chunk_cache import SharedChunkCache
+from config import WEBRTC_BUFFER_HIGH, WEBRTC_BUFFER_LOW, WEBRTC_PREFETCH_CHUNKS
+from hash_cache import HashCache
 from webrtc_manager import WebRTCSender, WebRTCReceiver
 
+# Point the global hash cache at a temp dir instead of data/ in the repo
+cdc.hash_cache = merkle.hash_cache = chunk_cache.hash_cache = HashCache(
+    filepath=os.path.join(tempfile.mkdtemp(prefix="quickshare_test_cache_"), "cache.db"))
+
 
 def create_test_file(path, size_kb=100):
     """Create a test file with random-ish data"""
@@ -169,6 +181,276 @@ def test_p2p_transfer():
     return success
 
 
+class SlowHashSender(WebRTCSender):
+    """Block hashing that takes a while, as on the first share of a large file"""
+
+    def _block_info(self, file_info):
+        time.sleep(1.5)
+        return super()._block_info(file_info)
+
+
+def test_file_list_before_block_hashes():
+    """The file list goes out at once; block hashes follow and resume waits for them"""
+    src_dir = tempfile.mkdtemp(prefix="quickshare_test_")
+    save_dir = tempfile.mkdtemp(prefix="quickshare_recv_")
+    data = os.urandom(3 * 1024 * 1024 + 100)
+    path = os.path.join(src_dir, "big.bin")
+    with open(path, "wb") as f:
+        f.write(data)
+    # Interrupted earlier download with a corrupt first block
+    partial = bytearray(data[:2 * 1024 * 1024])
+    partial[10] ^= 0xFF
+    with open(os.path.join(save_dir, "big.bin"), "wb") as f:
+        f.write(partial)
+
+    logs = []
+    sender = SlowHashSender()
+    sender.set_files([{"name": "big.bin", "path": path, "size": len(data)}])
+    sender.start()
+    sender.wait_until_ready()
+    receiver = WebRTCReceiver()
+    receiver.save_path = save_dir
+    receiver.log_callback = logs.append
+    try:
+        offer = receiver.create_offer_sync()
+        receiver.set_answer_sync(sender.handle_offer_sync(offer["sdp"])["sdp"])
+        assert receiver.wait_for_connection(timeout=15)
+        assert receiver._file_list_event.wait(15)
+        # Hashing is still running on the sender
+        assert not receiver._file_meta_event.is_set()
+
+        receiver.request_download(["big.bin"])
+        assert receiver._file_meta_event.is_set() and "blocks" in receiver._file_list[0]
+        assert "chunks" in receiver._file_list[0]
+        assert receiver._resume_ranges["big.bin"][0] == [0, 1024 * 1024]
+        assert receiver.wait_for_transfer(timeout=30) and receiver.status == "done"
+    finally:
+        sender.stop()
+        receiver.stop()
+        time.sleep(0.3)
+
+    assert "Blok hash'leri bekleniyor..." in logs
+    with open(os.path.join(save_dir, "big.bin"), "rb") as f:
+        assert f.read() == data
+
+
+def test_striped_transfer_reassembles():
+    """Frames striped across several channels land at their offsets; out-of-range counts are clamped"""
+    assert WebRTCSender._requested_channels(4) == 4
+    assert WebRTCSender._requested_channels(0) == 1
+    assert WebRTCSender._requested_channels(10 ** 6) == webrtc_manager.WEBRTC_MAX_CHANNELS
+    for bad in ("4", 2.5, None, True, [4]):
+        assert WebRTCSender._requested_channels(bad) is None
+
+    src_dir = tempfile.mkdtemp(prefix="quickshare_test_")
+    save_dir = tempfile.mkdtemp(prefix="quickshare_recv_")
+    files = {"big.bin": os.urandom(3 * 1024 * 1024 + 17), "small.bin": os.urandom(5000)}
+    for name, data in files.items():
+        with open(os.path.join(src_dir, name), "wb") as f:
+            f.write(data)
+
+    logs = []
+    sender = WebRTCSender()
+    sender.log_callback = logs.append
+    sender.set_files([{"name": name, "path": os.path.join(src_dir, name), "size": len(data)}
+                      for name, data in files.items()])
+    sender.start()
+    sender.wait_until_ready()
+    receiver = WebRTCReceiver()
+    receiver.save_path = save_dir
+    receiver.data_channels = 4
+    # Loopback peers would otherwise move the data over the direct TCP link
+    direct = webrtc_manager.WEBRTC_DIRECT_TRANSFER
+    webrtc_manager.WEBRTC_DIRECT_TRANSFER = False
+    try:
+        offer = receiver.create_offer_sync()
+        receiver.set_answer_sync(sender.handle_offer_sync(offer["sdp"])["sdp"])
+        assert receiver.wait_for_connection(timeout=15)
+        assert receiver._file_list_event.wait(15)
+        receiver.request_download(list(files))
+        assert receiver.wait_for_transfer(timeout=60) and receiver.status == "done"
+    finally:
+        webrtc_manager.WEBRTC_DIRECT_TRANSFER = direct
+        sender.stop()
+        receiver.stop()
+        time.sleep(0.3)
+
+    assert any("4 sıralı kanala bölünerek" in msg for msg in logs)
+    for name, data in files.items():
+        with open(os.path.join(save_dir, name), "rb") as f:
+            assert f.read() == data
+
+
+class LossyReceiver(WebRTCReceiver):
+    """Drops data frames covering the given positions, `times` times each, like a lossy link"""
+
+    def __init__(self, losses):
+        super().__init__()
+        self.losses = losses  # {(name, position): times}
+
+    def _write_chunk(self, file_id, offset, payload, compressed=False):
+        name = self._files_by_id[file_id]["name"]
+        for (lost_name, position), times in self.losses.items():
+            if times and lost_name == name and offset <= position < offset + len(payload):
+                self.losses[(lost_name, position)] = times - 1
+                return
+        super()._write_chunk(file_id, offset, payload, compressed)
+
+
+def test_unordered_repairs_and_gives_up():
+    """Unordered mode: dropped frames are re-requested; a range that never arrives fails its file"""
+    src_dir = tempfile.mkdtemp(prefix="quickshare_test_")
+    save_dir = tempfile.mkdtemp(prefix="quickshare_recv_")
+    files = {"big.bin": os.urandom(2 * 1024 * 1024 + 5), "gone.bin": os.urandom(300 * 1024)}
+    for name, data in files.items():
+        with open(os.path.join(src_dir, name), "wb") as f:
+            f.write(data)
+
+    sender = WebRTCSender()
+    sender.set_files([{"name": name, "path": os.path.join(src_dir, name), "size": len(data)}
+                      for name, data in files.items()])
+    sender.start()
+    sender.wait_until_ready()
+    logs = []
+    losses = {("big.bin", 100): 1, ("big.bin", 1024 * 1024): 2, ("gone.bin", 200 * 1024): 10 ** 6}
+    receiver = LossyReceiver(losses)
+    receiver.log_callback = logs.append
+    receiver.save_path = save_dir
+    receiver.unordered = True
+    saved = (webrtc_manager.WEBRTC_DIRECT_TRANSFER, webrtc_manager.WEBRTC_NACK_DELAY,
+             webrtc_manager.WEBRTC_NACK_RETRIES)
+    webrtc_manager.WEBRTC_DIRECT_TRANSFER = False
+    webrtc_manager.WEBRTC_NACK_DELAY = 0.2
+    webrtc_manager.WEBRTC_NACK_RETRIES = 5
+    try:
+        offer = receiver.create_offer_sync()
+        receiver.set_answer_sync(sender.handle_offer_sync(offer["sdp"])["sdp"])
+        assert receiver.wait_for_connection(timeout=15)
+        assert receiver._file_list_event.wait(15)
+        receiver.request_download(list(files))
+        # Without the give-up the transfer would never end
+        assert receiver.wait_for_transfer(timeout=60) and receiver.status == "done"
+    finally:
+        (webrtc_manager.WEBRTC_DIRECT_TRANSFER, webrtc_manager.WEBRTC_NACK_DELAY,
+         webrtc_manager.WEBRTC_NACK_RETRIES) = saved
+        sender.stop()
+        receiver.stop()
+        time.sleep(0.3)
+
+    assert losses[("big.bin", 100)] == 0 and losses[("big.bin", 1024 * 1024)] == 0
+    with open(os.path.join(save_dir, "big.bin"), "rb") as f:
+        assert f.read() == files["big.bin"]
+    assert any("✅ big.bin alındı (hash OK)" in msg for msg in logs)
+    assert any("gone.bin: eksik veri tamamlanamadı" in msg for msg in logs)
+    assert any("❌ gone.bin yazılamadı" in msg for msg in logs)
+    assert receiver._files_received == 2
+
+
+class FakeChannel:
+    """The parts of an RTCDataChannel that backpressure looks at"""
+
+    def __init__(self, buffered):
+        self.bufferedAmount = buffered
+        self.readyState = "open"
+
+
+def _run_on_sender_loop(sender, coro, timeout=15):
+    return asyncio.run_coroutine_threadsafe(coro, sender._loop).result(timeout)
+
+
+def test_backpressure_waits_for_drain_event():
+    """Over the high watermark the sender sleeps until bufferedamountlow, it does not poll"""
+    sender = WebRTCSender()
+    sender.start()
+    sender.wait_until_ready()
+
+    async def scenario():
+        peer_data = {"drained": asyncio.Event()}
+        # Under the high watermark: no wait at all
+        await asyncio.wait_for(sender._wait_buffer_low(peer_data, [FakeChannel(WEBRTC_BUFFER_LOW)]), 0.1)
+
+        # The total across channels counts
+        channels = [FakeChannel(WEBRTC_BUFFER_HIGH), FakeChannel(WEBRTC_BUFFER_LOW)]
+        waiter = asyncio.ensure_future(sender._wait_buffer_low(peer_data, channels))
+        await asyncio.sleep(0.1)
+        assert not waiter.done()
+
+        # An event while still above the low watermark: keep waiting
+        channels[0].bufferedAmount = 1
+        peer_data["drained"].set()
+        await asyncio.sleep(0.1)
+        assert not waiter.done()
+
+        # Drained, but no event yet: nothing notices (the 1 s guard is not a poll interval)
+        channels[0].bufferedAmount = 0
+        await asyncio.sleep(0.3)
+        assert not waiter.done()
+        peer_data["drained"].set()
+        await asyncio.wait_for(waiter, 0.1)
+
+    try:
+        _run_on_sender_loop(sender, scenario())
+    finally:
+        sender.stop()
+
+
+class ThreadRecordingCache(SharedChunkCache):
+    """Records which threads read (and so hash) file blocks"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.threads = set()
+
+    def _get_block(self, entry, index):
+        self.threads.add(threading.current_thread().name)
+        return super()._get_block(entry, index)
+
+
+def test_prefetch_and_hashing_off_the_loop():
+    """Large-file reads are queued ahead in the I/O pool and the SHA256 follows them there"""
+    test_dir = tempfile.mkdtemp(prefix="quickshare_test_")
+    data = os.urandom(10 * 64 * 1024 + 123)
+    path = os.path.join(test_dir, "big.bin")
+    with open(path, "wb") as f:
+        f.write(data)
+
+    sender = WebRTCSender()
+    sender._chunk_cache = cache = ThreadRecordingCache(block_size=64 * 1024)
+    sender.start()
+    sender.wait_until_ready()
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        out = sender._open_outgoing("peer", 0, {"name": "big.bin", "path": path, "size": len(data)}, 0)
+        parts = []
+        while True:
+            pos, chunk, packed = await sender._next_chunk(out, loop)
+            if not chunk:
+                break
+            assert pos == sum(len(p) for p in parts) and packed is None
+            parts.append(chunk)
+            assert len(out["prefetch"]) <= WEBRTC_PREFETCH_CHUNKS
+        # The whole file was hashed while it was read; only the final digest is left
+        assert out["file"]._hash_pos == len(data) and out["file"].digest is None
+        digest = await loop.run_in_executor(sender._io_pool, cache.digest, out["file"])
+        cache.release(out["file"])
+        return b"".join(parts), digest, threading.current_thread().name
+
+    try:
+        sent, digest, loop_thread = _run_on_sender_loop(sender, scenario())
+    finally:
+        sender.stop()
+
+    assert sent == data and digest == hashlib.sha256(data).hexdigest()
+    assert cache.threads and all(name.startswith("quickshare-io") for name in cache.threads)
+    assert loop_thread not in cache.threads
+
+
 if __name__ == "__main__":
     success = test_p2p_transfer()
+    test_file_list_before_block_hashes()
+    test_striped_transfer_reassembles()
+    test_unordered_repairs_and_gives_up()
+    test_backpressure_waits_for_drain_event()
+    test_prefetch_and_hashing_off_the_loop()
     sys.exit(0 if success else 1)
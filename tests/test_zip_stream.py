@@ -0,0 +1,69 @@
+"""
+Streaming ZIP Test - üretilen arşiv zipfile ile okunabilmeli
+"""
+import io
+import os
+import sys
+import tempfile
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import zip_stream
+from zip_stream import generate_zip_stream
+
+
+def _make_files():
+    root = tempfile.mkdtemp(prefix="quickshare_zip_")
+    files = {
+        "docs/readme.txt": b"QuickShare " * 5000,
+        "docs/alt/data.csv": b"a,b,c\n1,2,3\n" * 1000,
+        "photo.jpg": os.urandom(70 * 1024),
+        "empty.bin": b"",
+        "türkçe ğüş.txt": "merhaba".encode("utf-8"),
+    }
+    entries = []
+    for name, data in files.items():
+        path = os.path.join(root, *name.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        entries.append((path, name))
+    return entries, files
+
+
+def _read_back(entries, chunk_size=4096):
+    data = b"".join(generate_zip_stream(entries, chunk_size=chunk_size))
+    return zipfile.ZipFile(io.BytesIO(data))
+
+
+def test_zip_roundtrip():
+    entries, files = _make_files()
+    with _read_back(entries) as zf:
+        assert zf.testzip() is None
+        for name, data in files.items():
+            assert zf.read(name) == data
+        # Sıkıştırılmış formatlar deflate edilmemeli
+        assert zf.getinfo("photo.jpg").compress_type == zipfile.ZIP_STORED
+        assert zf.getinfo("docs/readme.txt").compress_type == zipfile.ZIP_DEFLATED
+
+
+def test_zip64_records():
+    entries, files = _make_files()
+    old_limit, old_count = zip_stream.ZIP64_LIMIT, zip_stream.ZIP64_COUNT_LIMIT
+    # Sınırları düşürerek ZIP64 extra field ve end record yolunu zorla
+    zip_stream.ZIP64_LIMIT = 1024
+    zip_stream.ZIP64_COUNT_LIMIT = 2
+    try:
+        with _read_back(entries) as zf:
+            assert zf.testzip() is None
+            for name, data in files.items():
+                assert zf.read(name) == data
+    finally:
+        zip_stream.ZIP64_LIMIT, zip_stream.ZIP64_COUNT_LIMIT = old_limit, old_count
+
+
+if __name__ == "__main__":
+    test_zip_roundtrip()
+    test_zip64_records()
+    print("✅ PASSED")
@@ -7,6 +7,7 @@ import json
 import os
 import uuid
 import time
+import threading
 from datetime import datetime
 from typing import List, Dict, Optional
 
@@ -22,6 +23,7 @@ class TransferHistory:
     
     def __init__(self, filepath: str = DEFAULT_HISTORY_FILE):
         self.filepath = filepath
+        self._lock = threading.Lock()
         self._ensure_dir()
         self._data = self._load()
     
@@ -47,11 +49,16 @@ class TransferHistory:
     def _save(self):
         """JSON dosyasına yaz"""
         try:
-            with open(self.filepath, "w", encoding="utf-8") as f:
-                json.dump(self._data, f, ensure_ascii=False, indent=2)
+            with self._lock:
+                with open(self.filepath, "w", encoding="utf-8") as f:
+                    json.dump(self._data, f, ensure_ascii=False, indent=2)
         except IOError as e:
             print(f"[History] Kayıt hatası: {e}")
     
+    def flush(self):
+        """save=False ile eklenen kayıtları diske yaz"""
+        self._save()
+    
     def _trim(self):
         """MAX_RECORDS'u aşan eski kayıtları sil (FIFO)"""
         if len(self._data["transfers"]) > MAX_RECORDS:
@@ -67,6 +74,7 @@ class TransferHistory:
         duration_sec: float = 0,
         avg_speed: float = 0,
         method: str = "http",  # "http" | "p2p"
+        save: bool = True,  # False: toplu kayıt için flush() beklenir
     ) -> str:
         """
         Yeni transfer kaydı ekle
@@ -89,9 +97,11 @@ class TransferHistory:
             "method": method,
         }
         
-        self._data["transfers"].append(record)
-        self._trim()
-        self._save()
+        with self._lock:
+            self._data["transfers"].append(record)
+            self._trim()
+        if save:
+            self._save()
         
         return transfer_id
     
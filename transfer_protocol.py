@@ -0,0 +1,223 @@
+"""
+QuickShare Transfer Protocol
+DataChannel için ikili (binary) frame formatı
+
+Her binary DataChannel mesajı bir veya daha fazla frame'in art arda
+eklenmesinden oluşur. Böylece küçük dosyaların verisi ve bitiş frame'leri
+tek mesajda toplanabilir, birden fazla dosyanın chunk'ları aynı kanalda
+karışık (multiplexed) gönderilebilir.
+
+Frame header (20 byte, network byte order):
+    version   B   protokol sürümü
+    type      B   FRAME_DATA | FRAME_FILE_END | FRAME_COPY | FRAME_SIGNATURE | FRAME_ZDATA
+    stream_id H   gönderici stream'i (çoklu kanal/oturum ayrımı için)
+    file_id   I   file_list içindeki dosya id'si
+    offset    Q   DATA/COPY/ZDATA: dosya içi offset, FILE_END: dosyanın toplam boyutu,
+                  SIGNATURE: imza verisi içindeki offset
+    length    I   payload uzunluğu
+"""
+
+import bisect
+import struct
+from typing import Iterator, List, Tuple
+
+
+PROTOCOL_VERSION = 2
+
+HEADER = struct.Struct('!BBHIQI')
+HEADER_SIZE = HEADER.size
+
+FRAME_DATA = 1
+FRAME_FILE_END = 2  # payload: 32 byte SHA256 digest
+FRAME_COPY = 3  # Delta: payload COPY_PAYLOAD (alıcının eski kopyasındaki offset, uzunluk)
+FRAME_SIGNATURE = 4  # Delta: alıcı -> gönderici, eski kopyanın blok imzası (parça parça)
+FRAME_ZDATA = 5  # Sıkıştırılmış veri: payload ZDATA_HEADER (ham uzunluk) + zlib akışı
+
+COPY_PAYLOAD = struct.Struct('!QI')
+ZDATA_HEADER = struct.Struct('!I')
+
+# Dosya verisi taşıyan (kaybolursa NACK ile yeniden istenebilen) frame'ler
+BULK_FRAMES = (FRAME_DATA, FRAME_ZDATA)
+
+
+class ProtocolError(ValueError):
+    """Bozuk veya desteklenmeyen frame"""
+
+
+def encode_frame(frame_type: int, file_id: int, offset: int, payload: bytes = b"", stream_id: int = 0) -> bytes:
+    """
+    Tek bir frame oluştur
+
+    Args:
+        frame_type: FRAME_DATA veya FRAME_FILE_END
+        file_id: Dosya id'si
+        offset: Dosya içi offset (FILE_END için dosya boyutu)
+        payload: Frame verisi
+        stream_id: Stream id'si
+
+    Returns:
+        Header + payload byte'ları
+    """
+    return HEADER.pack(PROTOCOL_VERSION, frame_type, stream_id, file_id, offset, len(payload)) + payload
+
+
+def iter_frames(message) -> Iterator[Tuple[int, int, int, int, memoryview]]:
+    """
+    Bir DataChannel mesajındaki frame'leri sırayla çöz (kopyasız)
+
+    Args:
+        message: bytes / bytearray / memoryview
+
+    Yields:
+        (frame_type, stream_id, file_id, offset, payload) — payload memoryview
+    """
+    view = memoryview(message)
+    pos = 0
+    end = len(view)
+    while pos < end:
+        if end - pos < HEADER_SIZE:
+            raise ProtocolError("Truncated frame header")
+        version, frame_type, stream_id, file_id, offset, length = HEADER.unpack_from(view, pos)
+        if version != PROTOCOL_VERSION:
+            raise ProtocolError(f"Unsupported protocol version {version}")
+        pos += HEADER_SIZE
+        if end - pos < length:
+            raise ProtocolError("Truncated frame payload")
+        yield frame_type, stream_id, file_id, offset, view[pos:pos + length]
+        pos += length
+
+
+class FrameReader:
+    """
+    Akış halinde gelen (HTTP gövdesi gibi) veriden frame'leri parça parça çözer.
+
+    feed() tamamlanan frame'leri döndürür; yarım kalan frame bir sonraki
+    parçayla birleştirilir.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data) -> List[Tuple[int, int, int, int, bytes]]:
+        """
+        Args:
+            data: Akıştan gelen yeni byte'lar
+
+        Returns:
+            [(frame_type, stream_id, file_id, offset, payload)] — payload bytes
+        """
+        self._buffer += data
+        frames = []
+        pos = 0
+        end = len(self._buffer)
+        while end - pos >= HEADER_SIZE:
+            version, frame_type, stream_id, file_id, offset, length = HEADER.unpack_from(self._buffer, pos)
+            if version != PROTOCOL_VERSION:
+                raise ProtocolError(f"Unsupported protocol version {version}")
+            if end - pos - HEADER_SIZE < length:
+                break
+            start = pos + HEADER_SIZE
+            frames.append((frame_type, stream_id, file_id, offset, bytes(self._buffer[start:start + length])))
+            pos = start + length
+        del self._buffer[:pos]
+        return frames
+
+    @property
+    def pending(self) -> int:
+        """Henüz tamamlanmamış frame byte'ları"""
+        return len(self._buffer)
+
+
+class FrameBatch:
+    """
+    Frame'leri tek bir DataChannel mesajında biriktirir.
+
+    Küçük dosyalar ve FILE_END frame'leri max_size dolana kadar aynı
+    mesaja eklenir; take() biriken mesajı döndürüp buffer'ı sıfırlar.
+    """
+
+    def __init__(self, max_size: int, stream_id: int = 0):
+        self.max_size = max_size
+        self.stream_id = stream_id
+        self._buffer = bytearray()
+        self.frame_count = 0
+        self.reliable = False  # FILE_END gibi kaybolmaması gereken frame içeriyor mu?
+
+    def add(self, frame_type: int, file_id: int, offset: int, payload: bytes = b""):
+        self._buffer += HEADER.pack(PROTOCOL_VERSION, frame_type, self.stream_id, file_id, offset, len(payload))
+        self._buffer += payload
+        self.frame_count += 1
+        if frame_type not in BULK_FRAMES:
+            self.reliable = True
+
+    def fits(self, payload_size: int) -> bool:
+        """payload_size'lık bir frame daha eklenirse max_size aşılmaz mı?"""
+        return len(self._buffer) + HEADER_SIZE + payload_size <= self.max_size
+
+    @property
+    def full(self) -> bool:
+        return len(self._buffer) >= self.max_size
+
+    def take(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        self.frame_count = 0
+        self.reliable = False
+        return data
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+
+class RangeSet:
+    """
+    Alınan byte aralıklarının kümesi ([start, end) aralıkları, birleştirilmiş)
+
+    Sırasız/kısmi güvenilir kanallarda eksik aralıkları (NACK) bulmak ve
+    tekrar gelen chunk'ları ayıklamak için kullanılır.
+    """
+
+    def __init__(self):
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+
+    def add(self, start: int, end: int):
+        if end <= start:
+            return
+        # start'a değen veya onu kapsayan ilk aralıktan itibaren birleştir
+        i = bisect.bisect_left(self._ends, start)
+        j = i
+        while j < len(self._starts) and self._starts[j] <= end:
+            start = min(start, self._starts[j])
+            end = max(end, self._ends[j])
+            j += 1
+        self._starts[i:j] = [start]
+        self._ends[i:j] = [end]
+
+    def contains(self, start: int, end: int) -> bool:
+        """[start, end) tamamen alınmış mı?"""
+        if end <= start:
+            return True
+        i = bisect.bisect_right(self._starts, start) - 1
+        return i >= 0 and self._ends[i] >= end
+
+    def missing(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """[start, end) içindeki eksik aralıklar"""
+        gaps = []
+        pos = start
+        i = max(0, bisect.bisect_right(self._starts, start) - 1)
+        while pos < end and i < len(self._starts):
+            s, e = self._starts[i], self._ends[i]
+            if e <= pos:
+                i += 1
+                continue
+            if s > pos:
+                gaps.append((pos, min(s, end)))
+            pos = max(pos, e)
+            i += 1
+        if pos < end:
+            gaps.append((pos, end))
+        return gaps
+
+    def __len__(self) -> int:
+        return len(self._starts)
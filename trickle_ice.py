@@ -0,0 +1,193 @@
+"""
+QuickShare Trickle ICE
+ICE adaylarını toplandıkça sinyal sunucusu üzerinden iletme
+
+aiortc, setLocalDescription() içinde bütün adayları (host, STUN, TURN) toplamadan
+SDP üretmez; yanıt vermeyen bir TURN sunucusu aynı ağdaki iki makine arasında bile
+bağlantıyı saniyelerce geciktirir. Burada SDP yalnızca host adaylarıyla hemen
+gönderilir; STUN/TURN sorguları arka planda sürer ve her aday hazır olduğunda
+karşı tarafa iletilip addIceCandidate ile eklenir. Teklif eden taraf (kontrol eden
+ICE ajanı) her denetimde aday göstermeyi (aggressive nomination) kullandığından
+bağlantı ilk çalışan aday çiftinde kurulur.
+
+Not: aiortc yerel adayları dışarıya olay olarak vermez; bu yüzden aioice
+Connection'ın iç alanlarına yalnızca bu modülde erişilir.
+"""
+
+import asyncio
+import ipaddress
+from typing import Awaitable, Callable, Dict, Optional
+
+from aiortc import RTCIceCandidate, RTCPeerConnection
+from aiortc.rtcicetransport import candidate_from_aioice
+from aiortc.sdp import candidate_from_sdp, candidate_to_sdp
+from aioice.ice import CandidatePair, StunProtocol, relayed_candidate, server_reflexive_candidate
+from config import WEBRTC_ICE_GATHER_TIMEOUT
+
+
+END_OF_CANDIDATES = "a=end-of-candidates"
+
+
+def encode_candidate(candidate: Optional[RTCIceCandidate], mid: str = "0") -> Dict:
+    """
+    Adayı sinyal mesajına çevir (tarayıcıların RTCIceCandidateInit biçimi)
+
+    Args:
+        candidate: Yerel aday; aday listesinin sonu için None
+        mid: Adayın ait olduğu medya satırı (DataChannel için SCTP mid)
+
+    Returns:
+        {"candidate", "sdpMid", "sdpMLineIndex"} (liste sonunda candidate boş dizgedir)
+    """
+    return {
+        "candidate": f"candidate:{candidate_to_sdp(candidate)}" if candidate else "",
+        "sdpMid": mid,
+        "sdpMLineIndex": 0,
+    }
+
+
+def decode_candidate(data) -> Optional[RTCIceCandidate]:
+    """
+    Sinyal mesajından aday oluştur
+
+    Args:
+        data: encode_candidate çıktısı (ya da yalnızca aday satırı)
+
+    Returns:
+        RTCIceCandidate; aday listesinin sonu için None
+
+    Raises:
+        ValueError: Aday satırı çözümlenemezse
+    """
+    if isinstance(data, str):
+        data = {"candidate": data}
+    line = (data or {}).get("candidate") or ""
+    if not line:
+        return None
+    if line.startswith("candidate:"):
+        line = line[len("candidate:"):]
+    try:
+        candidate = candidate_from_sdp(line)
+    except (AssertionError, IndexError, ValueError) as e:
+        raise ValueError(f"Geçersiz ICE adayı: {line!r}") from e
+    candidate.sdpMid = data.get("sdpMid")
+    candidate.sdpMLineIndex = data.get("sdpMLineIndex")
+    if candidate.sdpMid is None and candidate.sdpMLineIndex is None:
+        candidate.sdpMLineIndex = 0
+    return candidate
+
+
+def strip_end_of_candidates(sdp: str) -> str:
+    """SDP'den a=end-of-candidates satırını çıkar (karşı taraf yeni aday beklesin)"""
+    return "".join(line for line in sdp.splitlines(keepends=True)
+                   if line.strip() != END_OF_CANDIDATES)
+
+
+class IceTrickler:
+    """
+    Bir RTCPeerConnection için ertelenmiş STUN/TURN aday toplama
+
+    Kullanım sırası:
+        trickler.defer()                 # setLocalDescription'dan önce
+        await pc.setLocalDescription(...)
+        send_sdp(trickler.sdp())         # yalnızca host adayları
+        await trickler.run(send_ice)     # STUN/TURN adayları + liste sonu
+    """
+
+    def __init__(self, pc: RTCPeerConnection, timeout: float = WEBRTC_ICE_GATHER_TIMEOUT):
+        self.pc = pc
+        self.timeout = timeout
+        self._connection = None
+        self._stun_server = None
+        self._turn_server = None
+
+    @property
+    def mid(self) -> str:
+        sctp = self.pc.sctp
+        return sctp.mid if sctp is not None and sctp.mid is not None else "0"
+
+    def defer(self):
+        """
+        STUN/TURN sunucularını aday toplamadan çıkar; setLocalDescription
+        yalnızca host adaylarını toplayıp hemen döner.
+        """
+        sctp = self.pc.sctp
+        if sctp is None:
+            return
+        gatherer = sctp.transport.transport.iceGatherer
+        if gatherer.state != "new":
+            return
+        connection = gatherer._connection
+        self._connection = connection
+        self._stun_server, connection.stun_server = connection.stun_server, None
+        self._turn_server, connection.turn_server = connection.turn_server, None
+
+    def sdp(self) -> str:
+        """Gönderilecek yerel SDP (aday listesi henüz bitmedi)"""
+        sdp = self.pc.localDescription.sdp
+        return strip_end_of_candidates(sdp) if self._connection is not None else sdp
+
+    async def run(self, send: Callable[[Dict], Awaitable]):
+        """
+        STUN/TURN adaylarını topla ve her birini hazır olur olmaz gönder
+
+        Args:
+            send: Sinyal mesajını ileten coroutine fonksiyonu (ör. SignalingClient.send_ice)
+        """
+        connection = self._connection
+        if connection is None:
+            return
+        loop = asyncio.get_running_loop()
+        tasks = set()
+        if self._stun_server:
+            for protocol in list(connection._protocols):
+                if ipaddress.ip_address(protocol.local_candidate.host).version == 4:
+                    tasks.add(loop.create_task(server_reflexive_candidate(protocol, self._stun_server)))
+        if self._turn_server:
+            tasks.add(loop.create_task(relayed_candidate(
+                component=1,
+                protocol_factory=lambda: StunProtocol(connection),
+                turn_server=self._turn_server,
+                turn_username=connection.turn_username,
+                turn_password=connection.turn_password,
+                turn_ssl=connection.turn_ssl,
+                turn_transport=connection.turn_transport,
+            )))
+
+        deadline = loop.time() + self.timeout
+        try:
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, timeout=max(0.0, deadline - loop.time()),
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    if task.cancelled() or task.exception() is not None:
+                        continue
+                    candidate, protocol = task.result()
+                    if await self._adopt(candidate, protocol):
+                        await send(encode_candidate(candidate_from_aioice(candidate), self.mid))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        if self.pc.connectionState != "closed":
+            await send(encode_candidate(None, self.mid))
+
+    async def _adopt(self, candidate, protocol: Optional[StunProtocol]) -> bool:
+        """Geç gelen adayı ICE bağlantısına ekle; TURN adayını uzak adaylarla eşle"""
+        connection = self._connection
+        if self.pc.connectionState == "closed":
+            if protocol is not None:
+                await protocol.close()
+            return False
+        connection._local_candidates.append(candidate)
+        if protocol is not None:
+            connection._protocols.append(protocol)
+            if not connection._check_list_done:
+                for remote in connection._remote_candidates:
+                    if (protocol.local_candidate.can_pair_with(remote)
+                            and not connection._find_pair(protocol, remote)):
+                        connection._check_list.append(CandidatePair(protocol, remote))
+                connection.sort_check_list()
+        return True
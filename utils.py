@@ -5,6 +5,7 @@ Yardımcı fonksiyonlar
 
 import os
 import hashlib
+import threading
 from typing import List, Dict
 
 
@@ -27,6 +28,33 @@ def calculate_file_hash(filepath: str, chunk_size: int = 8192) -> str:
     return sha256_hash.hexdigest()
 
 
+def hash_file_prefix(filepath: str, length: int, chunk_size: int = 1024 * 1024):
+    """
+    Dosyanın ilk `length` byte'ının SHA256 hasher'ını döndür
+    
+    Yarıda kalmış bir indirmeye devam ederken hasher state'ini yeniden
+    kurmak için kullanılır; dönen nesne yeni chunk'larla güncellenebilir.
+    
+    Args:
+        filepath: Dosya yolu
+        length: Hash'lenecek prefix uzunluğu
+        chunk_size: Okuma buffer boyutu
+        
+    Returns:
+        hashlib sha256 nesnesi
+    """
+    sha256_hash = hashlib.sha256()
+    remaining = length
+    with open(filepath, "rb") as f:
+        while remaining > 0:
+            block = f.read(min(chunk_size, remaining))
+            if not block:
+                break
+            sha256_hash.update(block)
+            remaining -= len(block)
+    return sha256_hash
+
+
 def format_size(bytes_count: int) -> str:
     """
     Byte sayısını okunabilir formata çevir
@@ -180,3 +208,55 @@ def calculate_total_size(file_paths: List[str]) -> int:
                 total += os.path.getsize(file)
     return total
 
+
+_pwrite_lock = threading.Lock()
+
+
+def pwrite(fd: int, data: bytes, offset: int) -> int:
+    """
+    Dosyaya verilen offset'ten yaz (dosya pozisyonunu paylaşmadan)
+    
+    os.pwrite olmayan platformlarda (Windows) lseek + write kilitle yapılır.
+    
+    Args:
+        fd: Dosya tanımlayıcısı
+        data: Yazılacak veri
+        offset: Dosya içi byte offset
+        
+    Returns:
+        Yazılan byte sayısı
+    """
+    view = memoryview(data)
+    written = 0
+    if hasattr(os, "pwrite"):
+        while written < len(view):
+            written += os.pwrite(fd, view[written:], offset + written)
+        return written
+    
+    with _pwrite_lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        while written < len(view):
+            written += os.write(fd, view[written:])
+    return written
+
+
+def pread(fd: int, length: int, offset: int) -> bytes:
+    """
+    Dosyadan verilen offset'ten oku (dosya pozisyonunu paylaşmadan)
+    
+    os.pread olmayan platformlarda (Windows) lseek + read kilitle yapılır.
+    
+    Args:
+        fd: Dosya tanımlayıcısı
+        length: Okunacak en fazla byte
+        offset: Dosya içi byte offset
+        
+    Returns:
+        Okunan veri (dosya sonunda daha kısa olabilir)
+    """
+    if hasattr(os, "pread"):
+        return os.pread(fd, length, offset)
+    
+    with _pwrite_lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        return os.read(fd, length)
@@ -6,14 +6,39 @@ P2P dosya transferi için WebRTC DataChannel yönetimi
 import asyncio
 import json
 import os
-import hashlib
 import time
 import threading
+import functools
 import math
+import bisect
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Callable, List, Dict
 from aiortc import RTCPeerConnection, RTCSessionDescription, RTCConfiguration, RTCIceServer
+from aiortc.rtcsctptransport import (ForwardTsnChunk, InboundStream, RTCSctpTransport, SCTP_DATA_UNORDERED,
+                                     uint16_gt, uint32_gt, uint32_gte)
 import socketio
-from config import WEBRTC_CHUNK_SIZE, ICE_SERVERS, WEBRTC_TIMEOUT, SIGNALING_SERVER_URL
+from config import (WEBRTC_CHUNK_SIZE, ICE_SERVERS, WEBRTC_TIMEOUT, SIGNALING_SERVER_URL,
+                    WEBRTC_MULTIPLEX_FILES, WEBRTC_SMALL_FILE_SIZE,
+                    WEBRTC_BUFFER_HIGH, WEBRTC_BUFFER_LOW, WEBRTC_SHARED_CACHE_SIZE,
+                    WEBRTC_IO_WORKERS, WEBRTC_PREFETCH_CHUNKS, WEBRTC_WRITE_BUFFER,
+                    WEBRTC_DATA_CHANNELS, WEBRTC_MAX_CHANNELS, WEBRTC_UNORDERED, WEBRTC_MAX_RETRANSMITS,
+                    WEBRTC_NACK_DELAY, WEBRTC_NACK_RETRIES, WEBRTC_REPAIR_RETRIES, DELTA_SUFFIX,
+                    DEDUP_TRANSFER, COMPRESSION, SIGNALING_TRANSPORT, SIGNALING_POOL_SIZE,
+                    SIGNALING_JOIN_TIMEOUT, SIGNALING_POLL_TIMEOUT, SIGNALING_POST_TIMEOUT,
+                    SIGNALING_WS_HEARTBEAT, WEBRTC_TRICKLE_ICE, WEBRTC_DIRECT_TRANSFER,
+                    WEBRTC_DIRECT_TLS, WEBRTC_META_TIMEOUT)
+from chunk_cache import SharedChunkCache
+from transfer_protocol import (PROTOCOL_VERSION, HEADER_SIZE, FRAME_DATA, FRAME_FILE_END,
+                               FRAME_COPY, FRAME_SIGNATURE, FRAME_ZDATA, COPY_PAYLOAD, ZDATA_HEADER,
+                               FrameBatch, ProtocolError, RangeSet, encode_frame, iter_frames)
+from file_writer import FileWriter
+from merkle import BLOCK_SIZE as MERKLE_BLOCK_SIZE, file_blocks, missing_ranges, valid_blocks
+from delta import DeltaScanner, block_size_for, check_local, parse_signature
+from compress import SAMPLE_SIZE as COMPRESS_SAMPLE, compress_block, compress_pool, should_compress
+from cdc import MAX_CHUNK as CDC_MAX_CHUNK, ChunkIndex, encode_chunks, file_chunks, plan_transfer
+from trickle_ice import IceTrickler, decode_candidate
+from direct_transfer import DirectLink, DirectServer, connect as direct_connect, lan_address
 
 
 def is_safe_path(basedir, path, follow_symlinks=True):
@@ -23,6 +48,53 @@ def is_safe_path(basedir, path, follow_symlinks=True):
     return os.path.abspath(path).startswith(os.path.abspath(basedir))
 
 
+def _prune_abandoned_fragments(self, tsn: int) -> int:
+    """
+    FORWARD TSN handling for aiortc's InboundStream.prune_chunks.
+
+    aiortc drops every buffered fragment up to the new cumulative TSN, including
+    those of a reliable ordered message still being reassembled. Once the
+    unordered, partially reliable channels abandon data, a control message split
+    over several SCTP chunks (FILE_END batch, NACK re-send) is lost that way and
+    the ordered control channel stalls. Only unordered fragments and ordered
+    fragments of messages the sender skipped are dropped here.
+    """
+    size = 0
+    kept = []
+    for chunk in self.reassembly:
+        if uint32_gte(tsn, chunk.tsn) and (chunk.flags & SCTP_DATA_UNORDERED
+                                           or uint16_gt(self.sequence_number, chunk.stream_seq)):
+            size += len(chunk.user_data)
+        else:
+            kept.append(chunk)
+    self.reassembly = kept
+    return size
+
+
+InboundStream.prune_chunks = _prune_abandoned_fragments
+
+_aiortc_update_ack_point = RTCSctpTransport._update_advanced_peer_ack_point
+
+
+def _repeat_forward_tsn(self):
+    """
+    aiortc sends a FORWARD TSN only when it abandons new chunks; if that one
+    packet is lost the peer's cumulative TSN never moves past the abandoned
+    data and the association stalls. Per RFC 3758 it is sent again (on SACK and
+    T3 expiry) while the peer has not acknowledged the Advanced.Peer.Ack.Point.
+    """
+    _aiortc_update_ack_point(self)
+    if self._forward_tsn_chunk is not None:
+        self._forward_tsn_streams = self._forward_tsn_chunk.streams
+    elif uint32_gt(self._advanced_peer_ack_tsn, self._last_sacked_tsn):
+        self._forward_tsn_chunk = ForwardTsnChunk()
+        self._forward_tsn_chunk.cumulative_tsn = self._advanced_peer_ack_tsn
+        self._forward_tsn_chunk.streams = getattr(self, "_forward_tsn_streams", [])
+
+
+RTCSctpTransport._update_advanced_peer_ack_point = _repeat_forward_tsn
+
+
 def _get_rtc_config() -> RTCConfiguration:
     """Create RTCConfiguration from ICE_SERVERS config"""
     ice_servers = []
@@ -49,6 +121,7 @@ class WebRTCSender:
         self._thread: Optional[threading.Thread] = None
         self.log_callback: Optional[Callable] = None
         self.progress_callback: Optional[Callable] = None
+        self.on_peer_done: Optional[Callable] = None  # Called with peer_sid after transfer_end
         self.password: Optional[str] = None # Added for Phase 9 Security
         # Track connection state for UI (true if AT LEAST ONE peer is connected)
         self._connected_event = threading.Event()
@@ -61,24 +134,46 @@ class WebRTCSender:
         self._pause_event = asyncio.Event()
         self._pause_event.set() # Not paused by default
         self.signaling = None
+        # Peers sending the same file share disk reads and its hash
+        self._chunk_cache = SharedChunkCache(max_bytes=WEBRTC_SHARED_CACHE_SIZE)
+        # Disk reads and hashing run here so the loop only drives SCTP/DTLS
+        self._io_pool = ThreadPoolExecutor(max_workers=WEBRTC_IO_WORKERS, thread_name_prefix="quickshare-io")
+        # Full-file block hashes and chunk fingerprints (file_meta) never queue ahead of transfer reads
+        self._meta_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quickshare-meta")
+        # LAN fast path: direct TCP listener, started for the first peer connected host to host
+        self._direct_server: Optional[DirectServer] = None
 
     def setup_signaling(self, signaling_client):
-        """Attach signaling client"""
-        self.signaling = signaling_client
-        self.signaling.on_offer = self.handle_signaling_offer
-        self.signaling.on_ice = self.handle_signaling_ice
+        """
+        Attach a signaling client. Several may be attached (internet and LAN
+        signaling for the same room); each offer is answered on the client it came from.
+        """
+        if self.signaling is None:
+            self.signaling = signaling_client
+        signaling_client.on_offer = functools.partial(self.handle_signaling_offer, signaling=signaling_client)
+        signaling_client.on_ice = self.handle_signaling_ice
 
-    async def handle_signaling_offer(self, sdp, sender_sid):
+    async def handle_signaling_offer(self, sdp, sender_sid, signaling=None):
         """Handle offer from signaling server"""
+        signaling = signaling or self.signaling
         self._log(f"Offer received from {sender_sid}")
-        answer = await self.handle_offer(sdp, sender_sid=sender_sid)
-        await self.signaling.send_answer(answer["sdp"], target_sid=sender_sid)
+        answer = await self.handle_offer(sdp, sender_sid=sender_sid, trickle=WEBRTC_TRICKLE_ICE)
+        await signaling.send_answer(answer["sdp"], target_sid=sender_sid)
+        trickler = self.peers[sender_sid].get("trickle")
+        if trickler:
+            # STUN/TURN candidates follow the answer as they are gathered
+            self.peers[sender_sid]["trickle_task"] = asyncio.ensure_future(
+                trickler.run(lambda candidate: signaling.send_ice(candidate, target_sid=sender_sid)))
 
     async def handle_signaling_ice(self, candidate, sender_sid):
-        """Handle ICE candidate"""
-        if sender_sid in self.peers and self.peers[sender_sid]["pc"]:
-            try: pass 
-            except: pass
+        """Handle a trickled ICE candidate (empty candidate = end of candidates)"""
+        peer_data = self.peers.get(sender_sid)
+        if not peer_data or not peer_data["pc"]:
+            return
+        try:
+            await peer_data["pc"].addIceCandidate(decode_candidate(candidate))
+        except Exception as e:
+            self._log(f"[{sender_sid}] ICE adayı eklenemedi: {e}")
 
     def _log(self, msg):
         if self.log_callback:
@@ -90,6 +185,12 @@ class WebRTCSender:
     def set_files(self, file_list: List[Dict]):
         """Set the file list to send — [{name, path, size}]"""
         self.files = file_list
+        # Compute block hashes and chunk fingerprints ahead of the first peer (cached across runs)
+        for f in file_list:
+            if f["size"] > MERKLE_BLOCK_SIZE:
+                self._meta_pool.submit(self._block_info, f)
+            if DEDUP_TRANSFER:
+                self._meta_pool.submit(self._chunk_info, f)
 
     def start(self):
         """Start the async event loop in a background thread"""
@@ -132,6 +233,8 @@ class WebRTCSender:
                     try: await pc.close()
                     except: pass
             self.peers.clear()
+            if self._direct_server is not None:
+                await self._direct_server.close()
             
             # Cancel all running tasks except this shutdown task
             current_task = asyncio.current_task()
@@ -141,6 +244,8 @@ class WebRTCSender:
             
             if tasks:
                 await asyncio.gather(*tasks, return_exceptions=True)
+            self._io_pool.shutdown(wait=False)
+            self._meta_pool.shutdown(wait=False, cancel_futures=True)
                 
             self._loop.stop()
 
@@ -175,9 +280,13 @@ class WebRTCSender:
                     try: self._loop.call_soon_threadsafe(channel.send, json.dumps({"type": "RESUME"}))
                     except: pass
 
-    async def handle_offer(self, offer_sdp: str, offer_type: str = "offer", sender_sid: str = "default_peer") -> dict:
+    async def handle_offer(self, offer_sdp: str, offer_type: str = "offer", sender_sid: str = "default_peer",
+                           trickle: bool = False) -> dict:
         """
         Alıcıdan gelen SDP offer'ı işle ve answer döndür.
+
+        trickle=True ise answer yalnızca host adaylarını içerir; STUN/TURN adayları
+        peer_data["trickle"] ile sonradan gönderilir.
         """
         pc = RTCPeerConnection(configuration=_get_rtc_config())
         
@@ -187,18 +296,34 @@ class WebRTCSender:
             "channel": None,
             "ready": asyncio.Event(),
             "start": asyncio.Event(),
+            "drained": asyncio.Event(),  # Set by the channels' bufferedamountlow event
+            "writable": asyncio.Event(),  # Cleared while the receiver's disk writer is behind
+            "stripes": [],  # Extra data channels (fileTransfer-N)
+            "channel_count": 1,
             "files_to_send": [],
             "offsets": {},
+            "ranges": {},  # Verified resume: {name: [[start, end], ...]} still needed
+            "delta": {},  # Delta transfer: {name: {"block_size", "size"}} of the receiver's signature
+            "signatures": {},  # {file_id: bytearray} signature bytes received so far
+            "compression": False,  # Receiver accepts zlib-compressed (ZDATA) frames
             "status": "waiting",
             "last_time": 0.0,
             "last_bytes": 0,
             "current_speed": 0.0
         }
+        peer_data["writable"].set()
         self.peers[sender_sid] = peer_data
         self.status = "waiting" # Global status
 
         @pc.on("datachannel")
         def on_datachannel(channel):
+            channel.bufferedAmountLowThreshold = WEBRTC_BUFFER_LOW
+            channel.on("bufferedamountlow", peer_data["drained"].set)
+            if channel.label != "fileTransfer":
+                # Extra striping channel from the receiver: file data only
+                peer_data["stripes"].append(channel)
+                return
+
             peer_data["channel"] = channel
             self._log(f"[{sender_sid}] DataChannel bağlandı!")
             peer_data["status"] = "connected"
@@ -207,6 +332,9 @@ class WebRTCSender:
 
             @channel.on("message")
             def on_message(message):
+                if isinstance(message, bytes):
+                    self._receive_signature(sender_sid, peer_data, message)
+                    return
                 try:
                     data = json.loads(message)
                     if data.get("type") == "PAUSE":
@@ -215,9 +343,23 @@ class WebRTCSender:
                     elif data.get("type") == "RESUME":
                         self._log(f"[{sender_sid}] ▶️ Alıcı tarafından devam ettirildi")
                         self._pause_event.set()
+                    elif data.get("type") == "WRITE_PAUSE":
+                        peer_data["writable"].clear()
+                    elif data.get("type") == "WRITE_RESUME":
+                        peer_data["writable"].set()
+                    elif data.get("type") == "NACK":
+                        asyncio.ensure_future(self._resend_ranges(sender_sid, data.get("file_id"), data.get("ranges", [])))
                     elif data.get("type") == "DOWNLOAD_REQUEST":
                         requested = data.get("files", [])
                         peer_data["offsets"] = data.get("offsets", {})  # Store requested offsets
+                        peer_data["ranges"] = data.get("ranges", {})
+                        peer_data["delta"] = data.get("delta", {})
+                        peer_data["compression"] = COMPRESSION and "zlib" in (data.get("compression") or [])
+                        channel_count = self._requested_channels(data.get("channels", 1))
+                        if channel_count is None:
+                            self._log(f"[{sender_sid}] ⚠️ Geçersiz kanal sayısı: {data.get('channels')!r}, tek kanal kullanılıyor")
+                        peer_data["channel_count"] = channel_count or 1
+                        peer_data["direct_requested"] = bool(data.get("direct"))
                         if not requested: pass
                         
                         peer_data["files_to_send"] = requested
@@ -264,11 +406,14 @@ class WebRTCSender:
 
         # Create answer
         answer = await pc.createAnswer()
+        if trickle:
+            peer_data["trickle"] = IceTrickler(pc)
+            peer_data["trickle"].defer()
         await pc.setLocalDescription(answer)
 
         self._log(f"[{sender_sid}] SDP answer oluşturuldu")
         return {
-            "sdp": pc.localDescription.sdp,
+            "sdp": peer_data["trickle"].sdp() if trickle else pc.localDescription.sdp,
             "type": pc.localDescription.type
         }
 
@@ -284,7 +429,13 @@ class WebRTCSender:
         return future.result(timeout=WEBRTC_TIMEOUT)
 
     async def _send_files_async(self, peer_sid: str):
-        """Send all files over the peer's DataChannel"""
+        """
+        Send all requested files over the peer's DataChannel.
+
+        File data travels as binary frames (transfer_protocol): small files
+        are packed together with their FILE_END frames into one message and
+        up to WEBRTC_MULTIPLEX_FILES large files are sent round-robin.
+        """
         if peer_sid not in self.peers: return
         peer_data = self.peers[peer_sid]
         channel = peer_data.get("channel")
@@ -296,146 +447,536 @@ class WebRTCSender:
         peer_data["status"] = "transferring"
         self.status = "transferring"
 
-        # 1. Send file list
+        # 1. Send file list (ids are used by binary frames) right away; block
+        # hashes and chunk fingerprints need a full read of uncached files and
+        # follow in file_meta messages (see _send_file_meta)
+        loop = asyncio.get_running_loop()
+        entries = [{"id": i, "name": f["name"], "size": f["size"]} for i, f in enumerate(self.files)]
         file_list_msg = {
             "type": "file_list",
-            "files": [{"name": f["name"], "size": f["size"]} for f in self.files],
-            "total_size": sum(f["size"] for f in self.files)
+            "protocol": PROTOCOL_VERSION,
+            "files": entries,
+            "total_size": sum(f["size"] for f in self.files),
+            "meta": True
         }
+        direct_offer = await self._offer_direct(peer_data)
+        if direct_offer:
+            file_list_msg["direct"] = direct_offer
         channel.send(json.dumps(file_list_msg))
         self._log(f"[{peer_sid}] Dosya listesi gönderildi, seçim bekleniyor...")
+        asyncio.ensure_future(self._send_file_meta(channel))
         
         # Wait for download request
         await peer_data["start"].wait()
+        link = await self._accept_direct(peer_data)
         
         # Filter files to send
         files_to_send = []
         if peer_data["files_to_send"]:
             # Filter self.files keeping order
-            files_to_send = [f for f in self.files if f['name'] in peer_data["files_to_send"]]
+            requested = set(peer_data["files_to_send"])
+            files_to_send = [(i, f) for i, f in enumerate(self.files) if f['name'] in requested]
             if not files_to_send:
                 self._log("⚠️ İstenen dosyalar bulunamadı veya liste boş.")
-                # We should probably send an "end" or error
-                # For now, just log and proceed with empty list, which will skip transfer.
-                pass
         else:
-            # If _files_to_send is empty, it means the receiver requested all or didn't specify.
-            # For now, we'll assume if _files_to_send is empty after _transfer_start_event,
-            # it implies "send all". This might need refinement based on receiver behavior.
-            files_to_send = self.files
+            # Empty request means "send all"
+            files_to_send = list(enumerate(self.files))
         
         total_files_count = len(files_to_send)
         self._log(f"Transfer başlıyor: {total_files_count} dosya gönderilecek.")
 
-        total_sent = 0
-        total_size = sum(f["size"] for f in files_to_send)
+        offsets = peer_data.get("offsets", {})
+        resume_ranges = peer_data.get("ranges", {})
+        deltas = peer_data.get("delta", {})
+        progress = {
+            "total_sent": 0,
+            "total_size": sum(f["size"] for _, f in files_to_send),
+            "files_done": 0,
+        }
 
-        for i, file_info in enumerate(files_to_send):
-            if self._stopped:
-                break
-            name = file_info["name"]
-            path = file_info["path"]
-            size = file_info["size"]
-            
-            # Check for resume offset
-            offset = peer_data.get("offsets", {}).get(name, 0)
-            if offset > size:
-                offset = 0 # Invalid offset, start from 0
-            
-            if offset > 0:
-                self._log(f"[{peer_sid}] Resume aktifleştirildi: {name} ({offset} bytes atlanıyor)")
-
-            # 2. FILE_START
-            start_msg = {
-                "type": "file_start",
-                "name": name,
-                "size": size,
-                "index": i,
-                "total": total_files_count,
-                "offset": offset
-            }
-            channel.send(json.dumps(start_msg))
-
-            # 3. Send chunks adaptively
-            file_hash = hashlib.sha256()
-            file_sent = offset
-            total_sent += offset # Pre-add offset to total so progress starts correctly
-            
-            # ADAPTIVE CHUNKING LOGIC
-            # Start with a chunk size based on file size, but cap it at 256KB for WebRTC safety
-            MIN_CHUNK_SIZE = 16 * 1024       # 16 KB
-            MAX_CHUNK_SIZE = 256 * 1024      # 256 KB
-            
-            # Base chunk size on file size (larger file = larger optimal chunk)
-            optimal_chunk = max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, size // 1000))
-            current_chunk_size = optimal_chunk
-            
-            BUFFER_THRESHOLD = current_chunk_size * 8 # Target max buffer
-
-            with open(path, "rb") as f:
-                if offset > 0:
-                    f.seek(offset)
-                    
-                while True:
-                    # Check pause
-                    await self._pause_event.wait()
-                    
-                    if self._stopped:
-                        break
-                        
-                    chunk = f.read(current_chunk_size)
-                    if not chunk:
-                        break
+        # Messages are capped at ~256KB for WebRTC safety; one cache block fills a message
+        chunk_size = self._chunk_cache.block_size
+        batch = FrameBatch(chunk_size + HEADER_SIZE)
+        pending = deque(files_to_send)
+        opening = deque()  # Files being opened (and small files read) in the I/O pool
+        active: List[Dict] = []
 
-                    # Wait for buffer to drain if needed (backpressure)
-                    buffered = channel.bufferedAmount
-                    if buffered > BUFFER_THRESHOLD:
-                        # Network is congested! Throttle down the chunk size temporarily to prevent bloat
-                        current_chunk_size = max(MIN_CHUNK_SIZE, current_chunk_size // 2)
-                        
-                        backoff = 0.001
-                        while channel.bufferedAmount > BUFFER_THRESHOLD:
-                            await asyncio.sleep(backoff)
-                            backoff = min(backoff * 1.5, 0.05)  # Max 50ms wait per loop
-                    else:
-                        # Network is clear, slowly increase back to optimal chunk size
-                        if current_chunk_size < optimal_chunk:
-                            current_chunk_size = min(optimal_chunk, int(current_chunk_size * 1.2))
-
-                    channel.send(chunk)
-                    file_hash.update(chunk)
-                    file_sent += len(chunk)
-                    total_sent += len(chunk)
-
-                    # Progress callback (throttled to avoid GUI overhead)
-                    if self.progress_callback:
-                        now = time.time()
-                        elapsed = now - peer_data["last_time"]
-                        if elapsed >= 0.5 or peer_data["last_time"] == 0:
-                            if peer_data["last_time"] > 0:
-                                byte_diff = total_sent - peer_data["last_bytes"]
-                                peer_data["current_speed"] = byte_diff / elapsed
-                            peer_data["last_time"] = now
-                            peer_data["last_bytes"] = total_sent
-                            
-                            # Aggregate totals across all peers for UI
-                            aggregate_speed = sum(p.get("current_speed", 0) for p in self.peers.values())
-                            
-                            self.progress_callback(total_sent, total_size, aggregate_speed, i + 1, len(self.files))
-
-            # 4. FILE_END
-            end_msg = {
-                "type": "file_end",
-                "name": name,
-                "hash": file_hash.hexdigest()
-            }
-            channel.send(json.dumps(end_msg))
-            self._log(f"[{peer_sid}] ✅ {name} gönderildi ({file_sent} bytes)")
+        if link is not None:
+            # Same LAN: all frames go over the direct TCP link in order, the channel keeps control messages
+            self._log(f"[{peer_sid}] ⚡ Aynı ağ: veri doğrudan TCP ile gönderiliyor")
+        else:
+            channels = await self._data_channels(peer_data)
+            # Unordered channels (if the receiver opened any) carry bulk data;
+            # FILE_END frames always go over the reliable control channel
+            bulk_channels = [c for c in channels if not c.ordered] or channels
+            if len(bulk_channels) > 1 or bulk_channels[0] is not channel:
+                mode = "sırasız" if not bulk_channels[0].ordered else "sıralı"
+                self._log(f"[{peer_sid}] Veri {len(bulk_channels)} {mode} kanala bölünerek gönderiliyor")
+
+        async def flush():
+            """Send the pending batch on the least-loaded channel, waiting for the buffers to drain first"""
+            if not len(batch):
+                return
+            # The receiver's disk writer is behind: hold the data here, not in its memory
+            await peer_data["writable"].wait()
+            if link is not None:
+                await link.send(batch.take())  # TCP backpressure via drain()
+                return
+            await self._wait_buffer_low(peer_data, channels)
+            if batch.reliable:
+                target = channel
+            else:
+                target = min((c for c in bulk_channels if c.readyState == "open"),
+                             key=lambda c: c.bufferedAmount, default=channel)
+            target.send(batch.take())
+
+        def schedule_opens():
+            while pending and len(opening) < WEBRTC_PREFETCH_CHUNKS:
+                file_id, file_info = pending.popleft()
+                opening.append(loop.run_in_executor(
+                    self._io_pool, self._prepare_outgoing, peer_sid, file_id, file_info,
+                    offsets.get(file_info["name"], 0), resume_ranges.get(file_info["name"]),
+                    self._take_signature(peer_data, file_id, deltas.get(file_info["name"])),
+                    peer_data["compression"]
+                ))
+
+        try:
+            while (pending or opening or active) and not self._stopped:
+                # Check pause
+                await self._pause_event.wait()
+                if self._stopped:
+                    break
+
+                # Fill the multiplex window; small files go straight into the batch
+                schedule_opens()
+                while opening and len(active) < WEBRTC_MULTIPLEX_FILES and not self._stopped:
+                    out = await opening.popleft()
+                    schedule_opens()
+                    progress["total_sent"] += out["offset"]  # Pre-add skipped bytes so progress starts correctly
+                    if "data" not in out:
+                        active.append(out)
+                        continue
+                    parts = out["data"]
+                    if not batch.fits(sum(len(p or d) + HEADER_SIZE for _, d, p in parts) + 32 + HEADER_SIZE):
+                        await flush()
+                    for pos, data, packed in parts:
+                        batch.add(FRAME_ZDATA if packed else FRAME_DATA, out["id"], pos, packed or data)
+                        self._account_sent(out, data, progress, len(packed or data))
+                    self._finish_outgoing(peer_sid, out, batch, progress, out["digest"])
+                    self._report_progress(peer_data, progress, len(self.files))
+
+                if not active:
+                    await flush()
+                    continue
+
+                # One chunk per active file (round-robin), read ahead in the I/O pool
+                for out in list(active):
+                    if "delta" in out:
+                        # Delta: block references into the receiver's old copy plus literal data
+                        scanner = out["delta"]
+                        for op in await loop.run_in_executor(self._io_pool, scanner.step):
+                            payload = COPY_PAYLOAD.pack(op[2], op[3]) if op[0] == "copy" else op[2]
+                            if not batch.fits(len(payload)):
+                                await flush()
+                            if op[0] == "copy":
+                                batch.add(FRAME_COPY, out["id"], op[1], payload)
+                                out["copied"] += op[3]
+                                progress["total_sent"] += op[3]
+                            else:
+                                batch.add(FRAME_DATA, out["id"], op[1], payload)
+                                self._account_sent(out, payload, progress)
+                        if scanner.done:
+                            active.remove(out)
+                            digest = await loop.run_in_executor(self._io_pool, self._chunk_cache.digest, out["file"])
+                            self._finish_outgoing(peer_sid, out, batch, progress, digest)
+                        await flush()
+                        self._report_progress(peer_data, progress, len(self.files))
+                        continue
+
+                    pos, chunk, packed = await self._next_chunk(out, loop)
+                    if chunk:
+                        # Compressed blocks travel as ZDATA, blocks that did not shrink as plain DATA
+                        payload = packed or chunk
+                        if not batch.fits(len(payload)):
+                            await flush()
+                        batch.add(FRAME_ZDATA if packed else FRAME_DATA, out["id"], pos, payload)
+                        self._account_sent(out, chunk, progress, len(payload))
+                    if not chunk or not (out["ranges"] or out["prefetch"]):
+                        active.remove(out)
+                        digest = await loop.run_in_executor(self._io_pool, self._chunk_cache.digest, out["file"])
+                        self._finish_outgoing(peer_sid, out, batch, progress, digest)
+                    await flush()
+                    self._report_progress(peer_data, progress, len(self.files))
+
+            await flush()
+        finally:
+            # In-flight reads must finish before their files are released
+            for out in active:
+                await asyncio.gather(*(f for _, f in out["prefetch"]), return_exceptions=True)
+                if "delta" in out:
+                    out["delta"].close()
+                self._chunk_cache.release(out["file"])
+            for out in await asyncio.gather(*opening, return_exceptions=True):
+                if isinstance(out, dict):
+                    self._chunk_cache.release(out["file"])
+            if link is not None:
+                # End of stream before transfer_end: the receiver finishes once the link drains
+                await link.close()
 
         # 5. TRANSFER_END
-        channel.send(json.dumps({"type": "transfer_end"}))
+        channel.send(json.dumps({"type": "transfer_end", "files": progress["files_done"]}))
         self._log(f"[{peer_sid}] Transfer tamamlandı!")
         peer_data["status"] = "done"
+        if self.on_peer_done:
+            self.on_peer_done(peer_sid)
+
+    async def _resend_ranges(self, peer_sid: str, file_id, ranges: List):
+        """Re-send byte ranges the receiver reported missing (NACK) on the reliable channel"""
+        peer_data = self.peers.get(peer_sid)
+        if not peer_data or not isinstance(file_id, int) or not 0 <= file_id < len(self.files):
+            return
+        channel = peer_data["channel"]
+        file_info = self.files[file_id]
+        loop = asyncio.get_running_loop()
+        block = self._chunk_cache.block_size
+        entry = await loop.run_in_executor(self._io_pool, self._chunk_cache.open, file_info["path"])
+        try:
+            for start, end in ranges:
+                pos, end = max(0, int(start)), min(int(end), file_info["size"])
+                while pos < end and not self._stopped and channel.readyState == "open":
+                    length = min(block - pos % block, end - pos)
+                    data = await loop.run_in_executor(self._io_pool, self._chunk_cache.read, entry, pos, length)
+                    if not data:
+                        break
+                    await peer_data["writable"].wait()
+                    await self._wait_buffer_low(peer_data, [channel])
+                    channel.send(encode_frame(FRAME_DATA, file_id, pos, data))
+                    pos += len(data)
+        finally:
+            self._chunk_cache.release(entry)
+        self._log(f"[{peer_sid}] 🔁 {file_info['name']}: {len(ranges)} eksik aralık yeniden gönderildi")
+
+    async def _offer_direct(self, peer_data: Dict) -> Optional[Dict]:
+        """
+        LAN fast path: when ICE connected us host to host, offer the receiver a
+        direct TCP endpoint (port, one-time token, TLS fingerprint) in the file list.
+        """
+        if not WEBRTC_DIRECT_TRANSFER or lan_address(peer_data["pc"]) is None:
+            return None
+        try:
+            if self._direct_server is None:
+                self._direct_server = DirectServer(tls=WEBRTC_DIRECT_TLS)
+            await self._direct_server.start()
+        except OSError as e:
+            self._log(f"⚠️ Doğrudan TCP sunucusu açılamadı: {e}")
+            return None
+        offer = self._direct_server.offer()
+        peer_data["direct_token"] = offer["token"]
+        return offer
+
+    async def _accept_direct(self, peer_data: Dict) -> Optional[DirectLink]:
+        """The receiver's direct link if it connected and asked for it, else None (DataChannel)"""
+        token = peer_data.pop("direct_token", None)
+        if token is None:
+            return None
+        # The receiver confirms the link before sending its request, so it is ready or absent by now
+        future = self._direct_server.expect(token)
+        self._direct_server.withdraw(token)
+        link = future.result() if future.done() and not future.cancelled() else None
+        if link is not None and not peer_data.get("direct_requested"):
+            await link.close()
+            return None
+        return link
+
+    async def _data_channels(self, peer_data: Dict) -> List:
+        """
+        Channels to stripe file data across: the control channel plus the
+        receiver's extra channels. Waits briefly for late ones to open.
+        """
+        wanted = peer_data["channel_count"]
+        waited = 0.0
+        while 1 + len(peer_data["stripes"]) < wanted and waited < 5.0:
+            await asyncio.sleep(0.05)
+            waited += 0.05
+        channels = [peer_data["channel"]] + peer_data["stripes"]
+        # Low watermark is for the total across channels
+        for c in channels:
+            c.bufferedAmountLowThreshold = WEBRTC_BUFFER_LOW // len(channels)
+        return channels
+
+    async def _wait_buffer_low(self, peer_data: Dict, channels: List):
+        """
+        Backpressure: once the buffered total passes the high watermark, wait
+        for aiortc's bufferedamountlow events (low watermark) before sending more.
+        """
+        def buffered():
+            return sum(c.bufferedAmount for c in channels)
+
+        if buffered() <= WEBRTC_BUFFER_HIGH:
+            return
+        drained = peer_data["drained"]
+        while (buffered() > WEBRTC_BUFFER_LOW
+               and channels[0].readyState == "open" and not self._stopped):
+            drained.clear()
+            try:
+                # Timeout only guards against a missed event, it is not a poll interval
+                await asyncio.wait_for(drained.wait(), timeout=1.0)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _send_file_meta(self, channel):
+        """
+        Follow-up to file_list: large files' Merkle block hashes (verified
+        resume, block repair, delta) and every file's content-defined chunk
+        fingerprints (dedup). Large files go out one by one as they are
+        hashed, small files together; a final message with "done" closes it.
+        """
+        loop = asyncio.get_running_loop()
+
+        def meta(file_id: int, file_info: Dict) -> Dict:
+            entry = {"id": file_id}
+            if file_info["size"] > MERKLE_BLOCK_SIZE:
+                entry.update(self._block_info(file_info) or {})
+            if DEDUP_TRANSFER:
+                chunks = self._chunk_info(file_info)
+                if chunks is not None:
+                    entry["chunks"] = chunks
+            return entry
+
+        def send(entries: List[Dict], done: bool = False):
+            if channel.readyState == "open":
+                channel.send(json.dumps({"type": "file_meta", "files": entries, "done": done}))
+
+        try:
+            small = []
+            for file_id, file_info in enumerate(self.files):
+                entry = await loop.run_in_executor(self._meta_pool, meta, file_id, file_info)
+                if file_info["size"] > MERKLE_BLOCK_SIZE:
+                    send([entry])
+                else:
+                    small.append(entry)
+            send(small, done=True)
+        except RuntimeError:
+            pass  # Shutting down: the pool no longer accepts work
+
+    def _block_info(self, file_info: Dict) -> Optional[Dict]:
+        """Merkle block hashes for the file list (None for single-block or unreadable files)"""
+        try:
+            return file_blocks(file_info["path"])
+        except OSError as e:
+            self._log(f"⚠️ Blok hash'leri hesaplanamadı ({file_info['name']}): {e}")
+            return None
+
+    def _chunk_info(self, file_info: Dict) -> Optional[str]:
+        """Content-defined chunk fingerprints for the file list (None for unreadable files)"""
+        try:
+            return encode_chunks(file_chunks(file_info["path"]))
+        except OSError as e:
+            self._log(f"⚠️ Parça listesi hesaplanamadı ({file_info['name']}): {e}")
+            return None
+
+    def _receive_signature(self, peer_sid: str, peer_data: Dict, message: bytes):
+        """Collect the receiver's delta signature (binary frames sent before DOWNLOAD_REQUEST)"""
+        try:
+            for frame_type, _stream_id, file_id, offset, payload in iter_frames(message):
+                if frame_type != FRAME_SIGNATURE:
+                    continue
+                sig = peer_data["signatures"].setdefault(file_id, bytearray())
+                if offset == len(sig):
+                    sig += payload
+        except ProtocolError as e:
+            self._log(f"[{peer_sid}] ⚠️ Bozuk imza frame'i atlandı: {e}")
+
+    @staticmethod
+    def _requested_channels(value) -> Optional[int]:
+        """Data channel count from DOWNLOAD_REQUEST, clamped to [1, WEBRTC_MAX_CHANNELS]; None if not an int"""
+        if not isinstance(value, int) or isinstance(value, bool):
+            return None
+        return min(max(value, 1), WEBRTC_MAX_CHANNELS)
+
+    @staticmethod
+    def _take_signature(peer_data: Dict, file_id: int, request: Optional[Dict]):
+        """(block_size, signature) for a delta request, None if it is missing or incomplete"""
+        sig = peer_data["signatures"].pop(file_id, None)
+        if not isinstance(request, dict) or sig is None or len(sig) != request.get("size"):
+            return None
+        return request.get("block_size"), bytes(sig)
+
+    def _open_outgoing(self, peer_sid: str, file_id: int, file_info: Dict, offset: int,
+                       ranges: Optional[List] = None) -> Dict:
+        """
+        Open a file for sending through the shared chunk cache.
+
+        ranges (verified resume, deduplication) lists the [start, end) pieces
+        the receiver still needs; otherwise everything from offset to the end is sent.
+        """
+        size = file_info["size"]
+        if ranges is not None:
+            try:
+                todo = [(max(0, int(s)), min(int(e), size)) for s, e in ranges]
+            except (TypeError, ValueError):
+                todo = [(0, size)]
+            todo = [(s, e) for s, e in todo if s < e]
+            skipped = size - sum(e - s for s, e in todo)
+            if skipped > 0:
+                self._log(f"[{peer_sid}] Kısmi gönderim: {file_info['name']} "
+                          f"({len(todo)} aralık isteniyor, {skipped} bytes alıcıda mevcut)")
+        else:
+            if offset > size:
+                offset = 0  # Invalid offset, start from 0
+            if offset > 0:
+                self._log(f"[{peer_sid}] Resume aktifleştirildi: {file_info['name']} ({offset} bytes atlanıyor)")
+            todo = [(offset, size)] if offset < size else []
+            skipped = offset
+
+        return {
+            "id": file_id,
+            "name": file_info["name"],
+            "size": size,
+            "offset": skipped,  # Bytes the receiver already has
+            "sent": 0,
+            "copied": 0,  # Delta: bytes the receiver copies from its old version
+            "compress": False,  # Blocks are zlib-compressed (ZDATA frames)
+            "wire": 0,  # Payload bytes actually sent (after compression)
+            "ranges": deque(todo),  # Still to be read
+            "prefetch": deque(),  # (offset, read future)
+            "file": self._chunk_cache.open(file_info["path"]),
+        }
+
+    def _prepare_outgoing(self, peer_sid: str, file_id: int, file_info: Dict, offset: int,
+                          ranges: Optional[List] = None, delta=None, compress: bool = False) -> Dict:
+        """
+        Open a file in the I/O pool. Small files are read and hashed here too,
+        so the event loop only has to frame and send them. With a delta
+        signature from the receiver the file is scanned instead of sent whole.
+        With compress, the entropy of the first block decides whether the
+        file's blocks are zlib-compressed.
+        """
+        out = self._open_outgoing(peer_sid, file_id, file_info, offset, ranges)
+        if delta:
+            try:
+                block_size, sig = delta
+                out["delta"] = DeltaScanner(file_info["path"], parse_signature(sig), int(block_size))
+                out["ranges"].clear()
+                self._log(f"[{peer_sid}] Delta aktarımı: {file_info['name']} (alıcının eski sürümüne göre)")
+                return out
+            except (OSError, ValueError, TypeError) as e:
+                self._log(f"[{peer_sid}] ⚠️ Delta kullanılamadı ({file_info['name']}): {e}")
+        try:
+            if compress and out["ranges"]:
+                sample = self._read_range(out, 0, min(COMPRESS_SAMPLE, out["size"]))
+                out["compress"] = should_compress(out["name"], out["size"], sample)
+        except Exception:
+            self._chunk_cache.release(out["file"])
+            raise
+        if out["size"] - out["offset"] <= WEBRTC_SMALL_FILE_SIZE:
+            try:
+                out["data"] = []
+                for s, e in out["ranges"]:
+                    data = self._read_range(out, s, e - s)
+                    out["data"].append((s, data, self._pack_block(data) if out["compress"] else None))
+                out["ranges"].clear()
+                out["digest"] = self._chunk_cache.digest(out["file"])
+            except Exception:
+                self._chunk_cache.release(out["file"])
+                raise
+        return out
+
+    async def _next_chunk(self, out: Dict, loop):
+        """
+        Return (offset, chunk, packed) for the next piece of a large file,
+        keeping a few block reads (and compressions) queued ahead. packed is
+        the ZDATA payload or None; the chunk is empty when nothing is left.
+        """
+        block = self._chunk_cache.block_size
+        queue = out["prefetch"]
+        todo = out["ranges"]
+        while len(queue) < WEBRTC_PREFETCH_CHUNKS and todo:
+            pos, end = todo[0]
+            length = min(block - pos % block, end - pos)  # Stay within one cache block
+            if out["compress"]:
+                queue.append((pos, asyncio.ensure_future(self._read_packed(out, pos, length, loop))))
+            else:
+                queue.append((pos, loop.run_in_executor(self._io_pool, self._chunk_cache.read, out["file"], pos, length)))
+            if pos + length >= end:
+                todo.popleft()
+            else:
+                todo[0] = (pos + length, end)
+        if not queue:
+            return 0, b"", None
+        pos, future = queue.popleft()
+        chunk, packed = await future if out["compress"] else (await future, None)
+        if not chunk:
+            # The file shrank while sharing: drop the reads queued past its end
+            await asyncio.gather(*(f for _, f in queue), return_exceptions=True)
+            queue.clear()
+            todo.clear()
+        return pos, chunk, packed
+
+    async def _read_packed(self, out: Dict, pos: int, length: int, loop):
+        """Read a block in the I/O pool, then compress it in the compression pool"""
+        chunk = await loop.run_in_executor(self._io_pool, self._chunk_cache.read, out["file"], pos, length)
+        packed = await loop.run_in_executor(compress_pool, self._pack_block, chunk) if chunk else None
+        return chunk, packed
+
+    @staticmethod
+    def _pack_block(data: bytes) -> Optional[bytes]:
+        """ZDATA payload for a block, None if it does not compress well"""
+        packed = compress_block(data)
+        return ZDATA_HEADER.pack(len(data)) + packed if packed is not None else None
+
+    def _read_range(self, out: Dict, pos: int, length: int) -> bytes:
+        """Read up to length bytes at pos from the shared cache (may span blocks)"""
+        parts = []
+        end = pos + length
+        while pos < end:
+            part = self._chunk_cache.read(out["file"], pos, end - pos)
+            if not part:
+                break
+            parts.append(part)
+            pos += len(part)
+        return parts[0] if len(parts) == 1 else b"".join(parts)
+
+    def _account_sent(self, out: Dict, data: bytes, progress: Dict, wire: Optional[int] = None):
+        """Update byte counters after queueing a chunk (wire: payload size if compressed)"""
+        out["sent"] += len(data)
+        out["wire"] += len(data) if wire is None else wire
+        progress["total_sent"] += len(data)
+
+    def _finish_outgoing(self, peer_sid: str, out: Dict, batch: FrameBatch, progress: Dict, digest: str):
+        """Release the file and queue its FILE_END frame (payload: whole-file SHA256 digest)"""
+        self._chunk_cache.release(out["file"])
+        batch.add(FRAME_FILE_END, out["id"], out["size"], bytes.fromhex(digest))
+        progress["files_done"] += 1
+        if out["copied"]:
+            self._log(f"[{peer_sid}] ✅ {out['name']} gönderildi ({out['sent']} bytes, "
+                      f"{out['copied']} bytes alıcının eski kopyasından)")
+        elif out["compress"]:
+            self._log(f"[{peer_sid}] ✅ {out['name']} gönderildi ({out['sent']} bytes, "
+                      f"sıkıştırılmış {out['wire']} bytes)")
+        else:
+            self._log(f"[{peer_sid}] ✅ {out['name']} gönderildi ({out['sent']} bytes)")
+
+    def _report_progress(self, peer_data: Dict, progress: Dict, total_files: int):
+        """Progress callback (throttled to avoid GUI overhead)"""
+        if not self.progress_callback:
+            return
+        now = time.time()
+        elapsed = now - peer_data["last_time"]
+        if elapsed >= 0.5 or peer_data["last_time"] == 0:
+            if peer_data["last_time"] > 0:
+                byte_diff = progress["total_sent"] - peer_data["last_bytes"]
+                peer_data["current_speed"] = byte_diff / elapsed
+            peer_data["last_time"] = now
+            peer_data["last_bytes"] = progress["total_sent"]
+            
+            # Aggregate totals across all peers for UI
+            aggregate_speed = sum(p.get("current_speed", 0) for p in self.peers.values())
+            
+            self.progress_callback(
+                progress["total_sent"], progress["total_size"], aggregate_speed,
+                min(progress["files_done"] + 1, total_files), total_files
+            )
 
     def send_files(self):
         """Deprecated: files are now sent per-peer inside handle_offer -> _send_files_async(peer_sid)"""
@@ -466,12 +1007,39 @@ class WebRTCReceiver:
         self.on_auth_failed: Optional[Callable] = None
         self.password: Optional[str] = None
         self.save_path: Optional[str] = None
+        # >1 stripes file data across several channels (at most WEBRTC_MAX_CHANNELS). They all
+        # share one SCTP association in aiortc, so this has not measured faster on loopback.
+        self.data_channels = WEBRTC_DATA_CHANNELS
+        self.unordered = WEBRTC_UNORDERED  # Unordered, partially reliable data channels + NACK
+        self._stripe_channels = []
+        self._answer_sid: Optional[str] = None  # Signaling: the sender that answered our offer
+        self._trickle_task = None
+        self._direct: Optional[DirectLink] = None  # LAN fast path: file data over direct TCP
+        self._direct_end: Optional[Dict] = None  # transfer_end held until the direct link drains
 
         # Transfer state
         self._file_list: List[Dict] = []
-        self._current_file = None
-        self._current_file_handle = None
-        self._current_hash = None
+        self._files_by_id: Dict[int, Dict] = {}
+        self._incoming: Dict[int, Dict] = {}  # {file_id: {skip, name, size, start, ranges, end}}
+        self._resume_offsets: Dict[str, int] = {}
+        self._resume_ranges: Dict[str, List] = {}  # Verified resume: pieces still needed
+        self._delta_sources: Dict[str, str] = {}  # Delta: {name: old local copy}
+        self._delta_files: Dict[int, str] = {}  # Delta: {file_id: temp path being rebuilt}
+        self._repairs: Dict[int, int] = {}  # Block repair rounds per file
+        self._repairs_pending = 0  # Repairs decided on the writer thread, not yet started
+        self._dedup: Dict[str, Dict] = {}  # Dedup: {name: chunk plan} (cdc.plan_transfer)
+        self._dedup_waiting: Dict[int, Dict] = {}  # {source file_id: {"keys", "items"}} copies waiting for data
+        self._dedup_done = set()  # File ids whose data is all in (copy sources)
+        self._files_ended = 0
+        self._expected_files: Optional[int] = None  # From transfer_end
+        self._transfer_end_queued = False
+        # Disk writes and hashing run on the writer thread, not in the DataChannel callback
+        self._writer = FileWriter(
+            max_buffered=WEBRTC_WRITE_BUFFER,
+            on_complete=self._on_file_written,
+            on_error=lambda file_id, name, e: self._log(f"⚠️ Yazma hatası ({name}): {e}"),
+            on_backpressure=self._on_write_backpressure,
+        )
         self._bytes_received = 0
         self._total_size = 0
         self._files_received = 0
@@ -481,6 +1049,7 @@ class WebRTCReceiver:
         self._connected_event = threading.Event()
         self._transfer_done_event = threading.Event()
         self._file_list_event = threading.Event()
+        self._file_meta_event = threading.Event()  # Block hashes / chunk lists (file_meta) all in
         self._offer_ready = threading.Event()
         self._offer_sdp: Optional[str] = None
         self.on_file_list: Optional[Callable] = None
@@ -507,28 +1076,63 @@ class WebRTCReceiver:
         # Create Offer
         self.status = "connecting"
         self.pc = RTCPeerConnection(configuration=_get_rtc_config())
+        self._answer_sid = None
         
         # Create DataChannel
         self.channel = self.pc.createDataChannel("fileTransfer", ordered=True)
         self._setup_datachannel(self.channel)
+        self._create_stripe_channels()
         
-        # Create Offer
+        # Create Offer (host candidates only when trickling)
         offer = await self.pc.createOffer()
+        trickler = IceTrickler(self.pc) if WEBRTC_TRICKLE_ICE else None
+        if trickler:
+            trickler.defer()
         await self.pc.setLocalDescription(offer)
         
         # Send Offer via Signaling
-        await self.signaling.send_offer(self.pc.localDescription.sdp)
+        await self.signaling.send_offer(trickler.sdp() if trickler else self.pc.localDescription.sdp)
         self._log("Offer sent to signaling server")
+        if trickler:
+            self._trickle_task = asyncio.ensure_future(trickler.run(self.signaling.send_ice))
 
     async def handle_signaling_answer(self, sdp, sender_sid):
         """Handle answer from signaling server"""
+        if self._answer_sid is not None:
+            return
         self._log(f"Answer received from {sender_sid}")
+        self._answer_sid = sender_sid
         answer = RTCSessionDescription(sdp=sdp, type="answer")
         await self.pc.setRemoteDescription(answer)
         self._log("Remote description set (Answer)")
 
     async def handle_signaling_ice(self, candidate, sender_sid):
-        pass
+        """Handle a trickled ICE candidate from the answering sender"""
+        # Candidates of other receivers in the room are broadcast too
+        if self.pc is None or sender_sid != self._answer_sid:
+            return
+        try:
+            await self.pc.addIceCandidate(decode_candidate(candidate))
+        except Exception as e:
+            self._log(f"ICE adayı eklenemedi: {e}")
+
+    def _create_stripe_channels(self):
+        """
+        Extra data-only channels (fileTransfer-1..N-1) the sender stripes chunks across.
+
+        In unordered mode they are unordered and partially reliable; the control
+        channel stays ordered/reliable and lost ranges are re-requested (NACK).
+        """
+        self._stripe_channels = []
+        count = min(max(2, self.data_channels) if self.unordered else self.data_channels, WEBRTC_MAX_CHANNELS)
+        for i in range(1, max(1, count)):
+            if self.unordered:
+                stripe = self.pc.createDataChannel(f"fileTransfer-{i}", ordered=False,
+                                                   maxRetransmits=WEBRTC_MAX_RETRANSMITS)
+            else:
+                stripe = self.pc.createDataChannel(f"fileTransfer-{i}", ordered=True)
+            stripe.on("message", self._handle_message)
+            self._stripe_channels.append(stripe)
 
     def _setup_datachannel(self, channel):
         @channel.on("open")
@@ -536,7 +1140,10 @@ class WebRTCReceiver:
             self._log("DataChannel AÇIK! (Signaling)")
             self.status = "connected"
             self._connected_event.set()
-            channel.send(json.dumps({"type": "ready"}))
+            if self.password:
+                channel.send(json.dumps({"type": "auth", "password": self.password}))
+            else:
+                channel.send(json.dumps({"type": "ready"}))
 
         @channel.on("message")
         def on_message(message):
@@ -567,11 +1174,8 @@ class WebRTCReceiver:
             
         self._stopped = True
         self._pause_event.set() # Unpause any waiting loops
-        if self._current_file_handle:
-            try:
-                self._current_file_handle.close()
-            except:
-                pass
+        self._writer.close()
+        self._incoming.clear()
                 
         async def _shutdown():
             if self.pc:
@@ -619,22 +1223,106 @@ class WebRTCReceiver:
         if self.channel and self.channel.readyState == "open" and self._loop and self._loop.is_running():
             try:
                 offsets = {}
+                ranges = {}
+                deltas = {}
+                sources = {}
                 save_dir = self.save_path or "."
+                by_name = {f["name"]: f for f in self._file_list}
+                # Verified resume and delta need the block hashes of files we already have
+                if (not self._file_meta_event.is_set()
+                        and any(os.path.exists(os.path.join(save_dir, name)) for name in filenames)):
+                    self._log("Blok hash'leri bekleniyor...")
+                    self._file_meta_event.wait(WEBRTC_META_TIMEOUT)
                 for name in filenames:
                     target_path = os.path.join(save_dir, name)
                     if os.path.exists(target_path):
                         offsets[name] = os.path.getsize(target_path)
+                        info = by_name.get(name)
+                        if info and valid_blocks(info) and is_safe_path(save_dir, target_path):
+                            # Check the existing blocks; only missing or corrupt ones are requested.
+                            # The delta signature of an older version comes out of the same read.
+                            missing, sig = check_local(target_path, info["size"], info["block_size"], info["blocks"])
+                            if sig is not None:
+                                # An older version, not a partial download: send its signature instead
+                                del offsets[name]
+                                deltas[name] = self._send_signature(info, sig)
+                                sources[name] = target_path
+                                continue
+                            ranges[name] = [list(r) for r in missing]
+                            # Senders without range support resume from the first bad block
+                            offsets[name] = ranges[name][0][0] if ranges[name] else info["size"]
+
+                # Fresh files: each unique chunk once, repeats are copied locally
+                plans = self._plan_dedup(filenames)
+                for name, plan in plans.items():
+                    ranges[name] = [list(r) for r in plan["fetch"]]
                 
+                self._resume_offsets = offsets
+                self._resume_ranges = ranges
+                self._delta_sources = sources
+                self._delta_files = {}
+                self._repairs = {}
+                self._dedup = plans
+                self._dedup_waiting = {}
+                self._dedup_done = set()
                 msg = {
                     "type": "DOWNLOAD_REQUEST",
                     "files": filenames,
-                    "offsets": offsets
+                    "offsets": offsets,
+                    "ranges": ranges,
+                    "delta": deltas,
+                    "compression": ["zlib"] if COMPRESSION else [],
+                    "channels": 1 + len(self._stripe_channels),
+                    "direct": self._direct is not None and not self._direct.closed
                 }
                 self._loop.call_soon_threadsafe(self.channel.send, json.dumps(msg))
                 self._log(f"İndirme isteği gönderildi: {len(filenames)} dosya (Resume: {len(offsets)} dosya)")
             except Exception as e:
                 self._log(f"İstek gönderilemedi: {e}")
 
+    def _plan_dedup(self, filenames: list) -> Dict[str, Dict]:
+        """
+        Chunk plan for files we do not have yet: chunks already in the save
+        directory or repeated earlier in this transfer are copied instead of
+        requested. Files are planned in file-list order, the order they are sent in.
+        """
+        if not DEDUP_TRANSFER:
+            return {}
+        save_dir = self.save_path or "."
+        wanted = set(filenames) if filenames else {f["name"] for f in self._file_list}
+        files = []
+        for f in self._file_list:
+            target_path = os.path.join(save_dir, f["name"])
+            if (f["name"] in wanted and "chunks" in f and not os.path.exists(target_path)
+                    and is_safe_path(save_dir, target_path)):
+                files.append(f)
+        if not files:
+            return {}
+        index = ChunkIndex()
+        # Requested files that exist locally are being resumed or rebuilt: not a stable source
+        index.scan(save_dir, exclude=[os.path.join(save_dir, name) for name in wanted])
+        plans = plan_transfer(files, index)
+        ids = {f["name"]: file_id for file_id, f in self._files_by_id.items()}
+        for plan in plans.values():
+            plan["dup"] = [(offset, length, ids[src], src_offset) for offset, length, src, src_offset in plan["dup"]]
+        if plans:
+            saved = sum(plan["saved"] for plan in plans.values())
+            self._log(f"Tekrar eden parçalar: {len(plans)} dosyada {saved} bytes yerelde kopyalanacak")
+        return plans
+
+    def _send_signature(self, info: Dict, sig: bytes) -> Dict:
+        """
+        Queue the delta signature of our old copy (see delta.check_local) as
+        binary frames on the control channel (ahead of DOWNLOAD_REQUEST, which
+        it must precede).
+        """
+        block_size = block_size_for(info["size"])
+        for pos in range(0, len(sig), WEBRTC_CHUNK_SIZE):
+            frame = encode_frame(FRAME_SIGNATURE, info["id"], pos, sig[pos:pos + WEBRTC_CHUNK_SIZE])
+            self._loop.call_soon_threadsafe(self.channel.send, frame)
+        self._log(f"Delta imzası gönderildi: {info['name']} ({len(sig)} bytes)")
+        return {"block_size": block_size, "size": len(sig)}
+
     async def create_offer(self) -> dict:
         """
         SDP offer oluştur ve döndür.
@@ -646,6 +1334,7 @@ class WebRTCReceiver:
 
         # Create DataChannel
         self.channel = self.pc.createDataChannel("fileTransfer", ordered=True)
+        self._create_stripe_channels()
 
         @self.channel.on("open")
         def on_open():
@@ -748,98 +1437,471 @@ class WebRTCReceiver:
 
                 if msg_type == "file_list":
                     self._file_list = data["files"]
+                    self._files_by_id = {f.get("id", i): f for i, f in enumerate(self._file_list)}
                     self._total_size = data["total_size"]
                     self._total_files = len(self._file_list)
                     self._log(f"Dosya listesi alındı: {self._total_files} dosya, toplam {self._total_size} bytes")
-                    self._file_list_event.set()
-                    if self.on_file_list:
-                        self.on_file_list(self._file_list)
-
-                elif msg_type == "file_start":
-                    name = data["name"]
-                    size = data["size"]
-                    index = data["index"]
-                    total = data["total"]
-                    offset = data.get("offset", 0)
-                    
-                    # Security Check
-                    target_path = os.path.join(self.save_path or ".", name)
-                    if not is_safe_path(self.save_path or ".", target_path):
-                        self._log(f"⚠️ GÜVENLİK UYARISI: Geçersiz dosya yolu '{name}'. Atlanıyor.")
-                        self._current_file = None # Reset current file state
-                        self._current_file_handle = None
-                        self._current_hash = None
-                        return
-
-                    os.makedirs(os.path.dirname(target_path) if os.path.dirname(target_path) else ".", exist_ok=True)
-                    
-                    if offset > 0 and os.path.exists(target_path):
-                        self._current_file_handle = open(target_path, "ab")
-                        self._bytes_received += offset # Ensure overall progress includes what we already have
-                        self._log(f"Devam ediliyor: {name} ({offset} bytes atlandı)")
+                    # Newer senders follow up with file_meta; older ones put it in the list
+                    if data.get("meta"):
+                        self._file_meta_event.clear()
                     else:
-                        self._current_file_handle = open(target_path, "wb")
-                        self._log(f"Alınıyor: {name} ({index+1}/{total})")
-                        
-                    self._current_file = {"name": name, "size": size} # Keep this for progress tracking
-                    self._current_hash = hashlib.sha256()
-
-                elif msg_type == "file_end":
-                    if self._current_file_handle:
-                        self._current_file_handle.close()
-                        self._current_file_handle = None
-                    
-                    # Verify hash
-                    expected_hash = data.get("hash", "")
-                    actual_hash = self._current_hash.hexdigest() if self._current_hash else ""
-                    
-                    if expected_hash and expected_hash == actual_hash:
-                        self._log(f"✅ {data['name']} alındı (hash OK)")
-                    elif expected_hash:
-                        self._log(f"⚠️ {data['name']} alındı (hash UYUMSUZ!)")
+                        self._file_meta_event.set()
+                    if data.get("direct") and WEBRTC_DIRECT_TRANSFER and self._direct is None:
+                        # The list is announced once the direct link is up or has failed
+                        asyncio.ensure_future(self._open_direct(data["direct"]))
                     else:
-                        self._log(f"✅ {data['name']} alındı")
-                    
-                    self._files_received += 1
-                    self._current_file = None
-                    self._current_hash = None
+                        self._file_list_ready()
+
+                elif msg_type == "file_meta":
+                    for meta in data.get("files", []):
+                        info = self._files_by_id.get(meta.get("id")) if isinstance(meta, dict) else None
+                        if info is not None:
+                            info.update({k: v for k, v in meta.items() if k in ("block_size", "blocks", "root", "chunks")})
+                    if data.get("done"):
+                        self._file_meta_event.set()
 
                 elif msg_type == "transfer_end":
-                    self._log(f"Transfer tamamlandı! {self._files_received} dosya alındı.")
-                    self.status = "done"
-                    self._transfer_done_event.set()
+                    if self._direct is not None:
+                        # Frames on the direct link may still be in flight; it ends right before transfer_end
+                        self._direct_end = data
+                    else:
+                        self._on_transfer_end(data)
 
             except json.JSONDecodeError:
                 pass
 
         elif isinstance(message, bytes):
-            # Binary chunk data
-            if self._current_file_handle:
-                self._current_file_handle.write(message)
-                if self._current_hash:
-                    self._current_hash.update(message)
-                
-                self._bytes_received += len(message)
-
-                # Progress callback with speed
-                if self.progress_callback:
-                    now = time.time()
-                    elapsed = now - self._speed_last_time
-                    if elapsed >= 0.3:
-                        byte_diff = self._bytes_received - self._speed_last_bytes
-                        self._current_speed = byte_diff / elapsed
-                        self._speed_last_time = now
-                        self._speed_last_bytes = self._bytes_received
-                    elif self._speed_last_time == 0:
-                        self._speed_last_time = now
-                        self._speed_last_bytes = self._bytes_received
-                    self.progress_callback(
-                        self._bytes_received,
-                        self._total_size,
-                        self._current_speed,
-                        self._files_received + 1,
-                        self._total_files
-                    )
+            # Binary frames (file data / file end)
+            self._handle_frames(message)
+
+    def _file_list_ready(self):
+        self._file_list_event.set()
+        if self.on_file_list:
+            self.on_file_list(self._file_list)
+
+    def _on_transfer_end(self, data: Dict):
+        # Striped data may still be in flight on other channels
+        self._expected_files = data.get("files", self._files_ended)
+        # Copy sources that were never sent: their dependants fall back to NACK
+        for src_id in [s for s in self._dedup_waiting if s not in self._incoming]:
+            self._drop_copies(src_id)
+        self._check_transfer_end()
+
+    async def _open_direct(self, offer: Dict):
+        """LAN fast path: connect to the sender's direct TCP endpoint, falling back to the DataChannel"""
+        try:
+            host = lan_address(self.pc) if self.pc else None
+            if host is not None:
+                self._direct = await direct_connect(host, offer)
+                self._log(f"⚡ Aynı ağ: doğrudan TCP bağlantısı kuruldu ({host})")
+                asyncio.ensure_future(self._read_direct(self._direct))
+        except (OSError, ConnectionError, asyncio.TimeoutError, ValueError, KeyError) as e:
+            self._log(f"Doğrudan bağlantı kurulamadı, DataChannel kullanılacak: {e}")
+        finally:
+            self._file_list_ready()
+
+    async def _read_direct(self, link: DirectLink):
+        """Feed frames from the direct link into the same path as DataChannel messages"""
+        try:
+            async for message in link.messages():
+                self._handle_frames(message)
+        except (OSError, ConnectionError, EOFError) as e:
+            self._log(f"⚠️ Doğrudan bağlantı koptu: {e}")
+        finally:
+            await link.close()
+            if self._direct is link:
+                self._direct = None
+            end, self._direct_end = self._direct_end, None
+            if end is not None and not self._stopped:
+                self._on_transfer_end(end)
+
+    def _handle_frames(self, message: bytes):
+        """Handle a binary DataChannel message (one or more frames)"""
+        try:
+            for frame_type, _stream_id, file_id, offset, payload in iter_frames(message):
+                if frame_type == FRAME_DATA:
+                    self._write_chunk(file_id, offset, payload)
+                elif frame_type == FRAME_ZDATA:
+                    self._write_chunk(file_id, offset, payload, compressed=True)
+                elif frame_type == FRAME_COPY:
+                    self._copy_chunk(file_id, offset, payload)
+                elif frame_type == FRAME_FILE_END:
+                    self._finish_file(file_id, offset, bytes(payload))
+        except ProtocolError as e:
+            self._log(f"⚠️ Bozuk frame atlandı: {e}")
+
+        # Progress callback with speed
+        if self.progress_callback:
+            now = time.time()
+            elapsed = now - self._speed_last_time
+            if elapsed >= 0.3:
+                byte_diff = self._bytes_received - self._speed_last_bytes
+                self._current_speed = byte_diff / elapsed
+                self._speed_last_time = now
+                self._speed_last_bytes = self._bytes_received
+            elif self._speed_last_time == 0:
+                self._speed_last_time = now
+                self._speed_last_bytes = self._bytes_received
+            self.progress_callback(
+                self._bytes_received,
+                self._total_size,
+                self._current_speed,
+                min(self._files_received + 1, self._total_files),
+                self._total_files
+            )
+
+    def _open_incoming(self, file_id: int) -> Dict:
+        """
+        Open the target file on the first frame of a file.
+
+        Frames may arrive out of order (striped channels), so the start
+        offset is the resume offset we requested, not the first frame's.
+        """
+        incoming = self._incoming.get(file_id)
+        if incoming is not None:
+            return incoming
+
+        incoming = {"skip": True}
+        self._incoming[file_id] = incoming
+        info = self._files_by_id.get(file_id)
+        if info is None:
+            self._log(f"⚠️ Bilinmeyen dosya id'si: {file_id}. Atlanıyor.")
+            return incoming
+
+        name = info["name"]
+        # Security Check
+        target_path = os.path.join(self.save_path or ".", name)
+        if not is_safe_path(self.save_path or ".", target_path):
+            self._log(f"⚠️ GÜVENLİK UYARISI: Geçersiz dosya yolu '{name}'. Atlanıyor.")
+            return incoming
+
+        received = RangeSet()  # Received byte ranges (gap detection / duplicates)
+        start = self._resume_offsets.get(name, 0)
+        if start > info["size"]:
+            start = 0  # Sender restarts invalid offsets from 0
+        needed = self._resume_ranges.get(name)
+        source = self._delta_sources.get(name)
+        plan = self._dedup.get(name)
+        if source and os.path.exists(source):
+            # Delta: rebuild next to the old copy, which COPY frames read from
+            temp_path = target_path + DELTA_SUFFIX
+            self._delta_files[file_id] = temp_path
+            self._log(f"Delta ile alınıyor: {name} ({self._files_received + 1}/{self._total_files})")
+            self._writer.open(file_id, temp_path, name, 0, source=source, final_path=target_path)
+            start, write_from = 0, None
+        elif plan is not None:
+            # Dedup: only the fetch ranges come over the network, repeats are copied below
+            self._log(f"Alınıyor: {name} ({self._files_received + 1}/{self._total_files}, "
+                      f"{plan['saved']} bytes yerelde kopyalanıyor)")
+            start = write_from = 0
+        elif needed is not None and os.path.exists(target_path):
+            # Verified resume: blocks outside the requested ranges are already good
+            self._mark_received(received, info["size"], needed)
+            kept = info["size"] - sum(e - s for s, e in needed)
+            self._bytes_received += kept
+            self._log(f"Devam ediliyor: {name} ({kept} bytes doğrulandı, {len(needed)} aralık isteniyor)")
+            start, write_from = 0, (needed[0][0] if needed else info["size"])
+        elif start > 0 and os.path.exists(target_path):
+            self._bytes_received += start  # Ensure overall progress includes what we already have
+            self._log(f"Devam ediliyor: {name} ({start} bytes atlandı)")
+            write_from = start
+        else:
+            start = write_from = 0
+            self._log(f"Alınıyor: {name} ({self._files_received + 1}/{self._total_files})")
+
+        if write_from is not None:
+            self._writer.open(file_id, target_path, name, write_from)
+        incoming.update({
+            "skip": False,
+            "name": name,
+            "size": info["size"],
+            "start": start,
+            "ranges": received,
+            "end": None,
+            "nacks": 0,
+            "waiting": 0,  # Repeated chunks waiting for their first copy to arrive
+            "last_data": time.monotonic(),
+        })
+        if plan is not None:
+            self._queue_copies(file_id, incoming, plan)
+        return incoming
+
+    def _queue_copies(self, file_id: int, incoming: Dict, plan: Dict):
+        """Copy a file's repeated chunks: local ones now, in-transfer ones once their first copy is in"""
+        for offset, length, path, src_offset in plan["local"]:
+            self._copy_repeat(file_id, incoming, offset, length, path, src_offset)
+        for offset, length, src_id, src_offset in plan["dup"]:
+            src = self._incoming.get(src_id)
+            if src_id in self._dedup_done or (src is not None and not src["skip"]
+                                              and src["ranges"].contains(src_offset, src_offset + length)):
+                self._copy_repeat(file_id, incoming, offset, length, self._target_path(src_id), src_offset)
+                continue
+            if src is not None and src["skip"]:
+                continue  # Source will not be written: left to NACK
+            waiting = self._dedup_waiting.setdefault(src_id, {"keys": [], "items": {}})
+            if src_offset not in waiting["items"]:
+                bisect.insort(waiting["keys"], src_offset)
+            waiting["items"].setdefault(src_offset, []).append((length, file_id, offset))
+            incoming["waiting"] += 1
+
+    def _copy_repeat(self, file_id: int, incoming: Dict, offset: int, length: int, path: str, src_offset: int):
+        """Queue a repeated chunk copy from a file that already holds it"""
+        end = offset + length
+        if incoming["ranges"].contains(offset, end):
+            return  # Already arrived (sender without range support)
+        self._writer.copy(file_id, offset, src_offset, length, source=path)
+        self._bytes_received += length
+        incoming["ranges"].add(offset, end)
+        self._maybe_finish(file_id, incoming)
+
+    def _release_copies(self, src_id: int, received: RangeSet, start: int, end: int):
+        """Data for [start, end) of a copy source arrived: queue the copies whose chunk is now complete"""
+        waiting = self._dedup_waiting.get(src_id)
+        if not waiting:
+            return
+        keys = waiting["keys"]
+        lo = bisect.bisect_left(keys, start - CDC_MAX_CHUNK)  # Chunks are never longer than this
+        hi = bisect.bisect_left(keys, end)
+        for key in keys[lo:hi]:
+            items = waiting["items"][key]
+            if not received.contains(key, key + items[0][0]):
+                continue
+            del waiting["items"][key]
+            keys.remove(key)
+            for length, file_id, offset in items:
+                target = self._incoming.get(file_id)
+                if target is not None:
+                    target["waiting"] -= 1
+                    self._copy_repeat(file_id, target, offset, length, self._target_path(src_id), key)
+        if not keys:
+            del self._dedup_waiting[src_id]
+
+    def _drop_copies(self, src_id: int):
+        """A copy source will never arrive: its dependants request those chunks themselves (NACK)"""
+        waiting = self._dedup_waiting.pop(src_id, None)
+        if not waiting:
+            return
+        for items in waiting["items"].values():
+            for _length, file_id, _offset in items:
+                target = self._incoming.get(file_id)
+                if target is not None:
+                    target["waiting"] -= 1
+
+    def _target_path(self, file_id: int) -> str:
+        return os.path.join(self.save_path or ".", self._files_by_id[file_id]["name"])
+
+    @staticmethod
+    def _mark_received(received: RangeSet, size: int, needed: List):
+        """Mark everything in [0, size) outside the needed ranges as received"""
+        pos = 0
+        for s, e in sorted(needed):
+            received.add(pos, s)
+            pos = max(pos, e)
+        received.add(pos, size)
+
+    def _write_chunk(self, file_id: int, offset: int, payload: memoryview, compressed: bool = False):
+        """Queue a DATA frame (or a ZDATA frame, inflated on the writer thread) for the writer thread"""
+        incoming = self._open_incoming(file_id)
+        if incoming["skip"]:
+            return
+        if compressed:
+            if len(payload) < ZDATA_HEADER.size:
+                raise ProtocolError("Invalid ZDATA payload")
+            length = ZDATA_HEADER.unpack_from(payload)[0]
+        else:
+            length = len(payload)
+        end = offset + length
+        if incoming["ranges"].contains(offset, end):
+            return  # Duplicate (late original after a NACK re-send)
+        if compressed:
+            self._writer.write_compressed(file_id, offset, payload[ZDATA_HEADER.size:], length)
+        else:
+            self._writer.write(file_id, offset, payload)
+        self._bytes_received += length
+        incoming["ranges"].add(offset, end)
+        incoming["last_data"] = time.monotonic()
+        if file_id in self._dedup_waiting:
+            self._release_copies(file_id, incoming["ranges"], offset, end)
+        self._maybe_finish(file_id, incoming)
+
+    def _copy_chunk(self, file_id: int, offset: int, payload: memoryview):
+        """Queue a COPY frame (delta): the data comes from our old copy of the file"""
+        incoming = self._open_incoming(file_id)
+        if incoming["skip"]:
+            return
+        if len(payload) != COPY_PAYLOAD.size:
+            raise ProtocolError("Invalid COPY payload")
+        src_offset, length = COPY_PAYLOAD.unpack(payload)
+        end = offset + length
+        if incoming["ranges"].contains(offset, end):
+            return
+        self._writer.copy(file_id, offset, src_offset, length)
+        self._bytes_received += length
+        incoming["ranges"].add(offset, end)
+        incoming["last_data"] = time.monotonic()
+        self._maybe_finish(file_id, incoming)
+
+    def _finish_file(self, file_id: int, size: int, digest: bytes):
+        """Handle a FILE_END frame (the file completes once all its data has arrived)"""
+        incoming = self._open_incoming(file_id)
+        if incoming["skip"]:
+            self._drop_copies(file_id)
+            if not incoming.get("ended"):
+                incoming["ended"] = True  # Entry stays to swallow late striped frames
+                self._files_received += 1
+                self._files_ended += 1
+                self._check_transfer_end()
+            return
+        incoming["size"] = size
+        incoming["end"] = digest.hex() if digest else ""
+        if not self._maybe_finish(file_id, incoming) and self._loop:
+            # Data may still be in flight on other channels; re-request what is still missing later
+            self._loop.call_later(WEBRTC_NACK_DELAY, self._check_gaps, file_id)
+
+    def _on_write_backpressure(self, paused: bool):
+        """
+        FileWriter callback (writer lock held, any thread): ask the sender to
+        hold data while the disk is behind instead of blocking the loop.
+        """
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._send_write_flow, paused)
+
+    def _send_write_flow(self, paused: bool):
+        if self.channel and self.channel.readyState == "open":
+            self.channel.send(json.dumps({"type": "WRITE_PAUSE" if paused else "WRITE_RESUME"}))
+
+    def _check_gaps(self, file_id: int):
+        """Send a NACK for ranges still missing after FILE_END"""
+        incoming = self._incoming.get(file_id)
+        if (incoming is None or incoming["skip"] or self._stopped
+                or not self.channel or self.channel.readyState != "open"):
+            return
+        idle = time.monotonic() - incoming["last_data"]
+        if idle < WEBRTC_NACK_DELAY:
+            # Data for this file is still arriving
+            self._loop.call_later(WEBRTC_NACK_DELAY - idle, self._check_gaps, file_id)
+            return
+        if incoming.get("waiting"):
+            # Repeated chunks are copied once their first copy (another file) is in
+            self._loop.call_later(WEBRTC_NACK_DELAY, self._check_gaps, file_id)
+            return
+        gaps = incoming["ranges"].missing(incoming["start"], incoming["size"])
+        if not gaps:
+            return
+        incoming["nacks"] += 1
+        if incoming["nacks"] > WEBRTC_NACK_RETRIES:
+            self._log(f"❌ {incoming['name']}: eksik veri tamamlanamadı ({len(gaps)} aralık)")
+            self._give_up(file_id)
+            return
+        self.channel.send(json.dumps({
+            "type": "NACK",
+            "file_id": file_id,
+            "ranges": [list(gap) for gap in gaps[:256]]
+        }))
+        self._log(f"🔁 {incoming['name']}: {len(gaps)} eksik aralık yeniden istendi")
+        # Back off while the re-sent data arrives
+        self._loop.call_later(WEBRTC_NACK_DELAY * min(2 ** incoming["nacks"], 8), self._check_gaps, file_id)
+
+    def _give_up(self, file_id: int):
+        """The sender did not fill the gaps: end the file as failed so the transfer can finish"""
+        # Entry stays to swallow late re-sent frames
+        self._incoming[file_id] = {"skip": True, "ended": True}
+        self._drop_copies(file_id)
+        self._writer.abort(file_id)  # Logged and counted by _on_file_written
+        self._files_ended += 1
+        self._check_transfer_end()
+
+    def _maybe_finish(self, file_id: int, incoming: Dict) -> bool:
+        """Hand the file to the writer for close/verify once FILE_END and all data are in"""
+        if incoming["end"] is None or not incoming["ranges"].contains(incoming["start"], incoming["size"]):
+            return False
+        del self._incoming[file_id]
+        self._dedup_done.add(file_id)
+        self._writer.finish(file_id, incoming["size"], incoming["end"])
+        self._files_ended += 1
+        self._check_transfer_end()
+        return True
+
+    def _check_transfer_end(self):
+        """After transfer_end and every announced file, wait for the writer to flush"""
+        if (self._expected_files is not None and not self._transfer_end_queued
+                and self._files_ended >= self._expected_files):
+            self._transfer_end_queued = True
+            # Done once the writer has flushed and verified every file
+            self._writer.barrier(self._on_transfer_written)
+
+    def _on_file_written(self, file_id: int, name: str, expected_hash: str, actual_hash: Optional[str]):
+        """Writer thread callback: a file has been flushed, closed and hashed"""
+        if actual_hash and expected_hash and expected_hash != actual_hash and self._plan_repair(file_id, expected_hash):
+            return
+        self._files_received += 1
+        if actual_hash is None:
+            self._log(f"❌ {name} yazılamadı")
+        elif expected_hash and expected_hash == actual_hash:
+            self._log(f"✅ {name} alındı (hash OK)")
+        elif expected_hash:
+            self._log(f"⚠️ {name} alındı (hash UYUMSUZ!)")
+        else:
+            self._log(f"✅ {name} alındı")
+
+    def _plan_repair(self, file_id: int, expected_hash: str) -> bool:
+        """
+        Writer thread: on a hash mismatch, find the corrupt blocks and ask for
+        just those again. Returns False when the file cannot be repaired.
+        """
+        info = self._files_by_id.get(file_id)
+        rounds = self._repairs.get(file_id, 0)
+        if not info or not valid_blocks(info) or rounds >= WEBRTC_REPAIR_RETRIES or not self._loop:
+            return False
+        path = self._delta_files.get(file_id) or os.path.join(self.save_path or ".", info["name"])
+        bad = missing_ranges(path, info["size"], info["block_size"], info["blocks"])
+        if not bad:
+            return False
+        self._repairs[file_id] = rounds + 1
+        self._repairs_pending += 1  # Holds back the transfer_end barrier until the repair starts
+        self._loop.call_soon_threadsafe(self._start_repair, file_id, path, bad, expected_hash)
+        return True
+
+    def _start_repair(self, file_id: int, path: str, bad: List, expected_hash: str):
+        """Re-open a file whose hash did not match and NACK its corrupt blocks"""
+        self._repairs_pending -= 1
+        info = self._files_by_id[file_id]
+        name = info["name"]
+        # The file counts as ended again only once the repaired blocks are in
+        self._files_ended -= 1
+        self._transfer_end_queued = False
+        received = RangeSet()
+        self._mark_received(received, info["size"], bad)
+        self._bytes_received -= sum(e - s for s, e in bad)
+        final_path = os.path.join(self.save_path or ".", name) if file_id in self._delta_files else None
+        self._writer.open(file_id, path, name, bad[0][0], final_path=final_path)
+        self._incoming[file_id] = {
+            "skip": False,
+            "name": name,
+            "size": info["size"],
+            "start": 0,
+            "ranges": received,
+            "end": expected_hash,
+            "nacks": 0,
+            "last_data": time.monotonic(),
+        }
+        self._log(f"🔧 {name}: hash uyuşmadı, {len(bad)} bozuk aralık yeniden isteniyor")
+        if self.channel and self.channel.readyState == "open":
+            self.channel.send(json.dumps({
+                "type": "NACK",
+                "file_id": file_id,
+                "ranges": [list(r) for r in bad[:256]]
+            }))
+        self._loop.call_later(WEBRTC_NACK_DELAY, self._check_gaps, file_id)
+
+    def _on_transfer_written(self):
+        """Writer thread callback: everything before transfer_end is on disk"""
+        if self._repairs_pending or (self._expected_files is not None
+                                     and self._files_ended < self._expected_files):
+            return  # A repair reopened a file; a new barrier follows once it completes
+        self._log(f"Transfer tamamlandı! {self._files_received} dosya alındı.")
+        self.status = "done"
+        self._transfer_done_event.set()
 
     def wait_for_connection(self, timeout=30) -> bool:
         """Block until P2P connection is established"""
@@ -851,14 +1913,31 @@ class WebRTCReceiver:
 
 
 import uuid
-import requests
+import aiohttp
 
 class SignalingClient:
     """
-    HTTP Polling based Signaling Client for P2P connection
+    Signaling client for the P2P handshake (room join + offer/answer/ICE relay)
+
+    All signaling I/O goes through one pooled aiohttp session, so the join,
+    the long-polls and every offer/answer/ICE message reuse the same
+    keep-alive connections instead of a fresh TCP+TLS handshake each.
+
+    Transports (SIGNALING_TRANSPORT):
+        websocket  {server}/ws — messages are pushed as soon as they arrive.
+                   Client sends {"type": "join", "room", "sid"} and gets
+                   {"type": "joined", "peers"}; signals use the /signal body,
+                   incoming messages look like /poll's "messages" entries.
+        http       POST /join, GET /poll (long-poll), POST /signal
+        auto       WebSocket first, HTTP long-polling if the server has no /ws
     """
-    def __init__(self, loop, server_url=SIGNALING_SERVER_URL):
-        self.server_url = server_url
+
+    # Servers that rejected the WebSocket upgrade (auto mode goes straight to HTTP)
+    _ws_unsupported = set()
+
+    def __init__(self, loop, server_url=SIGNALING_SERVER_URL, transport=SIGNALING_TRANSPORT):
+        self.server_url = server_url.rstrip("/")
+        self.transport = transport
         self.room_id = None
         self.sid = str(uuid.uuid4())
         self._loop = loop
@@ -866,55 +1945,116 @@ class SignalingClient:
         self.on_offer = None
         self.on_answer = None
         self.on_ice = None
+        self._session = None
+        self._ws = None
         self._polling_task = None
+        self._ws_task = None
         self._is_closing = False
-        import aiohttp # Ensure it's available for the async loop
-        self.aiohttp = aiohttp
+
+    def _get_session(self):
+        """Shared session, created on the peer's loop on first use"""
+        if self._session is None or self._session.closed:
+            # ThreadedResolver avoids aiodns/pycares DNS failures on Windows
+            connector = aiohttp.TCPConnector(resolver=aiohttp.resolver.ThreadedResolver(),
+                                             limit=SIGNALING_POOL_SIZE)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def _ws_url(self):
+        if self.server_url.startswith("https://"):
+            return "wss://" + self.server_url[len("https://"):] + "/ws"
+        if self.server_url.startswith("http://"):
+            return "ws://" + self.server_url[len("http://"):] + "/ws"
+        return self.server_url + "/ws"
 
     async def connect(self, room_id):
         self.room_id = room_id
         self._is_closing = False
-        
-        def _connect():
+
+        use_ws = self.transport == "websocket" or (
+            self.transport == "auto" and self.server_url not in self._ws_unsupported)
+        if use_ws:
             try:
-                # Increase timeout to 60 to allow Render free tier servers to wake up
-                resp = requests.post(f"{self.server_url}/join", json={'room': self.room_id, 'sid': self.sid}, timeout=60)
+                await self._connect_ws()
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, TypeError) as e:
+                if self.transport == "websocket":
+                    raise RuntimeError(f"WebSocket signaling failed: {e}")
+                if isinstance(e, aiohttp.WSServerHandshakeError):
+                    self._ws_unsupported.add(self.server_url)
+                print(f"[Signaling] WebSocket unavailable, using HTTP polling: {e}")
+                await self._close_ws()
+
+        if self._ws is None:
+            await self._join_http()
+            self._polling_task = self._loop.create_task(self._poll_loop())
+            print(f"[Signaling] Joined Room (HTTP): {self.room_id} as {self.sid}")
+        else:
+            print(f"[Signaling] Joined Room (WebSocket): {self.room_id} as {self.sid}")
+
+    async def _join_http(self):
+        try:
+            # Long timeout lets free-tier servers (Render) wake up
+            async with self._get_session().post(
+                    f"{self.server_url}/join", json={'room': self.room_id, 'sid': self.sid},
+                    timeout=aiohttp.ClientTimeout(total=SIGNALING_JOIN_TIMEOUT)) as resp:
                 resp.raise_for_status()
-                data = resp.json()
-                
-                if 'peers' in data and data['peers']:
-                     # We can trigger peer_joined for existing peers if we want
-                     pass
-            except Exception as e:
-                raise RuntimeError(f"HTTP Signaling Join failed: {e}")
-                
-        # Run blocking join in executor
-        await self._loop.run_in_executor(None, _connect)
-        print(f"[Signaling] Joined Room (HTTP): {self.room_id} as {self.sid}")
-        
-        # Start async polling loop
+                await resp.json()
+        except Exception as e:
+            raise RuntimeError(f"HTTP Signaling Join failed: {e}")
+
+    async def _connect_ws(self):
+        self._ws = await asyncio.wait_for(
+            self._get_session().ws_connect(self._ws_url(), heartbeat=SIGNALING_WS_HEARTBEAT),
+            SIGNALING_JOIN_TIMEOUT)
+        await self._ws.send_json({'type': 'join', 'room': self.room_id, 'sid': self.sid})
+        reply = await asyncio.wait_for(self._ws.receive_json(), SIGNALING_JOIN_TIMEOUT)
+        if reply.get('type') != 'joined':
+            raise ValueError(f"Unexpected join reply: {reply.get('type')}")
+        self._ws_task = self._loop.create_task(self._ws_loop())
+
+    async def _ws_loop(self):
+        ws = self._ws
+        try:
+            async for msg in ws:
+                if msg.type == aiohttp.WSMsgType.TEXT:
+                    try:
+                        await self._handle_message(json.loads(msg.data))
+                    except json.JSONDecodeError:
+                        continue
+                elif msg.type == aiohttp.WSMsgType.ERROR:
+                    break
+        except asyncio.CancelledError:
+            return
+        if self._is_closing:
+            return
+        # Connection dropped: keep the room alive over HTTP long-polling
+        print("[Signaling] WebSocket closed, falling back to HTTP polling")
+        self._ws = None
+        try:
+            await self._join_http()
+        except RuntimeError as e:
+            print(f"[Signaling] {e}")
+            return
         self._polling_task = self._loop.create_task(self._poll_loop())
 
     async def _poll_loop(self):
-        # Use ThreadedResolver to avoid aiodns/pycares DNS failures on Windows
-        resolver = self.aiohttp.resolver.ThreadedResolver()
-        connector = self.aiohttp.TCPConnector(resolver=resolver)
-        async with self.aiohttp.ClientSession(connector=connector) as session:
-            while not self._is_closing:
-                try:
-                    async with session.get(f"{self.server_url}/poll", params={'sid': self.sid}, timeout=35) as resp:
-                        if resp.status == 200:
-                            data = await resp.json()
-                            for msg in data.get('messages', []):
-                                await self._handle_message(msg)
-                except asyncio.TimeoutError:
-                    continue # Expected, just poll again
-                except asyncio.CancelledError:
-                    break # Task was cancelled for shutdown
-                except Exception as e:
-                    if not self._is_closing:
-                        print(f"[Signaling] Poll error: {e}")
-                        await asyncio.sleep(2) # Backoff
+        session = self._get_session()
+        while not self._is_closing:
+            try:
+                async with session.get(f"{self.server_url}/poll", params={'sid': self.sid},
+                                       timeout=aiohttp.ClientTimeout(total=SIGNALING_POLL_TIMEOUT)) as resp:
+                    if resp.status == 200:
+                        data = await resp.json()
+                        for msg in data.get('messages', []):
+                            await self._handle_message(msg)
+            except asyncio.TimeoutError:
+                continue # Expected, just poll again
+            except asyncio.CancelledError:
+                break # Task was cancelled for shutdown
+            except Exception as e:
+                if not self._is_closing:
+                    print(f"[Signaling] Poll error: {e}")
+                    await asyncio.sleep(2) # Backoff
 
     async def _handle_message(self, msg):
         msg_type = msg.get('type')
@@ -933,12 +2073,16 @@ class SignalingClient:
                  await self.on_ice(msg.get('data'), msg.get('sender'))
 
     async def _post_signal(self, payload):
-        def _post():
-            try:
-                requests.post(f"{self.server_url}/signal", json=payload, timeout=20)
-            except Exception as e:
-                print(f"[Signaling] Post error: {e}")
-        await self._loop.run_in_executor(None, _post)
+        try:
+            if self._ws is not None and not self._ws.closed:
+                await self._ws.send_json(payload)
+                return
+            async with self._get_session().post(
+                    f"{self.server_url}/signal", json=payload,
+                    timeout=aiohttp.ClientTimeout(total=SIGNALING_POST_TIMEOUT)) as resp:
+                await resp.read()
+        except Exception as e:
+            print(f"[Signaling] Post error: {e}")
 
     async def send_offer(self, sdp, target_sid=None):
         await self._post_signal({
@@ -966,12 +2110,24 @@ class SignalingClient:
             'target': target_sid,
             'room': self.room_id
         })
-    
-    async def close(self):
-        self._is_closing = True
-        if self._polling_task and not self._polling_task.done():
-            self._polling_task.cancel()
+
+    async def _close_ws(self):
+        if self._ws is not None:
             try:
-                await self._polling_task
-            except asyncio.CancelledError:
+                await self._ws.close()
+            except Exception:
                 pass
+            self._ws = None
+
+    async def close(self):
+        self._is_closing = True
+        for task in (self._polling_task, self._ws_task):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        await self._close_ws()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
@@ -0,0 +1,183 @@
+"""
+QuickShare Streaming ZIP
+ZIP64 arşivini belleğe almadan, dosyaları okurken üreten generator
+"""
+
+import os
+import time
+import zlib
+import struct
+from typing import Iterable, Iterator, List, Tuple
+from config import CHUNK_SIZE
+
+
+# Bu sınırı aşan boyut/offset'ler ZIP64 extra field ile yazılır
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP64_COUNT_LIMIT = 0xFFFF
+
+# Zaten sıkıştırılmış formatlar deflate edilmez, olduğu gibi saklanır
+COMPRESSED_EXTENSIONS = {
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.zst', '.lz4',
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic', '.avif',
+    '.mp3', '.aac', '.ogg', '.opus', '.flac', '.m4a',
+    '.mp4', '.mkv', '.avi', '.mov', '.webm', '.m4v',
+    '.docx', '.xlsx', '.pptx', '.odt', '.apk', '.jar', '.whl', '.epub',
+}
+
+_ZIP64_MARKER = 0xFFFFFFFF
+_ZIP64_COUNT_MARKER = 0xFFFF
+_METHOD_STORED = 0
+_METHOD_DEFLATED = 8
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+
+
+def should_store(path: str) -> bool:
+    """Dosya uzantısına göre deflate yerine STORED kullanılmalı mı?"""
+    return os.path.splitext(path)[1].lower() in COMPRESSED_EXTENSIONS
+
+
+def _dos_datetime(timestamp: float) -> Tuple[int, int]:
+    """Unix zamanını ZIP'in DOS time/date alanlarına çevir"""
+    t = time.localtime(timestamp)
+    if t.tm_year < 1980:
+        t = time.localtime(315532800)  # 1980-01-01
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+
+def _needs_zip64(size: int) -> bool:
+    """Deflate'in olası şişmesini de hesaba katarak ZIP64 gerekir mi?"""
+    return size + size // 1000 + 64 * 1024 >= ZIP64_LIMIT
+
+
+def generate_zip_stream(entries: Iterable[Tuple[str, str]], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Dosyaları streaming ZIP64 olarak üret
+
+    Her dosya için local header, veri ve data descriptor dosya okunurken
+    yield edilir; central directory en sonda gönderilir. Bellek kullanımı
+    birkaç chunk ile sınırlıdır.
+
+    Args:
+        entries: (dosya_yolu, arşiv_adı) listesi
+        chunk_size: Okuma buffer boyutu
+
+    Yields:
+        ZIP arşivinin byte parçaları
+    """
+    offset = 0
+    central: List[bytes] = []
+
+    for path, arcname in entries:
+        try:
+            st = os.stat(path)
+            f = open(path, 'rb')
+        except OSError:
+            continue  # Paylaşım sırasında silinen dosyayı atla
+
+        with f:
+            name = arcname.replace('\\', '/').encode('utf-8')
+            method = _METHOD_STORED if should_store(path) else _METHOD_DEFLATED
+            flags = _FLAG_DATA_DESCRIPTOR | _FLAG_UTF8
+            dos_time, dos_date = _dos_datetime(st.st_mtime)
+            size_limit = st.st_size
+            zip64 = _needs_zip64(size_limit)
+            version = 45 if zip64 else 20
+
+            # Local file header (CRC ve boyutlar data descriptor'da)
+            if zip64:
+                extra = struct.pack('<HHQQ', 0x0001, 16, 0, 0)
+                header_sizes = (_ZIP64_MARKER, _ZIP64_MARKER)
+            else:
+                extra = b''
+                header_sizes = (0, 0)
+            local_header = struct.pack(
+                '<IHHHHHIIIHH', 0x04034b50, version, flags, method,
+                dos_time, dos_date, 0, header_sizes[0], header_sizes[1],
+                len(name), len(extra)
+            ) + name + extra
+            header_offset = offset
+            yield local_header
+            offset += len(local_header)
+
+            # Dosya verisi
+            crc = 0
+            raw_size = 0
+            compressed_size = 0
+            compressor = zlib.compressobj(6, zlib.DEFLATED, -15) if method == _METHOD_DEFLATED else None
+            remaining = size_limit
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                raw_size += len(chunk)
+                crc = zlib.crc32(chunk, crc)
+                if compressor:
+                    chunk = compressor.compress(chunk)
+                    if not chunk:
+                        continue
+                compressed_size += len(chunk)
+                yield chunk
+            if compressor:
+                tail = compressor.flush()
+                compressed_size += len(tail)
+                if tail:
+                    yield tail
+            offset += compressed_size
+
+            # Data descriptor
+            if zip64:
+                descriptor = struct.pack('<IIQQ', 0x08074b50, crc, compressed_size, raw_size)
+            else:
+                descriptor = struct.pack('<IIII', 0x08074b50, crc, compressed_size, raw_size)
+            yield descriptor
+            offset += len(descriptor)
+
+            # Central directory kaydı (sonda gönderilecek)
+            cd_extra = b''
+            cd_usize, cd_csize, cd_offset = raw_size, compressed_size, header_offset
+            if raw_size >= ZIP64_LIMIT:
+                cd_extra += struct.pack('<Q', raw_size)
+                cd_usize = _ZIP64_MARKER
+            if compressed_size >= ZIP64_LIMIT:
+                cd_extra += struct.pack('<Q', compressed_size)
+                cd_csize = _ZIP64_MARKER
+            if header_offset >= ZIP64_LIMIT:
+                cd_extra += struct.pack('<Q', header_offset)
+                cd_offset = _ZIP64_MARKER
+            if cd_extra:
+                cd_extra = struct.pack('<HH', 0x0001, len(cd_extra)) + cd_extra
+                version = 45
+            central.append(struct.pack(
+                '<IHHHHHHIIIHHHHHII', 0x02014b50, (3 << 8) | version, version,
+                flags, method, dos_time, dos_date, crc, cd_csize, cd_usize,
+                len(name), len(cd_extra), 0, 0, 0,
+                (st.st_mode & 0xFFFF) << 16, cd_offset
+            ) + name + cd_extra)
+
+    # Central directory
+    cd_start = offset
+    cd_size = 0
+    for record in central:
+        yield record
+        cd_size += len(record)
+    offset += cd_size
+
+    count = len(central)
+    if count >= ZIP64_COUNT_LIMIT or cd_start >= ZIP64_LIMIT or cd_size >= ZIP64_LIMIT:
+        # ZIP64 end of central directory record + locator
+        yield struct.pack(
+            '<IQHHIIQQQQ', 0x06064b50, 44, (3 << 8) | 45, 45, 0, 0,
+            count, count, cd_size, cd_start
+        )
+        yield struct.pack('<IIQI', 0x07064b50, 0, offset, 1)
+        yield struct.pack(
+            '<IHHHHIIH', 0x06054b50, 0, 0,
+            min(count, _ZIP64_COUNT_MARKER), min(count, _ZIP64_COUNT_MARKER),
+            min(cd_size, _ZIP64_MARKER), min(cd_start, _ZIP64_MARKER), 0
+        )
+    else:
+        yield struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, count, count, cd_size, cd_start, 0)